@@ -457,3 +457,96 @@ def parse_aggregator_model(model_name: str) -> Tuple[str, str]:
         return parts[0], parts[1]
     return "", model_name
 
+
+
+# ==================== 上下文窗口与提示词预算 ====================
+
+# 常见模型的上下文窗口（token 数），用于给提示词中的数据块分配预算
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "qwen-turbo": 131072,
+    "qwen-plus": 131072,
+    "qwen-max": 32768,
+    "qwen3-max": 262144,
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "o1-mini": 128000,
+    "o1": 200000,
+    "o4-mini": 200000,
+    "deepseek-chat": 65536,
+    "deepseek-reasoner": 65536,
+    "ernie-3.5": 5120,
+    "ernie-4.0": 5120,
+    "ernie-4.0-turbo": 8192,
+    "glm-3-turbo": 128000,
+    "glm-4": 128000,
+    "glm-4-plus": 128000,
+    "glm-4.6": 200000,
+    "claude-3-haiku": 200000,
+    "claude-3-sonnet": 200000,
+    "claude-3-opus": 200000,
+    "claude-3.5-sonnet": 200000,
+    "gemini-pro": 32768,
+    "gemini-1.5-pro": 1048576,
+    "gemini-1.5-flash": 1048576,
+    "gemini-2.0-flash": 1048576,
+    "gemini-2.5-flash-lite-preview-06-17": 1048576,
+    "moonshot-v1-8k": 8192,
+    "moonshot-v1-32k": 32768,
+    "moonshot-v1-128k": 131072,
+}
+
+# 未知模型的默认上下文窗口（带 LONG_CONTEXT 特性的模型使用较大值）
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_LONG_CONTEXT_WINDOW = 32768
+
+# 数据块（行情表、指标、财务报告）占上下文窗口的比例及上下限
+PROMPT_DATA_BUDGET_RATIO = 0.25
+PROMPT_DATA_BUDGET_MIN = 600
+PROMPT_DATA_BUDGET_MAX = 6000
+
+
+def get_model_context_window(model_name: str) -> int:
+    """
+    获取模型上下文窗口大小
+
+    支持聚合渠道名称（如 openai/gpt-4o）和带版本后缀的名称（如 qwen-plus-latest），
+    按最长前缀匹配；未知模型按是否具备长上下文特性返回默认值。
+
+    Args:
+        model_name: 模型名称
+
+    Returns:
+        上下文窗口 token 数
+    """
+    if not model_name:
+        return DEFAULT_CONTEXT_WINDOW
+
+    _, name = parse_aggregator_model(model_name.strip().lower())
+    if name in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[name]
+
+    prefixes = [key for key in MODEL_CONTEXT_WINDOWS if name.startswith(key)]
+    if prefixes:
+        return MODEL_CONTEXT_WINDOWS[max(prefixes, key=len)]
+
+    features = DEFAULT_MODEL_CAPABILITIES.get(name, {}).get("features", [])
+    if ModelFeature.LONG_CONTEXT in features:
+        return DEFAULT_LONG_CONTEXT_WINDOW
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def get_prompt_data_budget(model_name: str) -> int:
+    """
+    获取提示词中单个数据块可用的 token 预算
+
+    Args:
+        model_name: 模型名称
+
+    Returns:
+        token 预算（按上下文窗口比例计算，并限制在上下限之间）
+    """
+    budget = int(get_model_context_window(model_name) * PROMPT_DATA_BUDGET_RATIO)
+    return max(PROMPT_DATA_BUDGET_MIN, min(PROMPT_DATA_BUDGET_MAX, budget))
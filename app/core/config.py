@@ -77,6 +77,12 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field(default="HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(default=60)
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(default=30)
+    # 认证主体缓存（命中时不查库，撤销通过用户 token_version 立即生效）
+    PRINCIPAL_CACHE_ENABLED: bool = Field(default=True)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = Field(
+        default=30, ge=0, description="缓存有效期（秒），也是 Redis 不可用时跨进程撤销的最大延迟"
+    )
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = Field(default=10000, ge=1)
 
     # 系统配置
     ADMIN_USER_ID: str = Field(
@@ -109,6 +115,13 @@ class Settings(BaseSettings):
     )
     LOG_FILE: str = Field(default="logs/tradingagents.log")
 
+    # 操作日志批量写入（缓冲区满时 spill=落盘到本地文件，drop=直接丢弃）
+    OPLOG_BUFFER_SIZE: int = Field(default=5000, ge=1)
+    OPLOG_BATCH_SIZE: int = Field(default=200, ge=1)
+    OPLOG_FLUSH_INTERVAL_SECONDS: float = Field(default=2.0, gt=0)
+    OPLOG_OVERFLOW_POLICY: str = Field(default="spill")
+    OPLOG_SPILL_FILE: str = Field(default="logs/operation_logs_spill.jsonl")
+
     # 代理配置
     # 用于配置需要绕过代理的域名（国内数据源）
     # 多个域名用逗号分隔
@@ -176,8 +189,19 @@ class Settings(BaseSettings):
         description="允许环境变量覆盖研究深度的辩论轮次设置（不推荐）"
     )
 
+    # TradingAgentsGraph 实例池（复用已构建的 LLM 客户端、记忆库与编译后的图）
+    TRADING_GRAPH_POOL_ENABLED: bool = Field(default=True)
+    TRADING_GRAPH_POOL_MAX_IDLE: int = Field(
+        default=2, ge=0, description="每种配置最多保留的空闲实例数"
+    )
+    TRADING_GRAPH_POOL_MAX_KEYS: int = Field(
+        default=8, ge=1, description="最多缓存的配置种类数（LRU 淘汰）"
+    )
+
     # 监控配置
     METRICS_ENABLED: bool = Field(default=True)
+    # 进程内指标聚合后批量写入 MongoDB 的间隔（秒）
+    METRICS_FLUSH_INTERVAL_SECONDS: float = Field(default=15.0, ge=1.0)
     HEALTH_CHECK_INTERVAL: int = Field(
         default=300
     )  # 300秒（5分钟），从60秒减少健康检查频率
@@ -201,6 +225,15 @@ class Settings(BaseSettings):
     # 时区
     TIMEZONE: str = Field(default="Asia/Shanghai")
 
+    # 股票搜索内存索引（代码前缀/名称/拼音/容错搜索，不访问数据库）
+    STOCK_SEARCH_INDEX_ENABLED: bool = Field(default=True)
+    STOCK_SEARCH_INDEX_REFRESH_SECONDS: int = Field(
+        default=60, ge=1, description="按 updated_at 增量刷新索引的最小间隔（秒）"
+    )
+    STOCK_SEARCH_INDEX_FULL_RELOAD_SECONDS: int = Field(
+        default=21600, ge=60, description="全量重载间隔（秒），用于移除已删除的股票"
+    )
+
     # 实时行情入库任务
     # 🔥 默认禁用（使用 AKShare 分析时按需获取，避免频繁同步）
     QUOTES_INGEST_ENABLED: bool = Field(default=False)
@@ -211,6 +244,16 @@ class Settings(BaseSettings):
     # 休市期/启动兜底补数（填充上一笔快照）
     QUOTES_BACKFILL_ON_STARTUP: bool = Field(default=True)
     QUOTES_BACKFILL_ON_OFFHOURS: bool = Field(default=True)
+    # 变化检测：只写入与上一轮快照相比有变化的股票
+    QUOTES_CHANGE_DETECTION_ENABLED: bool = Field(default=True)
+    # 分钟K线（market_quotes_1m，按股票+交易日分桶追加）
+    QUOTES_MINUTE_BARS_ENABLED: bool = Field(
+        default=True,
+        description="记录1分钟K线，要求 QUOTES_INGEST_INTERVAL_SECONDS <= 60，间隔更长时自动跳过",
+    )
+    QUOTES_MINUTE_BARS_RETENTION_DAYS: int = Field(
+        default=30, ge=0, description="分钟K线保留天数，0 表示不自动清理"
+    )
 
     # 实时行情接口轮换配置
     QUOTES_ROTATION_ENABLED: bool = Field(
@@ -237,6 +280,14 @@ class Settings(BaseSettings):
         default=0.8, ge=0.1, le=1.0, description="速率限制安全边际"
     )
 
+    # 分布式速率限制配置（Redis 令牌桶，所有进程共享配额）
+    RATE_LIMIT_DISTRIBUTED_ENABLED: bool = Field(
+        default=True, description="启用基于Redis的跨进程令牌桶限流"
+    )
+    RATE_LIMIT_REDIS_RETRY_SECONDS: float = Field(
+        default=30.0, ge=1.0, description="Redis不可用时降级为本地限流的持续时间（秒）"
+    )
+
     # 实时行情配置
     REALTIME_QUOTE_ENABLED: bool = Field(default=True, description="启用实时行情获取")
     # 🔥 默认禁用 Tushare 实时行情（使用 AKShare 获取，节省积分）
@@ -394,6 +445,15 @@ class Settings(BaseSettings):
     # 数据目录配置
     TRADINGAGENTS_DATA_DIR: str = Field(default="./data")
 
+    # 数据库备份/导出（按 _id 游标流式写入分块文件，内存占用与集合大小无关）
+    BACKUP_CHUNK_DOCUMENTS: int = Field(
+        default=50000, ge=1, description="每个分块文件的文档数，也是断点续传的粒度"
+    )
+    BACKUP_BATCH_SIZE: int = Field(
+        default=1000, ge=1, description="游标批大小和恢复时每次 bulk_write 的文档数"
+    )
+    BACKUP_COMPRESSION_LEVEL: int = Field(default=6, ge=1, le=9, description="gzip 压缩级别")
+
     @property
     def log_dir(self) -> str:
         """获取日志目录"""
@@ -425,6 +485,10 @@ class Settings(BaseSettings):
     NEWS_SYNC_HOURS_BACK: int = Field(default=24)
     NEWS_SYNC_MAX_PER_SOURCE: int = Field(default=50)
 
+    # ===== 交易所日历同步配置 =====
+    EXCHANGE_CALENDAR_SYNC_ENABLED: bool = Field(default=True)
+    EXCHANGE_CALENDAR_SYNC_CRON: str = Field(default="0 5 * * 1")  # 每周一凌晨5点
+
     @property
     def is_production(self) -> bool:
         """是否为生产环境"""
@@ -295,8 +295,11 @@ def bridge_config_to_env():
             task.add_done_callback(_handle_sync_task_result)
             logger.info("🔄 定价配置同步任务已创建（后台执行）")
         except RuntimeError:
-            # 不在异步上下文中，使用 asyncio.run
-            asyncio.run(_sync_pricing_config_from_db())
+            # 不在异步上下文中，在进程级后台事件循环中执行
+            from app.core.database import get_bridge_mongo_db
+            from tradingagents.utils.async_bridge import run_async
+
+            run_async(_sync_pricing_config_from_db(get_bridge_mongo_db()))
 
         logger.info(f"✅ 配置桥接完成，共桥接 {bridged_count} 项配置")
         return True
@@ -717,8 +720,11 @@ def sync_pricing_config_now():
             logger.info("🔄 定价配置同步任务已创建（后台执行）")
             return True
         except RuntimeError:
-            # 不在异步上下文中，使用 asyncio.run
-            asyncio.run(_sync_pricing_config_from_db())
+            # 不在异步上下文中，在进程级后台事件循环中执行
+            from app.core.database import get_bridge_mongo_db
+            from tradingagents.utils.async_bridge import run_async
+
+            run_async(_sync_pricing_config_from_db(get_bridge_mongo_db()))
             return True
     except Exception as e:
         logger.error(f"❌ 立即同步定价配置失败: {e}")
@@ -739,15 +745,20 @@ def _handle_sync_task_result(task):
         logger.error(traceback.format_exc())
 
 
-async def _sync_pricing_config_from_db():
+async def _sync_pricing_config_from_db(db=None):
     """
     从数据库同步定价配置（异步版本）
+
+    Args:
+        db: 异步数据库实例；在后台事件循环中执行时传入 get_bridge_mongo_db()，
+            默认使用应用主循环的 get_mongo_db()
     """
     try:
         from app.core.database import get_mongo_db
         from app.models.config import LLMConfig
 
-        db = get_mongo_db()
+        if db is None:
+            db = get_mongo_db()
 
         # 获取最新的激活配置
         config = await db["system_configs"].find_one({"is_active": True}, sort=[("version", -1)])
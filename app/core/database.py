@@ -4,11 +4,13 @@
 增强版本，支持连接池、健康检查和错误恢复
 """
 
+import asyncio
 import logging
 from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo import MongoClient
 from pymongo.database import Database
+from pymongo.errors import OperationFailure
 from redis.asyncio import Redis, ConnectionPool
 from .config import settings
 
@@ -24,6 +26,37 @@ redis_pool: Optional[ConnectionPool] = None
 _sync_mongo_client: Optional[MongoClient] = None
 _sync_mongo_db: Optional[Database] = None
 
+# 后台维护任务（保持引用，避免任务被垃圾回收）
+_report_backfill_task: Optional[asyncio.Task] = None
+
+
+def _mongo_client_options() -> dict:
+    """异步 MongoDB 客户端连接池参数"""
+    return dict(
+        maxPoolSize=settings.MONGO_MAX_CONNECTIONS,
+        minPoolSize=settings.MONGO_MIN_CONNECTIONS,
+        maxIdleTimeMS=60000,  # 60秒空闲超时（从30秒增加，减少连接销毁频率）
+        serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
+        retryWrites=True,  # 启用重试写入
+        w="majority",  # 写入确认级别：大多数节点确认
+        wtimeoutMS=5000,  # 写入超时：5秒
+    )
+
+
+def _redis_pool_options() -> dict:
+    """异步 Redis 连接池参数"""
+    return dict(
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
+        decode_responses=True,
+        socket_connect_timeout=10,  # 10秒连接超时（从5秒增加）
+        socket_timeout=30,  # 30秒套接字超时（从10秒增加）
+        health_check_interval=300,  # 300秒健康检查间隔（从30秒增加，减少频繁检查）
+        socket_keepalive=True,  # 启用TCP keepalive
+    )
+
 
 class DatabaseManager:
     """数据库连接管理器"""
@@ -42,18 +75,7 @@ class DatabaseManager:
             logger.info("🔄 正在初始化MongoDB连接...")
 
             # 创建MongoDB客户端，配置连接池（优化参数以减少连接创建销毁）
-            self.mongo_client = AsyncIOMotorClient(
-                settings.MONGO_URI,
-                maxPoolSize=settings.MONGO_MAX_CONNECTIONS,
-                minPoolSize=settings.MONGO_MIN_CONNECTIONS,
-                maxIdleTimeMS=60000,  # 60秒空闲超时（从30秒增加，减少连接销毁频率）
-                serverSelectionTimeoutMS=settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
-                connectTimeoutMS=settings.MONGO_CONNECT_TIMEOUT_MS,
-                socketTimeoutMS=settings.MONGO_SOCKET_TIMEOUT_MS,
-                retryWrites=True,  # 启用重试写入
-                w="majority",  # 写入确认级别：大多数节点确认
-                wtimeoutMS=5000,  # 写入超时：5秒
-            )
+            self.mongo_client = AsyncIOMotorClient(settings.MONGO_URI, **_mongo_client_options())
 
             # 获取数据库实例
             self.mongo_db = self.mongo_client[settings.MONGO_DB]
@@ -82,16 +104,7 @@ class DatabaseManager:
             logger.info("🔄 正在初始化Redis连接...")
 
             # 创建Redis连接池（优化参数以减少连接创建销毁）
-            self.redis_pool = ConnectionPool.from_url(
-                settings.REDIS_URL,
-                max_connections=settings.REDIS_MAX_CONNECTIONS,
-                retry_on_timeout=settings.REDIS_RETRY_ON_TIMEOUT,
-                decode_responses=True,
-                socket_connect_timeout=10,  # 10秒连接超时（从5秒增加）
-                socket_timeout=30,  # 30秒套接字超时（从10秒增加）
-                health_check_interval=300,  # 300秒健康检查间隔（从30秒增加，减少频繁检查）
-                socket_keepalive=True,  # 启用TCP keepalive
-            )
+            self.redis_pool = ConnectionPool.from_url(settings.REDIS_URL, **_redis_pool_options())
 
             # 创建Redis客户端
             self.redis_client = Redis(connection_pool=self.redis_pool)
@@ -229,6 +242,10 @@ async def init_database_views_and_indexes():
         # 2. 创建必要的索引
         await create_database_indexes(db)
 
+        # 3. 后台为历史报告补齐列表字段（不阻塞启动）
+        global _report_backfill_task
+        _report_backfill_task = asyncio.create_task(_backfill_report_list_fields(db))
+
         logger.info("✅ 数据库视图和索引初始化完成")
 
     except Exception as e:
@@ -236,6 +253,18 @@ async def init_database_views_and_indexes():
         # 不抛出异常，允许应用继续启动
 
 
+async def _backfill_report_list_fields(db):
+    """为历史分析报告补齐列表页预计算字段"""
+    try:
+        from app.services.analysis.report_generation_service import (
+            backfill_report_list_fields,
+        )
+
+        await backfill_report_list_fields(db)
+    except Exception as e:
+        logger.warning(f"⚠️ 历史报告列表字段补齐失败: {e}")
+
+
 async def create_stock_screening_view(db):
     """创建股票筛选视图"""
     try:
@@ -348,6 +377,33 @@ async def create_stock_screening_view(db):
         logger.warning(f"⚠️ 创建视图失败: {e}")
 
 
+async def _create_unique_index(collection, keys):
+    """
+    创建唯一索引
+
+    已有重复数据时索引无法建立，唯一性约束实际上不存在：列出重复的键并以
+    error 级别记录，需要人工合并重复文档后重启；不影响其余索引的创建。
+    """
+    try:
+        await collection.create_index(keys, unique=True)
+    except OperationFailure as e:
+        if e.code != 11000:
+            raise
+        group_id = {field: f"${field}" for field, _ in keys}
+        duplicates = await collection.aggregate(
+            [
+                {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+                {"$match": {"count": {"$gt": 1}}},
+                {"$limit": 20},
+            ]
+        ).to_list(None)
+        logger.error(
+            f"❌ {collection.name} 存在重复数据，唯一索引 {[f for f, _ in keys]} 未建立，"
+            f"并发写入可能继续产生重复文档。请合并以下重复键后重启: "
+            f"{[(d['_id'], d['count']) for d in duplicates]}"
+        )
+
+
 async def create_database_indexes(db):
     """创建数据库索引"""
     try:
@@ -366,6 +422,23 @@ async def create_database_indexes(db):
         await market_quotes.create_index([("amount", -1)])
         await market_quotes.create_index([("updated_at", -1)])
 
+        # analysis_reports 的索引（列表页键集分页 + n-gram 搜索）
+        analysis_reports = db["analysis_reports"]
+        await analysis_reports.create_index([("created_at", -1), ("_id", -1)])
+        await analysis_reports.create_index([("stock_symbol", 1), ("created_at", -1)])
+        await analysis_reports.create_index([("market_type", 1), ("created_at", -1)])
+        await analysis_reports.create_index([("search_ngrams", 1)])
+        # $or 每个分支都有索引才能走索引；版本索引同时支撑旧文档回退分支与后台回填
+        await analysis_reports.create_index([("search_ngrams_version", 1)])
+
+        # 模拟交易：唯一索引保证并发首次请求/首次买入的 upsert 只生成一个账户/一条持仓
+        await _create_unique_index(db["paper_accounts"], [("user_id", 1)])
+        await _create_unique_index(db["paper_positions"], [("user_id", 1), ("code", 1)])
+        paper_orders = db["paper_orders"]
+        await paper_orders.create_index([("user_id", 1), ("created_at", -1)])
+        await paper_orders.create_index([("status", 1), ("market", 1), ("user_id", 1)])
+        await db["paper_trades"].create_index([("user_id", 1), ("code", 1), ("timestamp", -1)])
+
         logger.info("✅ 数据库索引创建完成")
 
     except Exception as e:
@@ -433,6 +506,37 @@ def get_redis_client() -> Redis:
     return redis_client
 
 
+def get_bridge_mongo_db() -> AsyncIOMotorDatabase:
+    """
+    获取后台事件循环专属的异步 MongoDB 数据库实例
+
+    get_mongo_db() 的客户端属于应用主循环；同步代码经 run_async 在后台循环里
+    执行的协程应使用这里的客户端（在后台循环线程上创建，只在该循环上使用）。
+    """
+    from tradingagents.utils.async_bridge import get_bridge_resource
+
+    client = get_bridge_resource(
+        "mongo", lambda: AsyncIOMotorClient(settings.MONGO_URI, **_mongo_client_options())
+    )
+    return client[settings.MONGO_DB]
+
+
+def get_bridge_redis_client() -> Redis:
+    """
+    获取后台事件循环专属的异步 Redis 客户端
+
+    用法同 get_bridge_mongo_db：只在经 run_async 执行的协程里使用。
+    """
+    from tradingagents.utils.async_bridge import get_bridge_resource
+
+    return get_bridge_resource(
+        "redis",
+        lambda: Redis(
+            connection_pool=ConnectionPool.from_url(settings.REDIS_URL, **_redis_pool_options())
+        ),
+    )
+
+
 async def get_database_health() -> dict:
     """获取数据库健康状态"""
     return await db_manager.health_check()
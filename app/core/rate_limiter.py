@@ -2,13 +2,19 @@
 """
 速率限制器
 用于控制API调用频率，避免超过数据源的限流限制
+
+- RateLimiter: 进程内滑动窗口限流
+- DistributedRateLimiter: 基于Redis Lua令牌桶的跨进程限流（Redis不可用时降级为本地令牌桶）
 """
 
 import asyncio
+import bisect
+import os
+import threading
 import time
 import logging
 from collections import deque
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -201,19 +207,467 @@ class BaoStockRateLimiter(RateLimiter):
         )
 
 
+# ==================== 分布式令牌桶 ====================
+
+# Redis Lua 令牌桶（预约模式）：
+# 每次调用都扣减令牌，令牌不足时返回需要等待的毫秒数，调用方睡眠后直接执行，
+# 一次往返即可完成限流；时间取自 Redis 服务器，避免多主机时钟漂移。
+TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+tokens = tokens - requested
+local wait_ms = 0
+if tokens < 0 then
+    wait_ms = math.ceil(-tokens / rate)
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / rate) + wait_ms + 1000)
+return {wait_ms, math.floor(tokens)}
+"""
+
+
+class WaitTimeHistogram:
+    """
+    等待时间直方图（固定桶，线程安全）
+
+    桶边界单位为秒，计数为累积值（与 Prometheus histogram 语义一致）
+    """
+
+    BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, buckets: Optional[Tuple[float, ...]] = None):
+        self.buckets = tuple(buckets or self.BUCKETS)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """记录一次观测值"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取直方图快照"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = 0
+        buckets = {}
+        for bound, c in zip(list(self.buckets) + [float("inf")], counts):
+            cumulative += c
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+
+        return {"buckets": buckets, "sum": total, "count": count}
+
+
+class LocalTokenBucket:
+    """
+    进程内令牌桶（线程安全，预约模式）
+
+    与 Redis Lua 脚本算法一致，作为 Redis 不可用时的降级实现
+    """
+
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Args:
+            capacity: 桶容量（允许的突发调用数）
+            refill_rate: 每秒补充的令牌数
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> Tuple[float, float]:
+        """
+        预约令牌
+
+        Returns:
+            (需要等待的秒数, 剩余令牌数)
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(0.0, now - self.updated_at)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self.updated_at = now
+            self.tokens -= tokens
+            wait = -self.tokens / self.refill_rate if self.tokens < 0 else 0.0
+            return wait, self.tokens
+
+
+class DistributedRateLimiter:
+    """
+    分布式令牌桶速率限制器
+
+    使用 Redis Lua 脚本在所有进程（API服务、分析Worker、调度器）之间共享配额，
+    按 provider/endpoint 分键。Redis 不可用时自动降级为进程内令牌桶，
+    并在 RATE_LIMIT_REDIS_RETRY_SECONDS 后重新尝试 Redis。
+
+    保持与 RateLimiter 相同的 acquire() 接口；同步代码（如线程中调用的
+    数据源 SDK）使用 acquire_sync()。
+    """
+
+    KEY_PREFIX = "ratelimit"
+
+    def __init__(
+        self,
+        max_calls: int,
+        time_window: float,
+        provider: str,
+        endpoint: str = "default",
+        name: Optional[str] = None,
+        burst_ratio: float = 0.2,
+    ):
+        """
+        初始化分布式速率限制器
+
+        Args:
+            max_calls: 时间窗口内最大调用次数
+            time_window: 时间窗口大小（秒）
+            provider: 数据源标识（如 tushare）
+            endpoint: 接口标识（如 daily），不同接口独立计数
+            name: 限制器名称（用于日志）
+            burst_ratio: 桶容量占 max_calls 的比例。令牌桶在任意窗口内最多放行
+                容量 + max_calls 次调用，因此容量取较小比例，避免超过窗口配额
+        """
+        self.max_calls = max_calls
+        self.time_window = time_window
+        self.provider = provider
+        self.endpoint = endpoint
+        self.name = name or f"DistributedRateLimiter({provider}:{endpoint})"
+        self.key = f"{self.KEY_PREFIX}:{provider}:{endpoint}"
+
+        self.capacity = max(1, int(max_calls * burst_ratio))
+        self.refill_rate = max_calls / time_window  # 令牌/秒
+        self._local = LocalTokenBucket(self.capacity, self.refill_rate)
+
+        self._scripts: Dict[int, Any] = {}
+        self._redis_disabled_until = 0.0
+        self._remaining_tokens = float(self.capacity)
+        self.backend = "redis"
+
+        # 统计信息
+        self.total_calls = 0
+        self.total_waits = 0
+        self.total_wait_time = 0.0
+        self.redis_failures = 0
+        self.local_fallbacks = 0
+        self.wait_histogram = WaitTimeHistogram()
+
+        logger.info(
+            f"🔧 {self.name} 初始化: {max_calls}次/{time_window}秒 "
+            f"(桶容量: {self.capacity}, key: {self.key})"
+        )
+
+    # ---------- Redis 访问 ----------
+
+    def _redis_enabled(self) -> bool:
+        if time.monotonic() < self._redis_disabled_until:
+            return False
+        try:
+            from app.core.config import settings
+
+            return bool(getattr(settings, "RATE_LIMIT_DISTRIBUTED_ENABLED", True))
+        except Exception:
+            return True
+
+    def _get_script(self, client):
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = client.register_script(TOKEN_BUCKET_LUA)
+            self._scripts[id(client)] = script
+        return script
+
+    def _script_args(self, tokens: float) -> list:
+        return [self.capacity, repr(self.refill_rate / 1000.0), tokens]
+
+    def _on_redis_result(self, result) -> float:
+        wait_ms, remaining = int(result[0]), float(result[1])
+        self._remaining_tokens = remaining
+        self.backend = "redis"
+        return wait_ms / 1000.0
+
+    def _on_redis_error(self, error: Exception):
+        self.redis_failures += 1
+        try:
+            from app.core.config import settings
+
+            retry_seconds = float(getattr(settings, "RATE_LIMIT_REDIS_RETRY_SECONDS", 30.0))
+        except Exception:
+            retry_seconds = 30.0
+        self._redis_disabled_until = time.monotonic() + retry_seconds
+        logger.warning(
+            f"⚠️ {self.name} Redis限流不可用，{retry_seconds:.0f}秒内降级为本地限流: {error}"
+        )
+
+    def _reserve_local(self, tokens: float) -> float:
+        self.local_fallbacks += 1
+        self.backend = "local"
+        wait, remaining = self._local.reserve(tokens)
+        self._remaining_tokens = remaining
+        return wait
+
+    @staticmethod
+    def _get_async_redis():
+        from app.core.redis_client import get_redis
+
+        return get_redis()
+
+    @staticmethod
+    def _get_sync_redis():
+        from tradingagents.config.database_manager import get_redis_client
+
+        return get_redis_client()
+
+    async def _reserve(self, tokens: float) -> float:
+        if not self._redis_enabled():
+            return self._reserve_local(tokens)
+
+        try:
+            client = self._get_async_redis()
+            if client is not None:
+                try:
+                    result = await self._get_script(client)(
+                        keys=[self.key], args=self._script_args(tokens)
+                    )
+                    return self._on_redis_result(result)
+                except RuntimeError:
+                    # 异步客户端绑定在其他事件循环上（如线程内 asyncio.run），改用同步客户端
+                    pass
+
+            sync_client = self._get_sync_redis()
+            if sync_client is not None:
+                result = await asyncio.to_thread(
+                    self._get_script(sync_client),
+                    keys=[self.key],
+                    args=self._script_args(tokens),
+                )
+                return self._on_redis_result(result)
+        except Exception as e:
+            self._on_redis_error(e)
+
+        return self._reserve_local(tokens)
+
+    def _reserve_sync(self, tokens: float) -> float:
+        if not self._redis_enabled():
+            return self._reserve_local(tokens)
+
+        try:
+            client = self._get_sync_redis()
+            if client is not None:
+                result = self._get_script(client)(
+                    keys=[self.key], args=self._script_args(tokens)
+                )
+                return self._on_redis_result(result)
+        except Exception as e:
+            self._on_redis_error(e)
+
+        return self._reserve_local(tokens)
+
+    def _record(self, wait_time: float):
+        self.total_calls += 1
+        self.wait_histogram.observe(wait_time)
+        self._export_wait(wait_time)
+        if wait_time > 0:
+            self.total_waits += 1
+            self.total_wait_time += wait_time
+            logger.debug(f"⏳ {self.name} 达到速率限制，等待 {wait_time:.2f}秒 ({self.backend})")
+
+    def _export_wait(self, wait_time: float):
+        """
+        写入进程内指标注册表（/metrics 导出 tradingagents_rate_limit_wait 直方图）
+
+        后端模块不可用时（如独立运行的数据源脚本）静默跳过
+        """
+        try:
+            from app.services.metrics_collector import MetricType, get_metrics_collector
+
+            get_metrics_collector().observe(
+                MetricType.RATE_LIMIT_WAIT,
+                wait_time,
+                tags={"provider": self.provider, "endpoint": self.endpoint, "backend": self.backend},
+            )
+        except Exception:
+            pass
+
+    # ---------- 公共接口 ----------
+
+    async def acquire(self, tokens: float = 1):
+        """
+        获取调用许可（异步）
+        如果超过速率限制，会等待直到可以调用
+        """
+        wait_time = await self._reserve(tokens)
+        self._record(wait_time)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+
+    def acquire_sync(self, tokens: float = 1):
+        """
+        获取调用许可（同步，供线程中执行的数据源SDK调用使用）
+        """
+        wait_time = self._reserve_sync(tokens)
+        self._record(wait_time)
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+    def get_stats(self) -> dict:
+        """获取统计信息（字段与 RateLimiter.get_stats 兼容）"""
+        return {
+            "name": self.name,
+            "key": self.key,
+            "backend": self.backend,
+            "max_calls": self.max_calls,
+            "time_window": self.time_window,
+            "capacity": self.capacity,
+            "current_calls": max(0, int(self.capacity - self._remaining_tokens)),
+            "total_calls": self.total_calls,
+            "total_waits": self.total_waits,
+            "total_wait_time": self.total_wait_time,
+            "avg_wait_time": self.total_wait_time / self.total_waits
+            if self.total_waits > 0
+            else 0,
+            "redis_failures": self.redis_failures,
+            "local_fallbacks": self.local_fallbacks,
+            "wait_time_histogram": self.wait_histogram.snapshot(),
+        }
+
+    def reset_stats(self):
+        """重置统计信息"""
+        self.total_calls = 0
+        self.total_waits = 0
+        self.total_wait_time = 0.0
+        self.redis_failures = 0
+        self.local_fallbacks = 0
+        self.wait_histogram = WaitTimeHistogram()
+        logger.info(f"🔄 {self.name} 统计信息已重置")
+
+
+# 各数据源的默认配额（max_calls, time_window）
+PROVIDER_RATE_LIMITS: Dict[str, Tuple[int, float]] = {
+    "akshare": (60, 60),
+    "baostock": (100, 60),
+    "eastmoney": (2, 1),  # 东方财富反爬：至少间隔0.5秒
+}
+
+_distributed_limiters: Dict[Tuple[str, str], DistributedRateLimiter] = {}
+_distributed_limiters_lock = threading.Lock()
+
+
+def _get_tushare_limits() -> Tuple[int, float]:
+    """根据 TUSHARE_TIER 和安全边际计算 Tushare 单接口配额"""
+    try:
+        from app.core.config import settings
+
+        tier = getattr(settings, "TUSHARE_TIER", "standard")
+        safety_margin = float(getattr(settings, "TUSHARE_RATE_LIMIT_SAFETY_MARGIN", 0.8))
+    except Exception:
+        tier = os.getenv("TUSHARE_TIER", "standard")
+        safety_margin = float(os.getenv("TUSHARE_RATE_LIMIT_SAFETY_MARGIN", "0.8"))
+
+    limits = TushareRateLimiter.TIER_LIMITS.get(tier, TushareRateLimiter.TIER_LIMITS["standard"])
+    return max(1, int(limits["max_calls"] * safety_margin)), limits["time_window"]
+
+
+def get_distributed_rate_limiter(
+    provider: str,
+    endpoint: str = "default",
+    max_calls: Optional[int] = None,
+    time_window: Optional[float] = None,
+) -> DistributedRateLimiter:
+    """
+    获取分布式速率限制器（按 provider/endpoint 单例）
+
+    Args:
+        provider: 数据源标识（tushare/akshare/baostock/eastmoney）
+        endpoint: 接口标识，不同接口独立计数
+        max_calls: 覆盖默认配额
+        time_window: 覆盖默认时间窗口
+    """
+    key = (provider, endpoint)
+    limiter = _distributed_limiters.get(key)
+    if limiter is not None:
+        return limiter
+
+    with _distributed_limiters_lock:
+        limiter = _distributed_limiters.get(key)
+        if limiter is None:
+            if provider == "tushare":
+                default_calls, default_window = _get_tushare_limits()
+            else:
+                default_calls, default_window = PROVIDER_RATE_LIMITS.get(provider, (60, 60))
+            limiter = DistributedRateLimiter(
+                max_calls=max_calls or default_calls,
+                time_window=time_window or default_window,
+                provider=provider,
+                endpoint=endpoint,
+            )
+            _distributed_limiters[key] = limiter
+    return limiter
+
+
+def get_all_rate_limiter_stats() -> Dict[str, dict]:
+    """获取所有分布式速率限制器的统计信息"""
+    return {limiter.key: limiter.get_stats() for limiter in list(_distributed_limiters.values())}
+
+
+def get_provider_rate_limiter_stats(provider: str) -> Dict[str, Any]:
+    """汇总某个数据源所有接口级限制器的统计信息（用于同步任务进度日志）"""
+    limiters = [l for l in list(_distributed_limiters.values()) if l.provider == provider]
+    return {
+        "provider": provider,
+        "endpoints": len(limiters),
+        "total_calls": sum(l.total_calls for l in limiters),
+        "total_waits": sum(l.total_waits for l in limiters),
+        "total_wait_time": sum(l.total_wait_time for l in limiters),
+    }
+
+
 # 全局速率限制器实例
-_tushare_limiter: Optional[TushareRateLimiter] = None
+_tushare_limiter: Optional[DistributedRateLimiter] = None
 _akshare_limiter: Optional[AKShareRateLimiter] = None
 _baostock_limiter: Optional[BaoStockRateLimiter] = None
 
 
 def get_tushare_rate_limiter(
     tier: str = "standard", safety_margin: float = 0.8
-) -> TushareRateLimiter:
-    """获取Tushare速率限制器（单例）"""
+) -> DistributedRateLimiter:
+    """
+    获取Tushare速率限制器（单例）
+
+    返回跨进程共享的分布式令牌桶，API服务、Worker和调度器共用同一配额
+    """
     global _tushare_limiter
     if _tushare_limiter is None:
-        _tushare_limiter = TushareRateLimiter(tier=tier, safety_margin=safety_margin)
+        if tier not in TushareRateLimiter.TIER_LIMITS:
+            logger.warning(f"⚠️ 未知的Tushare积分等级: {tier}，使用默认值 'standard'")
+            tier = "standard"
+        limits = TushareRateLimiter.TIER_LIMITS[tier]
+        _tushare_limiter = DistributedRateLimiter(
+            max_calls=int(limits["max_calls"] * safety_margin),
+            time_window=limits["time_window"],
+            provider="tushare",
+            endpoint="default",
+            name=f"TushareRateLimiter({tier})",
+        )
     return _tushare_limiter
 
 
@@ -239,4 +693,5 @@ def reset_all_limiters():
     _tushare_limiter = None
     _akshare_limiter = None
     _baostock_limiter = None
+    _distributed_limiters.clear()
     logger.info("🔄 所有速率限制器已重置")
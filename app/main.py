@@ -32,6 +32,7 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 from app.core.database import init_db, close_db
 from app.core.logging_config import setup_logging
+from app.services.metrics_collector import get_metrics_collector, observe_request
 from app.routers import (
     auth_db as auth,
     analysis,
@@ -289,6 +290,11 @@ async def lifespan(app: FastAPI):
 
     await init_db()
 
+    # LLM token 流：分析线程把增量输出发布到任务进度频道（SSE/WebSocket 转发）
+    from app.services.progress.stream_relay import install_redis_token_sink
+
+    install_redis_token_sink()
+
     # 初始化聚合渠道厂家配置（302.AI、OpenRouter等）
     try:
         from app.services.config_service import config_service
@@ -818,6 +824,29 @@ async def lifespan(app: FastAPI):
         else:
             logger.info(f"📰 新闻数据同步已配置（仅自选股）: {settings.NEWS_SYNC_CRON}")
 
+        # 交易所日历同步（节假日/提前收盘更新写入本地日历文件）
+        from app.services.exchange_calendar_sync_service import (
+            get_exchange_calendar_sync_service,
+        )
+
+        scheduler.add_job(
+            get_exchange_calendar_sync_service().run_sync,
+            CronTrigger.from_crontab(
+                settings.EXCHANGE_CALENDAR_SYNC_CRON, timezone=settings.TIMEZONE
+            ),
+            id="exchange_calendar_sync",
+            name="交易所日历同步",
+        )
+        if not settings.EXCHANGE_CALENDAR_SYNC_ENABLED:
+            scheduler.pause_job("exchange_calendar_sync")
+            logger.info(
+                f"⏸️ 交易所日历同步已添加但暂停: {settings.EXCHANGE_CALENDAR_SYNC_CRON}"
+            )
+        else:
+            logger.info(
+                f"📅 交易所日历同步已配置: {settings.EXCHANGE_CALENDAR_SYNC_CRON}"
+            )
+
         scheduler.start()
 
         # 设置调度器实例到服务中，以便API可以管理任务
@@ -846,6 +875,28 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"UserService cleanup error: {e}")
 
+        # 写出缓冲区中的操作日志
+        try:
+            from app.services.operation_log_writer import get_operation_log_writer
+
+            await get_operation_log_writer().stop()
+        except Exception as e:
+            logger.warning(f"OperationLogWriter cleanup error: {e}")
+
+        # 停止认证缓存失效通知订阅
+        try:
+            from app.services.principal_cache import get_principal_cache
+
+            await get_principal_cache().stop()
+        except Exception as e:
+            logger.warning(f"PrincipalCache cleanup error: {e}")
+
+        # 写入剩余的进程内指标
+        try:
+            await get_metrics_collector().stop()
+        except Exception as e:
+            logger.warning(f"MetricsCollector cleanup error: {e}")
+
         await close_db()
         logger.info("TradingAgents FastAPI backend stopped")
 
@@ -922,6 +973,15 @@ async def log_requests(request: Request, call_next):
     response = await call_next(request)
     process_time = time.time() - start_time
 
+    # 进程内请求指标（按路由模板聚合，避免路径参数导致标签基数膨胀）
+    route = request.scope.get("route")
+    observe_request(
+        getattr(route, "path", "unmatched"),
+        request.method,
+        process_time,
+        response.status_code,
+    )
+
     # 记录请求完成
     status_emoji = "✅" if response.status_code < 400 else "❌"
     logger.info(
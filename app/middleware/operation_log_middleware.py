@@ -7,12 +7,14 @@
 import time
 import json
 import logging
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
-from app.services.operation_log_service import log_operation
-from app.models.operation_log import ActionType
+from app.services.operation_log_service import log_operation, OperationLogService
+from app.services.operation_log_writer import get_operation_log_writer
+from app.models.operation_log import ActionType, OperationLogCreate
 
 logger = logging.getLogger("webapi")
 
@@ -23,6 +25,11 @@ def set_operation_log_enabled(flag: bool) -> None:
     global OPLOG_ENABLED
     OPLOG_ENABLED = bool(flag)
 
+# 按 token 缓存的用户信息（避免每个请求重复校验 JWT）
+_USER_INFO_CACHE_TTL = 60.0
+_USER_INFO_CACHE_MAX = 1024
+_user_info_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
 
 
 class OperationLogMiddleware(BaseHTTPMiddleware):
@@ -35,6 +42,7 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             "/health",
             "/healthz",
             "/readyz",
+            "/api/metrics",  # Prometheus 抓取不记录
             "/favicon.ico",
             "/docs",
             "/redoc",
@@ -78,10 +86,10 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
         # 计算耗时
         duration_ms = int((time.time() - start_time) * 1000)
 
-        # 异步记录操作日志
+        # 放入缓冲区，由后台任务批量写入
         if user_info:
             try:
-                await self._log_operation(
+                self._log_operation(
                     user_info=user_info,
                     method=method,
                     path=path,
@@ -148,19 +156,32 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             if auth_header and auth_header.startswith("Bearer "):
                 token = auth_header.split(" ", 1)[1]
 
+                now = time.monotonic()
+                cached = _user_info_cache.get(token)
+                if cached and cached[0] > now:
+                    _user_info_cache.move_to_end(token)
+                    return cached[1]
+
                 # 使用AuthService验证token
                 from app.services.auth_service import AuthService, TokenStatus
                 result = AuthService.verify_access_token(token)
 
                 if result.status == TokenStatus.VALID and result.data:
                     # 返回用户信息（开源版只有admin用户）
-                    return {
+                    user_info = {
                         "id": "admin",
                         "username": "admin",
                         "name": "管理员",
                         "is_admin": True,
                         "roles": ["admin"]
                     }
+                    _user_info_cache[token] = (now + _USER_INFO_CACHE_TTL, user_info)
+                    _user_info_cache.move_to_end(token)
+                    while len(_user_info_cache) > _USER_INFO_CACHE_MAX:
+                        _user_info_cache.popitem(last=False)
+                    return user_info
+
+                _user_info_cache.pop(token, None)
 
             return None
         except Exception as e:
@@ -228,7 +249,7 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
         else:
             return f"{action_verb} {path}"
 
-    async def _log_operation(
+    def _log_operation(
         self,
         user_info: Dict[str, Any],
         method: str,
@@ -261,10 +282,8 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             if not success:
                 error_message = f"HTTP {response.status_code}"
 
-            # 记录操作日志
-            await log_operation(
-                user_id=user_info.get("id", ""),
-                username=user_info.get("username", "unknown"),
+            # 放入批量写入缓冲区（不等待数据库）
+            log_data = OperationLogCreate(
                 action_type=action_type,
                 action=action,
                 details=details,
@@ -275,6 +294,15 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
                 user_agent=user_agent,
                 session_id=user_info.get("session_id")
             )
+            get_operation_log_writer().submit(
+                OperationLogService.build_log_document(
+                    user_id=user_info.get("id", ""),
+                    username=user_info.get("username", "unknown"),
+                    log_data=log_data,
+                    ip_address=ip_address,
+                    user_agent=user_agent,
+                )
+            )
 
         except Exception as e:
             logger.error(f"记录操作日志失败: {e}")
@@ -32,7 +32,7 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         # 跳过健康检查和静态资源
         if request.url.path.startswith(
-            ("/api/health", "/docs", "/redoc", "/openapi.json")
+            ("/api/health", "/api/metrics", "/docs", "/redoc", "/openapi.json")
         ):
             return await call_next(request)
 
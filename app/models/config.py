@@ -307,6 +307,7 @@ class UsageRecord(BaseModel):
     session_id: str = Field(..., description="会话ID")
     analysis_type: str = Field(default="stock_analysis", description="分析类型")
     stock_code: Optional[str] = Field(None, description="股票代码")
+    cached_tokens: int = Field(default=0, description="命中供应商提示词缓存的输入token数")
 
 
 class UsageStatistics(BaseModel):
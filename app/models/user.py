@@ -78,6 +78,8 @@ class User(BaseModel):
     is_active: bool = True
     is_verified: bool = False
     is_admin: bool = False
+    # Token 版本号：登出、改密、禁用等操作时 +1，使已签发的 Token 失效
+    token_version: int = 0
     created_at: datetime = Field(default_factory=now_tz)
     updated_at: datetime = Field(default_factory=now_tz)
     last_login: Optional[datetime] = None
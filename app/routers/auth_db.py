@@ -4,6 +4,7 @@
 替代原有的基于配置文件的认证机制
 """
 
+import copy
 import time
 from typing import Optional
 
@@ -11,6 +12,7 @@ from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from pydantic import BaseModel
 
 from app.services.auth_service import AuthService, TokenStatus
+from app.services.principal_cache import get_principal_cache
 from app.services.refresh_token_service import refresh_token_service
 from app.services.user_service import user_service
 from app.models.user import UserCreate, UserUpdate
@@ -89,6 +91,16 @@ async def get_current_user(authorization: Optional[str] = Header(default=None))
     logger.debug(f"🎫 提取的token长度: {len(token)}")
     logger.debug(f"🎫 Token前20位: {token[:20]}...")
 
+    return await resolve_access_token(token)
+
+
+async def resolve_access_token(token: str) -> dict:
+    """
+    校验 Access Token 并返回认证主体（HTTP 依赖与 WebSocket 端点共用）
+
+    校验签名与有效期，并与用户当前的 token_version 比较（登出、改密等操作后
+    旧 Token 立即失效）。失败时抛出 HTTPException(401)。
+    """
     # 使用新的验证方法
     result = AuthService.verify_access_token(token)
     logger.debug(f"🔍 Token验证结果: status={result.status.value}")
@@ -101,19 +113,35 @@ async def get_current_user(authorization: Optional[str] = Header(default=None))
         logger.warning(f"❌ Access token 验证失败: {result.error_message}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    # 从数据库获取用户信息
-    user = await user_service.get_user_by_username(result.data.sub)
-    if not user:
-        logger.warning(f"❌ 用户不存在: {result.data.sub}")
-        raise HTTPException(status_code=401, detail="User not found")
+    # 优先使用认证缓存，未命中时从数据库获取用户信息
+    cache = get_principal_cache()
+    entry = cache.get(result.data.sub, result.data.ver)
+    if entry is None:
+        user = await user_service.get_user_by_username(result.data.sub)
+        if not user:
+            logger.warning(f"❌ 用户不存在: {result.data.sub}")
+            raise HTTPException(status_code=401, detail="User not found")
+
+        if not user.is_active:
+            logger.warning(f"❌ 用户已禁用: {result.data.sub}")
+            raise HTTPException(status_code=401, detail="User is inactive")
 
-    if not user.is_active:
-        logger.warning(f"❌ 用户已禁用: {result.data.sub}")
-        raise HTTPException(status_code=401, detail="User is inactive")
+        entry = cache.put(result.data.sub, _build_principal(user), user.token_version)
+
+    # 登出、改密、禁用等操作后版本号已增加，旧 Token 立即失效
+    if result.data.ver < entry.token_version:
+        cache.record_revoked()
+        logger.warning(f"🚫 Access token 已撤销: {result.data.sub}")
+        raise HTTPException(status_code=401, detail="Token has been revoked")
 
     logger.debug(f"✅ 认证成功，用户: {result.data.sub}")
 
-    # 返回完整的用户信息，包括偏好设置
+    # 返回副本，避免调用方修改缓存内容
+    return copy.deepcopy(entry.principal)
+
+
+def _build_principal(user) -> dict:
+    """构建认证主体：完整的用户信息，包括偏好设置"""
     return {
         "id": str(user.id),
         "username": user.username,
@@ -178,10 +206,14 @@ async def login(payload: LoginRequest, request: Request):
             raise HTTPException(status_code=401, detail="用户名或密码错误")
 
         # 生成 access token (短有效期)
-        access_token = AuthService.create_access_token(sub=user.username)
+        access_token = AuthService.create_access_token(
+            sub=user.username, token_version=user.token_version
+        )
 
         # 生成 refresh token (长有效期，带 JWT ID)
-        refresh_token = AuthService.create_refresh_token(sub=user.username)
+        refresh_token = AuthService.create_refresh_token(
+            sub=user.username, token_version=user.token_version
+        )
 
         # 解析 refresh token 获取 jti 并注册
         import jwt
@@ -277,6 +309,11 @@ async def refresh_token(payload: RefreshTokenRequest):
             logger.warning(f"❌ 用户不存在或已禁用: {result.data.sub}")
             raise HTTPException(status_code=401, detail="User not found or inactive")
 
+        # 登出、改密、禁用等操作后签发的旧 refresh token 一律失效
+        if result.data.ver < user.token_version:
+            logger.warning(f"🚫 Refresh token 版本已失效: user={user.username}")
+            raise HTTPException(status_code=401, detail="Token has been revoked")
+
         # 检查 token 是否已被撤销
         import jwt
         from app.core.config import settings
@@ -298,8 +335,12 @@ async def refresh_token(payload: RefreshTokenRequest):
         logger.debug(f"✅ Refresh token验证成功，用户: {result.data.sub}")
 
         # 生成新的 tokens
-        new_access_token = AuthService.create_access_token(sub=result.data.sub)
-        new_refresh_token = AuthService.create_refresh_token(sub=result.data.sub)
+        new_access_token = AuthService.create_access_token(
+            sub=result.data.sub, token_version=user.token_version
+        )
+        new_refresh_token = AuthService.create_refresh_token(
+            sub=result.data.sub, token_version=user.token_version
+        )
 
         # 注册新的 refresh token
         try:
@@ -347,7 +388,7 @@ async def logout(
     payload: Optional[LogoutRequest] = None,
     user: dict = Depends(get_current_user)
 ):
-    """用户登出 - 撤销 refresh token"""
+    """用户登出 - 撤销 refresh token 和已签发的 access token"""
     start_time = time.time()
 
     # 获取客户端信息
@@ -373,6 +414,9 @@ async def logout(
             except Exception as e:
                 logger.warning(f"⚠️ 撤销 refresh token 失败: {e}")
 
+        # Token 版本号 +1，已签发的 access token 立即失效
+        await user_service.bump_token_version(user["username"])
+
         # 记录登出日志
         await log_operation(
             user_id=user["id"],
@@ -415,6 +459,7 @@ async def logout_all_devices(
     try:
         # 撤销用户的所有 refresh token
         success = await refresh_token_service.revoke_all_user_tokens(user["id"])
+        await user_service.bump_token_version(user["username"])
 
         if success:
             logger.info(f"🚫 用户所有设备已登出: user={user['username']}")
@@ -34,9 +34,14 @@ class ImportRequest(BaseModel):
 class ExportRequest(BaseModel):
     """导出请求"""
     collections: List[str] = []  # 空列表表示导出所有集合
-    format: str = "json"  # json, csv
+    format: str = "json"  # json, csv, xlsx, ndjson, parquet
     sanitize: bool = False  # 是否脱敏（清空敏感字段，用于演示系统）
 
+class RestoreRequest(BaseModel):
+    """恢复请求"""
+    collections: List[str] = []  # 空列表表示恢复备份中的所有集合
+    overwrite: bool = False  # 恢复前是否清空目标集合
+
 # 响应模型
 class DatabaseStatusResponse(BaseModel):
     """数据库状态响应"""
@@ -236,6 +241,55 @@ async def export_data(
             detail=f"导出数据失败: {str(e)}"
         )
 
+@router.post("/backups/{backup_id}/resume")
+async def resume_backup(
+    backup_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """续传中断的备份"""
+    try:
+        logger.info(f"🔄 用户 {current_user['username']} 续传备份: {backup_id}")
+        backup_info = await database_service.resume_backup(backup_id)
+        return {
+            "success": True,
+            "message": "备份续传完成",
+            "data": backup_info
+        }
+    except Exception as e:
+        logger.error(f"续传备份失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"续传备份失败: {str(e)}"
+        )
+
+@router.post("/backups/{backup_id}/restore")
+async def restore_backup(
+    backup_id: str,
+    request: RestoreRequest,
+    current_user: dict = Depends(get_current_user)
+):
+    """从备份恢复数据"""
+    try:
+        logger.info(
+            f"📥 用户 {current_user['username']} 恢复备份: {backup_id}, overwrite={request.overwrite}"
+        )
+        result = await database_service.restore_backup(
+            backup_id,
+            collections=request.collections or None,
+            overwrite=request.overwrite
+        )
+        return {
+            "success": True,
+            "message": f"恢复完成，共 {result['total_restored']} 条文档",
+            "data": result
+        }
+    except Exception as e:
+        logger.error(f"恢复备份失败: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"恢复备份失败: {str(e)}"
+        )
+
 @router.delete("/backups/{backup_id}")
 async def delete_backup(
     backup_id: str,
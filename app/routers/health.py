@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
 import time
 from pathlib import Path
 
@@ -31,6 +32,18 @@ async def health():
         }
     }
 
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus 抓取端点 - 导出进程内聚合的请求/分析指标
+    """
+    from app.services.metrics_collector import get_metrics_collector
+
+    return PlainTextResponse(
+        get_metrics_collector().get_prometheus_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
 @router.get("/health/detailed")
 async def health_detailed():
     """
@@ -15,6 +15,8 @@ from pydantic import BaseModel
 from .auth_db import get_current_user
 from ..core.database import get_mongo_db
 from ..utils.timezone import to_config_tz
+from ..utils.pagination import build_keyset_filter, encode_keyset_cursor
+from ..utils.search_utils import build_ngram_search_query
 import logging
 
 logger = logging.getLogger("webapi")
@@ -117,10 +119,67 @@ class ReportListResponse(BaseModel):
     page: int
     page_size: int
 
+# 列表页只需要的字段：不读取 reports 全文，文件大小优先使用预计算值，
+# 旧文档在服务端用 $bsonSize 估算（只返回一个数字）
+REPORT_LIST_PROJECTION = {
+    "analysis_id": 1,
+    "task_id": 1,
+    "stock_symbol": 1,
+    "stock_name": 1,
+    "market_type": 1,
+    "model_info": 1,
+    "status": 1,
+    "created_at": 1,
+    "analysis_date": 1,
+    "analysts": 1,
+    "research_depth": 1,
+    "summary": 1,
+    "source": 1,
+    "file_size": {"$ifNull": ["$report_size", {"$bsonSize": {"$ifNull": ["$reports", {}]}}]},
+}
+
+# 股票名称查询的数据源优先级
+_STOCK_NAME_SOURCE_PRIORITY = ["tushare", "akshare", "baostock"]
+
+
+async def _get_stock_names(db, stock_codes: List[str]) -> Dict[str, str]:
+    """批量获取股票名称（一次查询，结果写入 _stock_name_cache）"""
+    names = {code: _stock_name_cache[code] for code in stock_codes if code in _stock_name_cache}
+    missing = {str(code).zfill(6): code for code in stock_codes if code not in names}
+    if not missing:
+        return names
+
+    try:
+        candidates: Dict[str, Dict[str, str]] = {}
+        cursor = db.stock_basic_info.find(
+            {"code": {"$in": list(missing.keys())}},
+            {"_id": 0, "code": 1, "name": 1, "source": 1},
+        )
+        async for info in cursor:
+            if info.get("name"):
+                candidates.setdefault(info["code"], {})[info.get("source") or ""] = info["name"]
+
+        for code6, original in missing.items():
+            by_source = candidates.get(code6, {})
+            name = next(
+                (by_source[src] for src in _STOCK_NAME_SOURCE_PRIORITY if src in by_source),
+                next(iter(by_source.values()), original),
+            )
+            _stock_name_cache[original] = name
+            names[original] = name
+    except Exception as e:
+        logger.warning(f"⚠️ 批量获取股票名称失败: {e}")
+        for original in missing.values():
+            names.setdefault(original, original)
+
+    return names
+
+
 @router.get("/list", response_model=Dict[str, Any])
 async def get_reports_list(
-    page: int = Query(1, ge=1, description="页码"),
+    page: int = Query(1, ge=1, description="页码（未提供 cursor 时使用）"),
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
+    cursor: Optional[str] = Query(None, description="键集分页游标（上一页返回的 next_cursor）"),
     search_keyword: Optional[str] = Query(None, description="搜索关键词"),
     market_filter: Optional[str] = Query(None, description="市场筛选（A股/港股/美股）"),
     start_date: Optional[str] = Query(None, description="开始日期"),
@@ -128,7 +187,11 @@ async def get_reports_list(
     stock_code: Optional[str] = Query(None, description="股票代码"),
     user: dict = Depends(get_current_user)
 ):
-    """获取分析报告列表"""
+    """获取分析报告列表
+
+    使用投影只读取列表字段；传入 cursor 时按 (created_at, _id) 键集分页，
+    深分页不再依赖 skip()。
+    """
     try:
         logger.info(f"🔍 获取报告列表: 用户={user['id']}, 页码={page}, 每页={page_size}, 市场={market_filter}")
 
@@ -137,13 +200,13 @@ async def get_reports_list(
         # 构建查询条件
         query = {}
 
-        # 搜索关键词
+        # 搜索关键词（n-gram 索引 + 精确子串匹配）
         if search_keyword:
-            query["$or"] = [
-                {"stock_symbol": {"$regex": search_keyword, "$options": "i"}},
-                {"analysis_id": {"$regex": search_keyword, "$options": "i"}},
-                {"summary": {"$regex": search_keyword, "$options": "i"}}
-            ]
+            query.update(
+                build_ngram_search_query(
+                    search_keyword, ["stock_symbol", "stock_name", "analysis_id", "summary"]
+                )
+            )
 
         # 市场筛选
         if market_filter:
@@ -164,21 +227,31 @@ async def get_reports_list(
 
         logger.info(f"📊 查询条件: {query}")
 
-        # 计算总数
-        total = await db.analysis_reports.count_documents(query)
-
         # 分页查询
-        skip = (page - 1) * page_size
-        cursor = db.analysis_reports.find(query).sort("created_at", -1).skip(skip).limit(page_size)
+        total = None
+        if cursor:
+            try:
+                page_query = {"$and": [query, build_keyset_filter(cursor)]} if query else build_keyset_filter(cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            docs_cursor = db.analysis_reports.find(page_query, REPORT_LIST_PROJECTION)
+        else:
+            # 计算总数（仅页码模式需要）
+            total = await db.analysis_reports.count_documents(query)
+            skip = (page - 1) * page_size
+            docs_cursor = db.analysis_reports.find(query, REPORT_LIST_PROJECTION).skip(skip)
+
+        docs = await docs_cursor.sort([("created_at", -1), ("_id", -1)]).limit(page_size).to_list(length=page_size)
+
+        # 🔥 优先使用MongoDB中保存的股票名称，缺失的一次性批量查询
+        missing_codes = list({doc.get("stock_symbol", "") for doc in docs if not doc.get("stock_name")})
+        stock_names = await _get_stock_names(db, missing_codes) if missing_codes else {}
 
         reports = []
-        async for doc in cursor:
+        for doc in docs:
             # 转换为前端需要的格式
             stock_code = doc.get("stock_symbol", "")
-            # 🔥 优先使用MongoDB中保存的股票名称，如果没有则查询
-            stock_name = doc.get("stock_name")
-            if not stock_name:
-                stock_name = get_stock_name(stock_code)
+            stock_name = doc.get("stock_name") or stock_names.get(stock_code, stock_code)
 
             # 🔥 获取市场类型，如果没有则根据股票代码推断
             market_type = doc.get("market_type")
@@ -213,12 +286,17 @@ async def get_reports_list(
                 "analysts": doc.get("analysts", []),
                 "research_depth": doc.get("research_depth", 1),
                 "summary": doc.get("summary", ""),
-                "file_size": len(str(doc.get("reports", {}))),  # 估算大小
+                "file_size": doc.get("file_size", 0),  # 预计算的估算大小
                 "source": doc.get("source", "unknown"),
                 "task_id": doc.get("task_id", "")
             }
             reports.append(report)
 
+        next_cursor = None
+        if len(docs) == page_size:
+            last = docs[-1]
+            next_cursor = encode_keyset_cursor(last.get("created_at"), last["_id"])
+
         logger.info(f"✅ 查询完成: 总数={total}, 返回={len(reports)}")
 
         return {
@@ -227,11 +305,14 @@ async def get_reports_list(
                 "reports": reports,
                 "total": total,
                 "page": page,
-                "page_size": page_size
+                "page_size": page_size,
+                "next_cursor": next_cursor
             },
             "message": "报告列表获取成功"
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ 获取报告列表失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -11,6 +11,7 @@ from app.core.database import get_redis_client
 from app.core.config import settings
 
 from app.services.queue_service import get_queue_service, QueueService
+from app.services.progress.stream_relay import read_task_messages
 
 router = APIRouter()
 logger = logging.getLogger("webapi.sse")
@@ -62,15 +63,14 @@ async def task_progress_generator(task_id: str, user_id: str):
 
         while idle_elapsed < max_idle_seconds:
             try:
-                message = await asyncio.wait_for(pubsub.get_message(ignore_subscribe_messages=True), timeout=poll_timeout)
-                if message and message['type'] == 'message':
+                # 一次取出已到达的全部消息并合并 token 分片（客户端慢时批次更大、事件更少）
+                messages = await read_task_messages(pubsub, poll_timeout)
+                if messages:
                     # Reset idle timer on valid message
                     idle_elapsed = 0.0
-                    try:
-                        progress_data = json.loads(message['data'])
-                        yield f"event: progress\ndata: {json.dumps(progress_data, ensure_ascii=False)}\n\n"
-                    except json.JSONDecodeError:
-                        logger.warning(f"Invalid JSON in progress message: {message['data']}")
+                    for data in messages:
+                        event = "token" if data.get("type") == "token" else "progress"
+                        yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
                 else:
                     # No update: accumulate idle time and send heartbeat if due
                     idle_elapsed += poll_timeout
@@ -3,6 +3,7 @@
 股票数据API路由 - 基于扩展数据模型
 提供标准化的股票数据访问接口
 """
+import re
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi import status
@@ -218,11 +219,8 @@ async def search_stocks(
         dict: 搜索结果
     """
     try:
-        from app.core.database import get_mongo_db
         from app.core.unified_config_service import get_config_manager
-
-        db = get_mongo_db()
-        collection = db.stock_basic_info
+        from app.services.stock_search_index import get_stock_search_index
 
         # 🔥 获取数据源优先级配置
         config = get_config_manager()
@@ -239,31 +237,18 @@ async def search_stocks(
 
         preferred_source = enabled_sources[0] if enabled_sources else 'tushare'
 
-        # 构建搜索条件
-        search_conditions = []
-
-        # 如果是6位数字，按代码精确匹配
-        if keyword.isdigit() and len(keyword) == 6:
-            search_conditions.append({"symbol": keyword})
+        # 优先查询内存索引（代码前缀/名称/拼音/容错），索引不可用时回退到数据库
+        index = get_stock_search_index()
+        if await index.ensure_ready():
+            results = index.search(
+                keyword,
+                markets=["CN"],
+                sources={"CN": [preferred_source]},
+                strict_sources=True,
+                limit=limit,
+            )
         else:
-            # 按名称模糊匹配
-            search_conditions.append({"name": {"$regex": keyword, "$options": "i"}})
-            # 如果包含数字，也尝试代码匹配
-            if any(c.isdigit() for c in keyword):
-                search_conditions.append({"symbol": {"$regex": keyword}})
-
-        # 🔥 添加数据源筛选：只查询优先级最高的数据源
-        query = {
-            "$and": [
-                {"$or": search_conditions},
-                {"source": preferred_source}
-            ]
-        }
-
-        # 执行搜索
-        cursor = collection.find(query, {"_id": 0}).limit(limit)
-
-        results = await cursor.to_list(length=limit)
+            results = await _search_stocks_in_db(keyword, preferred_source, limit)
 
         # 数据标准化
         service = get_stock_data_service()
@@ -288,6 +273,37 @@ async def search_stocks(
         )
 
 
+async def _search_stocks_in_db(keyword: str, preferred_source: str, limit: int) -> List[dict]:
+    """数据库搜索（搜索索引不可用时的回退）"""
+    from app.core.database import get_mongo_db
+
+    collection = get_mongo_db().stock_basic_info
+
+    # 构建搜索条件
+    search_conditions = []
+
+    # 如果是6位数字，按代码精确匹配
+    if keyword.isdigit() and len(keyword) == 6:
+        search_conditions.append({"symbol": keyword})
+    else:
+        # 按名称模糊匹配
+        search_conditions.append({"name": {"$regex": re.escape(keyword), "$options": "i"}})
+        # 如果包含数字，也尝试代码匹配
+        if any(c.isdigit() for c in keyword):
+            search_conditions.append({"symbol": {"$regex": re.escape(keyword)}})
+
+    # 🔥 添加数据源筛选：只查询优先级最高的数据源
+    query = {
+        "$and": [
+            {"$or": search_conditions},
+            {"source": preferred_source}
+        ]
+    }
+
+    cursor = collection.find(query, {"_id": 0}).limit(limit)
+    return await cursor.to_list(length=limit)
+
+
 @router.get("/markets")
 async def get_market_summary(
     current_user: dict = Depends(get_current_user)
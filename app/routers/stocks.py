@@ -416,7 +416,7 @@ async def get_kline(
     """
     获取K线数据（支持A股/港股/美股）
 
-    period: day/week/month/5m/15m/30m/60m
+    period: day/week/month/1m/5m/15m/30m/60m（1m 仅A股，来自行情入库聚合的分钟K线）
     adj: none/qfq/hfq
     force_refresh: 是否强制刷新（跳过缓存）
 
@@ -429,7 +429,7 @@ async def get_kline(
     from zoneinfo import ZoneInfo
     logger = logging.getLogger(__name__)
 
-    valid_periods = {"day","week","month","5m","15m","30m","60m"}
+    valid_periods = {"day","week","month","1m","5m","15m","30m","60m"}
     if period not in valid_periods:
         raise HTTPException(status_code=400, detail=f"不支持的period: {period}")
 
@@ -450,8 +450,36 @@ async def get_kline(
             'items': kline_data,
             'source': 'cache_or_api'
         })
+    if period == "1m" and market != "CN":
+        raise HTTPException(status_code=400, detail="1分钟K线仅支持A股")
+
     # A股：使用现有逻辑
     code_padded = normalized_code
+
+    # 1分钟K线：读取行情入库时聚合的分钟K线，不访问外部数据源
+    if period == "1m":
+        from app.services.quotes import get_quotes_ingestion_service
+
+        bars = await get_quotes_ingestion_service().get_minute_bars(code_padded, limit=limit)
+        return ok(data={
+            "code": code_padded,
+            "period": period,
+            "limit": limit,
+            "adj": "none",
+            "source": "market_quotes_1m",
+            "items": [
+                {
+                    "time": bar["t"].isoformat(),
+                    "open": bar.get("open"),
+                    "high": bar.get("high"),
+                    "low": bar.get("low"),
+                    "close": bar.get("close"),
+                    "volume": bar.get("volume"),
+                    "amount": bar.get("amount"),
+                }
+                for bar in bars
+            ],
+        })
     adj_norm = None if adj in (None, "none", "", "null") else adj
     items = None
     source = None
@@ -19,7 +19,8 @@ from typing import Dict, Set, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, HTTPException
 from datetime import datetime
 
-from app.services.auth_service import AuthService, TokenStatus
+from app.routers.auth_db import resolve_access_token
+from app.services.progress.stream_relay import read_task_messages
 
 router = APIRouter()
 logger = logging.getLogger("webapi.websocket")
@@ -310,26 +311,11 @@ async def websocket_notifications_endpoint(websocket: WebSocket):
         logger.warning("🚫 [WS] 拒绝连接：未提供 Token")
         return
 
-    # 验证 token
-    result = AuthService.verify_access_token(token)
-    if result.status != TokenStatus.VALID:
-        reason = "Token expired" if result.status == TokenStatus.EXPIRED else "Invalid token"
-        await websocket.close(code=1008, reason=f"Unauthorized: {reason}")
-        logger.warning(f"🚫 [WS] 拒绝连接：{reason}")
-        return
-
-    # 🔥 安全修复：从 token 中解析用户 ID，不再硬编码
-    try:
-        user_id = result.data.sub if result.data else None
-
-        if not user_id:
-            logger.error("❌ [WS] Token 中未找到用户标识")
-            await websocket.close(code=1008, reason="Invalid token data")
-            return
-    except Exception as e:
-        logger.error(f"❌ [WS] 解析 Token 用户 ID 失败: {e}")
-        await websocket.close(code=1008, reason="Token parse error")
+    # 验证 token（含 token_version 撤销检查）
+    principal = await _authenticate(websocket, token, "WS")
+    if principal is None:
         return
+    user_id = principal["username"]
 
     # 🔒 获取客户端 IP
     client_ip = get_client_ip(websocket)
@@ -418,6 +404,89 @@ async def websocket_notifications_endpoint(websocket: WebSocket):
         await manager.disconnect(websocket, user_id, client_ip)
 
 
+async def _authenticate(websocket: WebSocket, token: str, tag: str) -> Optional[dict]:
+    """
+    校验 Token 并返回认证主体（与 HTTP 接口相同：经认证缓存比较 token_version，
+    登出、改密后的旧 Token 被拒绝）；失败时关闭连接并返回 None
+    """
+    try:
+        return await resolve_access_token(token)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=f"Unauthorized: {e.detail}")
+        logger.warning(f"🚫 [{tag}] 拒绝连接：{e.detail}")
+        return None
+
+
+async def _is_task_owner(task_id: str, user_id: str) -> bool:
+    """
+    任务是否属于该用户（队列任务或进程内分析任务）
+
+    Args:
+        task_id: 任务ID
+        user_id: 用户ID（认证主体的 id，任务记录的也是用户ID而不是 JWT 中的用户名）
+    """
+    try:
+        from app.services.queue_service import get_queue_service
+
+        task = await get_queue_service().get_task(task_id)
+        if task:
+            return str(task.get("user")) == str(user_id)
+    except Exception as e:
+        logger.debug(f"查询队列任务失败: {e}")
+    try:
+        from app.services.memory_state_manager import get_memory_state_manager
+
+        state = await get_memory_state_manager().get_task(task_id)
+        if state:
+            return str(state.user_id) == str(user_id)
+    except Exception as e:
+        logger.debug(f"查询内存任务失败: {e}")
+    return False
+
+
+async def relay_task_stream(websocket: WebSocket, task_id: str, poll_timeout: float = 1.0):
+    """
+    把任务进度频道（进度 + LLM token 流）转发给 WebSocket
+
+    发送是逐条 await 的：客户端慢时消息留在订阅连接上，下一轮一次取出
+    并合并 token 分片，不在服务端为客户端缓存完整输出。
+    """
+    from app.core.database import get_redis_client
+
+    channel = f"task_progress:{task_id}"
+    pubsub = get_redis_client().pubsub()
+    try:
+        await pubsub.subscribe(channel)
+        while True:
+            for data in await read_task_messages(pubsub, poll_timeout):
+                message_type = "token" if data.get("type") == "token" else "progress"
+                await websocket.send_text(
+                    json.dumps({"type": message_type, "data": data}, ensure_ascii=False)
+                )
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️ [WS-Task] 任务流转发结束: task={task_id}, {e}")
+    finally:
+        try:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+        except Exception as e:
+            logger.warning(f"⚠️ [WS-Task] 关闭 PubSub 连接失败: {e}")
+
+
+async def _stop_relay(relay_task: Optional[asyncio.Task]):
+    if relay_task is None:
+        return
+    relay_task.cancel()
+    try:
+        await asyncio.wait_for(relay_task, timeout=2.0)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ [WS-Task] 转发任务清理异常: {e}")
+
+
 @router.websocket("/ws/tasks/{task_id}")
 async def websocket_task_progress_endpoint(
     websocket: WebSocket, task_id: str, token: str = Query(...)
@@ -429,7 +498,7 @@ async def websocket_task_progress_endpoint(
 
     消息格式:
     {
-        "type": "progress",  // 消息类型: progress, completed, error, heartbeat
+        "type": "progress",  // 消息类型: progress, token, completed, error, heartbeat
         "data": {
             "task_id": "...",
             "message": "正在分析...",
@@ -439,27 +508,15 @@ async def websocket_task_progress_endpoint(
             "timestamp": "2025-10-23T12:00:00"
         }
     }
-    """
-    # 验证 token
-    result = AuthService.verify_access_token(token)
-    if result.status != TokenStatus.VALID:
-        reason = "Token expired" if result.status == TokenStatus.EXPIRED else "Invalid token"
-        await websocket.close(code=1008, reason=f"Unauthorized: {reason}")
-        logger.warning(f"🚫 [WS-Task] 拒绝连接：{reason}")
-        return
-
-    # 🔥 安全修复：从 token 中解析用户 ID
-    try:
-        user_id = result.data.sub if result.data else None
 
-        if not user_id:
-            logger.error("❌ [WS-Task] Token 中未找到用户标识")
-            await websocket.close(code=1008, reason="Invalid token data")
-            return
-    except Exception as e:
-        logger.error(f"❌ [WS-Task] 解析 Token 用户 ID 失败: {e}")
-        await websocket.close(code=1008, reason="Token parse error")
+    token 消息（LLM 增量输出，同一智能体同一次调用的分片按 call/seq 拼接）:
+    {"type": "token", "data": {"agent": "Market Analyst", "round": null, "call": 3, "seq": 2, "text": "...", "done": false}}
+    """
+    # 验证 token（含 token_version 撤销检查）
+    principal = await _authenticate(websocket, token, "WS-Task")
+    if principal is None:
         return
+    user_id = principal["username"]
 
     channel = f"task_progress:{task_id}"
 
@@ -479,9 +536,11 @@ async def websocket_task_progress_endpoint(
         }
     )
 
+    relay_task = None
+    if await _is_task_owner(task_id, principal["id"]):
+        relay_task = asyncio.create_task(relay_task_stream(websocket, task_id))
+
     try:
-        # 这里可以从 Redis 或数据库获取任务进度
-        # 暂时保持连接，等待任务完成
         while True:
             try:
                 data = await websocket.receive_text()
@@ -496,6 +555,7 @@ async def websocket_task_progress_endpoint(
                 break
 
     finally:
+        await _stop_relay(relay_task)
         logger.info(f"🔌 [WS-Task] 断开连接: task={task_id}")
 
 
@@ -516,7 +576,7 @@ async def websocket_task_progress_endpoint_v2(
 
     消息格式:
     {
-        "type": "progress",  // 消息类型: progress, completed, error, heartbeat
+        "type": "progress",  // 消息类型: progress, token, completed, error, heartbeat
         "data": {
             "task_id": "...",
             "message": "正在分析...",
@@ -526,16 +586,15 @@ async def websocket_task_progress_endpoint_v2(
             "timestamp": "2025-10-23T12:00:00"
         }
     }
+
+    token 消息（LLM 增量输出，同一智能体同一次调用的分片按 call/seq 拼接）:
+    {"type": "token", "data": {"agent": "Market Analyst", "round": null, "call": 3, "seq": 2, "text": "...", "done": false}}
     """
-    # 验证 token
-    result = AuthService.verify_access_token(token)
-    if result.status != TokenStatus.VALID:
-        reason = "Token expired" if result.status == TokenStatus.EXPIRED else "Invalid token"
-        await websocket.close(code=1008, reason=f"Unauthorized: {reason}")
-        logger.warning(f"🚫 [WS-Task-v2] 拒绝连接：{reason}")
+    # 验证 token（含 token_version 撤销检查）
+    principal = await _authenticate(websocket, token, "WS-Task-v2")
+    if principal is None:
         return
-
-    user_id = result.data.sub if result.data else None
+    user_id = principal["username"]
 
     # 连接 WebSocket
     await websocket.accept()
@@ -554,6 +613,10 @@ async def websocket_task_progress_endpoint_v2(
         }
     )
 
+    relay_task = None
+    if await _is_task_owner(task_id, principal["id"]):
+        relay_task = asyncio.create_task(relay_task_stream(websocket, task_id))
+
     try:
         # 保持连接活跃
         while True:
@@ -576,6 +639,7 @@ async def websocket_task_progress_endpoint_v2(
     except Exception as e:
         logger.error(f"❌ [WS-Task] 连接错误: {e}")
     finally:
+        await _stop_relay(relay_task)
         logger.info(f"🔌 [WS-Task] 断开连接: task={task_id}")
 
 
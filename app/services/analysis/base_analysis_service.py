@@ -99,26 +99,34 @@ class BaseAnalysisService:
             return PyObjectId(new_object_id)
 
     def _get_trading_graph(self, config: Dict[str, Any]):
-        """获取或创建TradingAgents实例
+        """签出TradingAgents实例
 
-        注意：为了避免并发执行时的数据混淆，每次都创建新实例
-        虽然这会增加一些初始化开销，但可以确保线程安全
+        启用实例池（TRADING_GRAPH_POOL_ENABLED）时从池中按配置签出独占实例，
+        用完必须调用 _release_trading_graph 归还；否则每次创建新实例。
+        并发任务不会共享同一实例，保证线程安全。
         """
-        from tradingagents.graph.trading_graph import TradingAgentsGraph
-
-        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
-
-        trading_graph = TradingAgentsGraph(
-            selected_analysts=config.get(
-                "selected_analysts", ["market", "fundamentals"]
-            ),
-            debug=config.get("debug", False),
-            config=config,
+        from app.core.config import settings
+        from app.services.analysis.trading_graph_pool import (
+            _build_trading_graph,
+            get_trading_graph_pool,
         )
 
+        if settings.TRADING_GRAPH_POOL_ENABLED:
+            return get_trading_graph_pool().acquire(config)
+
+        logger.info(f"🔧 创建新的TradingAgents实例（并发安全模式）...")
+        trading_graph = _build_trading_graph(config)
         logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(trading_graph)}）")
         return trading_graph
 
+    def _release_trading_graph(self, trading_graph, discard: bool = False) -> None:
+        """归还TradingAgents实例（运行失败时 discard=True 丢弃）"""
+        from app.core.config import settings
+        from app.services.analysis.trading_graph_pool import get_trading_graph_pool
+
+        if settings.TRADING_GRAPH_POOL_ENABLED:
+            get_trading_graph_pool().release(trading_graph, discard=discard)
+
     @staticmethod
     def _format_error_for_user(error: Exception, context: Dict[str, Any] = None) -> str:
         """格式化错误信息为用户友好的提示"""
@@ -227,46 +227,52 @@ class AnalysisExecutionService(
 
             base_service = BaseAnalysisService()
             trading_graph = base_service._get_trading_graph(config)
-
-            # 准备分析数据
-            start_time = datetime.now()
-            analysis_date = self._get_analysis_date(request)
-
-            # 获取交易日范围
-            from tradingagents.utils.trading_date_manager import (
-                get_trading_date_manager,
-            )
-
-            date_mgr = get_trading_date_manager()
-            data_start_date, data_end_date = date_mgr.get_trading_date_range(
-                analysis_date, lookback_days=10
-            )
-
-            logger.info(f"📅 分析目标日期: {analysis_date}")
-            logger.info(f"📅 数据查询范围: {data_start_date} 至 {data_end_date}")
-
-            # 开始分析
-            self._update_progress_sync(
-                task_id,
-                10,
-                "🤖 开始多智能体协作分析",
-                "agent_analysis",
-                progress_tracker,
-            )
-
-            # 启动进度模拟线程
-            progress_thread = self._start_progress_simulation(request, progress_tracker)
-
-            # 定义进度回调函数
-            callback = self._create_progress_callback(task_id, progress_tracker)
-
-            # 执行实际分析
-            state, decision = trading_graph.propagate(
-                request.stock_code,
-                analysis_date,
-                progress_callback=callback,
-                task_id=task_id,
-            )
+            discard = False
+            try:
+                # 准备分析数据
+                start_time = datetime.now()
+                analysis_date = self._get_analysis_date(request)
+
+                # 获取交易日范围
+                from tradingagents.utils.trading_date_manager import (
+                    get_trading_date_manager,
+                )
+
+                date_mgr = get_trading_date_manager()
+                data_start_date, data_end_date = date_mgr.get_trading_date_range(
+                    analysis_date, lookback_days=10
+                )
+
+                logger.info(f"📅 分析目标日期: {analysis_date}")
+                logger.info(f"📅 数据查询范围: {data_start_date} 至 {data_end_date}")
+
+                # 开始分析
+                self._update_progress_sync(
+                    task_id,
+                    10,
+                    "🤖 开始多智能体协作分析",
+                    "agent_analysis",
+                    progress_tracker,
+                )
+
+                # 启动进度模拟线程
+                progress_thread = self._start_progress_simulation(request, progress_tracker)
+
+                # 定义进度回调函数
+                callback = self._create_progress_callback(task_id, progress_tracker)
+
+                # 执行实际分析（运行中失败的实例状态不可信，归还时丢弃）
+                discard = True
+                state, decision = trading_graph.propagate(
+                    request.stock_code,
+                    analysis_date,
+                    progress_callback=callback,
+                    task_id=task_id,
+                )
+                discard = False
+            finally:
+                # 签出后任何一步失败都要归还，否则实例池会逐渐耗尽
+                base_service._release_trading_graph(trading_graph, discard=discard)
 
             logger.info(f"✅ trading_graph.propagate 执行完成")
 
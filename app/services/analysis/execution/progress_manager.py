@@ -18,6 +18,7 @@ from app.services.analysis.execution.constants import (
     NODE_PROGRESS_MAP,
 )
 from app.services.memory_state_manager import TaskStatus
+from tradingagents.utils.async_bridge import run_async
 
 if TYPE_CHECKING:
     from app.services.redis_progress_tracker import RedisProgressTracker
@@ -111,22 +112,15 @@ class ProgressManagerMixin:
                 )
 
             # 更新内存中的任务状态
-            import asyncio
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(
-                    self.memory_manager.update_task_status(
-                        task_id=task_id,
-                        status=TaskStatus.RUNNING,
-                        progress=progress,
-                        message=message,
-                        current_step=step,
-                    )
+            run_async(
+                self.memory_manager.update_task_status(
+                    task_id=task_id,
+                    status=TaskStatus.RUNNING,
+                    progress=progress,
+                    message=message,
+                    current_step=step,
                 )
-            finally:
-                loop.close()
+            )
 
             # 更新 MongoDB
             from pymongo import MongoClient
@@ -207,13 +201,10 @@ class ProgressManagerMixin:
             message: 进度消息
         """
         try:
-            import asyncio
-            from pymongo import MongoClient
-            from app.core.config import settings
+            from app.core.database import get_mongo_db_sync
 
-            # 创建同步 MongoDB 客户端
-            sync_client = MongoClient(settings.MONGO_URI)
-            sync_db = sync_client[settings.MONGO_DB]
+            # 复用进程级同步 MongoDB 连接池（不再每次新建客户端）
+            sync_db = get_mongo_db_sync()
 
             sync_db.analysis_tasks.update_one(
                 {"task_id": task_id},
@@ -226,23 +217,17 @@ class ProgressManagerMixin:
                     }
                 },
             )
-            sync_client.close()
 
             # 异步更新内存
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                loop.run_until_complete(
-                    self.memory_manager.update_task_status(
-                        task_id=task_id,
-                        status=TaskStatus.RUNNING,
-                        progress=progress,
-                        message=message,
-                        current_step=message,
-                    )
+            run_async(
+                self.memory_manager.update_task_status(
+                    task_id=task_id,
+                    status=TaskStatus.RUNNING,
+                    progress=progress,
+                    message=message,
+                    current_step=message,
                 )
-            finally:
-                loop.close()
+            )
 
         except Exception as e:
             logger.warning(f"⚠️ [Graph进度] 同步更新失败: {e}")
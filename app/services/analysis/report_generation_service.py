@@ -20,10 +20,78 @@ from typing import Dict, Any, Optional, List
 from app.core.database import get_mongo_db
 from app.utils.error_handler import handle_errors, async_handle_errors, async_handle_errors_none
 from app.utils.report_extractor import ReportExtractor
+from app.utils.search_utils import SEARCH_NGRAMS_VERSION, build_search_ngrams
 
 logger = logging.getLogger(__name__)
 
 
+def build_report_list_fields(
+    stock_symbol: str,
+    stock_name: str,
+    analysis_id: str,
+    summary: str,
+    reports: Dict[str, Any],
+) -> Dict[str, Any]:
+    """构建报告列表页所需的预计算字段
+
+    列表接口只投影这些轻量字段，不再读取完整的多章节 markdown：
+    - report_size: 报告内容大小估算（与原先 len(str(reports)) 口径一致）
+    - search_ngrams: 代码/名称/ID/摘要全文的 n-gram，供子串搜索命中多键索引
+    - search_ngrams_version: n-gram 生成规则版本，旧版本文档由后台任务重建
+    """
+    return {
+        "report_size": len(str(reports or {})),
+        "search_ngrams": build_search_ngrams(stock_symbol, stock_name, analysis_id, summary),
+        "search_ngrams_version": SEARCH_NGRAMS_VERSION,
+    }
+
+
+async def backfill_report_list_fields(db=None, batch_size: int = 200) -> int:
+    """为历史报告补齐 report_size / search_ngrams 字段
+
+    处理缺少 search_ngrams 或版本过旧的文档，可重复执行。
+
+    Returns:
+        更新的文档数量
+    """
+    from pymongo import UpdateOne
+
+    db = db if db is not None else get_mongo_db()
+    projection = {"stock_symbol": 1, "stock_name": 1, "analysis_id": 1, "summary": 1, "reports": 1}
+    updated = 0
+
+    while True:
+        docs = await db.analysis_reports.find(
+            {"search_ngrams_version": {"$ne": SEARCH_NGRAMS_VERSION}}, projection
+        ).limit(batch_size).to_list(length=batch_size)
+        if not docs:
+            break
+
+        ops = [
+            UpdateOne(
+                {"_id": doc["_id"]},
+                {
+                    "$set": build_report_list_fields(
+                        doc.get("stock_symbol", ""),
+                        doc.get("stock_name", ""),
+                        doc.get("analysis_id", ""),
+                        doc.get("summary", ""),
+                        doc.get("reports", {}),
+                    )
+                },
+            )
+            for doc in docs
+        ]
+        result = await db.analysis_reports.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+        if len(docs) < batch_size:
+            break
+
+    if updated:
+        logger.info(f"✅ 已为 {updated} 份历史报告补齐列表字段")
+    return updated
+
+
 class ReportGenerationService:
     """报告生成和保存服务"""
 
@@ -233,7 +301,9 @@ class ReportGenerationService:
         reports: Dict[str, str],
     ) -> Dict[str, Any]:
         """构建分析文档"""
+        summary = result.get("summary", "")
         return {
+            **build_report_list_fields(stock_symbol, stock_name, analysis_id, summary, reports),
             "analysis_id": analysis_id,
             "stock_symbol": stock_symbol,
             "stock_name": stock_name,
@@ -243,7 +313,7 @@ class ReportGenerationService:
             "timestamp": timestamp,
             "status": "completed",
             "source": "api",
-            "summary": result.get("summary", ""),
+            "summary": summary,
             "analysts": result.get("analysts", []),
             "research_depth": result.get("research_depth", 1),
             "reports": reports,
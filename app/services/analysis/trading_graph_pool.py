@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+TradingAgentsGraph 实例池
+
+构建 TradingAgentsGraph 需要创建 LLM 客户端、初始化 5 个记忆库并编译
+LangGraph 图，耗时可达数秒。本模块按 (分析师组合, 快/深模型, 配置哈希)
+缓存已构建的实例：
+
+- 每个任务独占签出一个实例（acquire/release），并发任务不会共享同一实例
+- 归还时清理单次运行状态（reset_run_state）；配置与分析日期由 propagate
+  的运行级上下文传递，复用实例无需重新应用全局配置
+- 运行异常的实例直接丢弃，不再回池
+- 每种配置最多保留 max_idle 个空闲实例，配置种类按 LRU 淘汰
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[Tuple[str, ...], str, str, str]
+
+DEFAULT_ANALYSTS = ["market", "fundamentals"]
+
+
+def make_pool_key(config: Dict[str, Any]) -> PoolKey:
+    """生成实例池键：(分析师组合, 快速模型, 深度模型, 完整配置哈希)"""
+    analysts = tuple(config.get("selected_analysts") or DEFAULT_ANALYSTS)
+    config_hash = hashlib.sha256(
+        json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:16]
+    return (
+        analysts,
+        str(config.get("quick_think_llm", "")),
+        str(config.get("deep_think_llm", "")),
+        config_hash,
+    )
+
+
+def _build_trading_graph(config: Dict[str, Any]):
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+    return TradingAgentsGraph(
+        selected_analysts=config.get("selected_analysts", DEFAULT_ANALYSTS),
+        debug=config.get("debug", False),
+        config=config,
+    )
+
+
+class TradingGraphPool:
+    """TradingAgentsGraph 实例池（线程安全）"""
+
+    def __init__(
+        self,
+        factory: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        max_idle_per_key: int = 2,
+        max_keys: int = 8,
+    ):
+        self.factory = factory or _build_trading_graph
+        self.max_idle_per_key = max(0, max_idle_per_key)
+        self.max_keys = max(1, max_keys)
+
+        self._lock = threading.Lock()
+        self._idle: "OrderedDict[PoolKey, List[Any]]" = OrderedDict()
+        self._leased: Dict[int, PoolKey] = {}
+        self.stats = {"created": 0, "reused": 0, "released": 0, "discarded": 0}
+
+    def acquire(self, config: Dict[str, Any]):
+        """签出一个与配置匹配的实例（无空闲实例时新建）"""
+        key = make_pool_key(config)
+        graph = None
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                graph = idle.pop()
+                self._idle.move_to_end(key)
+                self.stats["reused"] += 1
+
+        if graph is not None:
+            logger.info(f"♻️ 复用TradingAgents实例（实例ID: {id(graph)}）")
+        else:
+            graph = self.factory(config)
+            with self._lock:
+                self.stats["created"] += 1
+            logger.info(f"✅ TradingAgents实例创建成功（实例ID: {id(graph)}）")
+
+        with self._lock:
+            self._leased[id(graph)] = key
+        return graph
+
+    def release(self, graph, discard: bool = False) -> None:
+        """归还实例；discard=True 或清理失败时直接丢弃"""
+        if graph is None:
+            return
+        with self._lock:
+            key = self._leased.pop(id(graph), None)
+        if key is None:
+            # 不是从本池签出的实例（例如实例池关闭期间创建），忽略
+            return
+
+        if not discard:
+            try:
+                reset = getattr(graph, "reset_run_state", None)
+                if callable(reset):
+                    reset()
+            except Exception as e:
+                logger.warning(f"⚠️ 清理TradingAgents实例状态失败，丢弃该实例: {e}")
+                discard = True
+
+        with self._lock:
+            if discard:
+                self.stats["discarded"] += 1
+                return
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) >= self.max_idle_per_key:
+                self.stats["discarded"] += 1
+            else:
+                idle.append(graph)
+                self.stats["released"] += 1
+            while len(self._idle) > self.max_keys:
+                _, evicted = self._idle.popitem(last=False)
+                self.stats["discarded"] += len(evicted)
+            if not self._idle.get(key):
+                self._idle.pop(key, None)
+
+    @contextmanager
+    def lease(self, config: Dict[str, Any]):
+        """with 语句签出实例，正常结束归还，异常时丢弃"""
+        graph = self.acquire(config)
+        try:
+            yield graph
+        except BaseException:
+            self.release(graph, discard=True)
+            raise
+        else:
+            self.release(graph)
+
+    def clear(self) -> None:
+        """丢弃全部空闲实例（已签出的实例归还时仍会入池）"""
+        with self._lock:
+            for idle in self._idle.values():
+                self.stats["discarded"] += len(idle)
+            self._idle.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["idle"] = sum(len(v) for v in self._idle.values())
+            stats["leased"] = len(self._leased)
+            stats["keys"] = len(self._idle)
+        return stats
+
+
+_trading_graph_pool: Optional[TradingGraphPool] = None
+_trading_graph_pool_lock = threading.Lock()
+
+
+def get_trading_graph_pool() -> TradingGraphPool:
+    """获取 TradingAgentsGraph 实例池单例"""
+    global _trading_graph_pool
+    if _trading_graph_pool is None:
+        with _trading_graph_pool_lock:
+            if _trading_graph_pool is None:
+                _trading_graph_pool = TradingGraphPool(
+                    max_idle_per_key=settings.TRADING_GRAPH_POOL_MAX_IDLE,
+                    max_keys=settings.TRADING_GRAPH_POOL_MAX_KEYS,
+                )
+    return _trading_graph_pool
@@ -22,6 +22,8 @@ class TokenStatus(Enum):
 class TokenData(BaseModel):
     sub: str
     exp: int
+    # 签发时用户的 token_version，低于当前版本的 Token 视为已撤销
+    ver: int = 0
 
 
 class TokenVerifyResult(BaseModel):
@@ -37,9 +39,12 @@ class AuthService:
 
     @staticmethod
     def create_access_token(
-        sub: str, expires_minutes: int | None = None, expires_delta: int | None = None
+        sub: str,
+        expires_minutes: int | None = None,
+        expires_delta: int | None = None,
+        token_version: int = 0,
     ) -> str:
-        """创建 Access Token (短有效期)"""
+        """创建 Access Token (短有效期)，token_version 为用户当前的 Token 版本号"""
         if expires_delta:
             expire = now_tz() + timedelta(seconds=expires_delta)
         else:
@@ -50,7 +55,8 @@ class AuthService:
             "sub": sub,
             "exp": expire,
             "type": AuthService.TOKEN_TYPE_ACCESS,
-            "iat": now_tz()
+            "iat": now_tz(),
+            "ver": token_version,
         }
         token = jwt.encode(
             payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
@@ -58,7 +64,7 @@ class AuthService:
         return token
 
     @staticmethod
-    def create_refresh_token(sub: str) -> str:
+    def create_refresh_token(sub: str, token_version: int = 0) -> str:
         """创建 Refresh Token (长有效期，仅用于获取新的 Access Token)"""
         expire = now_tz() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
         payload = {
@@ -66,7 +72,8 @@ class AuthService:
             "exp": expire,
             "type": AuthService.TOKEN_TYPE_REFRESH,
             "iat": now_tz(),
-            "jti": f"{sub}_{int(time.time() * 1000)}"  # JWT ID，用于唯一标识和撤销
+            "jti": f"{sub}_{int(time.time() * 1000)}",  # JWT ID，用于唯一标识和撤销
+            "ver": token_version,
         }
         token = jwt.encode(
             payload, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
@@ -110,7 +117,9 @@ class AuthService:
                 )
 
             token_data = TokenData(
-                sub=payload.get("sub"), exp=int(payload.get("exp", time.time()))
+                sub=payload.get("sub"),
+                exp=int(payload.get("exp", time.time())),
+                ver=int(payload.get("ver") or 0),
             )
             logger.debug(f"🎯 Token数据: sub={token_data.sub}, exp={token_data.exp}, type={token_type}")
 
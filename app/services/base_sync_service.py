@@ -11,6 +11,9 @@ from typing import Any, Dict, List, Optional, Callable
 import asyncio
 import logging
 
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
 logger = logging.getLogger(__name__)
 
 
@@ -108,6 +111,131 @@ class BaseSyncService(ABC):
         threshold = datetime.utcnow() - timedelta(hours=hours)
         return updated_at > threshold
 
+    # ==================== 基础信息批量写入工具 ====================
+
+    async def _load_basic_info_snapshot(
+        self, source: Optional[str] = None, codes: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """一次性加载当前数据源的基础信息快照
+
+        用一次投影查询替代逐只股票的 find_one，结果同时用于
+        新鲜度预检（updated_at）和字段级差异比较。
+
+        Args:
+            source: 数据源（默认使用 self.data_source）
+            codes: 仅加载指定代码（默认加载整个股票池）
+
+        Returns:
+            {code: 文档} 映射（不含 _id）
+        """
+        source = source or self.data_source
+        snapshot: Dict[str, Dict[str, Any]] = {}
+        query: Dict[str, Any] = {"source": source}
+        if codes is not None:
+            query["code"] = {"$in": list(codes)}
+
+        try:
+            cursor = self.db.stock_basic_info.find(query, {"_id": 0})
+            async for doc in cursor:
+                code = doc.get("code")
+                if code:
+                    snapshot[str(code)] = doc
+            logger.debug(f"📋 已加载 {len(snapshot)} 条 {source} 基础信息快照")
+        except Exception as e:
+            # 快照加载失败时退化为全量更新，不影响同步本身
+            logger.warning(f"⚠️ 加载基础信息快照失败，将按全量更新处理: {e}")
+
+        return snapshot
+
+    @staticmethod
+    def _diff_fields(
+        existing: Optional[Dict[str, Any]],
+        new_data: Dict[str, Any],
+        ignore: tuple = ("updated_at",),
+    ) -> Dict[str, Any]:
+        """返回 new_data 中与 existing 不同的字段
+
+        Args:
+            existing: 数据库中已有文档（可为 None）
+            new_data: 新获取的数据
+            ignore: 不参与比较的字段
+
+        Returns:
+            需要 $set 的字段字典
+        """
+        if not existing:
+            return {k: v for k, v in new_data.items() if k not in ignore}
+
+        return {
+            k: v
+            for k, v in new_data.items()
+            if k not in ignore and (k not in existing or existing[k] != v)
+        }
+
+    def _build_basic_info_update(
+        self,
+        code: str,
+        basic_data: Dict[str, Any],
+        existing: Optional[Dict[str, Any]],
+    ) -> Optional[UpdateOne]:
+        """根据字段级差异构建基础信息的 UpdateOne 操作
+
+        - 新文档：写入全部字段
+        - 有字段变化：只 $set 变化的字段和 updated_at
+        - 无字段变化但已过期：只刷新 updated_at，保证新鲜度判断继续生效
+        - 无字段变化且仍新鲜（强制更新时）：不写入
+
+        Returns:
+            UpdateOne 操作，无需写入时返回 None
+        """
+        changed = self._diff_fields(existing, basic_data)
+        if not changed and existing and self._is_data_fresh(
+            existing.get("updated_at"), hours=24
+        ):
+            return None
+
+        changed["updated_at"] = datetime.utcnow()
+        return UpdateOne(
+            {"code": code, "source": self.data_source},
+            {"$set": changed},
+            upsert=True,
+        )
+
+    async def _flush_basic_info_ops(
+        self, codes: List[str], ops: List[UpdateOne], batch_stats: Dict[str, Any]
+    ) -> None:
+        """以无序 bulk_write 一次性提交批次内的基础信息更新
+
+        Args:
+            codes: 与 ops 一一对应的股票代码（用于错误定位）
+            ops: UpdateOne 操作列表
+            batch_stats: 批次统计（就地更新 success_count / error_count）
+        """
+        if not ops:
+            return
+
+        try:
+            await self.db.stock_basic_info.bulk_write(ops, ordered=False)
+            batch_stats["success_count"] += len(ops)
+        except BulkWriteError as e:
+            write_errors = e.details.get("writeErrors", [])
+            batch_stats["success_count"] += len(ops) - len(write_errors)
+            batch_stats["error_count"] += len(write_errors)
+            for err in write_errors:
+                index = err.get("index", 0)
+                batch_stats["errors"].append(
+                    {
+                        "code": codes[index] if index < len(codes) else "unknown",
+                        "error": f"数据库更新失败: {err.get('errmsg')}",
+                        "context": "update_stock_basic_info",
+                    }
+                )
+        except Exception as e:
+            batch_stats["error_count"] += len(ops)
+            batch_stats["errors"].append(
+                {"error": f"批量写入失败: {str(e)}", "context": "update_stock_basic_info"}
+            )
+
     async def _get_last_sync_date(self, symbol: str = None) -> str:
         """获取最后同步日期
 
@@ -21,6 +21,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
+from app.services.stock_search_index import get_stock_search_index
 from app.core.config import settings
 from app.utils.symbol_utils import SymbolGenerator
 
@@ -346,6 +347,8 @@ class BasicsSyncService:
             logger.info(
                 f"Stock basics sync finished: total={stats.total} inserted={inserted} updated={updated} errors={errors} trade_date={latest_trade_date}"
             )
+            # 搜索索引在下一次搜索时增量刷新
+            get_stock_search_index().request_refresh()
             return stats.__dict__
 
         except Exception as e:
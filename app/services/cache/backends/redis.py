@@ -11,7 +11,7 @@ from typing import TYPE_CHECKING, Any, Optional, Tuple
 
 import redis
 
-from app.core.database import get_redis_client
+from app.core.database import get_bridge_redis_client, get_redis_client
 from ..utils import _run_async
 
 if TYPE_CHECKING:
@@ -39,19 +39,20 @@ class RedisBackend:
         """
         获取Redis客户端
 
+        同步方法经后台事件循环执行 Redis 命令，因此使用后台循环专属的客户端
+        （应用主循环上的客户端不能跨循环使用）；应用未初始化 Redis 时不启用。
         带健康检查和降级策略的Redis连接管理
         """
         if self._client is None:
             try:
-                self._client = get_redis_client()
+                # 应用未初始化 Redis 时抛出 RuntimeError，降级到其它缓存
+                get_redis_client()
+                client = get_bridge_redis_client()
 
                 # 健康检查：尝试ping Redis
-                if self._client:
-                    self._client.ping()
-                    logger.info("✅ Redis连接成功")
-                else:
-                    logger.warning("⚠️ Redis连接失败: ping失败")
-                    self._client = None
+                _run_async(client.ping())
+                self._client = client
+                logger.info("✅ Redis连接成功")
 
             except redis.ConnectionError as e:
                 logger.warning(f"⚠️ Redis连接失败: {e}")
@@ -64,14 +65,6 @@ class RedisBackend:
             except Exception as e:
                 logger.warning(f"⚠️ Redis初始化异常: {e}")
                 self._client = None
-        else:
-            # 已有客户端，定期检查健康状态
-            try:
-                self._client.ping()
-            except Exception as e:
-                logger.warning(f"⚠️ Redis健康检查失败: {e}")
-                logger.info("💡 将自动降级到MongoDB缓存")
-                self._client = None
 
         return self._client
 
@@ -3,29 +3,17 @@
 缓存服务工具函数
 """
 
-import asyncio
 import logging
 from typing import Optional
 
+from tradingagents.utils.async_bridge import run_async
+
 logger = logging.getLogger(__name__)
 
 
 def _run_async(coro):
-    """在同步上下文中运行异步协程"""
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            # 如果事件循环已经在运行，使用 run_coroutine_threadsafe
-            import concurrent.futures
-
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                future = executor.submit(asyncio.run, coro)
-                return future.result()
-        else:
-            return loop.run_until_complete(coro)
-    except RuntimeError:
-        # 没有事件循环，创建一个新的
-        return asyncio.run(coro)
+    """在同步上下文中运行异步协程（进程级后台事件循环）"""
+    return run_async(coro)
 
 
 # 全局缓存服务实例
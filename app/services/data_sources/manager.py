@@ -14,6 +14,7 @@ from .baostock_adapter import BaoStockAdapter
 from .base import DataSourceAdapter
 from .constants import NETWORK_ERROR_KEYWORDS
 from .tushare_adapter import TushareAdapter
+from tradingagents.utils.exchange_calendar import get_exchange_calendar
 
 logger = logging.getLogger(__name__)
 
@@ -278,12 +279,21 @@ class DataSourceManager:
         """
         查找最新交易日期，支持指定优先数据源
 
+        优先使用本地交易所日历（最近一个已收盘的交易日），不访问网络；
+        只有当前日期超出日历覆盖范围时才探测数据源。
+
         Args:
             preferred_sources: 优先使用的数据源列表
 
         Returns:
             交易日期字符串（YYYYMMDD格式）或 None
         """
+        calendar = get_exchange_calendar("CN")
+        now = calendar.now()
+        if calendar.covers(now):
+            return calendar.latest_completed_session(now).strftime("%Y%m%d")
+
+        logger.info("Trade calendar does not cover today, probing data sources")
         result, _ = self._execute_with_fallback(
             fetch_func=lambda adapter: adapter.find_latest_trade_date(),
             log_message="latest trade date from {name}",
@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
-from . import status_checks, backups, cleanup, serialization
+from . import status_checks, backups, cleanup, serialization, streaming
 
 __all__ = [
     "status_checks",
     "backups",
     "cleanup",
     "serialization",
+    "streaming",
 ]
 
@@ -7,10 +7,10 @@ from __future__ import annotations
 
 import json
 import os
-import gzip
 import asyncio
 import subprocess
 import shutil
+import tarfile
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 import logging
@@ -20,6 +20,7 @@ from bson import ObjectId
 from app.core.database import get_mongo_db
 from app.core.config import settings
 from .serialization import serialize_document
+from . import streaming as _streaming
 
 logger = logging.getLogger(__name__)
 
@@ -152,70 +153,124 @@ async def create_backup(
     user_id: str | None = None,
 ) -> Dict[str, Any]:
     """
-    创建数据库备份（Python 实现，兼容性好但速度较慢）
+    创建数据库备份（Python 实现，mongodump 不可用时使用）
 
-    对于大数据量（>100MB），建议使用 create_backup_native() 方法
+    按 _id 游标流式写入 gzip 压缩的 NDJSON 分块，附带清单和分块校验和，
+    峰值内存与数据量无关；中断后可用 resume_backup() 续传，用 restore_backup() 恢复。
     """
     db = get_mongo_db()
 
     backup_id = str(ObjectId())
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    backup_filename = f"backup_{name}_{timestamp}.json.gz"
-    backup_path = os.path.join(backup_dir, backup_filename)
+    backup_dirname = f"backup_{name}_{timestamp}"
+    backup_path = os.path.join(backup_dir, backup_dirname)
 
     if not collections:
         collections = await db.list_collection_names()
-
-    backup_data: Dict[str, Any] = {
-        "backup_id": backup_id,
-        "name": name,
-        "created_at": datetime.utcnow().isoformat(),
-        "created_by": user_id,
-        "collections": collections,
-        "data": {},
-    }
-
-    for collection_name in collections:
-        collection = db[collection_name]
-        documents: List[dict] = []
-        async for doc in collection.find():
-            documents.append(serialize_document(doc))
-        backup_data["data"][collection_name] = documents
-
-    os.makedirs(backup_dir, exist_ok=True)
-
-    # 🔥 使用 asyncio.to_thread 将阻塞的文件 I/O 操作放到线程池执行
-    def _write_backup():
-        with gzip.open(backup_path, "wt", encoding="utf-8") as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2)
-        return os.path.getsize(backup_path)
-
-    file_size = await asyncio.to_thread(_write_backup)
+        collections = [c for c in collections if not c.startswith("system.")]
 
     backup_meta = {
         "_id": ObjectId(backup_id),
         "name": name,
-        "filename": backup_filename,
+        "filename": backup_dirname,
         "file_path": backup_path,
-        "size": file_size,
+        "size": 0,
         "collections": collections,
         "created_at": datetime.utcnow(),
         "created_by": user_id,
+        "backup_type": "ndjson",
+        "status": "running",
     }
-
+    # 先登记元数据，中断后仍能在列表中看到并续传
     await db.database_backups.insert_one(backup_meta)
 
+    manifest = _streaming.new_manifest(name, collections, created_by=user_id)
+    manifest["backup_id"] = backup_id
+    return await _run_backup(db, backup_meta, manifest)
+
+
+async def _run_backup(db, backup_meta: Dict[str, Any], manifest: Dict[str, Any]) -> Dict[str, Any]:
+    backup_path = backup_meta["file_path"]
+    try:
+        manifest = await _streaming.stream_export(db, backup_path, manifest)
+    except Exception as e:
+        logger.error(f"❌ 备份中断（可续传）: {backup_meta['name']}: {e}")
+        await db.database_backups.update_one(
+            {"_id": backup_meta["_id"]}, {"$set": {"status": "failed", "error": str(e)}}
+        )
+        raise
+
+    file_size = await asyncio.to_thread(_streaming.directory_size, backup_path)
+    document_count = sum(c["count"] for c in manifest["collections"].values())
+    await db.database_backups.update_one(
+        {"_id": backup_meta["_id"]},
+        {
+            "$set": {"status": "completed", "size": file_size, "document_count": document_count},
+            "$unset": {"error": ""},
+        },
+    )
+    logger.info(f"✅ 备份完成: {backup_meta['name']}（{document_count} 条文档，{file_size} 字节）")
+
     return {
-        "id": backup_id,
-        "name": name,
-        "filename": backup_filename,
+        "id": str(backup_meta["_id"]),
+        "name": backup_meta["name"],
+        "filename": backup_meta["filename"],
         "file_path": backup_path,
         "size": file_size,
-        "collections": collections,
+        "document_count": document_count,
+        "collections": backup_meta["collections"],
         "created_at": backup_meta["created_at"].isoformat(),
+        "backup_type": "ndjson",
+        "status": "completed",
     }
 
 
+async def _get_streaming_backup(db, backup_id: str) -> Dict[str, Any]:
+    backup = await db.database_backups.find_one({"_id": ObjectId(backup_id)})
+    if not backup:
+        raise Exception("备份不存在")
+    if backup.get("backup_type") != "ndjson":
+        raise Exception("只有 NDJSON 格式的备份支持续传和恢复")
+    if not os.path.isdir(backup["file_path"]):
+        raise Exception("备份文件不存在")
+    return backup
+
+
+async def resume_backup(backup_id: str) -> Dict[str, Any]:
+    """从清单记录的检查点继续未完成的备份"""
+    db = get_mongo_db()
+    backup = await _get_streaming_backup(db, backup_id)
+    manifest = await asyncio.to_thread(_streaming.load_manifest, backup["file_path"])
+    if manifest["status"] == "completed":
+        raise Exception("备份已完成，无需续传")
+
+    logger.info(f"🔄 续传备份: {backup['name']}")
+    await db.database_backups.update_one({"_id": backup["_id"]}, {"$set": {"status": "running"}})
+    return await _run_backup(db, backup, manifest)
+
+
+async def restore_backup(
+    backup_id: str,
+    collections: Optional[List[str]] = None,
+    overwrite: bool = False,
+) -> Dict[str, Any]:
+    """
+    从 NDJSON 备份恢复数据
+
+    先校验分块校验和，再按批有序写入（按 _id 覆盖），中断后重新调用会跳过已完成的分块。
+    """
+    db = get_mongo_db()
+    backup = await _get_streaming_backup(db, backup_id)
+    manifest = await asyncio.to_thread(_streaming.load_manifest, backup["file_path"])
+    if manifest["status"] != "completed":
+        raise Exception("备份未完成，请先续传")
+
+    logger.info(f"🔄 恢复备份: {backup['name']}（overwrite={overwrite}）")
+    return await _streaming.stream_restore(
+        db, backup["file_path"], collections=collections, overwrite=overwrite
+    )
+
+
 async def list_backups() -> List[Dict[str, Any]]:
     db = get_mongo_db()
     backups: List[Dict[str, Any]] = []
@@ -229,6 +284,8 @@ async def list_backups() -> List[Dict[str, Any]]:
                 "collections": backup["collections"],
                 "created_at": backup["created_at"].isoformat(),
                 "created_by": backup.get("created_by"),
+                "backup_type": backup.get("backup_type", "python"),
+                "status": backup.get("status", "completed"),
             }
         )
     return backups
@@ -241,12 +298,11 @@ async def delete_backup(backup_id: str) -> None:
         raise Exception("备份不存在")
     if os.path.exists(backup["file_path"]):
         # 🔥 使用 asyncio.to_thread 将阻塞的文件删除操作放到线程池执行
-        backup_type = backup.get("backup_type", "python")
-        if backup_type == "mongodump":
-            # mongodump 备份是目录，需要递归删除
+        if os.path.isdir(backup["file_path"]):
+            # mongodump 和 NDJSON 备份是目录，需要递归删除
             await asyncio.to_thread(shutil.rmtree, backup["file_path"])
         else:
-            # Python 备份是单个文件
+            # 旧版 Python 备份是单个文件
             await asyncio.to_thread(os.remove, backup["file_path"])
     await db.database_backups.delete_one({"_id": ObjectId(backup_id)})
 
@@ -492,6 +548,73 @@ def _sanitize_document(doc: Any) -> Any:
         return doc
 
 
+async def _export_json_stream(
+    db,
+    collections: List[str],
+    file_path: str,
+    *,
+    sanitize: bool,
+) -> None:
+    """
+    流式写入 JSON 导出文件
+
+    结构与 import_data 识别的 {"export_info": ..., "data": {集合: [文档]}} 一致，
+    按批序列化后追加写入，不在内存中拼装整个导出内容。
+    """
+    batch_size = settings.BACKUP_BATCH_SIZE
+    header = {
+        "created_at": datetime.utcnow().isoformat(),
+        "collections": collections,
+        "format": "json",
+    }
+
+    def _dump(doc: dict) -> str:
+        doc = serialize_document(doc)
+        if sanitize:
+            doc = _sanitize_document(doc)
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+    f = await asyncio.to_thread(open, file_path, "w", encoding="utf-8")
+    try:
+        await asyncio.to_thread(
+            f.write, '{"export_info": ' + json.dumps(header, ensure_ascii=False) + ', "data": {'
+        )
+        for i, collection_name in enumerate(collections):
+            prefix = (", " if i else "") + json.dumps(collection_name, ensure_ascii=False) + ": ["
+            await asyncio.to_thread(f.write, prefix)
+            # users 集合在脱敏模式下只导出空数组（保留结构，不导出实际用户数据）
+            if sanitize and collection_name == "users":
+                await asyncio.to_thread(f.write, "]")
+                continue
+
+            first = True
+            batch: List[dict] = []
+
+            async def _flush() -> None:
+                nonlocal first, batch
+                text = ", ".join(_dump(d) for d in batch)
+                await asyncio.to_thread(f.write, text if first else ", " + text)
+                first, batch = False, []
+
+            async for doc in db[collection_name].find(batch_size=batch_size):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    await _flush()
+            if batch:
+                await _flush()
+            await asyncio.to_thread(f.write, "]")
+        await asyncio.to_thread(f.write, "}}")
+    finally:
+        await asyncio.to_thread(f.close)
+
+
+def _pack_directory(source_dir: str, tar_path: str) -> None:
+    """把分块目录打包为单个 tar 文件（分块已压缩，不再压缩）"""
+    with tarfile.open(tar_path, "w") as tar:
+        tar.add(source_dir, arcname=os.path.basename(source_dir))
+    shutil.rmtree(source_dir)
+
+
 async def export_data(
     collections: Optional[List[str]] = None,
     *,
@@ -499,11 +622,20 @@ async def export_data(
     format: str = "json",
     sanitize: bool = False,
 ) -> str:
-    import pandas as pd
+    """
+    导出数据
 
+    格式：
+    - json：单个 JSON 文件，可通过 import_data 导入，流式写入
+    - ndjson / parquet：按集合分块（gzip NDJSON 或 Parquet）并附带清单，打包为 .tar，流式写入
+    - csv / xlsx：表格格式，在内存中组装，适合小数据量导出
+    """
     # 🔥 使用异步数据库连接
     db = get_mongo_db()
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    format = format.lower()
+    if format not in ("json", "csv", "xlsx", "excel", *_streaming.CHUNK_FORMATS):
+        raise Exception(f"不支持的导出格式: {format}")
 
     if not collections:
         # 🔥 异步调用 list_collection_names()
@@ -512,6 +644,31 @@ async def export_data(
 
     os.makedirs(export_dir, exist_ok=True)
 
+    if format == "json":
+        file_path = os.path.join(export_dir, f"export_{timestamp}.json")
+        await _export_json_stream(db, collections, file_path, sanitize=sanitize)
+        return file_path
+
+    if format in _streaming.CHUNK_FORMATS:
+        export_name = f"export_{timestamp}"
+        export_path = os.path.join(export_dir, export_name)
+        manifest = _streaming.new_manifest(
+            export_name, collections, chunk_format=format, sanitized=sanitize
+        )
+        await _streaming.stream_export(
+            db,
+            export_path,
+            manifest,
+            transform=_sanitize_document if sanitize else None,
+            # users 集合在脱敏模式下只保留空集合
+            skip_collections=["users"] if sanitize else None,
+        )
+        file_path = f"{export_path}.tar"
+        await asyncio.to_thread(_pack_directory, export_path, file_path)
+        return file_path
+
+    import pandas as pd
+
     all_data: Dict[str, List[dict]] = {}
     for collection_name in collections:
         collection = db[collection_name]
@@ -531,27 +688,7 @@ async def export_data(
     if sanitize:
         all_data = _sanitize_document(all_data)
 
-    if format.lower() == "json":
-        filename = f"export_{timestamp}.json"
-        file_path = os.path.join(export_dir, filename)
-        export_data_dict = {
-            "export_info": {
-                "created_at": datetime.utcnow().isoformat(),
-                "collections": collections,
-                "format": format,
-            },
-            "data": all_data,
-        }
-
-        # 🔥 使用 asyncio.to_thread 将阻塞的文件 I/O 操作放到线程池执行
-        def _write_json():
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(export_data_dict, f, ensure_ascii=False, indent=2)
-
-        await asyncio.to_thread(_write_json)
-        return file_path
-
-    if format.lower() == "csv":
+    if format == "csv":
         filename = f"export_{timestamp}.csv"
         file_path = os.path.join(export_dir, filename)
         rows: List[dict] = []
@@ -571,7 +708,7 @@ async def export_data(
         await asyncio.to_thread(_write_csv)
         return file_path
 
-    if format.lower() in ["xlsx", "excel"]:
+    if format in ["xlsx", "excel"]:
         filename = f"export_{timestamp}.xlsx"
         file_path = os.path.join(export_dir, filename)
 
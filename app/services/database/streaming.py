@@ -0,0 +1,503 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming backup, export and restore.
+
+每个集合按 _id 升序用游标逐批读取，写入固定文档数的分块文件，内存中最多只有
+一批文档，峰值内存与集合大小无关。目录结构：
+
+    backup_<name>_<timestamp>/
+        manifest.json                      清单（每完成一个分块更新一次，即检查点）
+        <collection>/00000.ndjson.gz       每行一个 MongoDB Extended JSON 文档
+        <collection>/00001.ndjson.gz
+        restore_state.json                 恢复进度（恢复完成后删除）
+
+- 分块关闭后才写入清单，清单记录文档数、字节数、SHA-256 和最后一个 _id；
+  中断后从最后一个 _id 之后继续（未登记的残留分块会被覆盖）
+- Extended JSON 保留 ObjectId/datetime 等类型，恢复后与原文档一致
+- 恢复时先校验分块的 SHA-256，再按批使用有序 bulk_write（按 _id 覆盖写入），
+  重复执行是幂等的，中断后跳过已完成的分块
+- 导出可选 Parquet 分块（需要 pyarrow，用于分析，不支持恢复）
+
+_id 类型不一致的集合无法按 _id 续传（$gt 只匹配同一 BSON 类型），续传时先检查
+集合中是否有清单未记录类型的 _id，有则整个集合重新导出。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import logging
+
+from bson import json_util
+from pymongo import InsertOne, ReplaceOne
+
+from app.core.config import settings
+from .serialization import serialize_document
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = "mongo-ndjson-v1"
+MANIFEST_FILE = "manifest.json"
+RESTORE_STATE_FILE = "restore_state.json"
+
+CHUNK_FORMATS = {"ndjson": ".ndjson.gz", "parquet": ".parquet"}
+
+_EJSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+
+
+# ==================== 清单 ====================
+
+
+def _encode_id(value: Any) -> Any:
+    """_id 转为可写入清单的 Extended JSON"""
+    return json.loads(json_util.dumps(value, json_options=_EJSON_OPTIONS))
+
+
+def _decode_id(value: Any) -> Any:
+    return json_util.loads(json.dumps(value))
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path: str) -> Dict[str, Any]:
+    """读取备份目录中的清单"""
+    with open(os.path.join(path, MANIFEST_FILE), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT_VERSION:
+        raise Exception(f"不支持的备份格式: {manifest.get('format')}")
+    return manifest
+
+
+# 清单中记录的 _id Python 类型名 -> MongoDB $type 别名（数值类型在比较时同属一类）
+_ID_TYPE_ALIASES = {
+    "ObjectId": "objectId",
+    "str": "string",
+    "int": "number",
+    "Int64": "number",
+    "float": "number",
+    "Decimal128": "number",
+    "datetime": "date",
+    "bool": "bool",
+    "dict": "object",
+    "SON": "object",
+    "bytes": "binData",
+    "Binary": "binData",
+    "UUID": "binData",
+    "Timestamp": "timestamp",
+}
+
+
+async def _has_unrecorded_id_types(collection, id_types: List[str]) -> bool:
+    """集合中是否有清单未记录类型的 _id（按 _id 续传会漏掉这些文档）"""
+    aliases = {_ID_TYPE_ALIASES.get(name) for name in id_types}
+    if not aliases or None in aliases:
+        return True
+    doc = await collection.find_one(
+        {"_id": {"$not": {"$type": sorted(aliases)}}}, projection={"_id": 1}
+    )
+    return doc is not None
+
+
+def _new_collection_entry() -> Dict[str, Any]:
+    return {"status": "pending", "count": 0, "last_id": None, "id_types": [], "chunks": []}
+
+
+def new_manifest(
+    name: str,
+    collections: List[str],
+    *,
+    chunk_format: str = "ndjson",
+    created_by: Optional[str] = None,
+    sanitized: bool = False,
+) -> Dict[str, Any]:
+    """创建新的清单"""
+    return {
+        "format": FORMAT_VERSION,
+        "name": name,
+        "chunk_format": chunk_format,
+        "created_at": datetime.utcnow().isoformat(),
+        "created_by": created_by,
+        "completed_at": None,
+        "status": "running",
+        "sanitized": sanitized,
+        "collections": {c: _new_collection_entry() for c in collections},
+    }
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def directory_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+
+# ==================== 分块写入（在线程中执行）====================
+
+
+class _HashingFile:
+    """写入时计算 SHA-256 和字节数的文件包装"""
+
+    def __init__(self, path: str):
+        self._file = open(path, "wb")
+        self._digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data) -> int:
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def flush(self) -> None:
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+
+class _NdjsonChunkWriter:
+    """gzip 压缩的 NDJSON 分块"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._raw = _HashingFile(path)
+        self._gzip = gzip.GzipFile(
+            filename="", mode="wb", fileobj=self._raw,
+            compresslevel=settings.BACKUP_COMPRESSION_LEVEL, mtime=0,
+        )
+
+    def write(self, docs: List[dict]) -> None:
+        data = "".join(
+            json_util.dumps(doc, json_options=_EJSON_OPTIONS, ensure_ascii=False) + "\n"
+            for doc in docs
+        )
+        self._gzip.write(data.encode("utf-8"))
+
+    def close(self) -> Dict[str, Any]:
+        self._gzip.close()
+        self._raw.close()
+        return {"bytes": self._raw.size, "sha256": self._raw.sha256}
+
+
+class _ParquetChunkWriter:
+    """Parquet 分块：嵌套字段存为 JSON 字符串，类型不一致的列转为字符串"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rows: List[dict] = []
+
+    def write(self, docs: List[dict]) -> None:
+        for doc in docs:
+            row = serialize_document(doc)
+            self._rows.append({k: self._cell(v) for k, v in row.items()})
+
+    @staticmethod
+    def _cell(value: Any) -> Any:
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, ensure_ascii=False, default=str)
+        if value is None or isinstance(value, (str, int, float, bool, datetime)):
+            return value
+        return str(value)
+
+    def close(self) -> Dict[str, Any]:
+        import pandas as pd
+
+        df = pd.DataFrame(self._rows)
+        for col in df.columns:
+            if df[col].dtype == object:
+                types = {type(v) for v in df[col].dropna()}
+                if len(types) > 1:
+                    df[col] = df[col].map(lambda v: None if v is None else str(v))
+        df.to_parquet(self.path, index=False)
+        self._rows = []
+        return {"bytes": os.path.getsize(self.path), "sha256": file_sha256(self.path)}
+
+
+def _remove_unlisted_chunks(root: str, collection_name: str, entry: Dict[str, Any]) -> None:
+    directory = os.path.join(root, collection_name)
+    if not os.path.isdir(directory):
+        return
+    listed = {os.path.basename(c["file"]) for c in entry["chunks"]}
+    for filename in os.listdir(directory):
+        if filename not in listed:
+            os.remove(os.path.join(directory, filename))
+
+
+def _open_chunk(path: str, chunk_format: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if chunk_format == "parquet":
+        return _ParquetChunkWriter(path)
+    return _NdjsonChunkWriter(path)
+
+
+# ==================== 导出 ====================
+
+
+async def _export_collection(
+    db,
+    collection_name: str,
+    root: str,
+    manifest: Dict[str, Any],
+    *,
+    transform: Optional[Callable[[dict], dict]] = None,
+    chunk_documents: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> None:
+    entry = manifest["collections"][collection_name]
+    chunk_format = manifest.get("chunk_format", "ndjson")
+    chunk_documents = chunk_documents or settings.BACKUP_CHUNK_DOCUMENTS
+    batch_size = batch_size or settings.BACKUP_BATCH_SIZE
+    manifest_path = os.path.join(root, MANIFEST_FILE)
+
+    # _id 类型不一致时无法按 _id 续传，整个集合重新导出；中断前只见过一种类型时，
+    # 其它类型的 _id 可能排在后面尚未读到，也要检查
+    if len(entry["id_types"]) > 1 or (
+        entry["last_id"] is not None
+        and await _has_unrecorded_id_types(db[collection_name], entry["id_types"])
+    ):
+        logger.warning(f"⚠️ 集合 {collection_name} 的 _id 类型不一致，重新导出")
+        await asyncio.to_thread(shutil.rmtree, os.path.join(root, collection_name), True)
+        entry.update(_new_collection_entry())
+
+    query: Dict[str, Any] = {}
+    if entry["last_id"] is not None:
+        query = {"_id": {"$gt": _decode_id(entry["last_id"])}}
+    # 删除上次中断时未登记到清单的分块
+    await asyncio.to_thread(_remove_unlisted_chunks, root, collection_name, entry)
+    entry["status"] = "running"
+
+    writer = None
+    in_chunk = 0
+    id_types = set(entry["id_types"])
+    last_id = None
+
+    async def close_chunk() -> None:
+        nonlocal writer, in_chunk
+        info = await asyncio.to_thread(writer.close)
+        entry["chunks"].append({
+            "file": os.path.relpath(writer.path, root).replace(os.sep, "/"),
+            "count": in_chunk,
+            **info,
+            "last_id": _encode_id(last_id),
+        })
+        entry["count"] += in_chunk
+        entry["last_id"] = _encode_id(last_id)
+        entry["id_types"] = sorted(id_types)
+        # 检查点：分块完整落盘后才登记到清单
+        await asyncio.to_thread(_write_json_atomic, manifest_path, manifest)
+        writer, in_chunk = None, 0
+
+    async def write_batch(ids: List[Any], docs: List[dict]) -> None:
+        nonlocal writer, in_chunk, last_id
+        while docs:
+            if writer is None:
+                seq = len(entry["chunks"])
+                path = os.path.join(
+                    root, collection_name, f"{seq:05d}{CHUNK_FORMATS[chunk_format]}"
+                )
+                writer = await asyncio.to_thread(_open_chunk, path, chunk_format)
+            take = chunk_documents - in_chunk
+            await asyncio.to_thread(writer.write, docs[:take])
+            in_chunk += len(docs[:take])
+            last_id = ids[:take][-1]
+            ids, docs = ids[take:], docs[take:]
+            if in_chunk >= chunk_documents:
+                await close_chunk()
+
+    cursor = db[collection_name].find(query, batch_size=batch_size).sort("_id", 1)
+    ids: List[Any] = []
+    docs: List[dict] = []
+    try:
+        async for doc in cursor:
+            ids.append(doc["_id"])
+            id_types.add(type(doc["_id"]).__name__)
+            docs.append(transform(doc) if transform else doc)
+            if len(docs) >= batch_size:
+                await write_batch(ids, docs)
+                ids, docs = [], []
+        if docs:
+            await write_batch(ids, docs)
+        if writer is not None:
+            await close_chunk()
+    except BaseException:
+        # 未完成的分块不登记到清单，续传时会被删除
+        if writer is not None:
+            try:
+                await asyncio.to_thread(writer.close)
+            except Exception:
+                pass
+        raise
+
+    entry["status"] = "completed"
+    entry["id_types"] = sorted(id_types)
+    await asyncio.to_thread(_write_json_atomic, manifest_path, manifest)
+    logger.info(f"✅ 导出集合 {collection_name}: {entry['count']} 条，{len(entry['chunks'])} 个分块")
+
+
+async def stream_export(
+    db,
+    root: str,
+    manifest: Dict[str, Any],
+    *,
+    transform: Optional[Callable[[dict], dict]] = None,
+    skip_collections: Optional[List[str]] = None,
+    chunk_documents: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    按清单流式导出（新建或续传）
+
+    Args:
+        db: 异步数据库
+        root: 输出目录（清单所在目录）
+        manifest: new_manifest() 创建的新清单，或 load_manifest() 读取的未完成清单
+        transform: 文档写入前的转换（如脱敏）
+        skip_collections: 只保留为空集合、不导出内容的集合
+
+    Returns:
+        完成后的清单
+    """
+    os.makedirs(root, exist_ok=True)
+    manifest["status"] = "running"
+    await asyncio.to_thread(_write_json_atomic, os.path.join(root, MANIFEST_FILE), manifest)
+
+    for collection_name, entry in manifest["collections"].items():
+        if entry["status"] == "completed":
+            continue
+        if skip_collections and collection_name in skip_collections:
+            entry["status"] = "completed"
+            continue
+        await _export_collection(
+            db, collection_name, root, manifest,
+            transform=transform, chunk_documents=chunk_documents, batch_size=batch_size,
+        )
+
+    manifest["status"] = "completed"
+    manifest["completed_at"] = datetime.utcnow().isoformat()
+    await asyncio.to_thread(_write_json_atomic, os.path.join(root, MANIFEST_FILE), manifest)
+    return manifest
+
+
+# ==================== 恢复 ====================
+
+
+def _read_lines(fh, limit: int) -> List[Any]:
+    docs = []
+    for line in fh:
+        if line.strip():
+            docs.append(json_util.loads(line))
+            if len(docs) >= limit:
+                break
+    return docs
+
+
+def _open_ndjson(path: str):
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def _load_restore_state(path: str) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+async def stream_restore(
+    db,
+    root: str,
+    *,
+    collections: Optional[List[str]] = None,
+    overwrite: bool = False,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    从备份目录流式恢复
+
+    Args:
+        db: 异步数据库
+        root: 备份目录
+        collections: 只恢复这些集合，默认全部
+        overwrite: 开始恢复某个集合前先清空它（续传时不会重复清空）
+        batch_size: 每次 bulk_write 的文档数
+
+    Returns:
+        各集合恢复的文档数
+    """
+    manifest = await asyncio.to_thread(load_manifest, root)
+    if manifest.get("chunk_format", "ndjson") != "ndjson":
+        raise Exception("只有 NDJSON 格式的备份支持恢复")
+    batch_size = batch_size or settings.BACKUP_BATCH_SIZE
+    state_path = os.path.join(root, RESTORE_STATE_FILE)
+    state = await asyncio.to_thread(_load_restore_state, state_path)
+
+    restored: Dict[str, int] = {}
+    for collection_name, entry in manifest["collections"].items():
+        if collections and collection_name not in collections:
+            continue
+        progress = state.setdefault(collection_name, {"chunks_done": 0, "restored": 0})
+        coll = db[collection_name]
+
+        if overwrite and progress["chunks_done"] == 0:
+            result = await coll.delete_many({})
+            logger.info(f"🗑️ 清空集合 {collection_name}：删除 {result.deleted_count} 条文档")
+
+        for chunk in entry["chunks"][progress["chunks_done"]:]:
+            path = os.path.join(root, chunk["file"])
+            checksum = await asyncio.to_thread(file_sha256, path)
+            if checksum != chunk["sha256"]:
+                raise Exception(f"分块校验失败: {chunk['file']}")
+
+            fh = await asyncio.to_thread(_open_ndjson, path)
+            try:
+                while True:
+                    docs = await asyncio.to_thread(_read_lines, fh, batch_size)
+                    if not docs:
+                        break
+                    ops = [
+                        ReplaceOne({"_id": d["_id"]}, d, upsert=True) if "_id" in d else InsertOne(d)
+                        for d in docs
+                    ]
+                    await coll.bulk_write(ops, ordered=True)
+                    progress["restored"] += len(docs)
+            finally:
+                await asyncio.to_thread(fh.close)
+
+            progress["chunks_done"] += 1
+            await asyncio.to_thread(_write_json_atomic, state_path, state)
+
+        restored[collection_name] = progress["restored"]
+        logger.info(f"✅ 恢复集合 {collection_name}: {progress['restored']} 条")
+
+    if os.path.exists(state_path):
+        await asyncio.to_thread(os.remove, state_path)
+    return {
+        "collections": list(restored),
+        "restored": restored,
+        "total_restored": sum(restored.values()),
+        "overwrite": overwrite,
+    }
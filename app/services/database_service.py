@@ -130,7 +130,7 @@ class DatabaseService:
                 user_id=user_id
             )
         else:
-            logger.warning("⚠️ mongodump 不可用，使用 Python 备份（较慢）")
+            logger.warning("⚠️ mongodump 不可用，使用 Python 流式备份（NDJSON 分块）")
             logger.warning("💡 建议安装 MongoDB Database Tools 以获得更快的备份速度")
             return await _db_backups.create_backup(
                 name=name,
@@ -147,6 +147,15 @@ class DatabaseService:
         """删除备份（委托子模块）"""
         await _db_backups.delete_backup(backup_id)
 
+    async def resume_backup(self, backup_id: str) -> Dict[str, Any]:
+        """续传中断的备份（委托子模块）"""
+        return await _db_backups.resume_backup(backup_id)
+
+    async def restore_backup(self, backup_id: str, collections: List[str] = None,
+                             overwrite: bool = False) -> Dict[str, Any]:
+        """从备份恢复数据（委托子模块）"""
+        return await _db_backups.restore_backup(backup_id, collections=collections, overwrite=overwrite)
+
     async def cleanup_old_data(self, days: int) -> Dict[str, Any]:
         """清理旧数据（委托子模块）"""
         return await _db_cleanup.cleanup_old_data(days)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+交易所日历同步服务
+
+定期从数据源拉取交易日列表，与本地日历比较，有变化时把新版本写入本地
+覆盖文件（见 tradingagents.utils.exchange_calendar），各进程的查询都不访问
+网络。数据来源：
+
+- A股：AKShare 新浪交易日历 → Tushare trade_cal（SSE）→ pandas_market_calendars
+- 港股/美股：pandas_market_calendars（可选依赖，未安装时跳过）
+"""
+
+import asyncio
+import logging
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tradingagents.utils.exchange_calendar import (
+    WEEKMASK,
+    ExchangeCalendar,
+    ExchangeCalendarRegistry,
+    get_calendar_registry,
+)
+
+logger = logging.getLogger(__name__)
+
+# pandas_market_calendars 中的日历名称
+MARKET_CALENDAR_NAMES = {"CN": "XSHG", "HK": "XHKG", "US": "NYSE"}
+
+# 节假日占工作日比例超过该值视为数据异常，不更新
+MAX_HOLIDAY_RATIO = 0.2
+
+Schedule = Tuple[List[date], Dict[date, time], str]
+
+
+def merge_schedule(
+    calendar: ExchangeCalendar,
+    sessions: List[date],
+    early_closes: Dict[date, time],
+    source: str,
+) -> Optional[ExchangeCalendar]:
+    """
+    用数据源返回的交易日替换日历在该区间内的节假日
+
+    Returns:
+        有变化时返回新版本日历（版本号 +1），否则返回 None
+    """
+    if not sessions:
+        return None
+    start, end = min(sessions), max(sessions)
+    days = np.arange(
+        np.datetime64(start), np.datetime64(end) + np.timedelta64(1, "D"), dtype="datetime64[D]"
+    )
+    weekdays = days[np.is_busday(days, weekmask=WEEKMASK)]
+    holidays = set(weekdays.astype(object)) - set(sessions)
+    if len(holidays) > len(weekdays) * MAX_HOLIDAY_RATIO:
+        logger.warning(
+            f"⚠️ [{calendar.market}] 交易日数据异常（{len(holidays)}/{len(weekdays)} 个工作日休市），跳过更新"
+        )
+        return None
+
+    kept_holidays = {d for d in calendar.holidays if not start <= d <= end} | holidays
+    kept_early = {d: t for d, t in calendar.early_closes.items() if not start <= d <= end}
+    kept_early.update(early_closes)
+    new_start = min(calendar.start, start) if calendar.start else start
+    new_end = max(calendar.end, end) if calendar.end else end
+
+    if (
+        kept_holidays == set(calendar.holidays)
+        and kept_early == calendar.early_closes
+        and (new_start, new_end) == (calendar.start, calendar.end)
+    ):
+        return None
+
+    return ExchangeCalendar(
+        market=calendar.market,
+        timezone=calendar.timezone,
+        sessions=calendar.sessions,
+        holidays=sorted(kept_holidays),
+        early_closes=kept_early,
+        start=new_start,
+        end=new_end,
+        version=calendar.version + 1,
+        updated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        source=source,
+        name=calendar.name,
+    )
+
+
+class ExchangeCalendarSyncService:
+    """交易所日历同步服务"""
+
+    def __init__(self, registry: Optional[ExchangeCalendarRegistry] = None):
+        self.registry = registry or get_calendar_registry()
+
+    # ==================== 数据源 ====================
+
+    @staticmethod
+    def _fetch_cn_akshare(start: date, end: date) -> Optional[List[date]]:
+        import akshare as ak
+
+        df = ak.tool_trade_date_hist_sina()
+        if df is None or df.empty:
+            return None
+        days = [d.date() if isinstance(d, datetime) else d for d in df["trade_date"]]
+        return [d for d in days if start <= d <= end]
+
+    @staticmethod
+    def _fetch_cn_tushare(start: date, end: date) -> Optional[List[date]]:
+        from tradingagents.dataflows.providers.china.tushare import get_tushare_provider
+
+        provider = get_tushare_provider()
+        if not getattr(provider, "api", None):
+            return None
+        df = provider.api.trade_cal(
+            exchange="SSE",
+            start_date=start.strftime("%Y%m%d"),
+            end_date=end.strftime("%Y%m%d"),
+            is_open="1",
+        )
+        if df is None or df.empty:
+            return None
+        return [datetime.strptime(str(d), "%Y%m%d").date() for d in df["cal_date"]]
+
+    @staticmethod
+    def _fetch_market_calendar(
+        market: str, tz, start: date, end: date
+    ) -> Optional[Tuple[List[date], Dict[date, time]]]:
+        try:
+            import pandas_market_calendars as mcal
+        except ImportError:
+            return None
+
+        cal = mcal.get_calendar(MARKET_CALENDAR_NAMES[market])
+        schedule = cal.schedule(start_date=start, end_date=end)
+        if schedule.empty:
+            return None
+        sessions = [ts.date() for ts in schedule.index]
+        early_closes = {
+            ts.date(): row["market_close"].tz_convert(tz).time()
+            for ts, row in cal.early_closes(schedule).iterrows()
+        }
+        return sessions, early_closes
+
+    def fetch_schedule(self, calendar: ExchangeCalendar, start: date, end: date) -> Optional[Schedule]:
+        """按优先级从数据源获取交易日（同步调用，在线程中执行）"""
+        fetchers = []
+        if calendar.market == "CN":
+            fetchers += [
+                ("akshare", lambda: (self._fetch_cn_akshare(start, end), {})),
+                ("tushare", lambda: (self._fetch_cn_tushare(start, end), {})),
+            ]
+        fetchers.append(
+            (
+                "pandas_market_calendars",
+                lambda: self._fetch_market_calendar(calendar.market, calendar.tz, start, end)
+                or (None, {}),
+            )
+        )
+
+        for source, fetch in fetchers:
+            try:
+                sessions, early_closes = fetch()
+                if sessions:
+                    return sorted(set(sessions)), early_closes, source
+            except Exception as e:
+                logger.warning(f"⚠️ [{calendar.market}] 从 {source} 获取交易日历失败: {e}")
+        return None
+
+    # ==================== 同步 ====================
+
+    async def run_sync(self) -> Dict[str, Any]:
+        """同步全部市场的日历，返回每个市场的结果"""
+        today = date.today()
+        results: Dict[str, Any] = {}
+        updated: Dict[str, ExchangeCalendar] = {}
+
+        for market in ("CN", "HK", "US"):
+            calendar = self.registry.get(market)
+            start = calendar.start or date(today.year, 1, 1)
+            end = date(today.year + 1, 12, 31)
+
+            schedule = await asyncio.to_thread(self.fetch_schedule, calendar, start, end)
+            if schedule is None:
+                results[market] = {"status": "skipped", "version": calendar.version}
+                continue
+
+            sessions, early_closes, source = schedule
+            new_calendar = merge_schedule(calendar, sessions, early_closes, source)
+            if new_calendar is None:
+                results[market] = {"status": "unchanged", "version": calendar.version, "source": source}
+                continue
+
+            updated[market] = new_calendar
+            results[market] = {
+                "status": "updated",
+                "version": new_calendar.version,
+                "source": source,
+                "end": new_calendar.end.isoformat(),
+            }
+
+        if updated:
+            path = await asyncio.to_thread(self.registry.save, updated)
+            logger.info(f"📅 交易所日历已更新: {', '.join(updated)} -> {path}")
+        else:
+            logger.info("📅 交易所日历无变化")
+        return results
+
+
+_sync_service: Optional[ExchangeCalendarSyncService] = None
+
+
+def get_exchange_calendar_sync_service() -> ExchangeCalendarSyncService:
+    """获取交易所日历同步服务单例"""
+    global _sync_service
+    if _sync_service is None:
+        _sync_service = ExchangeCalendarSyncService()
+    return _sync_service
@@ -10,21 +10,28 @@ Features:
 - Business metrics (analysis count, token usage)
 - Time-series data storage
 - Metrics aggregation and reporting
+- In-process aggregation (counters/gauges/histograms) with periodic batch flush
+- Prometheus text exposition
 """
 
 from __future__ import annotations
 
 import asyncio
+import bisect
 import logging
+import math
 import os
+import threading
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
 
+from app.core.config import settings
 from app.core.database import get_mongo_db
 from app.core.unified_config_service import get_config_manager
 from app.utils.error_handler import (
@@ -52,6 +59,9 @@ class MetricType(Enum):
     TOKEN_USAGE = "token_usage"
     CACHE_HIT_RATE = "cache_hit_rate"
     DATA_SYNC_COUNT = "data_sync_count"
+    PRINCIPAL_CACHE_REQUESTS = "principal_cache_requests"
+    TOKEN_REVOCATION_LATENCY = "token_revocation_latency"
+    RATE_LIMIT_WAIT = "rate_limit_wait"
 
 
 @dataclass
@@ -79,6 +89,267 @@ class MetricsSummary:
     last_updated: Optional[str] = None
 
 
+# ==================== 进程内聚合 ====================
+
+# 耗时类直方图分桶（秒）
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+# Token 用量直方图分桶
+TOKEN_BUCKETS: Tuple[float, ...] = (
+    100, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000,
+)
+
+# 计数器类指标（值为增量）
+COUNTER_METRICS = frozenset(
+    {
+        MetricType.APP_REQUEST_COUNT,
+        MetricType.APP_ERROR_COUNT,
+        MetricType.ANALYSIS_COUNT,
+        MetricType.DATA_SYNC_COUNT,
+        MetricType.PRINCIPAL_CACHE_REQUESTS,
+    }
+)
+# 直方图类指标及其分桶；其余指标按 gauge（取最新值）处理
+HISTOGRAM_METRICS: Dict[MetricType, Tuple[float, ...]] = {
+    MetricType.APP_REQUEST_LATENCY: LATENCY_BUCKETS,
+    MetricType.ANALYSIS_DURATION: LATENCY_BUCKETS,
+    MetricType.TOKEN_USAGE: TOKEN_BUCKETS,
+    MetricType.TOKEN_REVOCATION_LATENCY: LATENCY_BUCKETS,
+    MetricType.RATE_LIMIT_WAIT: LATENCY_BUCKETS,
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(tags: Optional[Dict[str, Any]]) -> LabelKey:
+    """将标签字典转换为可哈希的有序元组"""
+    if not tags:
+        return ()
+    return tuple(sorted((str(k), str(v)) for k, v in tags.items()))
+
+
+class Histogram:
+    """
+    固定分桶直方图
+
+    counts[i] 为落入 (buckets[i-1], buckets[i]] 的样本数，最后一格为 +Inf。
+    本类不加锁，由 MetricsRegistry 统一保护。
+    """
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+
+    def percentile(self, q: float) -> float:
+        """按桶内线性插值估算分位数（q 取 0~1）"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        lower = 0.0
+        for i, c in enumerate(self.counts):
+            if c and cumulative + c >= rank:
+                if i >= len(self.buckets):
+                    # +Inf 桶无上界，返回最大有限边界
+                    return lower
+                upper = self.buckets[i]
+                return lower + (upper - lower) * (rank - cumulative) / c
+            cumulative += c
+            if i < len(self.buckets):
+                lower = self.buckets[i]
+        return lower
+
+
+@dataclass
+class _PendingAggregate:
+    """两次落库之间的增量聚合"""
+
+    count: int = 0
+    sum: float = 0.0
+    min: float = math.inf
+    max: float = -math.inf
+    last: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.last = value
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = [f'{k}="{_escape_label_value(v)}"' for k, v in labels]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表
+
+    热路径只做一次加锁的字典更新；累计值用于 Prometheus 抓取，
+    增量值由 drain() 取出后批量写入 MongoDB。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[MetricType, LabelKey], float] = {}
+        self._gauges: Dict[Tuple[MetricType, LabelKey], float] = {}
+        self._histograms: Dict[Tuple[MetricType, LabelKey], Histogram] = {}
+        self._pending: Dict[Tuple[MetricType, LabelKey, str], _PendingAggregate] = {}
+
+    def observe(
+        self,
+        metric_type: MetricType,
+        value: float,
+        tags: Optional[Dict[str, Any]] = None,
+        source: str = "app",
+    ) -> None:
+        """记录一个样本（计数器累加 / gauge 覆盖 / 直方图分桶）"""
+        labels = _label_key(tags)
+        key = (metric_type, labels)
+        value = float(value)
+        with self._lock:
+            if metric_type in COUNTER_METRICS:
+                self._counters[key] = self._counters.get(key, 0.0) + value
+            elif metric_type in HISTOGRAM_METRICS:
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = Histogram(
+                        HISTOGRAM_METRICS[metric_type]
+                    )
+                hist.observe(value)
+            else:
+                self._gauges[key] = value
+
+            pending_key = (metric_type, labels, source)
+            pending = self._pending.get(pending_key)
+            if pending is None:
+                pending = self._pending[pending_key] = _PendingAggregate()
+            pending.add(value)
+
+    def drain(self) -> Dict[Tuple[MetricType, LabelKey, str], _PendingAggregate]:
+        """取出并清空自上次落库以来的增量聚合"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def percentiles(
+        self,
+        metric_type: MetricType,
+        tags: Optional[Dict[str, Any]] = None,
+        quantiles: Sequence[float] = (0.5, 0.9, 0.95, 0.99),
+    ) -> Dict[str, float]:
+        """
+        计算直方图分位数
+
+        Args:
+            metric_type: 直方图类指标
+            tags: 标签过滤（子集匹配）；为空时合并该指标的所有序列
+            quantiles: 分位点
+
+        Returns:
+            {"p50": ..., "p99": ..., "count": ..., "avg": ...}
+        """
+        wanted = set(_label_key(tags))
+        merged = Histogram(HISTOGRAM_METRICS.get(metric_type, LATENCY_BUCKETS))
+        with self._lock:
+            for (mtype, labels), hist in self._histograms.items():
+                if mtype == metric_type and wanted.issubset(labels):
+                    merged.merge(hist)
+
+        result = {f"p{int(q * 100)}": merged.percentile(q) for q in quantiles}
+        result["count"] = merged.count
+        result["avg"] = merged.sum / merged.count if merged.count else 0.0
+        return result
+
+    def render_prometheus(self, prefix: str = "tradingagents") -> str:
+        """按 Prometheus 文本格式（0.0.4）导出累计指标"""
+        with self._lock:
+            counters = sorted(self._counters.items(), key=lambda kv: (kv[0][0].value, kv[0][1]))
+            gauges = sorted(self._gauges.items(), key=lambda kv: (kv[0][0].value, kv[0][1]))
+            histograms = sorted(
+                (
+                    (key, list(h.counts), h.count, h.sum, h.buckets)
+                    for key, h in self._histograms.items()
+                ),
+                key=lambda item: (item[0][0].value, item[0][1]),
+            )
+
+        lines: List[str] = []
+        last_name = None
+        for (metric_type, labels), value in counters:
+            name = f"{prefix}_{metric_type.value}_total"
+            if name != last_name:
+                lines.append(f"# TYPE {name} counter")
+                last_name = name
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (metric_type, labels), value in gauges:
+            name = f"{prefix}_{metric_type.value}"
+            if name != last_name:
+                lines.append(f"# TYPE {name} gauge")
+                last_name = name
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for (metric_type, labels), counts, count, total, buckets in histograms:
+            name = f"{prefix}_{metric_type.value}"
+            if name != last_name:
+                lines.append(f"# TYPE {name} histogram")
+                last_name = name
+            cumulative = 0
+            for bound, c in zip(list(buckets) + [math.inf], counts):
+                cumulative += c
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+            self._pending.clear()
+
+
 class MetricsCollector:
     """
     系统指标收集器
@@ -86,12 +357,17 @@ class MetricsCollector:
     收集和存储系统及应用程序的各类指标数据。
     """
 
-    def __init__(self):
+    def __init__(self, flush_interval: Optional[float] = None):
         self._db: Optional[AsyncIOMotorDatabase] = None
         self._collection_name = "system_metrics"
         self._summary_collection = "metrics_summary"
         self._collection_lock = asyncio.Lock()
         self._initialized = False
+        self.registry = MetricsRegistry()
+        self._enabled = settings.METRICS_ENABLED
+        self._flush_interval = flush_interval or settings.METRICS_FLUSH_INTERVAL_SECONDS
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_flush = time.time()
 
     async def _get_db(self) -> AsyncIOMotorDatabase:
         """获取MongoDB连接"""
@@ -122,6 +398,23 @@ class MetricsCollector:
             self._initialized = True
             logger.info("MetricsCollector initialized")
 
+    def observe(
+        self,
+        metric_type: MetricType,
+        value: float,
+        tags: Optional[Dict[str, str]] = None,
+        source: str = "app",
+    ) -> None:
+        """
+        记录指标到进程内聚合器（同步、无 I/O，可在请求热路径调用）
+
+        聚合结果由后台任务每隔 METRICS_FLUSH_INTERVAL_SECONDS 秒批量落库。
+        """
+        if not self._enabled:
+            return
+        self.registry.observe(metric_type, value, tags, source)
+        self._ensure_flush_task()
+
     async def record_metric(
         self,
         metric_type: MetricType,
@@ -138,23 +431,7 @@ class MetricsCollector:
             tags: 标签字典
             source: 数据来源
         """
-        if not self._initialized:
-            await self.initialize()
-
-        db = await self._get_db()
-
-        metric_point = {
-            "metric_type": metric_type.value,
-            "value": value,
-            "timestamp": datetime.now().isoformat(),
-            "tags": tags or {},
-            "source": source,
-        }
-
-        await db[self._collection_name].insert_one(metric_point)
-
-        # 更新汇总
-        await self._update_summary(metric_type, value)
+        self.observe(metric_type, value, tags, source)
 
     async def record_batch(self, metrics: List[MetricPoint]) -> None:
         """
@@ -172,6 +449,7 @@ class MetricsCollector:
         db = await self._get_db()
 
         documents = []
+        aggregates: Dict[MetricType, _PendingAggregate] = {}
         for m in metrics:
             documents.append(
                 {
@@ -182,34 +460,151 @@ class MetricsCollector:
                     "source": m.source,
                 }
             )
+            aggregates.setdefault(m.metric_type, _PendingAggregate()).add(m.value)
 
-        await db[self._collection_name].insert_many(documents)
+        await db[self._collection_name].insert_many(documents, ordered=False)
 
-        # 更新汇总
-        for m in metrics:
-            await self._update_summary(m.metric_type, m.value)
+        # 更新汇总（每种指标一条 upsert，一次往返）
+        await self._update_summaries(aggregates)
+
+    def _ensure_flush_task(self) -> None:
+        """按需启动后台落库任务（仅在事件循环中生效）"""
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ 指标批量写入失败: {e}")
+
+    async def flush(self) -> int:
+        """
+        将进程内增量聚合批量写入 MongoDB
+
+        每个 (指标, 标签, 来源) 序列写入一条聚合文档，
+        汇总集合按指标类型做一次 bulk_write。
+
+        Returns:
+            写入的聚合文档数量
+        """
+        pending = self.registry.drain()
+        now = time.time()
+        interval = now - self._last_flush
+        self._last_flush = now
+        if not pending:
+            return 0
+
+        if not self._initialized:
+            await self.initialize()
 
-    async def _update_summary(self, metric_type: MetricType, value: float) -> None:
-        """更新指标汇总"""
         db = await self._get_db()
+        timestamp = datetime.now().isoformat()
 
-        await db[self._summary_collection].update_one(
-            {"metric_type": metric_type.value},
-            {
-                "$inc": {"count": 1, "sum": value},
-                "$min": {"min": value},
-                "$max": {"max": value},
-                "$set": {
-                    "last_value": value,
-                    "last_updated": datetime.now().isoformat(),
-                },
-                "$setOnInsert": {
+        documents = []
+        aggregates: Dict[MetricType, _PendingAggregate] = {}
+        for (metric_type, labels, source), agg in pending.items():
+            if metric_type in COUNTER_METRICS:
+                value = agg.sum
+            elif metric_type in HISTOGRAM_METRICS:
+                value = agg.sum / agg.count
+            else:
+                value = agg.last
+            documents.append(
+                {
                     "metric_type": metric_type.value,
-                    "avg": value,  # 会在查询时计算
+                    "value": value,
+                    "timestamp": timestamp,
+                    "tags": dict(labels),
+                    "source": source,
+                    "count": agg.count,
+                    "sum": agg.sum,
+                    "min": agg.min,
+                    "max": agg.max,
+                    "interval_seconds": round(interval, 3),
+                }
+            )
+
+            total = aggregates.get(metric_type)
+            if total is None:
+                total = aggregates[metric_type] = _PendingAggregate()
+            total.count += agg.count
+            total.sum += agg.sum
+            total.min = min(total.min, agg.min)
+            total.max = max(total.max, agg.max)
+            total.last = agg.last
+
+        await db[self._collection_name].insert_many(documents, ordered=False)
+        await self._update_summaries(aggregates)
+        return len(documents)
+
+    async def stop(self) -> None:
+        """停止后台落库任务并写入剩余指标"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._flush_task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"⚠️ 关闭时写入剩余指标失败: {e}")
+
+    async def _update_summaries(
+        self, aggregates: Dict[MetricType, _PendingAggregate]
+    ) -> None:
+        """批量更新指标汇总"""
+        if not aggregates:
+            return
+
+        db = await self._get_db()
+        now = datetime.now().isoformat()
+
+        ops = [
+            UpdateOne(
+                {"metric_type": metric_type.value},
+                {
+                    "$inc": {"count": agg.count, "sum": agg.sum},
+                    "$min": {"min": agg.min},
+                    "$max": {"max": agg.max},
+                    "$set": {
+                        "last_value": agg.last,
+                        "last_updated": now,
+                    },
+                    "$setOnInsert": {
+                        "metric_type": metric_type.value,
+                        "avg": agg.sum / agg.count if agg.count else 0,  # 会在查询时计算
+                    },
                 },
-            },
-            upsert=True,
-        )
+                upsert=True,
+            )
+            for metric_type, agg in aggregates.items()
+        ]
+        await db[self._summary_collection].bulk_write(ops, ordered=False)
+
+    def get_prometheus_metrics(self) -> str:
+        """导出 Prometheus 文本格式指标"""
+        return self.registry.render_prometheus()
+
+    def get_latency_percentiles(
+        self,
+        metric_type: MetricType = MetricType.APP_REQUEST_LATENCY,
+        tags: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, float]:
+        """获取进程内直方图的分位数（自进程启动以来）"""
+        return self.registry.percentiles(metric_type, tags)
 
     @async_handle_errors_empty_list(error_message="查询指标数据失败")
     async def query_metrics(
@@ -451,22 +846,20 @@ async def record_analysis_metric(
         )
 
 
-async def record_request_metric(
+def observe_request(
     endpoint: str, method: str, duration: float, status_code: int
 ) -> None:
-    """记录请求指标"""
+    """记录请求指标（同步版本，仅更新进程内聚合器）"""
     collector = get_metrics_collector()
-    await collector.record_metric(
-        MetricType.APP_REQUEST_COUNT,
-        1,
-        tags={"endpoint": endpoint, "method": method, "status": str(status_code)},
-    )
-    await collector.record_metric(
-        MetricType.APP_REQUEST_LATENCY,
-        duration,
-        tags={"endpoint": endpoint, "method": method},
-    )
+    tags = {"endpoint": endpoint, "method": method, "status": str(status_code)}
+    collector.observe(MetricType.APP_REQUEST_COUNT, 1, tags=tags)
+    collector.observe(MetricType.APP_REQUEST_LATENCY, duration, tags=tags)
     if status_code >= 400:
-        await collector.record_metric(
-            MetricType.APP_ERROR_COUNT, 1, tags={"endpoint": endpoint, "method": method}
-        )
+        collector.observe(MetricType.APP_ERROR_COUNT, 1, tags=tags)
+
+
+async def record_request_metric(
+    endpoint: str, method: str, duration: float, status_code: int
+) -> None:
+    """记录请求指标"""
+    observe_request(endpoint, method, duration, status_code)
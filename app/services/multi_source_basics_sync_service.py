@@ -20,6 +20,7 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from pymongo import UpdateOne
 
 from app.core.database import get_mongo_db
+from app.services.stock_search_index import get_stock_search_index
 from app.services.basics_sync import add_financial_metrics as _add_financial_metrics_util
 from app.utils.symbol_utils import SymbolGenerator
 
@@ -320,6 +321,8 @@ class MultiSourceBasicsSyncService:
                 f"✅ Multi-source sync finished: total={stats.total} inserted={inserted} "
                 f"updated={updated} errors={errors} sources={stats.data_sources_used}"
             )
+            # 搜索索引在下一次搜索时增量刷新
+            get_stock_search_index().request_refresh()
             return stats.__dict__
 
         except Exception as e:
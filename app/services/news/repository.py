@@ -154,6 +154,28 @@ class NewsRepositoryMixin:
         results = await cursor.to_list(length=None)
         return convert_objectid_to_str(results)
 
+    async def _get_fingerprints(
+        self,
+        symbol: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[int]:
+        """获取股票在时间范围内已保存新闻的 SimHash 指纹（内部方法）
+
+        走 symbol + publish_time 复合索引，只投影指纹字段。
+        """
+        collection = self._get_collection()
+        cursor = collection.find(
+            {
+                "symbol": symbol,
+                "publish_time": {"$gte": start_time, "$lt": end_time},
+                "simhash": {"$ne": None},
+            },
+            {"_id": 0, "simhash": 1},
+        )
+        docs = await cursor.to_list(length=None)
+        return [doc["simhash"] for doc in docs]
+
     async def _get_statistics(
         self,
         symbol: str = None,
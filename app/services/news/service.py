@@ -209,6 +209,29 @@ class NewsDataService(NewsRepositoryMixin):
             self.logger.error(f"Failed to get news statistics: {e}")
             return NewsStats()
 
+    async def get_news_fingerprints(
+        self,
+        symbol: str,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[int]:
+        """
+        获取已保存新闻的近似去重指纹（按股票、时间范围）
+
+        Args:
+            symbol: 股票代码
+            start_time: 开始时间（含）
+            end_time: 结束时间（不含）
+
+        Returns:
+            有符号 int64 指纹列表
+        """
+        try:
+            return await self._get_fingerprints(symbol, start_time, end_time)
+        except Exception as e:
+            self.logger.warning(f"Failed to load news fingerprints: {e}")
+            return []
+
     async def delete_old_news(self, days_to_keep: int = 90) -> int:
         """
         删除过期新闻
@@ -152,6 +152,9 @@ def standardize_news_data(
         "keywords": news_data.get("keywords", []),
         "importance": news_data.get("importance", "medium"),
 
+        # 近似去重指纹（SimHash，有符号 int64）
+        "simhash": news_data.get("simhash"),
+
         # 元数据
         "data_source": data_source,
         "created_at": now,
@@ -10,7 +10,7 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional, Tuple
 
-from app.services.crud import BaseCRUDService
+from app.services.crud import BaseCRUDService, add_timestamps
 from app.core.database import get_mongo_db
 from app.models.operation_log import (
     OperationLogCreate,
@@ -36,19 +36,19 @@ class OperationLogService(BaseCRUDService):
         """MongoDB 集合名称"""
         return "operation_logs"
 
-    async def create_log(
-        self,
+    @staticmethod
+    def build_log_document(
         user_id: str,
         username: str,
         log_data: OperationLogCreate,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None
-    ) -> Optional[str]:
-        """创建操作日志"""
+    ) -> Dict[str, Any]:
+        """构建操作日志文档"""
         # 使用 naive datetime（不带时区信息），MongoDB 会按原样存储
         current_time = now_tz().replace(tzinfo=None)
 
-        doc_id = await self.create({
+        return {
             "user_id": user_id,
             "username": username,
             "action_type": log_data.action_type,
@@ -62,12 +62,37 @@ class OperationLogService(BaseCRUDService):
             "session_id": log_data.session_id,
             "timestamp": current_time,
             "created_at": current_time
-        })
+        }
+
+    async def create_log(
+        self,
+        user_id: str,
+        username: str,
+        log_data: OperationLogCreate,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> Optional[str]:
+        """创建操作日志"""
+        doc_id = await self.create(
+            self.build_log_document(user_id, username, log_data, ip_address, user_agent)
+        )
 
         if doc_id:
             logger.info(f"[LOG] 操作日志已记录: {username} - {log_data.action}")
         return doc_id
 
+    async def insert_log_documents(self, documents: List[Dict[str, Any]]) -> int:
+        """批量写入已构建的操作日志文档（无序写入，失败时抛出异常由调用方处理）"""
+        if not documents:
+            return 0
+
+        collection = await self._get_collection()
+        for doc in documents:
+            add_timestamps(doc, is_update=False)
+
+        result = await collection.insert_many(documents, ordered=False)
+        return len(result.inserted_ids)
+
     async def get_logs(self, query: OperationLogQuery) -> Tuple[List[OperationLogResponse], int]:
         """获取操作日志列表（保留复杂查询逻辑）"""
         # 构建查询条件
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+操作日志批量写入器
+
+中间件只把日志文档放入进程内有界缓冲区，由后台任务按数量/时间阈值
+使用 insert_many 批量写入，请求路径上不再有 MongoDB 往返。
+
+缓冲区满或写库失败时按 OPLOG_OVERFLOW_POLICY 处理：
+- spill：追加到本地 JSONL 文件，下次后台任务启动时补写入库
+- drop：直接丢弃并计数
+
+insert_many 会先给文档分配 _id，失败的批次可能已部分写入。落盘时保留 _id，
+补写时重复键错误视为已写入，因此补写是幂等的，不会因为同一批日志反复失败。
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+from bson import json_util
+from pymongo.errors import BulkWriteError
+
+from app.core.config import settings
+from app.services.operation_log_service import get_operation_log_service
+
+logger = logging.getLogger("webapi")
+
+
+class OperationLogWriter:
+    """操作日志批量写入器（fire-and-forget）"""
+
+    def __init__(
+        self,
+        max_buffer: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        overflow_policy: Optional[str] = None,
+        spill_file: Optional[str] = None,
+    ):
+        self.max_buffer = max_buffer or settings.OPLOG_BUFFER_SIZE
+        self.batch_size = batch_size or settings.OPLOG_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.OPLOG_FLUSH_INTERVAL_SECONDS
+        self.overflow_policy = (overflow_policy or settings.OPLOG_OVERFLOW_POLICY).lower()
+        self.spill_file = Path(spill_file or settings.OPLOG_SPILL_FILE)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self.stats = {"written": 0, "spilled": 0, "dropped": 0, "replayed": 0, "failed_batches": 0}
+
+    # ===== 生产端（请求路径，同步、无 I/O）=====
+
+    def submit(self, document: Dict[str, Any]) -> bool:
+        """
+        提交一条操作日志文档
+
+        Returns:
+            True 表示已进入缓冲区；False 表示因缓冲区满被落盘或丢弃
+        """
+        if len(self._buffer) >= self.max_buffer:
+            self._handle_overflow([document])
+            return False
+
+        self._buffer.append(document)
+        self._ensure_task()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    def pending_count(self) -> int:
+        return len(self._buffer)
+
+    # ===== 后台任务 =====
+
+    def _ensure_task(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        await self.replay_spill_file()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"操作日志批量写入异常: {e}")
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    async def _write_batch(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        写入一批日志，返回已入库条数
+
+        BulkWriteError 中的重复键错误说明该文档此前已写入（例如上次批量写入
+        部分成功后被落盘），按已写入计；其余文档级错误（如校验失败）重试也不会
+        成功，直接丢弃。连接失败等其它异常原样抛出，由调用方落盘重试。
+        """
+        try:
+            return await get_operation_log_service().insert_log_documents(batch)
+        except BulkWriteError as e:
+            details = e.details or {}
+            if details.get("writeConcernErrors"):
+                raise
+            errors = details.get("writeErrors", [])
+            duplicates = sum(1 for err in errors if err.get("code") == 11000)
+            rejected = len(errors) - duplicates
+            if rejected:
+                self.stats["dropped"] += rejected
+                logger.warning(f"操作日志有 {rejected} 条被数据库拒绝，已丢弃: {errors[0].get('errmsg')}")
+            return details.get("nInserted", 0) + duplicates
+
+    async def flush(self) -> int:
+        """写出缓冲区中的全部日志，返回成功写入条数"""
+        lock = self._flush_lock or asyncio.Lock()
+        written = 0
+        async with lock:
+            while self._buffer:
+                batch = self._take_batch()
+                try:
+                    written += await self._write_batch(batch)
+                except Exception as e:
+                    self.stats["failed_batches"] += 1
+                    logger.warning(f"操作日志批量写入失败（{len(batch)} 条）: {e}")
+                    self._handle_overflow(batch)
+                    break
+        self.stats["written"] += written
+        if written:
+            logger.debug(f"[LOG] 操作日志批量写入 {written} 条")
+        return written
+
+    async def stop(self) -> None:
+        """停止后台任务并写出剩余日志（应用关闭时调用）"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+        if self._buffer:
+            await self.flush()
+        # 仍未写出的（例如数据库已不可用）全部落盘
+        if self._buffer:
+            remaining = list(self._buffer)
+            self._buffer.clear()
+            self._handle_overflow(remaining)
+
+    # ===== 溢出处理 =====
+
+    def _handle_overflow(self, documents: List[Dict[str, Any]]) -> None:
+        if self.overflow_policy == "spill":
+            try:
+                self.spill_file.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.spill_file, "a", encoding="utf-8") as f:
+                    for doc in documents:
+                        f.write(json_util.dumps(doc, ensure_ascii=False) + "\n")
+                self.stats["spilled"] += len(documents)
+                return
+            except Exception as e:
+                logger.error(f"操作日志落盘失败: {e}")
+
+        self.stats["dropped"] += len(documents)
+
+    async def replay_spill_file(self) -> int:
+        """把落盘文件中的日志补写入库，成功后删除文件"""
+        if not self.spill_file.exists():
+            return 0
+
+        # 先改名再读取，避免与正在进行的落盘写入冲突
+        replay_path = self.spill_file.with_suffix(self.spill_file.suffix + ".replay")
+        try:
+            os.replace(self.spill_file, replay_path)
+            with open(replay_path, "r", encoding="utf-8") as f:
+                documents = [json_util.loads(line) for line in f if line.strip()]
+        except Exception as e:
+            logger.warning(f"读取操作日志落盘文件失败: {e}")
+            return 0
+
+        replayed = 0
+        position = 0
+        try:
+            for position in range(0, len(documents), self.batch_size):
+                replayed += await self._write_batch(documents[position:position + self.batch_size])
+            replay_path.unlink()
+        except Exception as e:
+            # 当前批次及之后的日志合并回落盘文件（保留 _id，下次补写时已写入的按重复键跳过）
+            self._handle_overflow(documents[position:])
+            try:
+                replay_path.unlink()
+            except OSError:
+                pass
+            logger.warning(f"补写操作日志失败: {e}")
+
+        self.stats["replayed"] += replayed
+        if replayed:
+            logger.info(f"[LOG] 已补写落盘的操作日志 {replayed} 条")
+        return replayed
+
+
+# 全局实例
+_operation_log_writer: Optional[OperationLogWriter] = None
+
+
+def get_operation_log_writer() -> OperationLogWriter:
+    """获取操作日志批量写入器实例"""
+    global _operation_log_writer
+    if _operation_log_writer is None:
+        _operation_log_writer = OperationLogWriter()
+    return _operation_log_writer
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""模拟交易服务模块
+
+提供持仓批量估值、订单撮合（市价/限价/触发单）和原子成交。
+
+导出:
+    - PaperTradingEngine: 模拟交易引擎
+    - get_paper_trading_engine: 获取引擎实例
+    - PaperTradingError: 下单/成交被拒绝
+    - get_last_prices: 批量获取最新价
+"""
+
+from .engine import (
+    CURRENCY_BY_MARKET,
+    INITIAL_CASH_BY_MARKET,
+    ORDER_TYPES,
+    STALE_FILL_SECONDS,
+    PaperTradingEngine,
+    PaperTradingError,
+    calculate_commission,
+    detect_market_and_code,
+    evaluate_order,
+    get_paper_trading_engine,
+    public_order,
+)
+from .pricing import get_last_prices
+
+__all__ = [
+    "CURRENCY_BY_MARKET",
+    "INITIAL_CASH_BY_MARKET",
+    "ORDER_TYPES",
+    "STALE_FILL_SECONDS",
+    "PaperTradingEngine",
+    "PaperTradingError",
+    "calculate_commission",
+    "detect_market_and_code",
+    "evaluate_order",
+    "get_last_prices",
+    "get_paper_trading_engine",
+    "public_order",
+]
@@ -0,0 +1,832 @@
+# -*- coding: utf-8 -*-
+"""模拟交易撮合引擎
+
+订单类型：
+- market: 市价单，按最新价即时成交
+- limit: 限价单，买入最新价 ≤ 限价、卖出最新价 ≥ 限价时成交
+- stop: 止损/止盈触发单，买入最新价 ≥ 触发价、卖出最新价 ≤ 触发价时触发；
+  未设限价按最新价成交，设置限价则触发后按限价单撮合
+
+订单状态：open（挂单）→ filling（已认领）→ filled / rejected；open → cancelled
+
+成交原子性：MongoDB 单机部署不支持多文档事务，成交按比较并交换（CAS）
+执行，每一步都是带条件的单文档原子更新：
+1. 认领订单：status open → filling，同一挂单被并发撮合时只有一方成功
+2. 买入：现金按 ``$gte`` 条件扣款；持仓用管道更新原子计算加权成本
+   卖出：持仓数量按 ``$gte`` 条件扣减，返回扣减前的成本用于计算盈亏
+3. 后续步骤失败时补偿已执行的步骤，订单标记为 rejected
+4. 写入成交记录，订单标记为 filled
+
+资金/持仓的每一步更新都在同一文档上原子写入 ``pending_fills.<订单ID>``
+标记（成交价、金额、回滚所需的扣减量），订单完成后清除。进程在认领与
+终态之间中断时订单会停留在 filling，``recover_stale_fills`` 按标记和成交
+记录判断进度，补完成交或回滚已执行的步骤。
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.database import get_mongo_db
+
+from .pricing import PriceKey, get_last_prices, parse_price
+
+logger = logging.getLogger(__name__)
+
+
+# 每个市场的初始资金配置
+INITIAL_CASH_BY_MARKET = {
+    "CNY": 1_000_000.0,  # A股：100万人民币
+    "HKD": 1_000_000.0,  # 港股：100万港币
+    "USD": 100_000.0,  # 美股：10万美元
+}
+
+CURRENCY_BY_MARKET = {"CN": "CNY", "HK": "HKD", "US": "USD"}
+
+ORDER_TYPES = ("market", "limit", "stop")
+
+# filling 状态超过该时长未更新，视为撮合进程已中断
+STALE_FILL_SECONDS = 300
+
+
+class PaperTradingError(Exception):
+    """下单/成交被拒绝（资金不足、持仓不足、参数错误等）"""
+
+
+def detect_market_and_code(code: str) -> Tuple[str, str]:
+    """
+    检测股票代码的市场类型并标准化代码
+
+    Returns:
+        (market, normalized_code): 市场类型和标准化后的代码
+            - CN: A股（6位数字）
+            - HK: 港股（4-5位数字或带.HK后缀）
+            - US: 美股（字母代码）
+    """
+    code = code.strip().upper()
+
+    # 港股：带 .HK 后缀
+    if code.endswith(".HK"):
+        return ("HK", code[:-3].zfill(5))
+
+    # 美股：纯字母
+    if re.match(r"^[A-Z]+$", code):
+        return ("US", code)
+
+    # 港股：4-5位数字
+    if re.match(r"^\d{4,5}$", code):
+        return ("HK", code.zfill(5))
+
+    # A股：6位数字
+    if re.match(r"^\d{6}$", code):
+        return ("CN", code)
+
+    # 默认当作A股，补齐6位
+    return ("CN", code.zfill(6))
+
+
+def calculate_commission(
+    market: str, side: str, amount: float, rules: Dict[str, Any]
+) -> float:
+    """计算手续费"""
+    if not rules or "commission" not in rules:
+        return 0.0
+
+    commission_config = rules["commission"]
+    commission = 0.0
+
+    # 佣金
+    comm_rate = commission_config.get("rate", 0.0)
+    comm_min = commission_config.get("min", 0.0)
+    commission += max(amount * comm_rate, comm_min)
+
+    # 印花税（仅卖出）
+    if side == "sell" and "stamp_duty_rate" in commission_config:
+        commission += amount * commission_config["stamp_duty_rate"]
+
+    # 其他费用（港股）
+    if market == "HK":
+        if "transaction_levy_rate" in commission_config:
+            commission += amount * commission_config["transaction_levy_rate"]
+        if "trading_fee_rate" in commission_config:
+            commission += amount * commission_config["trading_fee_rate"]
+        if "settlement_fee_rate" in commission_config:
+            commission += amount * commission_config["settlement_fee_rate"]
+
+    # SEC费用（美股，仅卖出）
+    if market == "US" and side == "sell" and "sec_fee_rate" in commission_config:
+        commission += amount * commission_config["sec_fee_rate"]
+
+    return round(commission, 2)
+
+
+def evaluate_order(order: Dict[str, Any], last_price: Optional[float]) -> Tuple[bool, Optional[float]]:
+    """
+    按最新价撮合订单
+
+    Returns:
+        (是否已触发, 成交价)：成交价为 None 表示本次不成交
+    """
+    if last_price is None or last_price <= 0:
+        return bool(order.get("triggered")), None
+
+    side = order["side"]
+    order_type = order.get("order_type", "market")
+    limit_price = order.get("limit_price")
+    triggered = bool(order.get("triggered"))
+
+    if order_type == "market":
+        return True, last_price
+
+    if order_type == "stop" and not triggered:
+        stop_price = order["stop_price"]
+        triggered = last_price >= stop_price if side == "buy" else last_price <= stop_price
+        if not triggered:
+            return False, None
+    if order_type == "stop" and limit_price is None:
+        return True, last_price
+
+    if side == "buy":
+        return triggered, last_price if last_price <= limit_price else None
+    return triggered, last_price if last_price >= limit_price else None
+
+
+def _now_iso() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _pending_key(order: Dict[str, Any]) -> str:
+    """账户/持仓文档上记录未完成成交进度的字段路径"""
+    return f"pending_fills.{order['_id']}"
+
+
+def public_order(order: Dict[str, Any]) -> Dict[str, Any]:
+    """订单文档转为接口输出（_id 转为字符串 id）"""
+    item = {k: v for k, v in order.items() if k != "_id"}
+    if order.get("_id") is not None:
+        item["id"] = str(order["_id"])
+    return item
+
+
+class PaperTradingEngine:
+    """模拟交易引擎：批量估值、下单、挂单撮合"""
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_mongo_db()
+
+    # ------------------------------------------------------------------ 账户
+
+    async def get_or_create_account(self, user_id: str) -> Dict[str, Any]:
+        """获取或创建账户（多货币）"""
+        db = self.db
+        acc = await db["paper_accounts"].find_one({"user_id": user_id})
+        if not acc:
+            # 并发首次请求：upsert + 唯一索引保证只创建一个账户，落败方重新读取
+            now = _now_iso()
+            initial = {
+                # 多货币现金账户
+                "cash": dict(INITIAL_CASH_BY_MARKET),
+                # 多货币已实现盈亏
+                "realized_pnl": {"CNY": 0.0, "HKD": 0.0, "USD": 0.0},
+                # 账户设置
+                "settings": {"auto_currency_conversion": False, "default_market": "CN"},
+                "created_at": now,
+                "updated_at": now,
+            }
+            try:
+                await db["paper_accounts"].update_one(
+                    {"user_id": user_id}, {"$setOnInsert": initial}, upsert=True
+                )
+            except DuplicateKeyError:
+                pass
+            acc = await db["paper_accounts"].find_one({"user_id": user_id})
+        else:
+            # 兼容旧账户结构：如果 cash 或 realized_pnl 仍为标量，迁移为多货币对象
+            updates: Dict[str, Any] = {}
+            try:
+                cash_val = acc.get("cash")
+                if not isinstance(cash_val, dict):
+                    base_cash = float(cash_val or 0.0)
+                    updates["cash"] = {"CNY": base_cash, "HKD": 0.0, "USD": 0.0}
+
+                pnl_val = acc.get("realized_pnl")
+                if not isinstance(pnl_val, dict):
+                    base_pnl = float(pnl_val or 0.0)
+                    updates["realized_pnl"] = {"CNY": base_pnl, "HKD": 0.0, "USD": 0.0}
+
+                if updates:
+                    updates["updated_at"] = _now_iso()
+                    await db["paper_accounts"].update_one(
+                        {"user_id": user_id}, {"$set": updates}
+                    )
+                    # 重新读取迁移后的账户
+                    acc = await db["paper_accounts"].find_one({"user_id": user_id})
+            except Exception as e:
+                logger.error(f"❌ 账户结构迁移失败 user_id={user_id}: {e}")
+        return acc
+
+    async def get_market_rules(self, market: str) -> Optional[Dict[str, Any]]:
+        """获取市场规则配置"""
+        rules_doc = await self.db["paper_market_rules"].find_one({"market": market})
+        if rules_doc:
+            return rules_doc.get("rules", {})
+        return None
+
+    # ------------------------------------------------------------------ 估值
+
+    async def value_positions(
+        self, user_id: str
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """
+        按一次批量行情查询估值全部持仓
+
+        Returns:
+            (持仓明细, 各货币持仓市值)
+        """
+        positions = await self.db["paper_positions"].find({"user_id": user_id}).to_list(None)
+        prices = await get_last_prices(
+            self.db, [(p.get("market", "CN"), p.get("code")) for p in positions]
+        )
+
+        value_by_currency = {"CNY": 0.0, "HKD": 0.0, "USD": 0.0}
+        detailed: List[Dict[str, Any]] = []
+        for p in positions:
+            code = p.get("code")
+            market = p.get("market", "CN")
+            currency = p.get("currency", "CNY")
+            qty = int(p.get("quantity", 0))
+            avg_cost = float(p.get("avg_cost", 0.0))
+
+            last = prices.get((market, code))
+            mkt_value = round((last or 0.0) * qty, 2)
+            value_by_currency[currency] = value_by_currency.get(currency, 0.0) + mkt_value
+
+            detailed.append(
+                {
+                    "code": code,
+                    "market": market,
+                    "currency": currency,
+                    "quantity": qty,
+                    "available_qty": p.get("available_qty", qty),
+                    "avg_cost": avg_cost,
+                    "last_price": last,
+                    "market_value": mkt_value,
+                    "unrealized_pnl": None
+                    if last is None
+                    else round((last - avg_cost) * qty, 2),
+                }
+            )
+        return detailed, value_by_currency
+
+    # ------------------------------------------------------------------ 下单
+
+    async def place_order(
+        self,
+        user_id: str,
+        code: str,
+        side: str,
+        quantity: int,
+        market: Optional[str] = None,
+        order_type: str = "market",
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        analysis_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        提交订单
+
+        市价单即时成交（被拒绝时抛出 PaperTradingError）；限价/触发单先按
+        当前价尝试撮合，未成交则挂单等待后续行情。
+        """
+        if order_type not in ORDER_TYPES:
+            raise PaperTradingError(f"不支持的订单类型: {order_type}")
+        if order_type == "limit" and not limit_price:
+            raise PaperTradingError("限价单必须指定 limit_price")
+        if order_type == "stop" and not stop_price:
+            raise PaperTradingError("触发单必须指定 stop_price")
+
+        if market:
+            market = market.upper()
+            normalized_code = code
+        else:
+            market, normalized_code = detect_market_and_code(code)
+        currency = CURRENCY_BY_MARKET.get(market, "CNY")
+
+        await self.get_or_create_account(user_id)
+
+        key = (market, normalized_code)
+        price = (await get_last_prices(self.db, [key]))[key]
+        if order_type == "market" and price is None:
+            raise PaperTradingError(f"无法获取股票 {normalized_code} ({market}) 的最新价格")
+
+        now = _now_iso()
+        order: Dict[str, Any] = {
+            "user_id": user_id,
+            "code": normalized_code,
+            "market": market,
+            "currency": currency,
+            "side": side,
+            "order_type": order_type,
+            "quantity": int(quantity),
+            "limit_price": limit_price if order_type != "market" else None,
+            "stop_price": stop_price if order_type == "stop" else None,
+            # 市价单直接以已认领状态写入
+            "status": "filling" if order_type == "market" else "open",
+            "created_at": now,
+            "updated_at": now,
+        }
+        if analysis_id:
+            order["analysis_id"] = analysis_id
+
+        result = await self.db["paper_orders"].insert_one(order)
+        order["_id"] = result.inserted_id
+
+        if order_type == "market":
+            await self._execute_fill(order, price)
+        elif price is not None:
+            await self._try_match(order, price, raise_on_reject=True)
+        return order
+
+    async def cancel_order(self, user_id: str, order_id: str) -> Dict[str, Any]:
+        """撤销挂单（仅 open 状态可撤）"""
+        try:
+            oid = ObjectId(order_id)
+        except Exception:
+            raise PaperTradingError(f"无效的订单ID: {order_id}")
+
+        now = _now_iso()
+        order = await self.db["paper_orders"].find_one_and_update(
+            {"_id": oid, "user_id": user_id, "status": "open"},
+            {"$set": {"status": "cancelled", "cancelled_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if order is None:
+            raise PaperTradingError("订单不存在或已成交/撤销")
+        return order
+
+    # ------------------------------------------------------------------ 撮合
+
+    async def match_open_orders(
+        self,
+        user_id: Optional[str] = None,
+        prices: Optional[Dict[PriceKey, Any]] = None,
+        market: Optional[str] = None,
+    ) -> int:
+        """
+        用最新行情撮合挂单
+
+        Args:
+            user_id: 只撮合该用户的挂单
+            prices: 已有行情 {(market, code): 价格}（如行情入库批次）；
+                不传则为挂单标的批量查询一次
+            market: 只撮合该市场的挂单
+
+        Returns:
+            成交笔数
+        """
+        await self.recover_stale_fills(user_id=user_id)
+
+        query: Dict[str, Any] = {"status": "open"}
+        if user_id:
+            query["user_id"] = user_id
+        if market:
+            query["market"] = market
+
+        orders = await self.db["paper_orders"].find(query).to_list(None)
+        if not orders:
+            return 0
+        if prices is None:
+            prices = await get_last_prices(self.db, [(o["market"], o["code"]) for o in orders])
+
+        filled = 0
+        for order in orders:
+            price = parse_price(prices.get((order["market"], order["code"])))
+            if price is None:
+                continue
+            try:
+                if await self._try_match(order, price):
+                    filled += 1
+            except Exception as e:
+                logger.error(f"❌ 挂单撮合失败 order={order['_id']}: {e}")
+        if filled:
+            logger.info(f"📈 模拟交易挂单成交 {filled} 笔")
+        return filled
+
+    async def _try_match(
+        self, order: Dict[str, Any], price: float, raise_on_reject: bool = False
+    ) -> bool:
+        """按最新价撮合单个挂单，成交返回 True"""
+        triggered, fill_price = evaluate_order(order, price)
+        orders = self.db["paper_orders"]
+
+        if order.get("order_type") == "stop" and triggered and not order.get("triggered"):
+            now = _now_iso()
+            await orders.update_one(
+                {"_id": order["_id"], "status": "open"},
+                {"$set": {"triggered": True, "triggered_at": now, "updated_at": now}},
+            )
+            order["triggered"] = True
+        if fill_price is None:
+            return False
+
+        claimed = await orders.find_one_and_update(
+            {"_id": order["_id"], "status": "open"},
+            {"$set": {"status": "filling", "updated_at": _now_iso()}},
+        )
+        if claimed is None:
+            # 已被其他撮合方认领或已撤单
+            return False
+        order["status"] = "filling"
+
+        try:
+            await self._execute_fill(order, fill_price)
+        except PaperTradingError as e:
+            if raise_on_reject:
+                raise
+            logger.info(f"⚠️ 挂单成交被拒绝 order={order['_id']}: {e}")
+            return False
+        return True
+
+    # ------------------------------------------------------------------ 成交
+
+    async def _execute_fill(self, order: Dict[str, Any], price: float) -> None:
+        """对已认领（filling）的订单执行成交"""
+        market = order["market"]
+        side = order["side"]
+        qty = int(order["quantity"])
+
+        notional = round(price * qty, 2)
+        rules = await self.get_market_rules(market)
+        commission = calculate_commission(market, side, notional, rules) if rules else 0.0
+        now = _now_iso()
+
+        try:
+            if side == "buy":
+                realized_pnl = 0.0
+                await self._apply_buy(order, price, notional, commission, now)
+            else:
+                realized_pnl = await self._apply_sell(order, price, notional, commission, rules, now)
+        except PaperTradingError as e:
+            await self._finish_order(order, "rejected", reject_reason=str(e))
+            raise
+        except Exception as e:
+            await self._finish_order(order, "rejected", reject_reason=f"成交失败: {e}")
+            raise
+
+        # 成交记录先于订单终态写入：中断后恢复流程据此判定已成交
+        await self._complete_fill(order, price, notional, commission, realized_pnl, now)
+
+    async def _complete_fill(
+        self,
+        order: Dict[str, Any],
+        price: float,
+        amount: float,
+        commission: float,
+        realized_pnl: float,
+        now: str,
+        record_trade: bool = True,
+    ) -> None:
+        """写入成交记录、清除进度标记，订单标记为 filled"""
+        if record_trade:
+            trade_doc = {
+                "user_id": order["user_id"],
+                "order_id": str(order["_id"]),
+                "code": order["code"],
+                "market": order["market"],
+                "currency": order["currency"],
+                "side": order["side"],
+                "quantity": int(order["quantity"]),
+                "price": price,
+                "amount": amount,
+                "commission": commission,
+                "pnl": realized_pnl,
+                "timestamp": now,
+            }
+            if order.get("analysis_id"):
+                trade_doc["analysis_id"] = order["analysis_id"]
+            await self.db["paper_trades"].insert_one(trade_doc)
+
+        await self._clear_pending(order)
+        await self._finish_order(
+            order,
+            "filled",
+            price=price,
+            amount=amount,
+            commission=commission,
+            filled_at=now,
+        )
+
+    async def _clear_pending(self, order: Dict[str, Any]) -> None:
+        key = _pending_key(order)
+        unset = {"$unset": {key: ""}}
+        await self.db["paper_accounts"].update_one(
+            {"user_id": order["user_id"], key: {"$exists": True}}, unset
+        )
+        await self.db["paper_positions"].update_one(
+            {"user_id": order["user_id"], "code": order["code"], key: {"$exists": True}}, unset
+        )
+
+    async def _apply_buy(
+        self, order: Dict[str, Any], price: float, amount: float, commission: float, now: str
+    ) -> None:
+        db = self.db
+        user_id, code, market = order["user_id"], order["code"], order["market"]
+        currency = order["currency"]
+        qty = int(order["quantity"])
+        total_cost = round(amount + commission, 2)
+        key = _pending_key(order)
+
+        # 1. 条件扣款：余额不足时不匹配任何文档
+        debit = await db["paper_accounts"].update_one(
+            {"user_id": user_id, f"cash.{currency}": {"$gte": total_cost}},
+            {
+                "$inc": {f"cash.{currency}": -total_cost},
+                "$set": {
+                    "updated_at": now,
+                    key: {"price": price, "amount": amount, "commission": commission},
+                },
+            },
+        )
+        if debit.modified_count == 0:
+            acc = await db["paper_accounts"].find_one({"user_id": user_id})
+            cash = (acc or {}).get("cash") or {}
+            available = float(cash.get(currency, 0.0)) if isinstance(cash, dict) else 0.0
+            raise PaperTradingError(
+                f"可用{currency}不足：需要 {total_cost:.2f}，可用 {available:.2f}"
+            )
+
+        # 2. 持仓：管道更新在服务端按更新前的数量和成本计算加权平均成本
+        old_qty = {"$ifNull": ["$quantity", 0]}
+        old_available = {"$ifNull": ["$available_qty", 0]}
+        try:
+            await db["paper_positions"].update_one(
+                {"user_id": user_id, "code": code},
+                [
+                    {
+                        "$set": {
+                            "market": market,
+                            "currency": currency,
+                            "avg_cost": {
+                                "$round": [
+                                    {
+                                        "$divide": [
+                                            {
+                                                "$add": [
+                                                    {"$multiply": [{"$ifNull": ["$avg_cost", 0]}, old_qty]},
+                                                    price * qty,
+                                                ]
+                                            },
+                                            {"$add": [old_qty, qty]},
+                                        ]
+                                    },
+                                    4,
+                                ]
+                            },
+                            "quantity": {"$add": [old_qty, qty]},
+                            # A股T+1：今天买入的不可用；港股/美股T+0
+                            "available_qty": old_available
+                            if market == "CN"
+                            else {"$add": [old_available, qty]},
+                            "frozen_qty": {"$ifNull": ["$frozen_qty", 0]},
+                            "updated_at": now,
+                            key: True,
+                        }
+                    }
+                ],
+                upsert=True,
+            )
+        except Exception:
+            # 补偿：退回扣款（以标记为条件，与恢复流程互斥）
+            await self._refund_buy(order, total_cost)
+            raise
+
+    async def _refund_buy(self, order: Dict[str, Any], total_cost: float) -> None:
+        key = _pending_key(order)
+        await self.db["paper_accounts"].update_one(
+            {"user_id": order["user_id"], key: {"$exists": True}},
+            {"$inc": {f"cash.{order['currency']}": total_cost}, "$unset": {key: ""}},
+        )
+
+    async def _apply_sell(
+        self,
+        order: Dict[str, Any],
+        price: float,
+        amount: float,
+        commission: float,
+        rules: Optional[Dict[str, Any]],
+        now: str,
+    ) -> float:
+        db = self.db
+        user_id, code, market = order["user_id"], order["code"], order["market"]
+        currency = order["currency"]
+        qty = int(order["quantity"])
+        key = _pending_key(order)
+        locked = await self._today_locked_quantity(user_id, code, market, rules)
+
+        # 1. 条件扣减持仓（T+1 锁定部分不可卖），返回扣减前的持仓；
+        #    标记记下 available_qty 实际扣减量（$max 截断后可能小于 qty）
+        available = {"$ifNull": ["$available_qty", "$quantity"]}
+        pos = await db["paper_positions"].find_one_and_update(
+            {"user_id": user_id, "code": code, "quantity": {"$gte": qty + locked}},
+            [
+                {
+                    "$set": {
+                        "quantity": {"$subtract": ["$quantity", qty]},
+                        "available_qty": {"$max": [0, {"$subtract": [available, qty]}]},
+                        "updated_at": now,
+                        key: {"available_qty": {"$min": [qty, {"$max": [0, available]}]}},
+                    }
+                }
+            ],
+            return_document=ReturnDocument.BEFORE,
+        )
+        if pos is None:
+            current = await db["paper_positions"].find_one({"user_id": user_id, "code": code})
+            if not current:
+                raise PaperTradingError(f"没有持仓：无法卖出 {code}")
+            available = max(0, int(current.get("quantity", 0)) - locked)
+            raise PaperTradingError(f"可用持仓不足：需要 {qty}，可用 {available}")
+
+        realized_pnl = round((price - float(pos.get("avg_cost", 0.0))) * qty, 2)
+
+        # 2. 卖出收入（扣除手续费）与已实现盈亏入账
+        try:
+            await db["paper_accounts"].update_one(
+                {"user_id": user_id},
+                {
+                    "$inc": {
+                        f"cash.{currency}": amount - commission,
+                        f"realized_pnl.{currency}": realized_pnl,
+                    },
+                    "$set": {
+                        "updated_at": now,
+                        key: {
+                            "price": price,
+                            "amount": amount,
+                            "commission": commission,
+                            "pnl": realized_pnl,
+                        },
+                    },
+                },
+            )
+        except Exception:
+            # 补偿：按扣减量加回持仓（与第 1 步的 $max 截断对应），不覆盖期间并发成交的结果
+            available_before = int(pos.get("available_qty", pos.get("quantity", 0)))
+            await self._restore_sold(order, pos["_id"], max(0, min(qty, available_before)))
+            raise
+
+        # 3. 清仓后删除持仓（条件删除，避免误删并发买入后的持仓）
+        if int(pos.get("quantity", 0)) - qty <= 0:
+            await db["paper_positions"].delete_one({"_id": pos["_id"], "quantity": {"$lte": 0}})
+        return realized_pnl
+
+    async def _restore_sold(self, order: Dict[str, Any], position_id: Any, available_qty: int) -> None:
+        key = _pending_key(order)
+        await self.db["paper_positions"].update_one(
+            {"_id": position_id, key: {"$exists": True}},
+            {
+                "$inc": {"quantity": int(order["quantity"]), "available_qty": available_qty},
+                "$unset": {key: ""},
+            },
+        )
+
+    # ------------------------------------------------------------------ 恢复
+
+    async def recover_stale_fills(
+        self, user_id: Optional[str] = None, stale_seconds: int = STALE_FILL_SECONDS
+    ) -> int:
+        """
+        收尾撮合进程中断后停留在 filling 的订单
+
+        超过 ``stale_seconds`` 未更新的 filling 订单按成交记录与 pending_fills
+        标记判断进度：
+        - 已写成交记录，或资金/持仓两步都已完成：补写成交记录，订单标记为 filled
+        - 只完成第一步：按标记回滚（以标记为条件，重复执行不会重复回滚），
+          订单标记为 rejected
+        - 尚未执行任何一步：订单标记为 rejected
+
+        Returns:
+            收尾的订单数
+        """
+        cutoff = (datetime.utcnow() - timedelta(seconds=stale_seconds)).isoformat()
+        query: Dict[str, Any] = {"status": "filling", "updated_at": {"$lt": cutoff}}
+        if user_id:
+            query["user_id"] = user_id
+
+        orders = self.db["paper_orders"]
+        recovered = 0
+        for stale in await orders.find(query).to_list(None):
+            # 刷新 updated_at 认领，并发的恢复方只有一个成功
+            order = await orders.find_one_and_update(
+                {"_id": stale["_id"], "status": "filling", "updated_at": stale["updated_at"]},
+                {"$set": {"updated_at": _now_iso()}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if order is None:
+                continue
+            try:
+                await self._recover_fill(order)
+                recovered += 1
+            except Exception as e:
+                logger.error(f"❌ 收尾中断的成交失败 order={order['_id']}: {e}")
+        if recovered:
+            logger.warning(f"⚠️ 已收尾 {recovered} 笔中断的模拟交易成交")
+        return recovered
+
+    async def _recover_fill(self, order: Dict[str, Any]) -> None:
+        db = self.db
+        oid = str(order["_id"])
+        key = _pending_key(order)
+        user_id, code = order["user_id"], order["code"]
+
+        trade = await db["paper_trades"].find_one({"order_id": oid})
+        if trade is not None:
+            await self._complete_fill(
+                order,
+                trade["price"],
+                trade["amount"],
+                trade["commission"],
+                trade["pnl"],
+                trade["timestamp"],
+                record_trade=False,
+            )
+            return
+
+        account = await db["paper_accounts"].find_one({"user_id": user_id, key: {"$exists": True}})
+        position = await db["paper_positions"].find_one(
+            {"user_id": user_id, "code": code, key: {"$exists": True}}
+        )
+        fill = (account or {}).get("pending_fills", {}).get(oid)
+
+        if order["side"] == "buy":
+            if fill and position:
+                await self._complete_fill(
+                    order, fill["price"], fill["amount"], fill["commission"], 0.0, _now_iso()
+                )
+                return
+            if fill:
+                await self._refund_buy(order, round(fill["amount"] + fill["commission"], 2))
+        else:
+            # 卖出第二步（入账）已完成即视为成交
+            if fill:
+                await db["paper_positions"].delete_one(
+                    {"user_id": user_id, "code": code, "quantity": {"$lte": 0}}
+                )
+                await self._complete_fill(
+                    order, fill["price"], fill["amount"], fill["commission"], fill["pnl"], _now_iso()
+                )
+                return
+            if position:
+                await self._restore_sold(order, position["_id"], position["pending_fills"][oid]["available_qty"])
+
+        await self._finish_order(order, "rejected", reject_reason="成交中断，已回滚")
+
+    async def _today_locked_quantity(
+        self, user_id: str, code: str, market: str, rules: Optional[Dict[str, Any]]
+    ) -> int:
+        """A股T+1：今天买入、尚不可卖出的数量"""
+        if market != "CN" or not rules or rules.get("t_plus", 0) <= 0:
+            return 0
+
+        today = datetime.utcnow().date().isoformat()
+        pipeline = [
+            {
+                "$match": {
+                    "user_id": user_id,
+                    "code": code,
+                    "side": "buy",
+                    "timestamp": {"$gte": today},
+                }
+            },
+            {"$group": {"_id": None, "total": {"$sum": "$quantity"}}},
+        ]
+        today_buy = await self.db["paper_trades"].aggregate(pipeline).to_list(1)
+        return int(today_buy[0]["total"]) if today_buy else 0
+
+    async def _finish_order(self, order: Dict[str, Any], status: str, **fields: Any) -> None:
+        """订单从 filling 转为终态"""
+        fields.update({"status": status, "updated_at": _now_iso()})
+        await self.db["paper_orders"].update_one(
+            {"_id": order["_id"], "status": "filling"}, {"$set": fields}
+        )
+        order.update(fields)
+
+
+_engine: Optional[PaperTradingEngine] = None
+
+
+def get_paper_trading_engine() -> PaperTradingEngine:
+    """获取模拟交易引擎实例"""
+    global _engine
+    if _engine is None:
+        _engine = PaperTradingEngine()
+    return _engine
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""模拟交易批量行情查询
+
+账户估值和挂单撮合需要一次拿到所有持仓/挂单标的的最新价：
+- A股：market_quotes 一次 ``$in`` 查询，缺失的再用 stock_basic_info 一次补齐
+- 港股/美股：ForeignStockService 并发查询（限制并发数）
+"""
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (market, code)
+PriceKey = Tuple[str, str]
+
+FOREIGN_QUOTE_CONCURRENCY = 8
+
+
+def parse_price(value) -> Optional[float]:
+    """转为正数价格，无效时返回 None"""
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price > 0 else None
+
+
+async def _get_cn_prices(db, codes: List[str]) -> Dict[str, float]:
+    prices: Dict[str, float] = {}
+    if not codes:
+        return prices
+
+    # 1. market_quotes（code/symbol 均为6位代码）
+    cursor = db["market_quotes"].find(
+        {"$or": [{"code": {"$in": codes}}, {"symbol": {"$in": codes}}]},
+        {"_id": 0, "code": 1, "symbol": 1, "close": 1},
+    )
+    wanted = set(codes)
+    for doc in await cursor.to_list(None):
+        price = parse_price(doc.get("close"))
+        code = doc.get("code") or doc.get("symbol")
+        if price is not None and code in wanted:
+            prices.setdefault(code, price)
+
+    # 2. 缺失的回退到 stock_basic_info.current_price
+    missing = [c for c in codes if c not in prices]
+    if missing:
+        cursor = db["stock_basic_info"].find(
+            {"$or": [{"code": {"$in": missing}}, {"symbol": {"$in": missing}}]},
+            {"_id": 0, "code": 1, "symbol": 1, "current_price": 1},
+        )
+        for doc in await cursor.to_list(None):
+            price = parse_price(doc.get("current_price"))
+            code = doc.get("code") or doc.get("symbol")
+            if price is not None and code in wanted:
+                prices.setdefault(code, price)
+
+    for code in codes:
+        if code not in prices:
+            logger.warning(f"⚠️ 无法从数据库获取A股价格: {code}")
+    return prices
+
+
+async def _get_foreign_prices(db, keys: List[PriceKey]) -> Dict[PriceKey, float]:
+    prices: Dict[PriceKey, float] = {}
+    if not keys:
+        return prices
+
+    from app.services.foreign_stock_service import ForeignStockService
+
+    service = ForeignStockService(db=db)
+    semaphore = asyncio.Semaphore(FOREIGN_QUOTE_CONCURRENCY)
+
+    async def fetch(key: PriceKey) -> None:
+        market, code = key
+        async with semaphore:
+            try:
+                quote = await service.get_quote(market, code, force_refresh=False)
+            except Exception as e:
+                logger.error(f"❌ 获取{market}股价格失败 {code}: {e}")
+                return
+        if quote:
+            price = parse_price(
+                quote.get("price") or quote.get("current_price") or quote.get("close")
+            )
+            if price is not None:
+                prices[key] = price
+
+    await asyncio.gather(*(fetch(key) for key in keys))
+    return prices
+
+
+async def get_last_prices(db, keys: Iterable[PriceKey]) -> Dict[PriceKey, Optional[float]]:
+    """
+    批量获取最新价
+
+    Args:
+        db: MongoDB 数据库实例
+        keys: (market, code) 列表，可重复
+
+    Returns:
+        {(market, code): 最新价或 None}
+    """
+    unique = list(dict.fromkeys(keys))
+    cn_codes = [code for market, code in unique if market == "CN"]
+    foreign = [(market, code) for market, code in unique if market in ("HK", "US")]
+
+    cn_prices, foreign_prices = await asyncio.gather(
+        _get_cn_prices(db, cn_codes), _get_foreign_prices(db, foreign)
+    )
+
+    result: Dict[PriceKey, Optional[float]] = {}
+    for market, code in unique:
+        if market == "CN":
+            result[(market, code)] = cn_prices.get(code)
+        else:
+            result[(market, code)] = foreign_prices.get((market, code))
+    return result
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+认证主体缓存
+
+get_current_user 在每个请求上都要把 JWT 的 sub 解析成用户信息。这里在进程内
+按用户名缓存解析结果（短 TTL + LRU），命中时不访问数据库。
+
+撤销依靠每个用户的 token_version 计数器：
+- Access/Refresh Token 签发时写入当时的版本号（ver 声明）
+- 登出、改密、重置密码、禁用用户、角色变化时版本号 +1
+  （见 UserService.bump_token_version），版本号低于当前值的 Token 一律拒绝
+- 版本号变化后本进程立即失效缓存，并通过 Redis 频道通知其它进程；Redis 不可用时
+  其它进程最迟在 PRINCIPAL_CACHE_TTL_SECONDS 后重新读库
+
+指标：
+- principal_cache_requests_total{result=hit|miss|revoked}
+- token_revocation_latency{scope=local|remote}：版本号变化到本进程失效缓存的耗时
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.services.metrics_collector import MetricType, get_metrics_collector
+
+logger = logging.getLogger("webapi")
+
+# 跨进程失效通知频道
+INVALIDATION_CHANNEL = "auth:principal_invalidate"
+
+
+@dataclass
+class CachedPrincipal:
+    """缓存的认证主体"""
+
+    principal: Dict[str, Any]
+    token_version: int
+    expires_at: float
+
+
+class PrincipalCache:
+    """认证主体缓存（进程内单例，见 get_principal_cache）"""
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.PRINCIPAL_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or settings.PRINCIPAL_CACHE_MAX_ENTRIES
+        self._entries: "OrderedDict[str, CachedPrincipal]" = OrderedDict()
+        # 用于忽略本进程自己发出的通知
+        self.instance_id = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "revoked": 0, "invalidations": 0}
+
+    # ==================== 查询 ====================
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PRINCIPAL_CACHE_ENABLED and self.ttl > 0
+
+    def _record(self, result: str) -> None:
+        self.stats[{"hit": "hits", "miss": "misses", "revoked": "revoked"}[result]] += 1
+        get_metrics_collector().observe(
+            MetricType.PRINCIPAL_CACHE_REQUESTS, 1, tags={"result": result}
+        )
+
+    def get(self, username: str, token_version: int = 0) -> Optional[CachedPrincipal]:
+        """
+        查询缓存
+
+        Args:
+            username: 用户名（JWT sub）
+            token_version: Token 中的版本号；高于缓存版本说明缓存已过时，按未命中处理
+
+        Returns:
+            命中时返回缓存项，否则返回 None
+        """
+        if not self.enabled:
+            return None
+        self._ensure_listener()
+
+        entry = self._entries.get(username)
+        if entry is None or entry.expires_at <= time.monotonic() or token_version > entry.token_version:
+            if entry is not None:
+                self._entries.pop(username, None)
+            self._record("miss")
+            return None
+
+        self._entries.move_to_end(username)
+        self._record("hit")
+        return entry
+
+    def put(self, username: str, principal: Dict[str, Any], token_version: int) -> CachedPrincipal:
+        """写入缓存（禁用时只返回缓存项，不保存）"""
+        entry = CachedPrincipal(
+            principal=principal,
+            token_version=token_version,
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if self.enabled:
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def record_revoked(self) -> None:
+        """记录一次因版本号过低被拒绝的请求"""
+        self._record("revoked")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": len(self._entries),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+        }
+
+    # ==================== 失效 ====================
+
+    def _evict(self, username: str, changed_at: Optional[float], scope: str) -> None:
+        self._entries.pop(username, None)
+        self.stats["invalidations"] += 1
+        if changed_at is not None:
+            get_metrics_collector().observe(
+                MetricType.TOKEN_REVOCATION_LATENCY,
+                max(0.0, time.time() - changed_at),
+                tags={"scope": scope},
+            )
+
+    async def invalidate(self, username: str, token_version: Optional[int] = None) -> None:
+        """
+        失效某个用户的缓存并通知其它进程
+
+        Args:
+            username: 用户名
+            token_version: 新的版本号（撤销时传入，用于统计撤销耗时）
+        """
+        changed_at = time.time()
+        self._evict(username, changed_at if token_version is not None else None, "local")
+
+        redis = get_redis()
+        if redis is None:
+            return
+        message = {
+            "username": username,
+            "token_version": token_version,
+            "changed_at": changed_at,
+            "origin": self.instance_id,
+        }
+        try:
+            await redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"⚠️ 发布认证缓存失效通知失败（其它进程将在TTL后刷新）: {e}")
+
+    def handle_message(self, data: Any) -> None:
+        """处理其它进程发来的失效通知"""
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid principal invalidation message: {data}")
+            return
+        if message.get("origin") == self.instance_id or not message.get("username"):
+            return
+        changed_at = message.get("changed_at") if message.get("token_version") is not None else None
+        self._evict(message["username"], changed_at, "remote")
+
+    # ==================== 跨进程通知 ====================
+
+    def _ensure_listener(self) -> None:
+        """按需启动失效通知订阅任务（仅在事件循环中生效）"""
+        if self._listener is not None and not self._listener.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if get_redis() is None:
+            return
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        retry_delay = 1.0
+        while True:
+            redis = get_redis()
+            if redis is None:
+                return
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                retry_delay = 1.0
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self.handle_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 订阅中断期间可能漏掉通知，清空缓存保证不放过已撤销的 Token
+                self._entries.clear()
+                logger.warning(f"⚠️ 认证缓存失效通知订阅中断，{retry_delay:.0f}秒后重试: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    async def stop(self) -> None:
+        """停止订阅任务"""
+        if self._listener is not None and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._listener = None
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_principal_cache: Optional[PrincipalCache] = None
+
+
+def get_principal_cache() -> PrincipalCache:
+    """获取认证主体缓存单例"""
+    global _principal_cache
+    if _principal_cache is None:
+        _principal_cache = PrincipalCache()
+    return _principal_cache
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+任务进度与 LLM token 流的 Redis PubSub 转发
+
+分析线程把 token 分片发布到任务进度频道 ``task_progress:{task_id}``，
+SSE 和 WebSocket 端点共用本模块读取并转发：
+
+- install_redis_token_sink()：为分析线程安装同步 Redis 发布端
+- read_task_messages()：一次取出订阅上已到达的全部消息（有上限）；
+  客户端消费慢时每轮拿到更大的一批，消息不会在 Redis 端持续堆积
+- coalesce_messages()：同一智能体同一次调用的 token 分片合并为一条，
+  慢客户端收到的是更少、更大的增量，服务端不为客户端缓存完整输出
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger("webapi.stream_relay")
+
+# 每轮最多读取的消息数
+MAX_MESSAGES_PER_READ = 200
+
+
+def install_redis_token_sink() -> bool:
+    """为分析线程安装 Redis token 流发布端（同步客户端，在工作线程中调用）"""
+    try:
+        import redis
+
+        from app.core.config import settings
+        from tradingagents.llm_adapters.token_stream import set_token_sink
+
+        client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=1,
+            socket_connect_timeout=1,
+            decode_responses=True,
+        )
+        set_token_sink(client.publish)
+        logger.info("✅ LLM token 流发布端已安装")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ LLM token 流发布端安装失败，仅推送进度: {e}")
+        return False
+
+
+def coalesce_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    合并 token 分片
+
+    同一 (agent, round, call) 的 token 消息按到达顺序拼接为一条（位置取第一条），
+    其他消息原样保留顺序。
+    """
+    result: List[Dict[str, Any]] = []
+    streams: Dict[Tuple[Any, Any, Any], Dict[str, Any]] = {}
+    for message in messages:
+        if message.get("type") != "token":
+            result.append(message)
+            continue
+        key = (message.get("agent"), message.get("round"), message.get("call"))
+        merged = streams.get(key)
+        if merged is None or merged.get("done"):
+            merged = dict(message)
+            streams[key] = merged
+            result.append(merged)
+            continue
+        merged["text"] = (merged.get("text") or "") + (message.get("text") or "")
+        merged["seq"] = message.get("seq")
+        merged["done"] = bool(message.get("done"))
+        merged["timestamp"] = message.get("timestamp")
+    return result
+
+
+async def read_task_messages(
+    pubsub, timeout: float, max_messages: int = MAX_MESSAGES_PER_READ
+) -> List[Dict[str, Any]]:
+    """
+    读取订阅上的消息：最多等待 timeout 秒拿到第一条，再取出已到达的其余消息
+
+    Returns:
+        合并后的消息列表；超时无消息时返回空列表
+    """
+    raw: List[Dict[str, Any]] = []
+    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+    while message is not None:
+        if message.get("type") == "message":
+            try:
+                raw.append(json.loads(message["data"]))
+            except (TypeError, ValueError):
+                logger.warning(f"Invalid JSON in progress message: {message.get('data')}")
+        if len(raw) >= max_messages:
+            break
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.0)
+    return coalesce_messages(raw)
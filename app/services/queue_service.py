@@ -387,6 +387,14 @@ class QueueService:
                 mapping={"status": "cancelled", "cancelled_at": str(int(time.time()))},
             )
 
+            # 中止本进程内该任务的在途LLM调用
+            try:
+                from tradingagents.llm_adapters.invocation import cancel_task_invocations
+
+                cancel_task_invocations(task_id)
+            except Exception as e:
+                logger.debug(f"取消LLM调用失败: {e}")
+
             logger.info(f"任务已取消: {task_id}")
             return True
 
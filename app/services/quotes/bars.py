@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+"""分钟K线聚合模块
+
+把每轮采集到的行情快照（仅价格变化的股票）聚合为1分钟K线，按
+股票+交易日分桶追加写入 `market_quotes_1m`：
+
+- 当前分钟的K线保存在内存中，进入下一分钟（或休市时）才定型写库，
+  已写入的K线不再修改（只 $push 追加）
+- 成交量/成交额由快照中的当日累计值求差得到，当日首个快照没有基准时为 None
+- 桶文档带 expire_at，由 TTL 索引按 QUOTES_MINUTE_BARS_RETENTION_DAYS 清理
+- 要求采集间隔 QUOTES_INGEST_INTERVAL_SECONDS <= 60：间隔更长时每根K线只有一个
+  快照，成交量增量跨越多分钟，此时不记录分钟K线（启动时告警一次）
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.database import get_mongo_db
+
+from .utils import normalize_stock_code
+
+logger = logging.getLogger(__name__)
+
+# 分钟K线允许的最大采集间隔（秒）
+MAX_BAR_SAMPLING_SECONDS = 60
+
+
+class MinuteBarMixin:
+    """分钟K线聚合混入类"""
+
+    def __init__(self):
+        self.bars_collection_name = "market_quotes_1m"
+        # code -> 当前分钟尚未定型的K线
+        self._pending_bars: Dict[str, Dict[str, Any]] = {}
+        # code -> (交易日, 累计成交量, 累计成交额)，用于求分钟增量
+        self._last_cumulative: Dict[str, Tuple[str, Optional[float], Optional[float]]] = {}
+        self._bar_interval_warned = False
+
+    def _minute_bars_active(self) -> bool:
+        """分钟K线是否启用（已开启且采集间隔不超过 MAX_BAR_SAMPLING_SECONDS）"""
+        if not settings.QUOTES_MINUTE_BARS_ENABLED:
+            return False
+        interval = settings.QUOTES_INGEST_INTERVAL_SECONDS
+        if interval > MAX_BAR_SAMPLING_SECONDS:
+            if not self._bar_interval_warned:
+                self._bar_interval_warned = True
+                logger.warning(
+                    f"⚠️ 采集间隔 {interval}s 超过 {MAX_BAR_SAMPLING_SECONDS}s，"
+                    f"无法聚合出有效的1分钟K线，已跳过分钟K线记录"
+                    f"（需要分钟K线请把 QUOTES_INGEST_INTERVAL_SECONDS 设为 <= {MAX_BAR_SAMPLING_SECONDS}）"
+                )
+            return False
+        return True
+
+    async def ensure_bar_indexes(self) -> None:
+        """确保分钟K线集合的索引存在"""
+        if not self._minute_bars_active():
+            return
+        db = get_mongo_db()
+        coll = db[self.bars_collection_name]
+        try:
+            await coll.create_index([("code", 1), ("trade_date", 1)], unique=True)
+            await coll.create_index("expire_at", expireAfterSeconds=0)
+        except Exception as e:
+            logger.warning(f"Failed to create minute bar indexes (ignored): {e}")
+
+    @staticmethod
+    def _delta(current: Optional[float], previous: Optional[float]) -> Optional[float]:
+        if current is None or previous is None or current < previous:
+            return None
+        return current - previous
+
+    @staticmethod
+    def _add(total: Optional[float], value: Optional[float]) -> Optional[float]:
+        if value is None:
+            return total
+        return value if total is None else total + value
+
+    def _aggregate_ticks(
+        self, quotes: Dict[str, Dict], trade_date: str, now: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        把一轮快照并入当前分钟K线
+
+        Args:
+            quotes: {6位代码: 行情}，只包含价格有变化的股票
+            trade_date: 交易日期
+            now: 快照时间
+
+        Returns:
+            本轮定型（进入新分钟）的K线列表
+        """
+        minute = now.replace(second=0, microsecond=0)
+        finalized = []
+
+        for code, q in quotes.items():
+            price = q.get("close")
+            if price is None:
+                continue
+
+            volume, amount = q.get("volume"), q.get("amount")
+            previous = self._last_cumulative.get(code)
+            if previous and previous[0] == trade_date:
+                d_volume = self._delta(volume, previous[1])
+                d_amount = self._delta(amount, previous[2])
+            else:
+                d_volume = d_amount = None
+            self._last_cumulative[code] = (trade_date, volume, amount)
+
+            bar = self._pending_bars.get(code)
+            if bar and (bar["t"] != minute or bar["trade_date"] != trade_date):
+                finalized.append(bar)
+                bar = None
+
+            if bar is None:
+                self._pending_bars[code] = {
+                    "code": code,
+                    "trade_date": trade_date,
+                    "t": minute,
+                    "open": price,
+                    "high": price,
+                    "low": price,
+                    "close": price,
+                    "volume": d_volume,
+                    "amount": d_amount,
+                }
+            else:
+                bar["high"] = max(bar["high"], price)
+                bar["low"] = min(bar["low"], price)
+                bar["close"] = price
+                bar["volume"] = self._add(bar["volume"], d_volume)
+                bar["amount"] = self._add(bar["amount"], d_amount)
+
+        # 本轮没有新快照、但已经过了所在分钟的K线也定型
+        for code in [c for c, b in self._pending_bars.items() if b["t"] < minute and c not in quotes]:
+            finalized.append(self._pending_bars.pop(code))
+
+        return finalized
+
+    def _expire_at(self, trade_date: str) -> Optional[datetime]:
+        days = settings.QUOTES_MINUTE_BARS_RETENTION_DAYS
+        if days <= 0:
+            return None
+        day = datetime.strptime(trade_date, "%Y%m%d").replace(tzinfo=self.tz)
+        return day + timedelta(days=days + 1)
+
+    async def _append_minute_bars(self, bars: List[Dict[str, Any]]) -> int:
+        """按 股票+交易日 分桶追加写入已定型的K线，返回写入条数"""
+        if not bars:
+            return 0
+
+        buckets: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for bar in bars:
+            buckets.setdefault((bar["code"], bar["trade_date"]), []).append(
+                {k: bar[k] for k in ("t", "open", "high", "low", "close", "volume", "amount")}
+            )
+
+        now = datetime.now(self.tz)
+        ops = []
+        for (code, trade_date), items in buckets.items():
+            update: Dict[str, Any] = {
+                "$push": {"bars": {"$each": items}},
+                "$inc": {"count": len(items)},
+                "$set": {"updated_at": now},
+            }
+            expire_at = self._expire_at(trade_date)
+            if expire_at is not None:
+                update["$setOnInsert"] = {"expire_at": expire_at}
+            ops.append(UpdateOne({"code": code, "trade_date": trade_date}, update, upsert=True))
+
+        db = get_mongo_db()
+        await db[self.bars_collection_name].bulk_write(ops, ordered=False)
+        logger.debug(f"Minute bars appended: bars={len(bars)}, buckets={len(ops)}")
+        return len(bars)
+
+    async def _record_minute_bars(
+        self, quotes: Dict[str, Dict], trade_date: str, now: Optional[datetime] = None
+    ) -> None:
+        """把本轮变化的行情并入分钟K线（失败不影响行情入库）"""
+        if not self._minute_bars_active():
+            return
+        try:
+            finalized = self._aggregate_ticks(quotes, trade_date, now or datetime.now(self.tz))
+            await self._append_minute_bars(finalized)
+        except Exception as e:
+            logger.warning(f"Minute bar aggregation failed (ignored): {e}")
+
+    async def flush_minute_bars(self) -> int:
+        """把内存中所有未定型的K线写库（休市或停止服务时调用）"""
+        if not self._pending_bars:
+            return 0
+        bars = list(self._pending_bars.values())
+        self._pending_bars.clear()
+        try:
+            return await self._append_minute_bars(bars)
+        except Exception as e:
+            logger.warning(f"Failed to flush minute bars (ignored): {e}")
+            return 0
+
+    async def get_minute_bars(
+        self, code: str, trade_date: Optional[str] = None, limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        查询某只股票某个交易日的1分钟K线
+
+        Args:
+            code: 股票代码
+            trade_date: 交易日期（YYYYMMDD），默认最近一个有K线的交易日
+            limit: 只返回最后 N 条
+
+        Returns:
+            已定型的K线列表（按时间升序），当前分钟在进入下一分钟后才可见
+        """
+        code6 = normalize_stock_code(code)
+        query: Dict[str, Any] = {"code": code6}
+        if trade_date:
+            query["trade_date"] = trade_date
+
+        db = get_mongo_db()
+        cursor = (
+            db[self.bars_collection_name]
+            .find(query, {"_id": 0, "trade_date": 1, "bars": 1})
+            .sort("trade_date", -1)
+            .limit(1)
+        )
+        docs = await cursor.to_list(length=1)
+        bars = list(docs[0].get("bars") or []) if docs else []
+        bars = bars[-limit:] if limit else bars
+
+        # MongoDB 返回 UTC 时间（无时区），转换为本地时区
+        for bar in bars:
+            t = bar.get("t")
+            if isinstance(t, datetime) and t.tzinfo is None:
+                bar["t"] = t.replace(tzinfo=timezone.utc).astimezone(self.tz)
+        return bars
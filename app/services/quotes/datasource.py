@@ -154,9 +154,11 @@ class DataSourceMixin:
         """
         from datetime import time as dtime
 
+        from app.utils.trading_time import is_trading_day
+
         now = now or datetime.now(self.tz)
-        # 工作日 Mon-Fri
-        if now.weekday() > 4:
+        # 交易日（排除周末和节假日）
+        if not is_trading_day(now):
             return False
 
         t = now.time()
@@ -5,7 +5,7 @@
 """
 
 import logging
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from datetime import datetime
 
 from pymongo import UpdateOne
@@ -21,9 +21,15 @@ logger = logging.getLogger(__name__)
 class IngestionMixin:
     """行情采集混入类"""
 
+    # 参与变化检测的字段（与 market_quotes 写入的字段一致）
+    SNAPSHOT_FIELDS = ("close", "pct_chg", "amount", "volume", "open", "high", "low", "pre_close")
+
     def __init__(self):
         self.collection_name = "market_quotes"
         self.status_collection_name = "quotes_ingestion_status"
+        # code -> 上次写入的行情指纹，用于跳过未变化的股票
+        self._last_snapshot: Dict[str, Tuple] = {}
+        self.write_stats = {"cycles": 0, "written": 0, "skipped_unchanged": 0}
 
     async def ensure_indexes(self) -> None:
         """确保必要的索引存在"""
@@ -34,6 +40,7 @@ class IngestionMixin:
             await coll.create_index("updated_at")
         except Exception as e:
             logger.warning(f"Failed to create indexes (ignored): {e}")
+        await self.ensure_bar_indexes()
 
     async def _record_sync_status(
         self,
@@ -135,18 +142,28 @@ class IngestionMixin:
         quotes_map: Dict[str, Dict],
         trade_date: str,
         source: Optional[str] = None
-    ) -> None:
+    ) -> Dict[str, Dict]:
         """
         批量插入或更新行情数据
 
+        与内存中上次写入的快照比较，只写入有变化的股票
+        （QUOTES_CHANGE_DETECTION_ENABLED=false 时每轮全量写入）。
+
         Args:
             quotes_map: 行情数据字典
             trade_date: 交易日期
             source: 数据源名称
+
+        Returns:
+            本次实际写入的行情 {6位代码: 行情}
         """
         db = get_mongo_db()
         coll = db[self.collection_name]
         ops = []
+        changed: Dict[str, Dict] = {}
+        fingerprints: Dict[str, Tuple] = {}
+        skipped = 0
+        detect_changes = settings.QUOTES_CHANGE_DETECTION_ENABLED
         updated_at = datetime.now(self.tz)
 
         for code, q in quotes_map.items():
@@ -157,6 +174,11 @@ class IngestionMixin:
             if not code6:
                 continue
 
+            fingerprint = tuple(q.get(f) for f in self.SNAPSHOT_FIELDS) + (trade_date,)
+            if detect_changes and self._last_snapshot.get(code6) == fingerprint:
+                skipped += 1
+                continue
+
             volume = q.get("volume")
             if code6 in ["300750", "000001", "600000"]:
                 logger.info(f"[Write market_quotes] {code6} - volume={volume}, amount={q.get('amount')}, source={source}")
@@ -181,17 +203,40 @@ class IngestionMixin:
                     upsert=True,
                 )
             )
+            changed[code6] = q
+            fingerprints[code6] = fingerprint
+
+        self.write_stats["cycles"] += 1
+        self.write_stats["skipped_unchanged"] += skipped
 
         if not ops:
-            logger.info("No data to write, skipping")
-            return
+            logger.info(f"No changed quotes to write (unchanged={skipped}), skipping")
+            return changed
 
         result = await coll.bulk_write(ops, ordered=False)
+        self._last_snapshot.update(fingerprints)
+        self.write_stats["written"] += len(ops)
         logger.info(
-            f"Quotes ingested: source={source}, matched={result.matched_count}, "
+            f"Quotes ingested: source={source}, changed={len(ops)}, unchanged={skipped}, "
+            f"matched={result.matched_count}, "
             f"upserted={len(result.upserted_ids) if result.upserted_ids else 0}, "
             f"modified={result.modified_count}"
         )
+        return changed
+
+    async def _match_paper_orders(self, quotes_map: Dict[str, Dict]) -> None:
+        """用本批A股行情撮合模拟交易挂单（失败不影响行情入库）"""
+        try:
+            from app.services.paper import get_paper_trading_engine
+
+            prices = {}
+            for code, q in quotes_map.items():
+                code6 = normalize_stock_code(code) if code else None
+                if code6:
+                    prices[("CN", code6)] = q.get("close")
+            await get_paper_trading_engine().match_open_orders(prices=prices, market="CN")
+        except Exception as e:
+            logger.warning(f"Paper order matching failed (ignored): {e}")
 
     async def _collection_empty(self) -> bool:
         """检查集合是否为空"""
@@ -231,6 +276,8 @@ class IngestionMixin:
         from app.services.data_sources.manager import DataSourceManager
 
         if not self._is_trading_time():
+            # 休市后把最后一分钟的K线写库
+            await self.flush_minute_bars()
             if settings.QUOTES_BACKFILL_ON_OFFHOURS:
                 await self.backfill_last_close_snapshot_if_needed()
             else:
@@ -276,8 +323,12 @@ class IngestionMixin:
             except Exception:
                 trade_date = datetime.now(self.tz).strftime("%Y%m%d")
 
-            # 入库
-            await self._bulk_upsert(quotes_map, trade_date, source_name)
+            # 入库（只写有变化的股票），变化的行情并入分钟K线
+            changed = await self._bulk_upsert(quotes_map, trade_date, source_name)
+            await self._record_minute_bars(changed, trade_date)
+
+            # 用本批行情撮合模拟交易挂单
+            await self._match_paper_orders(quotes_map)
 
             # 记录成功状态
             await self._record_sync_status(
@@ -5,6 +5,8 @@
 定时从数据源适配层获取全市场近实时行情，入库到 MongoDB 集合 `market_quotes`。
 
 核心特性：
+- 变化检测：与上一轮快照比较，只写入价格/成交有变化的股票
+- 分钟K线：变化的行情聚合为1分钟K线，追加写入 `market_quotes_1m`
 - 调度频率：由 settings.QUOTES_INGEST_INTERVAL_SECONDS 控制（默认360秒=6分钟）
 - 接口轮换：Tushare → AKShare东方财富 → AKShare新浪财经（避免单一接口被限流）
 - 智能限流：Tushare免费用户每小时最多2次，付费用户自动切换到高频模式
@@ -20,9 +22,10 @@ from .utils import normalize_stock_code
 from .datasource import DataSourceMixin
 from .ingestion import IngestionMixin
 from .backfill import BackfillMixin
+from .bars import MinuteBarMixin
 
 
-class QuotesIngestionService(DataSourceMixin, IngestionMixin, BackfillMixin):
+class QuotesIngestionService(DataSourceMixin, IngestionMixin, BackfillMixin, MinuteBarMixin):
     """
     行情采集服务
 
@@ -33,6 +36,7 @@ class QuotesIngestionService(DataSourceMixin, IngestionMixin, BackfillMixin):
         DataSourceMixin.__init__(self)
         IngestionMixin.__init__(self)
         BackfillMixin.__init__(self)
+        MinuteBarMixin.__init__(self)
 
         self.collection_name = collection_name
         self.status_collection_name = "quotes_ingestion_status"
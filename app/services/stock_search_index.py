@@ -0,0 +1,550 @@
+# -*- coding: utf-8 -*-
+"""
+股票搜索内存索引
+
+把 A股/港股/美股 的基础信息（stock_basic_info / _hk / _us）加载到进程内，
+搜索请求只查内存，不再对 MongoDB 执行无锚点的 $regex 扫描。支持：
+
+- 代码前缀：600、00700、AAP
+- 名称/英文名子串：茅台、apple
+- 拼音全拼/首字母：guizhou、gzmt → 贵州茅台（需要 pypinyin，未安装时跳过）
+- 容错：一两个字符的输入错误（贵州矛台、aple）
+
+索引按快照整体替换，查询路径只读取当前快照，无需加锁。基础信息变化时
+按 updated_at 增量拉取：只有代码/名称/来源变化时才重建快照，否则只更新
+返回的文档内容；删除的股票在定期全量重载时移除。
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # pragma: no cover - 可选依赖
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+# 市场 -> 基础信息集合
+MARKET_COLLECTIONS = {
+    "CN": "stock_basic_info",
+    "HK": "stock_basic_info_hk",
+    "US": "stock_basic_info_us",
+}
+
+# 各类命中的基础分，越高越靠前
+SCORE_CODE_EXACT = 100
+SCORE_NAME_EXACT = 95
+SCORE_CODE_PREFIX = 90
+SCORE_INITIALS_EXACT = 85
+SCORE_NAME_PREFIX = 80
+SCORE_INITIALS_PREFIX = 75
+SCORE_PINYIN_PREFIX = 70
+SCORE_NAME_EN_PREFIX = 65
+SCORE_NAME_SUBSTRING = 60
+SCORE_CODE_SUBSTRING = 55
+SCORE_NAME_EN_SUBSTRING = 50
+SCORE_PINYIN_SUBSTRING = 45
+SCORE_FUZZY = 30
+
+# 参与搜索的字段及其前缀/子串得分
+FIELD_SCORES = {
+    "code": (SCORE_CODE_PREFIX, SCORE_CODE_SUBSTRING),
+    "name": (SCORE_NAME_PREFIX, SCORE_NAME_SUBSTRING),
+    "initials": (SCORE_INITIALS_PREFIX, SCORE_PINYIN_SUBSTRING),
+    "pinyin": (SCORE_PINYIN_PREFIX, SCORE_PINYIN_SUBSTRING),
+    "name_en": (SCORE_NAME_EN_PREFIX, SCORE_NAME_EN_SUBSTRING),
+}
+
+# 完全匹配的得分（未列出的字段按前缀计分）
+EXACT_SCORES = {
+    "code": SCORE_CODE_EXACT,
+    "name": SCORE_NAME_EXACT,
+    "initials": SCORE_INITIALS_EXACT,
+}
+
+# 影响索引内容的文档字段，其余字段变化只需更新返回内容
+INDEXED_FIELDS = ("code", "symbol", "name", "name_en", "source")
+
+# 代码输入中可以忽略的交易所前缀/后缀：sh600519、600519.SH、00700.HK
+_CODE_AFFIX_RE = re.compile(r"^(?:sh|sz|bj)?(\d{5,6})(?:\.(?:sh|sz|ss|bj|hk))?$|^(.+)\.(?:hk|us)$")
+_HAN_RE = re.compile(r"[一-鿿]")
+
+# 前缀/子串命中的最多候选数（相对 limit 的倍数），避免 "0"、"a" 这类短输入遍历全部股票
+CANDIDATE_FACTOR = 5
+# 容错匹配时跳过过于常见的二元组
+FUZZY_MAX_POSTING = 2000
+FUZZY_MAX_CANDIDATES = 50
+
+
+def normalize_text(text: Any) -> str:
+    """全角转半角、转小写并去掉空白和常见符号（*ST、A-B 等）"""
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def normalize_query(query: str) -> str:
+    """规范化搜索词，去掉代码的交易所前缀/后缀"""
+    raw = unicodedata.normalize("NFKC", query or "").strip().lower()
+    match = _CODE_AFFIX_RE.match(raw)
+    if match:
+        raw = match.group(1) or match.group(2)
+    return normalize_text(raw)
+
+
+def to_pinyin(name: str) -> Tuple[str, str]:
+    """
+    名称转拼音
+
+    Returns:
+        (全拼, 首字母)，非汉字原样保留（如 "ST康美" -> ("stkangmei", "stkm")）；
+        未安装 pypinyin 时返回空字符串
+    """
+    if lazy_pinyin is None or not name or not _HAN_RE.search(name):
+        return "", ""
+    chars = [ch for ch in unicodedata.normalize("NFKC", name) if ch.isalnum()]
+    # errors 回调把非汉字逐字拆开，保证与 chars 一一对应
+    parts = lazy_pinyin("".join(chars), errors=lambda s: list(s))
+    if len(parts) != len(chars):
+        return "", ""
+    full, initials = [], []
+    for ch, part in zip(chars, parts):
+        part = part.lower()
+        full.append(part)
+        initials.append(part[:1] if _HAN_RE.match(ch) else part)
+    return "".join(full), "".join(initials)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    编辑距离（含相邻交换），超过 max_distance 时提前返回 max_distance + 1
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev2[j - 2] + 1)
+            cur[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _grams(text: str) -> Set[str]:
+    """单字和二元组，用于子串候选和容错候选"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+@dataclass
+class SearchEntry:
+    """一条索引记录（一个市场的一只股票在一个数据源下的基础信息）"""
+
+    id: int
+    market: str
+    code: str
+    source: str
+    doc: Dict[str, Any]
+    keys: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def name(self) -> str:
+        return self.keys.get("name", "")
+
+
+class IndexSnapshot:
+    """不可变的索引快照，构建完成后只读"""
+
+    def __init__(self, entries: List[SearchEntry]):
+        self.entries = entries
+        # 字段 -> 按 key 排序的 (key, id)，用于前缀查找
+        self.sorted_keys: Dict[str, List[Tuple[str, int]]] = {}
+        # 单字/二元组 -> 包含它的记录 id
+        self.grams: Dict[str, Set[int]] = {}
+
+        for fname in FIELD_SCORES:
+            self.sorted_keys[fname] = sorted(
+                (e.keys[fname], e.id) for e in entries if e.keys.get(fname)
+            )
+        for e in entries:
+            for key in e.keys.values():
+                for gram in _grams(key):
+                    self.grams.setdefault(gram, set()).add(e.id)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _prefix_ids(self, fname: str, q: str) -> Iterable[Tuple[str, int]]:
+        keys = self.sorted_keys[fname]
+        i = bisect.bisect_left(keys, (q, -1))
+        while i < len(keys) and keys[i][0].startswith(q):
+            yield keys[i]
+            i += 1
+
+    def _substring_candidates(self, q: str) -> Set[int]:
+        if len(q) == 1:
+            return self.grams.get(q, set())
+        postings = sorted(
+            (self.grams.get(q[i:i + 2], set()) for i in range(len(q) - 1)), key=len
+        )
+        if not postings[0]:
+            return set()
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
+
+    def search(self, q: str, accept, limit: int) -> Dict[int, float]:
+        """返回 {记录 id: 得分}，accept(entry) 过滤市场/数据源"""
+        scores: Dict[int, float] = {}
+        cap = max(limit * CANDIDATE_FACTOR, 50)
+
+        def hit(entry_id: int, score: float) -> bool:
+            if not accept(self.entries[entry_id]):
+                return False
+            if score > scores.get(entry_id, 0):
+                scores[entry_id] = score
+            return True
+
+        # 1. 前缀（含完全匹配），每个字段最多取 cap 条符合过滤条件的记录
+        for fname, (prefix_score, _) in FIELD_SCORES.items():
+            found = 0
+            for key, entry_id in self._prefix_ids(fname, q):
+                score = EXACT_SCORES.get(fname, prefix_score) if key == q else prefix_score
+                found += hit(entry_id, score)
+                if found >= cap:
+                    break
+
+        # 前缀命中已足够时，得分更低的子串/容错结果不可能进入前 limit 条
+        if len({(self.entries[i].market, self.entries[i].code) for i in scores}) >= limit:
+            return scores
+
+        # 2. 子串：单个 ASCII 字符只做前缀匹配，纯数字至少 3 位
+        if (len(q) > 1 or not q.isascii()) and not (q.isdigit() and len(q) < 3):
+            for entry_id in self._substring_candidates(q):
+                entry = self.entries[entry_id]
+                for fname, (_, substring_score) in FIELD_SCORES.items():
+                    key = entry.keys.get(fname)
+                    if key and q in key and not key.startswith(q):
+                        hit(entry_id, substring_score)
+
+        # 3. 容错：结果不足时再按编辑距离补充（纯数字按代码处理，不做容错）
+        if len(scores) < limit and len(q) >= 3 and not q.isdigit():
+            self._fuzzy(q, hit)
+
+        return scores
+
+    def _fuzzy(self, q: str, hit) -> None:
+        max_distance = 1 if len(q) < 6 else 2
+        # q-gram 下界：每处编辑最多破坏 3 个二元组（相邻交换），共有二元组太少的不可能命中
+        min_overlap = max(1, len(q) - 1 - 3 * max_distance)
+        overlap: Dict[int, int] = {}
+        for gram in {q[i:i + 2] for i in range(len(q) - 1)}:
+            posting = self.grams.get(gram, ())
+            if len(posting) > FUZZY_MAX_POSTING:
+                continue
+            for entry_id in posting:
+                overlap[entry_id] = overlap.get(entry_id, 0) + 1
+
+        candidates = heapq.nlargest(FUZZY_MAX_CANDIDATES, overlap, key=overlap.get)
+        for entry_id in candidates:
+            if overlap[entry_id] < min_overlap:
+                break
+            entry = self.entries[entry_id]
+            best = max_distance + 1
+            for fname in ("name", "initials", "pinyin", "name_en", "code"):
+                key = entry.keys.get(fname)
+                if not key:
+                    continue
+                # 自动补全场景：与等长前缀比较，也与整个 key 比较
+                best = min(
+                    best,
+                    edit_distance(q, key[:len(q)], max_distance),
+                    edit_distance(q, key, max_distance),
+                )
+            if best <= max_distance:
+                hit(entry_id, SCORE_FUZZY - 5 * best)
+
+
+class StockSearchIndex:
+    """股票搜索内存索引（进程内单例，见 get_stock_search_index）"""
+
+    def __init__(self, db=None):
+        self._db = db
+        self._snapshot: Optional[IndexSnapshot] = None
+        # (市场, 代码, 数据源) -> 文档
+        self._docs: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # 拼音缓存，重建快照时复用
+        self._pinyin_cache: Dict[str, Tuple[str, str]] = {}
+        # 市场 -> updated_at 水位（字符串和 datetime 两种存储格式分别记录）
+        self._watermarks: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self._load_task: Optional[asyncio.Task] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_refresh = 0.0
+        self._last_full_load = 0.0
+        self.stats: Dict[str, Any] = {"full_loads": 0, "incremental_updates": 0, "rebuilds": 0}
+
+    @property
+    def db(self):
+        if self._db is None:
+            from app.core.database import get_mongo_db
+
+            self._db = get_mongo_db()
+        return self._db
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    # ==================== 构建 ====================
+
+    @staticmethod
+    def _doc_code(doc: Dict[str, Any]) -> str:
+        return str(doc.get("code") or doc.get("symbol") or "").strip()
+
+    def _build_entries(self) -> List[SearchEntry]:
+        entries = []
+        for (market, code, source), doc in self._docs.items():
+            name = doc.get("name") or ""
+            if name not in self._pinyin_cache:
+                self._pinyin_cache[name] = to_pinyin(name)
+            pinyin, initials = self._pinyin_cache[name]
+            keys = {
+                "code": normalize_text(code),
+                "name": normalize_text(name),
+                "name_en": normalize_text(doc.get("name_en")),
+                "pinyin": pinyin,
+                "initials": initials,
+            }
+            entries.append(SearchEntry(
+                id=len(entries),
+                market=market,
+                code=code,
+                source=source,
+                doc=doc,
+                keys={k: v for k, v in keys.items() if v},
+            ))
+        return entries
+
+    def _build_snapshot(self) -> IndexSnapshot:
+        return IndexSnapshot(self._build_entries())
+
+    async def _rebuild(self) -> None:
+        self._snapshot = await asyncio.to_thread(self._build_snapshot)
+        self.stats["rebuilds"] += 1
+
+    def _advance_watermark(self, market: str, value: Any) -> None:
+        if isinstance(value, datetime):
+            kind = "datetime"
+        elif isinstance(value, str):
+            kind = "str"
+        else:
+            return
+        marks = self._watermarks.setdefault(market, {})
+        if kind not in marks or value > marks[kind]:
+            marks[kind] = value
+
+    def _apply_doc(self, market: str, doc: Dict[str, Any]) -> bool:
+        """写入一条文档，返回是否影响索引内容"""
+        code = self._doc_code(doc)
+        if not code:
+            return False
+        self._advance_watermark(market, doc.get("updated_at"))
+        doc.pop("_id", None)
+        key = (market, code, str(doc.get("source") or ""))
+        old = self._docs.get(key)
+        self._docs[key] = doc
+        if old is None:
+            return True
+        if any(old.get(f) != doc.get(f) for f in INDEXED_FIELDS):
+            return True
+        # 只有非索引字段变化：原地替换返回内容，快照里的 entry 指向旧 dict
+        old.clear()
+        old.update(doc)
+        self._docs[key] = old
+        return False
+
+    async def load_all(self) -> int:
+        """全量加载全部市场并重建快照"""
+        async with self._lock:
+            docs: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+            self._docs, previous = docs, self._docs
+            self._watermarks = {}
+            try:
+                for market, collection in MARKET_COLLECTIONS.items():
+                    async for doc in self.db[collection].find({}, {"_id": 0}):
+                        self._apply_doc(market, doc)
+            except Exception:
+                self._docs = previous
+                raise
+            await self._rebuild()
+            now = time.monotonic()
+            self._last_full_load = self._last_refresh = now
+            self.stats["full_loads"] += 1
+            logger.info(f"🔍 股票搜索索引已加载: {len(self._snapshot)} 条")
+            return len(self._snapshot)
+
+    async def refresh(self) -> int:
+        """按 updated_at 增量拉取变化的文档，返回变化条数"""
+        async with self._lock:
+            changed = 0
+            rebuild = False
+            for market, collection in MARKET_COLLECTIONS.items():
+                marks = self._watermarks.get(market) or {}
+                conditions = [{"updated_at": {"$gt": v}} for v in marks.values()]
+                if not conditions:
+                    continue
+                query = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+                async for doc in self.db[collection].find(query, {"_id": 0}):
+                    changed += 1
+                    rebuild = self._apply_doc(market, doc) or rebuild
+            if rebuild:
+                await self._rebuild()
+            self._last_refresh = time.monotonic()
+            if changed:
+                self.stats["incremental_updates"] += changed
+                logger.debug(f"🔍 股票搜索索引增量更新: {changed} 条，重建={rebuild}")
+            return changed
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            if time.monotonic() - self._last_full_load >= settings.STOCK_SEARCH_INDEX_FULL_RELOAD_SECONDS:
+                await self.load_all()
+            else:
+                await self.refresh()
+        except Exception as e:
+            logger.warning(f"⚠️ 股票搜索索引刷新失败: {e}")
+            self._last_refresh = time.monotonic()
+
+    async def ensure_ready(self) -> bool:
+        """
+        确保索引可用：首次调用时等待全量加载，之后按间隔在后台增量刷新
+
+        Returns:
+            索引是否可用（加载失败时调用方回退到数据库查询）
+        """
+        if not settings.STOCK_SEARCH_INDEX_ENABLED:
+            return False
+        if self._snapshot is None:
+            # 并发的首次请求共用同一个加载任务
+            if self._load_task is None or self._load_task.done():
+                self._load_task = asyncio.create_task(self.load_all())
+            try:
+                await asyncio.shield(self._load_task)
+            except Exception as e:
+                logger.warning(f"⚠️ 股票搜索索引加载失败，回退到数据库搜索: {e}")
+                return False
+        elif (
+            time.monotonic() - self._last_refresh >= settings.STOCK_SEARCH_INDEX_REFRESH_SECONDS
+            and (self._refresh_task is None or self._refresh_task.done())
+        ):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return True
+
+    def request_refresh(self) -> None:
+        """基础信息同步完成后调用，下一次搜索时立即触发增量刷新"""
+        self._last_refresh = 0.0
+
+    # ==================== 查询 ====================
+
+    def search(
+        self,
+        query: str,
+        markets: Optional[Sequence[str]] = None,
+        sources: Optional[Dict[str, Sequence[str]]] = None,
+        strict_sources: bool = False,
+        limit: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        搜索股票
+
+        Args:
+            query: 代码、名称、英文名或拼音（全拼/首字母）
+            markets: 限定市场（CN/HK/US），默认全部
+            sources: {市场: 数据源优先级}，同一股票只返回优先级最高的数据源
+            strict_sources: 为 True 时只返回 sources 中列出的数据源
+            limit: 返回数量
+
+        Returns:
+            按相关度排序的基础信息文档（副本）
+        """
+        snapshot = self._snapshot
+        q = normalize_query(query)
+        if snapshot is None or not q:
+            return []
+
+        market_set = {m.upper() for m in markets} if markets else None
+        priorities = {
+            m.upper(): {s.lower(): i for i, s in enumerate(srcs)}
+            for m, srcs in (sources or {}).items()
+        }
+
+        def accept(entry: SearchEntry) -> bool:
+            if market_set is not None and entry.market not in market_set:
+                return False
+            if strict_sources and entry.market in priorities:
+                return entry.source.lower() in priorities[entry.market]
+            return True
+
+        scores = snapshot.search(q, accept, limit)
+
+        # 同一股票保留优先级最高的数据源，得分取各数据源中的最高分
+        best: Dict[Tuple[str, str], Tuple[float, SearchEntry]] = {}
+        for entry_id, score in scores.items():
+            entry = snapshot.entries[entry_id]
+            key = (entry.market, entry.code)
+            if key not in best:
+                best[key] = (score, entry)
+                continue
+            best_score, current = best[key]
+            rank = priorities.get(entry.market, {})
+            new_rank = (rank.get(entry.source.lower(), len(rank)), entry.source)
+            cur_rank = (rank.get(current.source.lower(), len(rank)), current.source)
+            best[key] = (max(score, best_score), entry if new_rank < cur_rank else current)
+
+        ranked = sorted(
+            best.values(),
+            key=lambda item: (
+                -item[0],
+                len(item[1].name) or len(item[1].keys.get("name_en", "")),
+                item[1].market,
+                item[1].code,
+            ),
+        )
+        return [dict(entry.doc) for _, entry in ranked[:limit]]
+
+
+_index: Optional[StockSearchIndex] = None
+
+
+def get_stock_search_index() -> StockSearchIndex:
+    """获取股票搜索索引单例"""
+    global _index
+    if _index is None:
+        _index = StockSearchIndex()
+    return _index
@@ -17,9 +17,12 @@
 """
 
 import logging
+import re
 from typing import Dict, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
+from app.services.stock_search_index import get_stock_search_index
+
 logger = logging.getLogger("webapi")
 
 
@@ -174,8 +177,20 @@ class UnifiedStockService:
         Returns:
             股票列表
         """
+        source_priority = await self._get_source_priority(market)
+
+        # 优先查询内存索引（代码前缀/名称/拼音/容错），索引不可用时回退到数据库
+        index = get_stock_search_index()
+        if await index.ensure_ready():
+            result_list = index.search(
+                query, markets=[market], sources={market: source_priority}, limit=limit
+            )
+            logger.info(f"🔍 搜索 {market} 市场: '{query}' -> {len(result_list)} 条结果（索引）")
+            return result_list
+
         collection_name = self.collection_map[market]["basic_info"]
         collection = self.db[collection_name]
+        query = re.escape(query)
 
         # 支持代码和名称搜索
         filter_query = {
@@ -194,7 +209,6 @@ class UnifiedStockService:
             return []
         
         # 按 code 分组，每个 code 只保留优先级最高的数据源
-        source_priority = await self._get_source_priority(market)
         unique_results = {}
         
         for doc in all_results:
@@ -10,10 +10,12 @@ from datetime import datetime
 from typing import Optional, List
 
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from app.core.config import settings
 from app.models.user import User, UserCreate, UserUpdate, UserResponse
 from app.services.crud import BaseCRUDService
+from app.services.principal_cache import get_principal_cache
 
 # 尝试导入日志管理器
 try:
@@ -158,6 +160,31 @@ class UserService(BaseCRUDService):
             return User(**user_doc)
         return None
 
+    async def bump_token_version(self, username: str) -> Optional[int]:
+        """
+        Token 版本号 +1，使该用户已签发的所有 Token 立即失效
+
+        用于登出、修改/重置密码、禁用用户、角色变化等场景。
+
+        Returns:
+            新的版本号，用户不存在时返回 None
+        """
+        collection = await self._get_collection()
+        doc = await collection.find_one_and_update(
+            {"username": username},
+            {"$inc": {"token_version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+            projection={"token_version": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if not doc:
+            logger.warning(f"用户不存在: {username}")
+            return None
+
+        token_version = int(doc.get("token_version", 0))
+        await get_principal_cache().invalidate(username, token_version=token_version)
+        logger.info(f"用户 Token 已撤销: {username} (token_version={token_version})")
+        return token_version
+
     async def authenticate_user(self, username: str, password: str) -> Optional[User]:
         """用户认证"""
         logger.info(f"开始认证用户: {username}")
@@ -239,6 +266,8 @@ class UserService(BaseCRUDService):
         success = await self.update(str(user.id), update_data)
         if success:
             logger.info(f"用户信息更新成功: {username}")
+            # 认证缓存中包含偏好设置，需要刷新
+            await get_principal_cache().invalidate(username)
             return await self.get_user_by_username(username)
         return None
 
@@ -259,6 +288,7 @@ class UserService(BaseCRUDService):
 
         if success:
             logger.info(f"密码修改成功: {username}")
+            await self.bump_token_version(username)
             return True
         return False
 
@@ -277,6 +307,7 @@ class UserService(BaseCRUDService):
 
         if success:
             logger.info(f"密码重置成功: {username}")
+            await self.bump_token_version(username)
             return True
         return False
 
@@ -366,6 +397,7 @@ class UserService(BaseCRUDService):
         success = await self.update(user.get("id"), {"is_active": False})
         if success:
             logger.info(f"用户已禁用: {username}")
+            await self.bump_token_version(username)
             return True
         return False
 
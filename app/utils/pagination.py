@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""分页工具模块
+
+提供基于 (created_at, _id) 的键集（keyset）分页游标，
+避免 skip() 在深分页时线性扫描。
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+
+# created_at 的值类型及其在倒序排序中的先后（MongoDB 跨类型排序：日期 > 字符串 > 数字 > null/缺失）
+_TYPE_ORDER = ("date", "string", "number", "null")
+_TYPE_FILTERS = {
+    "date": {"$type": "date"},
+    "string": {"$type": "string"},
+    "number": {"$type": "number"},
+}
+
+
+def _value_type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, datetime):
+        return "date"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return "number"
+    return "string"
+
+
+def encode_keyset_cursor(created_at: Any, doc_id: Any) -> str:
+    """将排序键编码为不透明的游标字符串
+
+    Args:
+        created_at: 最后一条记录的创建时间（历史数据中可能缺失或是字符串）
+        doc_id: 最后一条记录的 _id
+
+    Returns:
+        URL 安全的 base64 游标
+    """
+    value_type = _value_type(created_at)
+    if value_type == "date":
+        created_value = created_at.isoformat()
+    elif value_type == "string":
+        created_value = str(created_at)
+    else:
+        created_value = created_at
+
+    payload = json.dumps(
+        {"c": created_value, "t": value_type, "i": str(doc_id)}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_keyset_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    """解析游标字符串
+
+    Returns:
+        (created_at, _id)，created_at 保持编码时的类型（datetime / str / 数字 / None）
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value = payload.get("c")
+        # 不带类型的旧游标：有值即日期
+        value_type = payload.get("t") or ("date" if value else "null")
+        if value_type not in _TYPE_ORDER:
+            raise ValueError(value_type)
+        if value_type == "date":
+            created_at = datetime.fromisoformat(value)
+        elif value_type == "null":
+            created_at = None
+        elif value_type == "number":
+            if not isinstance(value, (int, float)):
+                raise TypeError(value)
+            created_at = value
+        else:
+            created_at = str(value)
+        return created_at, ObjectId(payload["i"])
+    except (ValueError, KeyError, TypeError, InvalidId) as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def build_keyset_filter(cursor: str, field: str = "created_at") -> Dict[str, Any]:
+    """根据游标构建“下一页”查询条件（按 field 倒序、_id 倒序）
+
+    MongoDB 的 $lt 只比较同类型的值，而排序是跨类型的。为了不漏掉 created_at
+    缺失或不是日期的历史数据，同类型内按 (field, _id) 比较，排序更靠后的
+    其它类型整体纳入；null/缺失只按 _id 比较。
+
+    Args:
+        cursor: encode_keyset_cursor 生成的游标
+        field: 排序字段
+
+    Returns:
+        MongoDB 查询条件
+    """
+    created_at, doc_id = decode_keyset_cursor(cursor)
+    value_type = _value_type(created_at)
+    if value_type == "null":
+        return {field: None, "_id": {"$lt": doc_id}}
+
+    conditions = [
+        {field: {"$lt": created_at}},
+        {field: created_at, "_id": {"$lt": doc_id}},
+    ]
+    for later_type in _TYPE_ORDER[_TYPE_ORDER.index(value_type) + 1:]:
+        conditions.append({field: None} if later_type == "null" else {field: _TYPE_FILTERS[later_type]})
+    return {"$or": conditions}
@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 """搜索工具模块
 
-提供通用的 MongoDB 全文搜索功能
+提供通用的 MongoDB 全文搜索功能，以及适用于中文子串搜索的 n-gram 索引工具
 """
 
 from typing import List, Dict, Any, Optional
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 
@@ -77,3 +78,80 @@ async def execute_text_search(
     except Exception as e:
         logger.error(f"❌ 全文搜索失败: {e}")
         return []
+
+
+# ==================== N-gram 搜索索引 ====================
+
+# n-gram 生成规则版本；规则变化（如早期只索引前 300 个字符）后递增，
+# 旧版本文档走正则匹配并由后台任务重建
+SEARCH_NGRAMS_VERSION = 2
+
+
+def _normalize_search_text(text: Any) -> str:
+    """统一小写并去除空白，中英文混合文本都按字符切分"""
+    if text is None:
+        return ""
+    return "".join(str(text).lower().split())
+
+
+def build_search_ngrams(*texts: Any) -> List[str]:
+    """构建 n-gram 搜索词（单字 + 双字）
+
+    MongoDB 的 $text 索引不支持中文分词，这里为每个文档预先生成
+    单字和相邻双字组成的词表，配合多键索引实现任意子串搜索。
+    文本全文参与索引（去重后的双字数量不超过文本长度），保证任意位置的关键词都能命中。
+
+    Args:
+        *texts: 参与索引的文本（如股票代码、名称、摘要）
+
+    Returns:
+        去重后的 n-gram 列表
+    """
+    grams = set()
+    for text in texts:
+        normalized = _normalize_search_text(text)
+        grams.update(normalized)
+        grams.update(normalized[i : i + 2] for i in range(len(normalized) - 1))
+    return sorted(grams)
+
+
+def build_ngram_search_query(
+    keyword: str,
+    fields: List[str],
+    ngram_field: str = "search_ngrams",
+    version: int = SEARCH_NGRAMS_VERSION,
+) -> Dict[str, Any]:
+    """构建基于 n-gram 索引的子串搜索条件
+
+    先用 ``$all`` 命中 n-gram 多键索引缩小候选集，再对候选文档做精确的
+    子串匹配；尚未生成 n-gram 或 n-gram 版本过旧的文档退化为正则匹配。
+    ``$or`` 只有在每个分支都有索引时才会走索引，因此 ``<ngram_field>_version``
+    必须单独建索引（见 ``create_database_indexes``），回退分支才只扫描旧文档。
+
+    Args:
+        keyword: 搜索关键词
+        fields: 需要精确匹配的字段
+        ngram_field: 存放 n-gram 的字段名，版本号存放在 ``<ngram_field>_version``
+        version: 当前 n-gram 版本
+
+    Returns:
+        MongoDB 查询条件（空关键词返回空字典）
+    """
+    normalized = _normalize_search_text(keyword)
+    if not normalized:
+        return {}
+
+    if len(normalized) == 1:
+        grams = [normalized]
+    else:
+        grams = sorted({normalized[i : i + 2] for i in range(len(normalized) - 1)})
+
+    pattern = re.escape(keyword.strip())
+    substring_match = {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+
+    return {
+        "$or": [
+            {"$and": [{ngram_field: {"$all": grams}}, substring_match]},
+            {"$and": [{f"{ngram_field}_version": {"$ne": version}}, substring_match]},
+        ]
+    }
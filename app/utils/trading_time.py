@@ -10,6 +10,22 @@ from typing import Optional
 from zoneinfo import ZoneInfo
 
 from app.core.config import settings
+from tradingagents.utils.exchange_calendar import get_exchange_calendar
+
+
+def is_trading_day(now: Optional[datetime] = None) -> bool:
+    """
+    判断是否是A股交易日（按交易所日历排除周末和节假日）
+
+    Args:
+        now: 指定时间，默认为当前时间（使用配置的时区）
+
+    Returns:
+        bool: 是否是交易日
+    """
+    tz = ZoneInfo(settings.TIMEZONE)
+    now = now or datetime.now(tz)
+    return get_exchange_calendar("CN").is_session(now)
 
 
 def is_trading_time(now: Optional[datetime] = None) -> bool:
@@ -35,8 +51,8 @@ def is_trading_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not is_trading_day(now):
         return False
     
     t = now.time()
@@ -68,8 +84,8 @@ def is_strict_trading_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not is_trading_day(now):
         return False
     
     t = now.time()
@@ -96,8 +112,8 @@ def is_pre_market_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not is_trading_day(now):
         return False
     
     t = now.time()
@@ -120,8 +136,8 @@ def is_after_market_time(now: Optional[datetime] = None) -> bool:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 工作日 Mon-Fri
-    if now.weekday() > 4:
+    # 交易日（排除周末和节假日）
+    if not is_trading_day(now):
         return False
     
     t = now.time()
@@ -150,8 +166,8 @@ def get_trading_status(now: Optional[datetime] = None) -> str:
     tz = ZoneInfo(settings.TIMEZONE)
     now = now or datetime.now(tz)
     
-    # 周末
-    if now.weekday() > 4:
+    # 周末 / 节假日
+    if not is_trading_day(now):
         return "closed"
     
     t = now.time()
@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
 
+from pymongo import UpdateOne
+
 from app.core.database import get_mongo_db
 from app.services.historical_data_service import get_historical_data_service
 from app.services.news import get_news_data_service
@@ -113,10 +115,15 @@ class AKShareSyncService(BaseSyncService):
             stats["total_processed"] = len(stock_list)
             logger.info(f"📊 获取到 {len(stock_list)} 只股票信息")
 
-            # 2. 批量处理
+            # 2. 一次性加载整个股票池的快照，用于新鲜度预检和差异比较
+            snapshot = await self._load_basic_info_snapshot()
+
+            # 3. 批量处理
             for i in range(0, len(stock_list), self.batch_size):
                 batch = stock_list[i : i + self.batch_size]
-                batch_stats = await self._process_basic_info_batch(batch, force_update)
+                batch_stats = await self._process_basic_info_batch(
+                    batch, force_update, snapshot
+                )
 
                 # 更新统计
                 stats["success_count"] += batch_stats["success_count"]
@@ -135,7 +142,7 @@ class AKShareSyncService(BaseSyncService):
                 if i + self.batch_size < len(stock_list):
                     await asyncio.sleep(self.rate_limit_delay)
 
-            # 3. 完成统计
+            # 4. 完成统计
             stats["end_time"] = datetime.utcnow()
             stats["duration"] = (
                 stats["end_time"] - stats["start_time"]
@@ -160,9 +167,18 @@ class AKShareSyncService(BaseSyncService):
             return stats
 
     async def _process_basic_info_batch(
-        self, batch: List[Dict[str, Any]], force_update: bool
+        self,
+        batch: List[Dict[str, Any]],
+        force_update: bool,
+        snapshot: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """处理基础信息批次"""
+        """处理基础信息批次
+
+        Args:
+            batch: 股票列表批次
+            force_update: 是否强制更新
+            snapshot: 预加载的 {code: 文档} 快照；未提供时按批次加载
+        """
         batch_stats = {
             "success_count": 0,
             "error_count": 0,
@@ -170,18 +186,25 @@ class AKShareSyncService(BaseSyncService):
             "errors": [],
         }
 
+        if snapshot is None:
+            snapshot = await self._load_basic_info_snapshot(
+                codes=[s.get("code") for s in batch if s.get("code")]
+            )
+
+        codes: List[str] = []
+        ops: List[UpdateOne] = []
+
         for stock_info in batch:
             try:
                 code = stock_info["code"]
+                existing = snapshot.get(code)
 
-                # 检查是否需要更新
-                if not force_update:
-                    existing = await self.db.stock_basic_info.find_one({"code": code})
-                    if existing and self._is_data_fresh(
-                        existing.get("updated_at"), hours=24
-                    ):
-                        batch_stats["skipped_count"] += 1
-                        continue
+                # 检查是否需要更新（内存中判断，不再逐只查询数据库）
+                if not force_update and existing and self._is_data_fresh(
+                    existing.get("updated_at"), hours=24
+                ):
+                    batch_stats["skipped_count"] += 1
+                    continue
 
                 # 获取详细基础信息
                 basic_info = await self.provider.get_stock_basic_info(code)
@@ -203,23 +226,14 @@ class AKShareSyncService(BaseSyncService):
                     if "symbol" not in basic_data:
                         basic_data["symbol"] = code
 
-                    # 更新到数据库（使用 code + source 联合查询）
-                    try:
-                        await self.db.stock_basic_info.update_one(
-                            {"code": code, "source": "akshare"},
-                            {"$set": basic_data},
-                            upsert=True,
-                        )
-                        batch_stats["success_count"] += 1
-                    except Exception as e:
-                        batch_stats["error_count"] += 1
-                        batch_stats["errors"].append(
-                            {
-                                "code": code,
-                                "error": f"数据库更新失败: {str(e)}",
-                                "context": "update_stock_basic_info",
-                            }
-                        )
+                    # 字段级差异比较，未变化的文档不重写
+                    op = self._build_basic_info_update(code, basic_data, existing)
+                    if op is None:
+                        batch_stats["skipped_count"] += 1
+                        continue
+
+                    codes.append(code)
+                    ops.append(op)
                 else:
                     batch_stats["error_count"] += 1
                     batch_stats["errors"].append(
@@ -240,6 +254,9 @@ class AKShareSyncService(BaseSyncService):
                     }
                 )
 
+        # 更新到数据库（一个批次一次无序 bulk_write，使用 code + source 联合查询）
+        await self._flush_basic_info_ops(codes, ops, batch_stats)
+
         return batch_stats
 
     def _is_data_fresh(self, updated_at: Any, hours: int = 24) -> bool:
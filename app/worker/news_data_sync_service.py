@@ -10,13 +10,70 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
 
-from app.services.news import get_news_data_service
+from app.services.news import get_news_data_service, parse_datetime
 from tradingagents.dataflows.providers.china.tushare import get_tushare_provider
 from tradingagents.dataflows.providers.china.akshare import get_akshare_provider
 from tradingagents.dataflows.news.realtime_news import RealtimeNewsAggregator
+from tradingagents.utils.keyword_matcher import KeywordHits, get_keyword_matcher
+from tradingagents.utils.news_dedup import (
+    SimHashIndex,
+    cluster_near_duplicates,
+    dedup_enabled,
+    default_max_distance,
+    from_signed64,
+    to_signed64,
+)
 
 logger = logging.getLogger(__name__)
 
+# 新闻类别关键词（按优先级排列）
+NEWS_CATEGORY_KEYWORDS = {
+    "company_announcement": ["年报", "季报", "业绩", "财报", "公告"],
+    "policy_news": ["政策", "央行", "监管", "法规"],
+    "market_news": ["市场", "行情", "指数", "板块"],
+    "research_report": ["研报", "分析", "评级", "推荐"],
+}
+
+NEWS_SENTIMENT_KEYWORDS = {
+    "positive": ["增长", "上涨", "利好", "盈利", "成功", "突破", "创新", "优秀"],
+    "negative": ["下跌", "亏损", "风险", "问题", "困难", "下滑", "减少", "警告"],
+}
+
+NEWS_IMPORTANCE_KEYWORDS = {
+    "high": ["重大", "紧急", "突发", "年报", "业绩", "重组", "收购"],
+    "medium": ["公告", "通知", "变更", "调整", "计划"],
+}
+
+# 简单的关键词提取词表，实际应用中可以使用更复杂的NLP技术
+NEWS_COMMON_KEYWORDS = [
+    "业绩",
+    "年报",
+    "季报",
+    "增长",
+    "利润",
+    "营收",
+    "股价",
+    "投资",
+    "市场",
+    "行业",
+    "政策",
+    "监管",
+    "风险",
+    "机会",
+    "创新",
+    "发展",
+]
+
+# 所有词典编译为一个自动机，每篇新闻只扫描一遍
+_NEWS_MATCHER = get_keyword_matcher(
+    {
+        **{f"category:{k}": v for k, v in NEWS_CATEGORY_KEYWORDS.items()},
+        **{f"sentiment:{k}": v for k, v in NEWS_SENTIMENT_KEYWORDS.items()},
+        **{f"importance:{k}": v for k, v in NEWS_IMPORTANCE_KEYWORDS.items()},
+        "keywords": NEWS_COMMON_KEYWORDS,
+    }
+)
+
 
 @dataclass
 class NewsSyncStats:
@@ -162,8 +219,11 @@ class NewsDataSyncService:
             if all_news:
                 stats.total_processed = len(all_news)
 
-                # 去重处理
+                # 去重处理（批内近似重复 + 数据库中同股票同日已有的近似重复）
                 unique_news = self._deduplicate_news(all_news)
+                unique_news = await self._drop_persisted_duplicates(
+                    symbol, unique_news, news_service
+                )
                 stats.duplicate_skipped = len(all_news) - len(unique_news)
 
                 # 批量保存
@@ -297,14 +357,7 @@ class NewsDataSyncService:
                 "source": news.get("source", "Tushare"),
                 "author": news.get("author", ""),
                 "publish_time": news.get("publish_time"),
-                "category": self._classify_news_category(news.get("title", "")),
-                "sentiment": self._analyze_sentiment(
-                    news.get("title", "") + " " + news.get("content", "")
-                ),
-                "importance": self._assess_importance(news.get("title", "")),
-                "keywords": self._extract_keywords(
-                    news.get("title", "") + " " + news.get("content", "")
-                ),
+                **self._annotate_news(news.get("title", ""), news.get("content", "")),
                 "data_source": "tushare",
             }
         except Exception as e:
@@ -325,14 +378,7 @@ class NewsDataSyncService:
                 "source": news.get("source", "AKShare"),
                 "author": news.get("author", ""),
                 "publish_time": news.get("publish_time"),
-                "category": self._classify_news_category(news.get("title", "")),
-                "sentiment": self._analyze_sentiment(
-                    news.get("title", "") + " " + news.get("content", "")
-                ),
-                "importance": self._assess_importance(news.get("title", "")),
-                "keywords": self._extract_keywords(
-                    news.get("title", "") + " " + news.get("content", "")
-                ),
+                **self._annotate_news(news.get("title", ""), news.get("content", "")),
                 "data_source": "akshare",
             }
         except Exception as e:
@@ -355,64 +401,48 @@ class NewsDataSyncService:
                 "source": news_item.source,
                 "author": "",
                 "publish_time": news_item.publish_time,
-                "category": self._classify_news_category(news_item.title),
-                "sentiment": self._analyze_sentiment(
-                    news_item.title + " " + news_item.content
-                ),
-                "importance": self._assess_importance(news_item.title),
-                "keywords": self._extract_keywords(
-                    news_item.title + " " + news_item.content
-                ),
+                **self._annotate_news(news_item.title, news_item.content),
                 "data_source": "realtime",
             }
         except Exception as e:
             self.logger.error(f"❌ 标准化实时新闻失败: {e}")
             return None
 
-    def _classify_news_category(self, title: str) -> str:
+    def _annotate_news(self, title: str, content: str) -> Dict[str, Any]:
+        """
+        一次扫描标题+正文，生成类别、情绪、重要性和关键词
+
+        类别和重要性只看标题部分的命中，情绪和关键词看全文。
+        """
+        title = title or ""
+        hits = _NEWS_MATCHER.scan(f"{title} {content or ''}".lower())
+        title_end = len(title)
+        return {
+            "category": self._classify_news_category(title, hits, title_end),
+            "sentiment": self._analyze_sentiment("", hits),
+            "importance": self._assess_importance(title, hits, title_end),
+            "keywords": self._extract_keywords("", hits),
+        }
+
+    def _classify_news_category(
+        self, title: str, hits: Optional[KeywordHits] = None, end: Optional[int] = None
+    ) -> str:
         """分类新闻类别"""
-        title_lower = title.lower()
-
-        if any(
-            word in title_lower for word in ["年报", "季报", "业绩", "财报", "公告"]
-        ):
-            return "company_announcement"
-        elif any(word in title_lower for word in ["政策", "央行", "监管", "法规"]):
-            return "policy_news"
-        elif any(word in title_lower for word in ["市场", "行情", "指数", "板块"]):
-            return "market_news"
-        elif any(word in title_lower for word in ["研报", "分析", "评级", "推荐"]):
-            return "research_report"
-        else:
-            return "general"
+        if hits is None:
+            hits = _NEWS_MATCHER.scan(title.lower())
+
+        for category in NEWS_CATEGORY_KEYWORDS:
+            if hits.any(f"category:{category}", end):
+                return category
+        return "general"
 
-    def _analyze_sentiment(self, text: str) -> str:
+    def _analyze_sentiment(self, text: str, hits: Optional[KeywordHits] = None) -> str:
         """分析情绪"""
-        text_lower = text.lower()
-
-        positive_words = [
-            "增长",
-            "上涨",
-            "利好",
-            "盈利",
-            "成功",
-            "突破",
-            "创新",
-            "优秀",
-        ]
-        negative_words = [
-            "下跌",
-            "亏损",
-            "风险",
-            "问题",
-            "困难",
-            "下滑",
-            "减少",
-            "警告",
-        ]
-
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+        if hits is None:
+            hits = _NEWS_MATCHER.scan(text.lower())
+
+        positive_count = hits.count("sentiment:positive")
+        negative_count = hits.count("sentiment:negative")
 
         if positive_count > negative_count:
             return "positive"
@@ -421,54 +451,37 @@ class NewsDataSyncService:
         else:
             return "neutral"
 
-    def _assess_importance(self, title: str) -> str:
+    def _assess_importance(
+        self, title: str, hits: Optional[KeywordHits] = None, end: Optional[int] = None
+    ) -> str:
         """评估重要性"""
-        title_lower = title.lower()
-
-        high_importance_words = ["重大", "紧急", "突发", "年报", "业绩", "重组", "收购"]
-        medium_importance_words = ["公告", "通知", "变更", "调整", "计划"]
+        if hits is None:
+            hits = _NEWS_MATCHER.scan(title.lower())
 
-        if any(word in title_lower for word in high_importance_words):
+        if hits.any("importance:high", end):
             return "high"
-        elif any(word in title_lower for word in medium_importance_words):
+        elif hits.any("importance:medium", end):
             return "medium"
         else:
             return "low"
 
-    def _extract_keywords(self, text: str) -> List[str]:
+    def _extract_keywords(self, text: str, hits: Optional[KeywordHits] = None) -> List[str]:
         """提取关键词"""
-        # 简单的关键词提取，实际应用中可以使用更复杂的NLP技术
-        keywords = []
-
-        common_keywords = [
-            "业绩",
-            "年报",
-            "季报",
-            "增长",
-            "利润",
-            "营收",
-            "股价",
-            "投资",
-            "市场",
-            "行业",
-            "政策",
-            "监管",
-            "风险",
-            "机会",
-            "创新",
-            "发展",
-        ]
-
-        for keyword in common_keywords:
-            if keyword in text:
-                keywords.append(keyword)
-
-        return keywords[:10]  # 最多返回10个关键词
+        if hits is None:
+            hits = _NEWS_MATCHER.scan(text)
+
+        return hits.get("keywords")[:10]  # 最多返回10个关键词
 
     def _deduplicate_news(
         self, news_list: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
-        """去重新闻"""
+        """
+        去重新闻
+
+        先按标题+URL精确去重，再按 SimHash 把不同来源转载的近似重复新闻
+        聚为一簇，只保留每簇第一条（数据源优先级顺序），并记录指纹供后续
+        批次比对。
+        """
         seen = set()
         unique_news = []
 
@@ -479,7 +492,57 @@ class NewsDataSyncService:
                 seen.add(key)
                 unique_news.append(news)
 
-        return unique_news
+        if not dedup_enabled():
+            return unique_news
+
+        clusters, _ = cluster_near_duplicates(
+            unique_news, lambda news: (news.get("title", ""), news.get("content", ""))
+        )
+        representatives = []
+        for cluster in clusters:
+            news = cluster.representative
+            if cluster.fingerprint is not None:
+                news["simhash"] = to_signed64(cluster.fingerprint)
+            representatives.append(news)
+
+        merged = len(unique_news) - len(representatives)
+        if merged:
+            self.logger.info(f"🧹 合并近似重复新闻: {merged}条")
+        return representatives
+
+    async def _drop_persisted_duplicates(
+        self, symbol: str, news_list: List[Dict[str, Any]], news_service
+    ) -> List[Dict[str, Any]]:
+        """丢弃与数据库中同股票同日新闻近似重复的条目"""
+        if not symbol or not news_list or not dedup_enabled():
+            return news_list
+
+        by_day: Dict[Any, List[int]] = {}
+        for i, news in enumerate(news_list):
+            if news.get("simhash") is None:
+                continue
+            publish_time = parse_datetime(news.get("publish_time")) or datetime.utcnow()
+            by_day.setdefault(publish_time.date(), []).append(i)
+
+        dropped = set()
+        for day, positions in by_day.items():
+            start = datetime.combine(day, datetime.min.time())
+            fingerprints = await news_service.get_news_fingerprints(
+                symbol, start, start + timedelta(days=1)
+            )
+            if not fingerprints:
+                continue
+
+            index = SimHashIndex(default_max_distance())
+            for fingerprint in fingerprints:
+                index.add(from_signed64(fingerprint), None)
+            for i in positions:
+                if index.nearest(from_signed64(news_list[i]["simhash"])) is not None:
+                    dropped.add(i)
+
+        if dropped:
+            self.logger.info(f"🧹 {symbol} 跳过与已保存新闻近似重复的: {len(dropped)}条")
+        return [news for i, news in enumerate(news_list) if i not in dropped]
 
     async def sync_market_news(
         self,
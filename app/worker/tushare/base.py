@@ -10,7 +10,6 @@ import logging
 
 from app.core.database import get_mongo_db
 from app.core.config import settings
-from app.core.rate_limiter import get_tushare_rate_limiter
 from app.services.stock_data_service import get_stock_data_service
 from app.services.base_sync_service import BaseSyncService
 from app.utils.timezone import now_tz
@@ -52,19 +51,10 @@ class TushareSyncBase(BaseSyncService):
 
         # 同步配置
         self.batch_size = 100  # 批量处理大小
-        self.rate_limit_delay = 0.1  # API调用间隔(秒) - 已弃用，使用rate_limiter
+        self.rate_limit_delay = 0.1  # 批次间隔(秒)
         self.max_retries = 3  # 最大重试次数
-
-        # 速率限制器（从环境变量读取配置）
-        tushare_tier = getattr(
-            settings, "TUSHARE_TIER", "standard"
-        )  # free/basic/standard/premium/vip
-        safety_margin = float(
-            getattr(settings, "TUSHARE_RATE_LIMIT_SAFETY_MARGIN", "0.8")
-        )
-        self.rate_limiter = get_tushare_rate_limiter(
-            tier=tushare_tier, safety_margin=safety_margin
-        )
+        # 速率限制由 TushareProvider 按接口在 _call_api 中统一处理（跨进程共享配额），
+        # 同步任务不再额外获取许可，避免同一次调用重复消耗配额
 
     async def initialize(self):
         """初始化同步服务"""
@@ -114,8 +104,6 @@ class TushareSyncBase(BaseSyncService):
         - 周一到周五（排除节假日）
         - 上午：9:30-11:30
         - 下午：13:00-15:00
-
-        注意：此方法不检查节假日，仅检查时间段
         """
         from datetime import datetime
         import pytz
@@ -124,9 +112,9 @@ class TushareSyncBase(BaseSyncService):
         tz = pytz.timezone("Asia/Shanghai")
         now = datetime.now(tz)
 
-        # 检查是否是周末
-        from tradingagents.utils.trading_hours import is_weekend
-        if is_weekend():
+        # 检查是否是交易日（按交易所日历排除周末和节假日）
+        from tradingagents.utils.exchange_calendar import get_exchange_calendar
+        if not get_exchange_calendar("CN").is_session(now):
             return False
 
         # 检查时间段
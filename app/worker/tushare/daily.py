@@ -5,12 +5,16 @@ Tushare日线数据同步
 """
 
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
 
+from pymongo import UpdateOne
+
 from tradingagents.utils.time_utils import get_today_str, get_days_ago_str, get_timestamp
 from tradingagents.utils.trading_hours import is_weekend
 
+from app.core.rate_limiter import get_provider_rate_limiter_stats
+
 from .base import TushareSyncBase
 
 logger = logging.getLogger(__name__)
@@ -56,7 +60,10 @@ class TushareDailySync(TushareSyncBase):
             stats["total_processed"] = len(stock_list)
             logger.info(f"📊 获取到 {len(stock_list)} 只股票信息")
 
-            # 2. 批量处理
+            # 2. 一次性加载整个股票池的快照，用于新鲜度预检和差异比较
+            snapshot = await self._load_basic_info_snapshot()
+
+            # 3. 批量处理
             for i in range(0, len(stock_list), self.batch_size):
                 # 检查是否需要退出
                 if job_id and await self._should_stop(job_id):
@@ -65,7 +72,9 @@ class TushareDailySync(TushareSyncBase):
                     break
 
                 batch = stock_list[i : i + self.batch_size]
-                batch_stats = await self._process_basic_info_batch(batch, force_update)
+                batch_stats = await self._process_basic_info_batch(
+                    batch, force_update, snapshot
+                )
 
                 # 更新统计
                 stats["success_count"] += batch_stats["success_count"]
@@ -94,7 +103,7 @@ class TushareDailySync(TushareSyncBase):
                     import asyncio
                     await asyncio.sleep(self.rate_limit_delay)
 
-            # 3. 完成统计
+            # 4. 完成统计
             stats["end_time"] = datetime.utcnow()
             stats["duration"] = (
                 stats["end_time"] - stats["start_time"]
@@ -119,9 +128,18 @@ class TushareDailySync(TushareSyncBase):
             return stats
 
     async def _process_basic_info_batch(
-        self, batch: List[Dict[str, Any]], force_update: bool
+        self,
+        batch: List[Dict[str, Any]],
+        force_update: bool,
+        snapshot: Optional[Dict[str, Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
-        """处理基础信息批次"""
+        """处理基础信息批次
+
+        Args:
+            batch: 股票列表批次
+            force_update: 是否强制更新
+            snapshot: 预加载的 {code: 文档} 快照；未提供时按批次加载
+        """
         batch_stats = {
             "success_count": 0,
             "error_count": 0,
@@ -129,6 +147,14 @@ class TushareDailySync(TushareSyncBase):
             "errors": [],
         }
 
+        if snapshot is None:
+            snapshot = await self._load_basic_info_snapshot(
+                codes=[str(self._get_code(s)).zfill(6) for s in batch]
+            )
+
+        codes: List[str] = []
+        ops: List[UpdateOne] = []
+
         for stock_info in batch:
             try:
                 # 🔥 先转换为字典格式（如果是Pydantic模型）
@@ -137,71 +163,62 @@ class TushareDailySync(TushareSyncBase):
                 elif hasattr(stock_info, "dict"):
                     stock_data = stock_info.dict()
                 else:
-                    stock_data = stock_info
-
-                code = stock_data["code"]
-
-                # 检查是否需要更新
-                if not force_update:
-                    existing = await self.stock_service.get_stock_basic_info(code)
-                    if existing:
-                        # 🔥 existing 也可能是 Pydantic 模型，需要安全获取属性
-                        existing_dict = (
-                            existing.model_dump()
-                            if hasattr(existing, "model_dump")
-                            else (
-                                existing.dict()
-                                if hasattr(existing, "dict")
-                                else existing
-                            )
-                        )
-                        if self._is_data_fresh(
-                            existing_dict.get("updated_at"), hours=24
-                        ):
-                            batch_stats["skipped_count"] += 1
-                            continue
-
-                # 更新到数据库（指定数据源为 tushare）
-                success = await self.stock_service.update_stock_basic_info(
-                    code, stock_data, source="tushare"
-                )
-                if success:
-                    batch_stats["success_count"] += 1
-                else:
-                    batch_stats["error_count"] += 1
-                    batch_stats["errors"].append(
-                        {
-                            "code": code,
-                            "error": "数据库更新失败",
-                            "context": "update_stock_basic_info",
-                        }
-                    )
+                    stock_data = dict(stock_info)
+
+                code = str(stock_data["code"]).zfill(6)
+                existing = snapshot.get(code)
+
+                # 检查是否需要更新（内存中判断，不再逐只查询数据库）
+                if not force_update and existing and self._is_data_fresh(
+                    existing.get("updated_at"), hours=24
+                ):
+                    batch_stats["skipped_count"] += 1
+                    continue
+
+                # 🔥 确保 code / symbol / source 字段存在（指定数据源为 tushare）
+                stock_data["code"] = code
+                stock_data.setdefault("symbol", code)
+                stock_data.setdefault("source", "tushare")
+
+                # 字段级差异比较，未变化的文档不重写
+                op = self._build_basic_info_update(code, stock_data, existing)
+                if op is None:
+                    batch_stats["skipped_count"] += 1
+                    continue
+
+                codes.append(code)
+                ops.append(op)
 
             except Exception as e:
                 batch_stats["error_count"] += 1
-                # 🔥 安全获取 code（处理 Pydantic 模型和字典）
-                try:
-                    if hasattr(stock_info, "code"):
-                        code = stock_info.code
-                    elif hasattr(stock_info, "model_dump"):
-                        code = stock_info.model_dump().get("code", "unknown")
-                    elif hasattr(stock_info, "dict"):
-                        code = stock_info.dict().get("code", "unknown")
-                    else:
-                        code = stock_info.get("code", "unknown")
-                except:
-                    code = "unknown"
-
                 batch_stats["errors"].append(
                     {
-                        "code": code,
+                        "code": self._get_code(stock_info),
                         "error": str(e),
                         "context": "_process_basic_info_batch",
                     }
                 )
 
+        # 更新到数据库（一个批次一次无序 bulk_write）
+        await self._flush_basic_info_ops(codes, ops, batch_stats)
+
         return batch_stats
 
+    @staticmethod
+    def _get_code(stock_info: Any) -> str:
+        """🔥 安全获取 code（处理 Pydantic 模型和字典）"""
+        try:
+            if hasattr(stock_info, "code"):
+                return stock_info.code
+            elif hasattr(stock_info, "model_dump"):
+                return stock_info.model_dump().get("code", "unknown")
+            elif hasattr(stock_info, "dict"):
+                return stock_info.dict().get("code", "unknown")
+            else:
+                return stock_info.get("code", "unknown")
+        except Exception:
+            return "unknown"
+
     async def sync_historical_data(
         self,
         symbols: List[str] = None,
@@ -315,9 +332,6 @@ class TushareDailySync(TushareSyncBase):
                         stats["stopped"] = True
                         break
 
-                    # 速率限制
-                    await self.rate_limiter.acquire()
-
                     # 确定该股票的起始日期
                     symbol_start_date = start_date
                     if not symbol_start_date:
@@ -395,9 +409,9 @@ class TushareDailySync(TushareSyncBase):
                         )
 
                         # 输出速率限制器统计
-                        limiter_stats = self.rate_limiter.get_stats()
+                        limiter_stats = get_provider_rate_limiter_stats("tushare")
                         logger.info(
-                            f"   速率限制: {limiter_stats['current_calls']}/{limiter_stats['max_calls']}次, "
+                            f"   速率限制: 调用 {limiter_stats['total_calls']}次, "
                             f"等待次数: {limiter_stats['total_waits']}, "
                             f"总等待时间: {limiter_stats['total_wait_time']:.1f}秒"
                         )
@@ -8,6 +8,8 @@ from datetime import datetime
 from typing import List, Dict, Any
 import logging
 
+from app.core.rate_limiter import get_provider_rate_limiter_stats
+
 from .base import TushareSyncBase
 
 logger = logging.getLogger(__name__)
@@ -66,9 +68,6 @@ class TushareFinancialSync(TushareSyncBase):
             # 批量处理
             for i, symbol in enumerate(symbols):
                 try:
-                    # 速率限制
-                    await self.rate_limiter.acquire()
-
                     # 获取财务数据（指定获取期数）
                     financial_data = await self.provider.get_financial_data(
                         symbol, limit=limit
@@ -94,9 +93,10 @@ class TushareFinancialSync(TushareSyncBase):
                             f"(成功: {stats['success_count']}, 错误: {stats['error_count']})"
                         )
                         # 输出速率限制器统计
-                        limiter_stats = self.rate_limiter.get_stats()
+                        limiter_stats = get_provider_rate_limiter_stats("tushare")
                         logger.info(
-                            f"   速率限制: {limiter_stats['current_calls']}/{limiter_stats['max_calls']}次"
+                            f"   速率限制: 调用 {limiter_stats['total_calls']}次, "
+                            f"等待次数: {limiter_stats['total_waits']}"
                         )
 
                         # 更新任务进度
@@ -78,7 +78,6 @@ class TushareNewsSync(TushareSyncBase):
                     batch=batch,
                     max_news_per_stock=max_news_per_stock,
                     hours_back=hours_back,
-                    rate_limiter=self.rate_limiter,
                 )
 
                 # 更新统计
@@ -130,7 +129,6 @@ class TushareNewsSync(TushareSyncBase):
         batch: List[str],
         max_news_per_stock: int,
         hours_back: int,
-        rate_limiter,
     ) -> Dict[str, Any]:
         """处理新闻批次"""
         batch_stats = {
@@ -166,12 +164,6 @@ class TushareNewsSync(TushareSyncBase):
                     logger.debug(f"⚠️ {symbol} 未获取到新闻数据")
                     batch_stats["success_count"] += 1  # 没有新闻也算成功
 
-                # API限流
-                if rate_limiter:
-                    await rate_limiter.acquire()
-                else:
-                    await asyncio.sleep(self.rate_limit_delay)
-
             except Exception as e:
                 batch_stats["error_count"] += 1
                 error_msg = f"{symbol}: {str(e)}"
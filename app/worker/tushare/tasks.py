@@ -10,8 +10,8 @@ import logging
 
 from app.core.config import get_settings
 from app.core.redis_client import get_redis
+from app.utils.trading_time import is_trading_day
 from tradingagents.utils.time_utils import get_timestamp
-from tradingagents.utils.trading_hours import is_weekend
 
 logger = logging.getLogger(__name__)
 
@@ -66,7 +66,7 @@ async def run_tushare_hourly_bulk_sync():
     now = datetime.now(tz)
 
     # 检查是否在交易时段（工作日 9:30-15:30）
-    if now.weekday() > 4:  # 周末
+    if not is_trading_day(now):  # 周末或节假日
         logger.info("⏭️ [Tushare Hourly Bulk] 非交易日，跳过同步")
         return {"skipped": True, "reason": "非交易日"}
 
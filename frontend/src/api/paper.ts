@@ -23,14 +23,22 @@ export interface PaperPositionItem {
   unrealized_pnl?: number | null
 }
 
+export type PaperOrderType = 'market' | 'limit' | 'stop'
+
 export interface PaperOrderItem {
+  id?: string
   user_id?: string
   code: string
   side: 'buy' | 'sell'
+  order_type?: PaperOrderType
   quantity: number
+  limit_price?: number | null
+  stop_price?: number | null
+  triggered?: boolean
   price: number
   amount: number
-  status: 'filled' | 'rejected' | string
+  status: 'open' | 'filling' | 'filled' | 'rejected' | 'cancelled' | string
+  reject_reason?: string
   created_at: string
   filled_at?: string
 }
@@ -44,6 +52,9 @@ export interface PlaceOrderPayload {
   code: string
   side: 'buy' | 'sell'
   quantity: number
+  order_type?: PaperOrderType
+  limit_price?: number
+  stop_price?: number
   analysis_id?: string
 }
 
@@ -57,6 +68,9 @@ export const paperApi = {
   async getPositions() {
     return ApiClient.get<{ items: PaperPositionItem[] }>('/api/paper/positions')
   },
+  async cancelOrder(orderId: string) {
+    return ApiClient.post<{ order: PaperOrderItem }>(`/api/paper/order/${orderId}/cancel`)
+  },
   async getOrders(limit = 50) {
     return ApiClient.get<{ items: PaperOrderItem[] }>(`/api/paper/orders`, { limit })
   },
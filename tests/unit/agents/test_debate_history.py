@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+辩论历史滚动摘要测试
+
+测试范围:
+- 发言拆分
+- 最近 K 次发言原文保留、早期发言折叠为摘要
+- 摘要链式缓存（下一位发言者命中、增量摘要）
+- 每轮 token 上限
+- 模型失败时的截断摘要与统计
+- 研究员/风险辩论节点使用压缩后的历史
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tradingagents.agents.utils.debate_history import (
+    DebateHistoryManager,
+    split_turns,
+)
+from tradingagents.utils.prompt_serializer import count_tokens
+
+
+def _history(turns, length=200):
+    speakers = ["Bull", "Bear"]
+    return "".join(
+        f"\n{speakers[i % 2]} Analyst: 第{i + 1}次发言，" + "论据与数据。" * length
+        for i in range(turns)
+    )
+
+
+def _summary_llm(text="早期摘要: 多头强调增长，空头强调估值风险。"):
+    llm = MagicMock()
+    llm.invoke.return_value = MagicMock(content=text)
+    return llm
+
+
+@pytest.mark.unit
+class TestSplitTurns:
+    """测试发言拆分"""
+
+    def test_split_keeps_multiline_turns(self):
+        history = "\nBull Analyst: 第一段\n继续\nBear Analyst: 反驳\n看涨 Analyst: 中文描述"
+        turns = split_turns(history)
+
+        assert turns == ["Bull Analyst: 第一段\n继续", "Bear Analyst: 反驳", "看涨 Analyst: 中文描述"]
+        assert split_turns("") == []
+
+
+@pytest.mark.unit
+class TestDebateHistoryManager:
+    """测试历史压缩"""
+
+    def test_short_history_is_unchanged(self):
+        manager = DebateHistoryManager(recent_turns=4, max_tokens=100000)
+        history = _history(3, length=5)
+        llm = _summary_llm()
+
+        assert manager.compact(history, llm) == history
+        llm.invoke.assert_not_called()
+
+    def test_older_turns_are_summarized(self):
+        manager = DebateHistoryManager(recent_turns=2, max_tokens=100000)
+        history = _history(6)
+        result = manager.compact(history, _summary_llm())
+
+        assert "【早期辩论摘要（前4次发言）】" in result
+        assert "早期摘要: 多头强调增长" in result
+        assert "第5次发言" in result and "第6次发言" in result
+        assert "第4次发言" not in result
+        assert count_tokens(result) < count_tokens(history)
+
+    def test_summary_is_cached_and_incremental(self):
+        manager = DebateHistoryManager(recent_turns=2, max_tokens=100000)
+        llm = _summary_llm()
+
+        manager.compact(_history(5), llm)
+        manager.compact(_history(5), llm)
+        assert llm.invoke.call_count == 1
+        assert manager.get_stats()["summary_cache_hits"] == 1
+
+        # 新增一次发言后只增量摘要新折叠的那一次
+        manager.compact(_history(6), llm)
+        prompt = llm.invoke.call_args[0][0]
+        assert llm.invoke.call_count == 2
+        assert "已有摘要" in prompt
+        assert "第4次发言" in prompt and "第3次发言" not in prompt
+
+    def test_hard_token_cap(self):
+        manager = DebateHistoryManager(recent_turns=4, max_tokens=800, summary_max_tokens=200)
+        result = manager.compact(_history(8, length=400), _summary_llm("摘要" * 500))
+
+        assert count_tokens(result) <= 800
+        assert "第8次发言" in result
+
+    def test_fallback_summary_when_llm_fails(self):
+        manager = DebateHistoryManager(recent_turns=2, max_tokens=100000, summary_max_tokens=300)
+        llm = MagicMock()
+        llm.invoke.side_effect = RuntimeError("timeout")
+
+        result = manager.compact(_history(6), llm)
+        stats = manager.get_stats()
+
+        assert "第1次发言" in result
+        assert stats["summary_failures"] == 1
+        assert stats["cached_summaries"] == 0
+
+    def test_stats_report_tokens_saved(self):
+        manager = DebateHistoryManager(recent_turns=2, max_tokens=100000)
+        manager.compact(_history(6), _summary_llm())
+        stats = manager.get_stats()
+
+        assert stats["calls"] == 1
+        assert stats["compacted"] == 1
+        assert stats["tokens_saved"] == stats["tokens_before"] - stats["tokens_after"] > 0
+
+    def test_disabled_returns_full_history(self):
+        manager = DebateHistoryManager(recent_turns=1, enabled=False)
+        history = _history(6)
+
+        assert manager.compact(history, _summary_llm()) == history
+
+
+@pytest.mark.unit
+class TestDebateNodes:
+    """测试辩论节点接入"""
+
+    def test_risky_debator_prompt_uses_compacted_history(self):
+        from tradingagents.agents.risk_mgmt.aggresive_debator import create_risky_debator
+
+        manager = DebateHistoryManager(recent_turns=2, max_tokens=100000)
+        llm = MagicMock()
+        llm.invoke.side_effect = [
+            MagicMock(content="早期摘要"),
+            MagicMock(content="激进观点"),
+        ]
+        history = _history(6)
+        state = {
+            "risk_debate_state": {"history": history, "count": 6},
+            "market_report": "",
+            "sentiment_report": "",
+            "news_report": "",
+            "fundamentals_report": "",
+            "trader_investment_plan": "买入",
+        }
+
+        with patch(
+            "tradingagents.agents.utils.debate_history.get_debate_history_manager",
+            return_value=manager,
+        ):
+            result = create_risky_debator(llm)(state)
+
+        prompt = llm.invoke.call_args_list[-1][0][0]
+        assert "早期摘要" in prompt
+        assert "第1次发言" not in prompt
+        # 状态中仍保存完整历史
+        assert result["risk_debate_state"]["history"].startswith(history)
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+向量缓存测试
+
+测试范围:
+- 缓存键（模型 + 规范化文本）
+- 内存 LRU 层与磁盘层
+- 并发请求合并
+- FinancialSituationMemory.get_embedding 接入缓存
+- 批量 embedding（分块、去重、部分失败重试）
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tradingagents.agents.utils.embedding_cache import (
+    EmbeddingCache,
+    make_cache_key,
+)
+
+
+@pytest.mark.unit
+class TestCacheKey:
+    """测试缓存键"""
+
+    def test_whitespace_is_normalized(self):
+        assert make_cache_key("m", "  市场 报告\n\n内容 ") == make_cache_key("m", "市场 报告 内容")
+
+    def test_model_is_part_of_key(self):
+        assert make_cache_key("dashscope:v3", "abc") != make_cache_key("openai:small", "abc")
+
+
+@pytest.mark.unit
+class TestEmbeddingCache:
+    """测试向量缓存"""
+
+    def test_hit_skips_compute(self):
+        cache = EmbeddingCache(max_entries=10)
+        compute = MagicMock(return_value=[0.1, 0.2])
+
+        first = cache.get_or_compute("m", "text", compute)
+        second = cache.get_or_compute("m", "text ", compute)
+
+        assert first == second == [0.1, 0.2]
+        assert compute.call_count == 1
+        assert cache.get_stats()["hits"] == 1
+
+    def test_zero_vector_is_not_cached(self):
+        cache = EmbeddingCache(max_entries=10)
+        compute = MagicMock(return_value=[0.0, 0.0])
+
+        cache.get_or_compute("m", "text", compute)
+        cache.get_or_compute("m", "text", compute)
+
+        assert compute.call_count == 2
+
+    def test_lru_eviction(self):
+        cache = EmbeddingCache(max_entries=2)
+        for text in ("a", "b"):
+            cache.put("m", text, [1.0])
+        cache.get("m", "a")  # a 变为最近使用
+        cache.put("m", "c", [1.0])
+
+        assert cache.get("m", "b") is None
+        assert cache.get("m", "a") == [1.0]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        EmbeddingCache(cache_dir=str(tmp_path)).put("m", "text", [0.5, -1.25])
+
+        fresh = EmbeddingCache(cache_dir=str(tmp_path))
+        compute = MagicMock()
+
+        assert fresh.get_or_compute("m", "text", compute) == [0.5, -1.25]
+        compute.assert_not_called()
+        assert fresh.get_stats()["disk_hits"] == 1
+
+    def test_concurrent_identical_requests_are_coalesced(self):
+        cache = EmbeddingCache(max_entries=10)
+        calls = []
+
+        def slow_compute(text):
+            calls.append(text)
+            time.sleep(0.05)
+            return [1.0, 2.0]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_compute("m", "same", slow_compute)))
+            for _ in range(5)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert results == [[1.0, 2.0]] * 5
+        assert cache.get_stats()["coalesced"] == 4
+
+    def test_compute_error_propagates_to_waiters(self):
+        cache = EmbeddingCache(max_entries=10)
+
+        def boom(text):
+            raise RuntimeError("api down")
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("m", "x", boom)
+        # 失败后不残留进行中的请求
+        assert cache.get_or_compute("m", "x", lambda t: [1.0]) == [1.0]
+
+    def test_disabled_cache_always_computes(self):
+        cache = EmbeddingCache(enabled=False)
+        compute = MagicMock(return_value=[1.0])
+
+        cache.get_or_compute("m", "x", compute)
+        cache.get_or_compute("m", "x", compute)
+
+        assert compute.call_count == 2
+
+
+@pytest.mark.unit
+class TestMemoryUsesCache:
+    """测试 FinancialSituationMemory 接入缓存"""
+
+    def test_get_embedding_calls_provider_once(self):
+        from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+        memory = FinancialSituationMemory.__new__(FinancialSituationMemory)
+        memory.client = MagicMock()
+        memory.llm_provider = "openai"
+        memory.embedding = "text-embedding-3-small"
+
+        cache = EmbeddingCache(max_entries=10)
+        with patch(
+            "tradingagents.agents.utils.memory.get_embedding_cache", return_value=cache
+        ), patch.object(
+            FinancialSituationMemory, "_compute_embedding", return_value=[0.3] * 4
+        ) as compute:
+            for _ in range(5):
+                assert memory.get_embedding("同一份分析师报告") == [0.3] * 4
+
+        assert compute.call_count == 1
+
+
+def _openai_memory(batch_fn):
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+
+    memory = FinancialSituationMemory.__new__(FinancialSituationMemory)
+    memory.llm_provider = "openai"
+    memory.embedding = "text-embedding-3-small"
+    memory.enable_embedding_length_check = True
+    memory.max_embedding_length = 50000
+    memory.client = MagicMock()
+
+    def create(model, input):
+        response = MagicMock()
+        response.data = [MagicMock(index=i, embedding=v) for i, v in enumerate(batch_fn(input))]
+        return response
+
+    memory.client.embeddings.create.side_effect = create
+    return memory
+
+
+@pytest.mark.unit
+class TestBatchedEmbeddings:
+    """测试批量 embedding"""
+
+    def test_chunks_requests_and_deduplicates(self, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "3")
+        memory = _openai_memory(lambda batch: [[float(len(t))] for t in batch])
+        texts = [f"situation {i}" for i in range(7)] + ["situation 0"]
+
+        with patch(
+            "tradingagents.agents.utils.memory.get_embedding_cache",
+            return_value=EmbeddingCache(max_entries=100),
+        ):
+            vectors = memory.get_embeddings(texts)
+
+        sizes = [len(c.kwargs["input"]) for c in memory.client.embeddings.create.call_args_list]
+        assert sorted(sizes) == [1, 3, 3]
+        assert vectors[0] == vectors[7] == [11.0]
+        assert all(v is not None for v in vectors)
+
+    def test_partial_failure_retries_only_missing(self, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "10")
+        monkeypatch.setattr("tradingagents.agents.utils.memory.time.sleep", lambda s: None)
+        attempts = []
+
+        def batch_fn(batch):
+            attempts.append(list(batch))
+            if len(attempts) == 1:
+                # 第一次只返回前两条
+                return [[1.0], [2.0]]
+            return [[9.0] for _ in batch]
+
+        memory = _openai_memory(batch_fn)
+
+        with patch(
+            "tradingagents.agents.utils.memory.get_embedding_cache",
+            return_value=EmbeddingCache(max_entries=100),
+        ):
+            vectors = memory.get_embeddings(["a", "b", "c"])
+
+        assert attempts[1] == ["c"]
+        assert vectors == [[1.0], [2.0], [9.0]]
+
+    def test_add_situations_uses_single_batch(self, monkeypatch):
+        monkeypatch.setenv("EMBEDDING_BATCH_SIZE", "100")
+        memory = _openai_memory(lambda batch: [[1.0] for _ in batch])
+        memory.situation_collection = MagicMock()
+        memory.situation_collection.count.return_value = 0
+
+        with patch(
+            "tradingagents.agents.utils.memory.get_embedding_cache",
+            return_value=EmbeddingCache(max_entries=100),
+        ):
+            memory.add_situations([(f"s{i}", f"r{i}") for i in range(50)])
+
+        assert memory.client.embeddings.create.call_count == 1
+        kwargs = memory.situation_collection.add.call_args.kwargs
+        assert len(kwargs["embeddings"]) == 50
+        assert kwargs["ids"][-1] == "49"
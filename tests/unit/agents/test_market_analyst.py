@@ -314,8 +314,8 @@ def test_market_analyst_different_data_sources(mock_stock_utils, mock_get_name):
         # 验证数据源信息被传递到提示词
         call_args = mock_llm.invoke.call_args
         messages = call_args[0][0]
-        system_message = messages[0][1]
-        assert source in system_message
+        human_message = messages[-1][1]
+        assert source in human_message
 
 
 @pytest.mark.unit
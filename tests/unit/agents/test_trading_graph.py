@@ -28,7 +28,7 @@ def test_trading_graph_initialization():
 def test_trading_graph_default_config():
     """测试使用默认配置初始化"""
     # Arrange & Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph()
 
@@ -44,7 +44,7 @@ def test_trading_graph_custom_analysts():
     custom_analysts = ["market", "fundamentals"]
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph(
                 selected_analysts=custom_analysts, debug=False, config=None
@@ -60,7 +60,7 @@ def test_trading_graph_debug_mode():
     """测试调试模式初始化"""
     # Arrange
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph(
                 selected_analysts=["market"], debug=True, config=None
@@ -89,7 +89,7 @@ def test_trading_graph_google_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch(
                 "tradingagents.graph.trading_graph.ChatGoogleOpenAI"
@@ -115,7 +115,7 @@ def test_trading_graph_dashscope_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch(
                 "tradingagents.graph.trading_graph.ChatDashScopeOpenAI"
@@ -149,7 +149,7 @@ def test_trading_graph_zhipu_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch(
                 "tradingagents.graph.trading_graph.create_openai_compatible_llm"
@@ -177,7 +177,7 @@ def test_trading_graph_siliconflow_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -203,7 +203,7 @@ def test_trading_graph_custom_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch(
                 "tradingagents.graph.trading_graph.create_openai_compatible_llm"
@@ -230,7 +230,7 @@ def test_trading_graph_anthropic_provider():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch(
                 "tradingagents.graph.trading_graph.ChatAnthropic"
@@ -256,7 +256,7 @@ def test_trading_graph_config_merge():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph(
                 selected_analysts=["market"], debug=False, config=user_config
@@ -282,7 +282,7 @@ def test_trading_graph_temperature_config():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -309,7 +309,7 @@ def test_trading_graph_max_tokens_config():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -336,7 +336,7 @@ def test_trading_graph_timeout_config():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -363,7 +363,7 @@ def test_trading_graph_backend_url_config():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -390,7 +390,7 @@ def test_trading_graph_mixed_mode_detection():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph(
                 selected_analysts=["market"], debug=False, config=mock_config
@@ -416,7 +416,7 @@ def test_trading_graph_api_key_from_config():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch("tradingagents.graph.trading_graph.ChatOpenAI") as mock_openai:
                 graph = TradingAgentsGraph(
@@ -441,7 +441,7 @@ def test_trading_graph_api_key_from_env():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch.dict(os.environ, {"GOOGLE_API_KEY": "test-api-key-from-env"}):
                 with patch(
@@ -469,7 +469,7 @@ def test_trading_graph_missing_api_key():
     }
 
     # Act & Assert
-    with patch("tradingagents.graph.trading_graph.set_config"):
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config"):
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             with patch.dict(os.environ, {}, clear=True):
                 with pytest.raises(ValueError) as exc_info:
@@ -495,7 +495,7 @@ def test_trading_graph_directory_creation():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs") as mock_makedirs:
             graph = TradingAgentsGraph(
                 selected_analysts=["market"], debug=False, config=mock_config
@@ -520,7 +520,7 @@ def test_trading_graph_config_interface_update():
     }
 
     # Act
-    with patch("tradingagents.graph.trading_graph.set_config") as mock_set_config:
+    with patch("tradingagents.dataflows.interfaces.base_interface.set_config") as mock_set_config:
         with patch("tradingagents.graph.trading_graph.os.makedirs"):
             graph = TradingAgentsGraph(
                 selected_analysts=["market"], debug=False, config=mock_config
@@ -528,5 +528,5 @@ def test_trading_graph_config_interface_update():
 
     # Assert
     assert graph is not None
-    # 验证调用set_config更新接口配置
-    mock_set_config.assert_called_once_with(mock_config)
+    # 配置通过运行级上下文传递，初始化时不再写入全局配置
+    mock_set_config.assert_not_called()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+测试 app.routers.websocket_notifications 任务进度鉴权
+
+测试范围:
+- 任务属主校验: 按认证主体的用户 ID 与任务记录比较
+- WebSocket 端点与 HTTP 接口一样检查 token_version，撤销后的旧 Token 被拒绝
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi import WebSocketDisconnect
+
+from app.models.user import User
+from app.routers import auth_db
+from app.routers import websocket_notifications as ws
+from app.services import principal_cache as principal_cache_mod
+from app.services.auth_service import AuthService
+from app.services.memory_state_manager import MemoryStateManager
+from app.services.principal_cache import PrincipalCache
+
+ALICE_ID = str(ObjectId())
+BOB_ID = str(ObjectId())
+
+
+class FakeQueue:
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    async def get_task(self, task_id):
+        return self.tasks.get(task_id)
+
+
+@pytest.fixture
+def owners():
+    """alice 拥有队列任务 q1 与内存任务 m1，bob 拥有 m2"""
+    memory = MemoryStateManager()
+    asyncio.run(memory.create_task("m1", ALICE_ID, "600000"))
+    asyncio.run(memory.create_task("m2", BOB_ID, "600000"))
+    queue = FakeQueue({"q1": {"id": "q1", "user": ALICE_ID}})
+
+    with patch(
+        "app.services.queue_service.get_queue_service", return_value=queue
+    ), patch(
+        "app.services.memory_state_manager.get_memory_state_manager", return_value=memory
+    ):
+        yield
+
+
+@pytest.fixture
+def alice(monkeypatch):
+    """数据库中的 alice（token_version=1），认证缓存为空"""
+    user = User(
+        _id=ObjectId(ALICE_ID),
+        username="alice",
+        email="alice@example.com",
+        hashed_password="x",
+        token_version=1,
+    )
+    monkeypatch.setattr(principal_cache_mod, "_principal_cache", PrincipalCache(ttl=30, max_entries=10))
+    monkeypatch.setattr(principal_cache_mod, "get_redis", lambda: None)
+    monkeypatch.setattr(
+        auth_db.user_service,
+        "get_user_by_username",
+        AsyncMock(side_effect=lambda name: user if name == "alice" else None),
+    )
+    return user
+
+
+def _websocket():
+    websocket = MagicMock()
+    for method in ("accept", "close", "send_json"):
+        setattr(websocket, method, AsyncMock())
+    websocket.receive_text = AsyncMock(side_effect=WebSocketDisconnect())
+    return websocket
+
+
+@pytest.mark.unit
+class TestTaskOwner:
+    """测试任务属主校验"""
+
+    def test_owner_matched_by_user_id(self, owners):
+        assert asyncio.run(ws._is_task_owner("q1", ALICE_ID)) is True
+        assert asyncio.run(ws._is_task_owner("m1", ALICE_ID)) is True
+        assert asyncio.run(ws._is_task_owner("m2", BOB_ID)) is True
+
+    def test_other_users_rejected(self, owners):
+        assert asyncio.run(ws._is_task_owner("q1", BOB_ID)) is False
+        assert asyncio.run(ws._is_task_owner("m1", BOB_ID)) is False
+        assert asyncio.run(ws._is_task_owner("m2", ALICE_ID)) is False
+        # JWT 中的用户名不是用户 ID
+        assert asyncio.run(ws._is_task_owner("q1", "alice")) is False
+        assert asyncio.run(ws._is_task_owner("missing", ALICE_ID)) is False
+
+
+@pytest.mark.unit
+class TestTaskStreamAuth:
+    """测试任务进度 WebSocket 的 Token 校验"""
+
+    @pytest.mark.parametrize(
+        "endpoint",
+        [ws.websocket_task_progress_endpoint, ws.websocket_task_progress_endpoint_v2],
+    )
+    def test_revoked_token_rejected(self, alice, endpoint):
+        old_token = AuthService.create_access_token(sub="alice", token_version=0)
+        websocket = _websocket()
+
+        asyncio.run(endpoint(websocket, "q1", old_token))
+
+        websocket.close.assert_awaited_once()
+        assert websocket.close.call_args[1]["reason"] == "Unauthorized: Token has been revoked"
+        websocket.accept.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "endpoint",
+        [ws.websocket_task_progress_endpoint, ws.websocket_task_progress_endpoint_v2],
+    )
+    def test_owner_checked_with_user_id(self, alice, endpoint):
+        token = AuthService.create_access_token(sub="alice", token_version=1)
+        websocket = _websocket()
+
+        with patch.object(ws, "_is_task_owner", AsyncMock(return_value=False)) as is_owner:
+            asyncio.run(endpoint(websocket, "q1", token))
+
+        websocket.accept.assert_awaited_once()
+        is_owner.assert_awaited_once_with("q1", ALICE_ID)
+
+    def test_notifications_endpoint_rejects_revoked_token(self, alice):
+        old_token = AuthService.create_access_token(sub="alice", token_version=0)
+        websocket = _websocket()
+        websocket.scope = {"subprotocols": ["auth-token", old_token]}
+
+        asyncio.run(ws.websocket_notifications_endpoint(websocket))
+
+        assert websocket.close.call_args[1]["reason"] == "Unauthorized: Token has been revoked"
+        websocket.accept.assert_not_called()
@@ -438,6 +438,64 @@ class TestDatabaseViewsAndIndexes:
             # 由于实现复杂，这里主要验证不抛出异常
             pass  # 暂不测试，因为实现较复杂
 
+    @pytest.mark.asyncio
+    async def test_report_search_indexes_cover_every_or_branch(self):
+        """测试报告搜索的两个 $or 分支字段都建了索引"""
+        from app.core.database import create_database_indexes
+
+        collections = {}
+
+        def get_collection(name):
+            collection = collections.setdefault(name, MagicMock())
+            collection.create_index = AsyncMock()
+            collection.aggregate = MagicMock()
+            return collection
+
+        mock_db = MagicMock()
+        mock_db.__getitem__.side_effect = get_collection
+
+        with patch("app.core.database.logger"):
+            await create_database_indexes(mock_db)
+
+        keys = [c[0][0] for c in collections["analysis_reports"].create_index.call_args_list]
+        assert [("search_ngrams", 1)] in keys
+        assert [("search_ngrams_version", 1)] in keys
+
+    @pytest.mark.asyncio
+    async def test_unique_index_with_duplicates_logs_error(self):
+        """测试已有重复数据时唯一索引建立失败会列出重复键"""
+        from pymongo.errors import OperationFailure
+        from app.core.database import _create_unique_index
+
+        collection = MagicMock()
+        collection.name = "paper_accounts"
+        collection.create_index = AsyncMock(
+            side_effect=OperationFailure("E11000 duplicate key", code=11000)
+        )
+        cursor = MagicMock()
+        cursor.to_list = AsyncMock(return_value=[{"_id": {"user_id": "u1"}, "count": 2}])
+        collection.aggregate.return_value = cursor
+
+        with patch("app.core.database.logger") as mock_logger:
+            await _create_unique_index(collection, [("user_id", 1)])
+
+        group = collection.aggregate.call_args[0][0][0]["$group"]
+        assert group["_id"] == {"user_id": "$user_id"}
+        message = mock_logger.error.call_args[0][0]
+        assert "paper_accounts" in message and "u1" in message
+
+    @pytest.mark.asyncio
+    async def test_unique_index_other_errors_propagate(self):
+        """测试非重复键错误照常抛出"""
+        from pymongo.errors import OperationFailure
+        from app.core.database import _create_unique_index
+
+        collection = MagicMock()
+        collection.create_index = AsyncMock(side_effect=OperationFailure("boom", code=2))
+
+        with pytest.raises(OperationFailure):
+            await _create_unique_index(collection, [("user_id", 1)])
+
 
 class TestSyncMongoDB:
     """测试同步 MongoDB 连接功能"""
@@ -6,8 +6,14 @@
 
 import pytest
 import asyncio
-from unittest.mock import patch, MagicMock
-from app.core.rate_limiter import RateLimiter
+from unittest.mock import patch, MagicMock, AsyncMock
+from app.core.rate_limiter import (
+    RateLimiter,
+    LocalTokenBucket,
+    DistributedRateLimiter,
+    get_distributed_rate_limiter,
+    reset_all_limiters,
+)
 
 
 class TestRateLimiterInitialization:
@@ -233,6 +239,121 @@ class TestRateLimiterEdgeCases:
         assert limiter.time_window == -1.0
 
 
+class TestLocalTokenBucket:
+    """测试进程内令牌桶"""
+
+    def test_burst_within_capacity_no_wait(self):
+        """测试容量内的突发调用无需等待"""
+        bucket = LocalTokenBucket(capacity=3, refill_rate=1.0)
+
+        waits = [bucket.reserve()[0] for _ in range(3)]
+
+        assert waits == [0.0, 0.0, 0.0]
+
+    def test_reserve_beyond_capacity_returns_wait(self):
+        """测试超出容量时返回需要等待的时间"""
+        bucket = LocalTokenBucket(capacity=1, refill_rate=2.0)
+
+        bucket.reserve()
+        wait, remaining = bucket.reserve()
+
+        assert 0.4 < wait <= 0.5
+        assert remaining < 0
+
+
+class TestDistributedRateLimiter:
+    """测试分布式令牌桶限流器"""
+
+    def _make_limiter(self, **kwargs):
+        params = dict(max_calls=10, time_window=1.0, provider="test", endpoint="unit")
+        params.update(kwargs)
+        return DistributedRateLimiter(**params)
+
+    def test_key_and_capacity(self):
+        """测试按 provider/endpoint 分键，容量按 burst_ratio 计算"""
+        limiter = self._make_limiter()
+
+        assert limiter.key == "ratelimit:test:unit"
+        assert limiter.capacity == 2
+        assert limiter.refill_rate == 10.0
+
+    @pytest.mark.asyncio
+    async def test_acquire_uses_redis_script_wait_time(self):
+        """测试使用 Redis 脚本返回的等待时间"""
+        limiter = self._make_limiter()
+        script = AsyncMock(return_value=[250, -1])
+        client = MagicMock()
+        client.register_script.return_value = script
+
+        with patch.object(DistributedRateLimiter, "_get_async_redis", return_value=client), \
+                patch("app.core.rate_limiter.asyncio.sleep", new=AsyncMock()) as mock_sleep:
+            await limiter.acquire()
+
+        script.assert_awaited_once()
+        assert script.await_args.kwargs["keys"] == ["ratelimit:test:unit"]
+        mock_sleep.assert_awaited_once_with(0.25)
+        stats = limiter.get_stats()
+        assert stats["backend"] == "redis"
+        assert stats["total_waits"] == 1
+        assert stats["wait_time_histogram"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_falls_back_to_local_when_redis_fails(self):
+        """测试 Redis 出错时降级为本地限流，并在重试间隔内不再访问 Redis"""
+        limiter = self._make_limiter()
+        client = MagicMock()
+        client.register_script.return_value = AsyncMock(side_effect=ConnectionError("down"))
+
+        with patch.object(DistributedRateLimiter, "_get_async_redis", return_value=client):
+            await limiter.acquire()
+            await limiter.acquire()
+
+        assert client.register_script.return_value.await_count == 1
+        stats = limiter.get_stats()
+        assert stats["backend"] == "local"
+        assert stats["redis_failures"] == 1
+        assert stats["local_fallbacks"] == 2
+
+    def test_acquire_sync_without_redis_uses_local_bucket(self):
+        """测试同步接口在无 Redis 时使用本地令牌桶"""
+        limiter = self._make_limiter()
+
+        with patch.object(DistributedRateLimiter, "_get_sync_redis", return_value=None):
+            limiter.acquire_sync()
+
+        assert limiter.get_stats()["total_calls"] == 1
+        assert limiter.get_stats()["backend"] == "local"
+
+    def test_registry_returns_singleton_per_endpoint(self):
+        """测试同一 provider/endpoint 返回同一实例"""
+        reset_all_limiters()
+        a = get_distributed_rate_limiter("akshare", "daily")
+        b = get_distributed_rate_limiter("akshare", "daily")
+        c = get_distributed_rate_limiter("akshare", "news")
+
+        assert a is b
+        assert a is not c
+        assert a.max_calls == 60
+        reset_all_limiters()
+
+    def test_wait_times_exported_to_prometheus(self):
+        """测试等待时间写入 /metrics 导出的直方图，并可按数据源汇总"""
+        from app.core.rate_limiter import get_provider_rate_limiter_stats
+        from app.services.metrics_collector import get_metrics_collector
+
+        reset_all_limiters()
+        limiter = get_distributed_rate_limiter("tushare", "daily")
+        with patch.object(DistributedRateLimiter, "_get_sync_redis", return_value=None):
+            limiter.acquire_sync()
+
+        text = get_metrics_collector().get_prometheus_metrics()
+        assert "# TYPE tradingagents_rate_limit_wait histogram" in text
+        assert 'tradingagents_rate_limit_wait_count{backend="local",endpoint="daily",provider="tushare"}' in text
+        summary = get_provider_rate_limiter_stats("tushare")
+        assert (summary["endpoints"], summary["total_calls"]) == (1, 1)
+        reset_all_limiters()
+
+
 # 如果需要通过 __main__ 运行测试
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
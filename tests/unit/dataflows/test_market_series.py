@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+结构化行情/基本面数据通道测试
+
+测试范围:
+- MarketSeries 数组构建、latest() 键名与数值
+- render() 文本格式与缓存、StructuredText 透传
+- FundamentalsSnapshot 指标解析
+- DataCoordinator 直接使用结构化数据（不走正则解析）
+- 技术信号 / 风险指标直接消费数组
+"""
+
+import pickle
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingagents.dataflows.data_source_manager import DataSourceManager
+from tradingagents.dataflows.schemas.market_series import (
+    FundamentalsSnapshot,
+    MarketSeries,
+    StructuredText,
+    get_structured,
+)
+
+
+def _frame(days=80):
+    rng = np.random.default_rng(7)
+    close = 10 + np.cumsum(rng.normal(0, 0.2, days))
+    return pd.DataFrame(
+        {
+            "trade_date": pd.date_range("2025-01-01", periods=days).strftime("%Y%m%d"),
+            "open": close + 0.1,
+            "high": close + 0.3,
+            "low": close - 0.3,
+            "close": close,
+            "volume": rng.integers(1000, 5000, days).astype(float),
+        }
+    )
+
+
+def _format(df, realtime_quote=None):
+    manager = DataSourceManager.__new__(DataSourceManager)
+    return manager._format_stock_data_response(
+        df, "000001", "平安银行", "2025-01-01", "2025-03-21", realtime_quote
+    )
+
+
+@pytest.mark.unit
+class TestMarketSeries:
+    """测试行情序列"""
+
+    def test_formatter_returns_structured_text(self):
+        text = _format(_frame())
+
+        series = get_structured(text)
+        assert isinstance(text, StructuredText)
+        assert isinstance(series, MarketSeries)
+        assert len(series) == 80
+        assert series.dates[-1] == "2025-03-21"
+        assert text == series.render()
+
+    def test_latest_matches_arrays(self):
+        df = _frame()
+        series = get_structured(_format(df))
+        latest = series.latest()
+
+        assert latest["current_price"] == pytest.approx(df["close"].iloc[-1])
+        assert latest["volume"] == df["volume"].iloc[-1]
+        assert latest["volume_unit"] == "手"
+        assert latest["MA5"] == pytest.approx(df["close"].tail(5).mean())
+        for key in ("MA60", "RSI", "RSI14", "MACD_DIF", "KDJ_K", "ATR14", "OBV", "BOLL_UPPER"):
+            assert key in latest
+
+    def test_render_contains_indicator_lines(self):
+        text = _format(_frame(), {"price": 11.2, "change": 0.1, "change_pct": 0.9})
+
+        assert "⚡ 实时行情（盘中）" in text
+        assert "💰 最新价格: ¥11.20 (来源: 实时)" in text
+        assert "   MA60: ¥" in text
+        assert "单日成交量:" in text
+        assert get_structured(text).latest()["current_price"] == 11.2
+
+    def test_render_is_cached(self):
+        series = get_structured(_format(_frame()))
+        assert series.render() is series.render()
+
+    def test_obv_matches_cumulative_definition(self):
+        df = _frame(10)
+        series = get_structured(_format(df))
+        close, vol = df["close"].to_numpy(), df["volume"].to_numpy()
+        expected = [0.0]
+        for i in range(1, len(df)):
+            step = np.sign(close[i] - close[i - 1]) * vol[i]
+            expected.append(expected[-1] + step)
+        assert series.indicators["obv"].tolist() == pytest.approx(expected)
+
+    def test_structured_text_survives_pickle_and_str_ops(self):
+        text = _format(_frame())
+        restored = pickle.loads(pickle.dumps(text))
+
+        assert isinstance(get_structured(restored), MarketSeries)
+        assert get_structured(text + "\n数据来源: tushare") is None
+
+    def test_to_dict_is_json_friendly(self):
+        import json
+
+        data = get_structured(_format(_frame())).to_dict()
+        json.dumps(data)
+        assert data["latest"]["data_days"] == 80
+
+
+@pytest.mark.unit
+class TestFundamentalsSnapshot:
+    """测试基本面快照"""
+
+    def test_from_metrics(self):
+        snapshot = FundamentalsSnapshot.from_metrics(
+            "000001",
+            {"pe": "5.20", "pb": "0.61", "roe": "10.5%", "roa": "N/A", "risk_level": "中等"},
+        )
+
+        assert snapshot.PE == 5.2
+        assert snapshot.ROE == 10.5
+        assert snapshot.ROA is None
+        assert snapshot.to_dict() == {"PE": 5.2, "PB": 0.61, "ROE": 10.5, "risk_level": "中等"}
+
+
+@pytest.mark.unit
+class TestStructuredConsumers:
+    """测试下游直接消费结构化数据"""
+
+    def test_coordinator_uses_series_without_regex(self):
+        from tradingagents.graph.data_coordinator import DataCoordinator
+
+        coordinator = DataCoordinator.__new__(DataCoordinator)
+        coordinator.cache = {}
+        coordinator.cache_ttl = 300
+        coordinator.validators = {}
+        text = _format(_frame())
+
+        with patch.object(
+            DataCoordinator, "_fetch_market_data_from_source", return_value=text
+        ), patch.object(DataCoordinator, "_parse_market_data") as regex_parse:
+            result = coordinator._get_market_data_with_fallback("000001", "2025-03-21")
+
+        regex_parse.assert_not_called()
+        assert result.structured is get_structured(text)
+        assert result.parsed_data["MA20"] == get_structured(text).latest()["MA20"]
+        assert result.structured.source == result.source
+        # 追加数据来源后仍携带结构化对象，缓存命中时同样可用
+        assert get_structured(result.data) is result.structured
+        issues = coordinator._check_data_sufficiency({"market": result}, "000001")
+        assert not [i for i in issues if i["field"] in ("MA60", "data_days")]
+
+    def test_technical_signals_accept_series(self):
+        from tradingagents.graph.technical_signals import compute_technical_signals
+
+        series = get_structured(_format(_frame()))
+        from_series = compute_technical_signals(series)
+        from_dict = compute_technical_signals(series.latest())
+
+        assert from_series["trend"] == from_dict["trend"]
+        assert set(from_dict["signals"]) <= set(from_series["signals"])
+
+    def test_risk_calculator_accepts_arrays(self):
+        from tradingagents.graph.risk_indicators import QuantRiskCalculator
+
+        series = get_structured(_format(_frame()))
+        metrics = QuantRiskCalculator().calculate(series.valid_closes())
+
+        assert metrics.data_days == 80
+        assert metrics == QuantRiskCalculator().calculate(series.close.tolist())
+
+    def test_validation_uses_structured_data(self):
+        from tradingagents.agents.utils import data_validation_integration as integration
+
+        text = _format(_frame())
+        with patch.object(integration, "parse_data_string_to_dict") as parse:
+            report = integration.add_data_validation_to_market_report("000001", text)
+
+        parse.assert_not_called()
+        assert report.startswith(str(text))
+
+    def test_mongodb_history_uses_public_formatter(self):
+        from tradingagents.dataflows.china.historical_data_loader import HistoricalDataLoader
+
+        loader = HistoricalDataLoader.__new__(HistoricalDataLoader)
+        loader.mongodb_adapter = MagicMock(use_app_cache=True)
+        loader.mongodb_adapter.get_historical_data.return_value = _frame().assign(name="平安银行")
+        manager = DataSourceManager.__new__(DataSourceManager)
+
+        with patch(
+            "tradingagents.dataflows.data_source_manager.get_data_source_manager", return_value=manager
+        ), patch.object(manager, "format_stock_data", wraps=manager.format_stock_data) as fmt:
+            text = loader._try_mongodb("000001", "2025-01-01", "2025-03-21")
+
+        fmt.assert_called_once()
+        assert get_structured(text).name == "平安银行"
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+可取消 LLM 调用层测试
+
+测试范围:
+- 嵌套调用范围的截止时间与取消级联
+- 请求前已取消：不发请求、记录节省的 token
+- 流式请求生成中取消：关闭连接
+- 只有声明支持的适配器才以流式请求取消；调用方传入的 stream_usage 不被覆盖
+- 请求超时取剩余时间
+- 按任务取消
+- 并行分析师超时后取消线程中的调用
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from tradingagents.llm_adapters.invocation import (
+    CancellationToken,
+    LLMCancelledError,
+    LLMDeadlineExceeded,
+    cancel_task_invocations,
+    current_scope,
+    get_invocation_stats,
+    guarded_generate,
+    invocation_scope,
+)
+
+LLM = SimpleNamespace(model_name="test-model")
+STREAMING_LLM = SimpleNamespace(model_name="test-model", supports_stream_cancellation=True)
+MESSAGES = [HumanMessage(content="分析贵州茅台最近一周的走势")]
+
+
+def _result(text="ok"):
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+class FakeBackend:
+    """记录调用参数的假模型后端"""
+
+    def __init__(self, chunks=("a", "b", "c")):
+        self.chunks = chunks
+        self.generate_calls = []
+        self.stream_kwargs = None
+        self.closed = False
+        self.on_chunk = None
+
+    def generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.generate_calls.append(kwargs)
+        return _result()
+
+    def stream(self, messages, stop=None, run_manager=None, **kwargs):
+        self.stream_kwargs = kwargs
+        try:
+            for index, text in enumerate(self.chunks):
+                yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+                if self.on_chunk:
+                    self.on_chunk(index)
+        finally:
+            self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def reset_stats():
+    get_invocation_stats().reset()
+    yield
+    get_invocation_stats().reset()
+
+
+@pytest.mark.unit
+class TestInvocationScope:
+    """测试调用范围"""
+
+    def test_child_deadline_never_later_than_parent(self):
+        with invocation_scope(timeout=10) as parent:
+            with invocation_scope(timeout=60) as child:
+                assert child.deadline == parent.deadline
+            with invocation_scope(timeout=1) as child:
+                assert child.deadline < parent.deadline
+            with invocation_scope() as child:
+                assert child.deadline == parent.deadline
+        assert current_scope() is None
+
+    def test_parent_cancel_cascades(self):
+        with invocation_scope(token=CancellationToken()) as parent:
+            with invocation_scope() as child:
+                assert child.cancellable
+                parent.token.cancel("stop")
+                assert child.token.cancelled and child.token.reason == "stop"
+
+    def test_cancel_task_invocations(self):
+        with invocation_scope(task_id="task-1") as scope:
+            assert cancel_task_invocations("task-1")
+            assert scope.token.cancelled
+        # 范围结束后注销
+        assert cancel_task_invocations("task-1") is False
+
+
+@pytest.mark.unit
+class TestGuardedGenerate:
+    """测试统一调用入口"""
+
+    def test_no_scope_passes_through(self):
+        backend = FakeBackend()
+
+        guarded_generate(LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        assert backend.generate_calls == [{}]
+        assert backend.stream_kwargs is None
+
+    def test_timeout_set_to_remaining_time(self):
+        backend = FakeBackend()
+
+        with invocation_scope(timeout=30):
+            guarded_generate(LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        # 不可外部取消的范围不走流式，只限制请求超时
+        assert backend.stream_kwargs is None
+        assert 0 < backend.generate_calls[0]["timeout"] <= 30
+
+    def test_cancelled_before_request_is_skipped(self):
+        backend = FakeBackend()
+        token = CancellationToken()
+        token.cancel("timeout")
+
+        with invocation_scope(token=token):
+            with pytest.raises(LLMCancelledError):
+                guarded_generate(LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        assert backend.generate_calls == [] and backend.stream_kwargs is None
+        stats = get_invocation_stats().get_stats()
+        assert stats["skipped"] == 1
+        assert stats["tokens_saved"] > 1000
+
+    def test_expired_deadline_raises_deadline_error(self):
+        backend = FakeBackend()
+
+        with invocation_scope(timeout=0.01):
+            time.sleep(0.02)
+            with pytest.raises(LLMDeadlineExceeded):
+                guarded_generate(LLM, backend.generate, MESSAGES)
+
+        assert get_invocation_stats().get_stats()["deadline_exceeded"] == 1
+
+    def test_stream_aborted_mid_generation(self):
+        backend = FakeBackend(chunks=("a", "b", "c", "d"))
+        token = CancellationToken()
+        backend.on_chunk = lambda index: index == 1 and token.cancel("timeout")
+
+        with invocation_scope(token=token):
+            with pytest.raises(LLMCancelledError):
+                guarded_generate(STREAMING_LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        assert backend.closed
+        assert backend.stream_kwargs["stream_usage"] is True
+        assert get_invocation_stats().get_stats()["aborted"] == 1
+
+    def test_stream_completes_into_result(self):
+        backend = FakeBackend()
+
+        with invocation_scope(token=CancellationToken()):
+            result = guarded_generate(STREAMING_LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        assert result.generations[0].message.content == "abc"
+        assert get_invocation_stats().get_stats()["completed"] == 1
+
+    def test_adapter_without_stream_support_is_not_streamed(self):
+        backend = FakeBackend()
+
+        with invocation_scope(token=CancellationToken()):
+            guarded_generate(LLM, backend.generate, MESSAGES, stream=backend.stream)
+
+        # 未声明支持的供应商可能拒绝 stream_options，保持普通请求
+        assert backend.stream_kwargs is None
+        assert "stream_usage" not in backend.generate_calls[0]
+
+    def test_caller_stream_usage_is_kept(self):
+        backend = FakeBackend()
+
+        with invocation_scope(token=CancellationToken()):
+            guarded_generate(
+                STREAMING_LLM, backend.generate, MESSAGES, stream=backend.stream, stream_usage=False
+            )
+
+        assert backend.stream_kwargs["stream_usage"] is False
+
+
+@pytest.mark.unit
+def test_parallel_executor_cancels_thread_on_timeout():
+    from tradingagents.graph.parallel_analysts_v2 import EnhancedParallelAnalystExecutor
+
+    executor = EnhancedParallelAnalystExecutor.__new__(EnhancedParallelAnalystExecutor)
+    executor.analyst_timeout = 0.2
+    executor.progress_callback = None
+    executor.use_cache = False
+    executor.llm_cache = None
+    executor.allow_partial_failure = True
+    executor.execution_stats = {
+        "analyst_times": {},
+        "cache_hits": 0,
+        "cache_misses": 0,
+        "timeout_count": 0,
+        "cancelled_count": 0,
+        "error_count": 0,
+    }
+
+    seen = {}
+    finished = threading.Event()
+
+    def slow_analyst(state):
+        scope = current_scope()
+        seen["scope"] = scope
+        scope.token._event.wait(5)
+        finished.set()
+        return {}
+
+    result = asyncio.run(executor._execute_analyst_with_timeout("market", slow_analyst, {}))
+
+    assert result.success is False
+    assert finished.wait(2)
+    assert seen["scope"].token.cancelled
+    assert executor.execution_stats["cancelled_count"] == 1
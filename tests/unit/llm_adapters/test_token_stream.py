@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+LLM token 流推送测试
+
+测试范围:
+- 生产端按字符数/时间间隔合并分片
+- 分析任务中的流式调用带任务/智能体/辩论轮次标签推送
+- 不在任务中时不推送、不改变调用方式
+- 发布失败时暂停推送
+- 转发端合并慢客户端积压的分片
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from tradingagents.llm_adapters.invocation import guarded_generate
+from tradingagents.llm_adapters.token_stream import (
+    agent_stream_scope,
+    get_token_stream_publisher,
+    set_token_sink,
+)
+from tradingagents.utils.run_context import run_scope
+
+LLM = SimpleNamespace(model_name="test-model")
+MESSAGES = [HumanMessage(content="分析一下")]
+
+
+class RecordingSink:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, channel, message):
+        self.messages.append((channel, json.loads(message)))
+
+    @property
+    def payloads(self):
+        return [payload for _, payload in self.messages]
+
+
+def _stream(texts):
+    def stream(messages, stop=None, run_manager=None, **kwargs):
+        for text in texts:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+    return stream
+
+
+def _generate(messages, stop=None, run_manager=None, **kwargs):
+    return ChatResult(generations=[ChatGeneration(message=AIMessage(content="完整报告"))])
+
+
+@pytest.fixture
+def sink(monkeypatch):
+    monkeypatch.setenv("LLM_TOKEN_STREAM_FLUSH_MS", "0")
+    recording = RecordingSink()
+    set_token_sink(recording)
+    yield recording
+    set_token_sink(None)
+
+
+@pytest.mark.unit
+class TestTokenStreamPublishing:
+    """测试生产端推送"""
+
+    def test_stream_published_with_tags(self, sink):
+        with run_scope({}, task_id="t1"), agent_stream_scope("Bull Researcher", 2):
+            result = guarded_generate(LLM, _generate, MESSAGES, stream=_stream(["看", "多"]))
+
+        assert result.generations[0].message.content == "看多"
+        channel, first = sink.messages[0]
+        assert channel == "task_progress:t1"
+        assert first["agent"] == "Bull Researcher" and first["round"] == 2
+        assert "".join(p["text"] for p in sink.payloads) == "看多"
+        assert sink.payloads[-1]["done"] is True
+        assert [p["seq"] for p in sink.payloads] == list(range(1, len(sink.payloads) + 1))
+
+    def test_chunks_coalesced_by_size(self, sink, monkeypatch):
+        monkeypatch.setenv("LLM_TOKEN_STREAM_FLUSH_MS", "60000")
+        monkeypatch.setenv("LLM_TOKEN_STREAM_MAX_CHARS", "4")
+
+        with run_scope({}, task_id="t1"):
+            guarded_generate(LLM, _generate, MESSAGES, stream=_stream(["ab", "cd", "ef", "g"]))
+
+        assert [p["text"] for p in sink.payloads] == ["abcd", "efg"]
+
+    def test_non_streaming_adapter_publishes_result(self, sink):
+        with run_scope({}, task_id="t1"):
+            guarded_generate(LLM, _generate, MESSAGES)
+
+        assert [(p["text"], p["done"]) for p in sink.payloads] == [("完整报告", True)]
+
+    def test_outside_task_not_published(self, sink):
+        calls = []
+
+        def generate(messages, stop=None, run_manager=None, **kwargs):
+            calls.append(kwargs)
+            return _generate(messages)
+
+        guarded_generate(LLM, generate, MESSAGES, stream=_stream(["x"]))
+
+        assert calls == [{}]
+        assert sink.messages == []
+
+    def test_publish_failure_suspends_stream(self, sink):
+        def broken(channel, message):
+            raise ConnectionError("redis down")
+
+        set_token_sink(broken)
+        publisher = get_token_stream_publisher()
+        errors = publisher.get_stats()["publish_errors"]
+
+        with run_scope({}, task_id="t1"):
+            result = guarded_generate(LLM, _generate, MESSAGES, stream=_stream(["a", "b", "c"]))
+
+        assert result.generations[0].message.content == "abc"
+        assert publisher.get_stats()["publish_errors"] == errors + 1
+
+    def test_graph_node_tagged_with_debate_round(self, sink):
+        from tradingagents.graph.setup import tag_stream_node
+
+        def node(state):
+            with run_scope({}, task_id="t1"):
+                guarded_generate(LLM, _generate, MESSAGES, stream=_stream(["x"]))
+            return {}
+
+        tag_stream_node("Safe Analyst", node)({"risk_debate_state": {"count": 4}})
+
+        assert sink.payloads[0]["agent"] == "Safe Analyst"
+        assert sink.payloads[0]["round"] == 2
+
+
+class FakePubSub:
+    def __init__(self, payloads):
+        self._queue = [{"type": "message", "data": json.dumps(p)} for p in payloads]
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=0.0):
+        return self._queue.pop(0) if self._queue else None
+
+
+def _token(agent, seq, text, done=False):
+    return {"type": "token", "agent": agent, "round": None, "call": 1, "seq": seq, "text": text, "done": done}
+
+
+@pytest.mark.unit
+def test_relay_coalesces_backlog():
+    from app.services.progress.stream_relay import read_task_messages
+
+    backlog = [
+        _token("Market Analyst", 1, "价格"),
+        _token("News Analyst", 1, "新闻"),
+        {"type": "progress", "message": "进行中"},
+        _token("Market Analyst", 2, "上涨", done=True),
+    ]
+
+    messages = asyncio.run(read_task_messages(FakePubSub(backlog), timeout=0))
+
+    assert [m.get("agent") for m in messages] == ["Market Analyst", "News Analyst", None]
+    assert messages[0]["text"] == "价格上涨" and messages[0]["seq"] == 2 and messages[0]["done"]
+
+    limited = asyncio.run(read_task_messages(FakePubSub(backlog), timeout=0, max_messages=2))
+    assert [m["text"] for m in limited] == ["价格", "新闻"]
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+BaseSyncService 基础信息批量写入工具单元测试
+
+测试内容：
+- 字段级差异比较
+- UpdateOne 构建规则（新文档 / 变化 / 未变化）
+- 快照加载与 bulk_write 统计
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.services.base_sync_service import BaseSyncService
+
+
+class _DummySyncService(BaseSyncService):
+    @property
+    def data_source(self) -> str:
+        return "akshare"
+
+    async def initialize(self):
+        pass
+
+
+class _AsyncCursor:
+    def __init__(self, docs):
+        self._docs = list(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._docs:
+            raise StopAsyncIteration
+        return self._docs.pop(0)
+
+
+@pytest.fixture
+def service():
+    svc = _DummySyncService()
+    svc.db = MagicMock()
+    return svc
+
+
+# ==============================================================================
+# 字段级差异比较
+# ==============================================================================
+
+
+@pytest.mark.unit
+def test_diff_fields_returns_only_changed(service):
+    existing = {"code": "000001", "name": "平安银行", "industry": "银行", "updated_at": 1}
+    new_data = {"code": "000001", "name": "平安银行", "industry": "金融", "updated_at": 2}
+
+    assert service._diff_fields(existing, new_data) == {"industry": "金融"}
+
+
+@pytest.mark.unit
+def test_diff_fields_without_existing_returns_all(service):
+    new_data = {"code": "000001", "name": "平安银行", "updated_at": 2}
+
+    assert service._diff_fields(None, new_data) == {"code": "000001", "name": "平安银行"}
+
+
+# ==============================================================================
+# UpdateOne 构建
+# ==============================================================================
+
+
+@pytest.mark.unit
+def test_build_update_skips_unchanged_fresh_document(service):
+    existing = {"code": "000001", "name": "平安银行", "updated_at": datetime.utcnow()}
+
+    op = service._build_basic_info_update("000001", {"code": "000001", "name": "平安银行"}, existing)
+
+    assert op is None
+
+
+@pytest.mark.unit
+def test_build_update_touches_timestamp_for_unchanged_stale_document(service):
+    stale = datetime.utcnow() - timedelta(days=3)
+    existing = {"code": "000001", "name": "平安银行", "updated_at": stale}
+
+    op = service._build_basic_info_update("000001", {"code": "000001", "name": "平安银行"}, existing)
+
+    assert isinstance(op, UpdateOne)
+    assert list(op._doc["$set"].keys()) == ["updated_at"]
+
+
+@pytest.mark.unit
+def test_build_update_sets_only_changed_fields(service):
+    existing = {"code": "000001", "name": "平安银行", "area": "深圳", "updated_at": datetime.utcnow()}
+
+    op = service._build_basic_info_update(
+        "000001", {"code": "000001", "name": "平安银行", "area": "广东"}, existing
+    )
+
+    assert op._filter == {"code": "000001", "source": "akshare"}
+    assert set(op._doc["$set"].keys()) == {"area", "updated_at"}
+    assert op._upsert is True
+
+
+# ==============================================================================
+# 快照加载与批量写入
+# ==============================================================================
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_load_snapshot_uses_single_projected_query(service):
+    service.db.stock_basic_info.find = MagicMock(
+        return_value=_AsyncCursor([{"code": "000001"}, {"code": "600519"}])
+    )
+
+    snapshot = await service._load_basic_info_snapshot()
+
+    assert set(snapshot.keys()) == {"000001", "600519"}
+    service.db.stock_basic_info.find.assert_called_once_with({"source": "akshare"}, {"_id": 0})
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_flush_ops_counts_partial_bulk_write_errors(service):
+    ops = [UpdateOne({"code": c}, {"$set": {}}) for c in ("000001", "000002")]
+    service.db.stock_basic_info.bulk_write = AsyncMock(
+        side_effect=BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "dup"}]})
+    )
+    stats = {"success_count": 0, "error_count": 0, "errors": []}
+
+    await service._flush_basic_info_ops(["000001", "000002"], ops, stats)
+
+    assert stats["success_count"] == 1
+    assert stats["error_count"] == 1
+    assert stats["errors"][0]["code"] == "000002"
@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+"""
+流式备份/导出/恢复测试
+
+测试范围:
+- 分块导出 + 清单，恢复后类型与原文档一致
+- 中断后从检查点续传，不重复、不遗漏（含中断前尚未读到的其它 _id 类型）
+- 分块校验失败时拒绝恢复；恢复可重复执行
+- JSON 导出保持 import_data 识别的格式；脱敏
+- NDJSON / Parquet 导出打包
+"""
+
+import asyncio
+import json
+import os
+import tarfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import Decimal128, ObjectId
+from pymongo import InsertOne, ReplaceOne
+
+from app.services.database import backups, streaming
+
+
+# MongoDB 按类型分组排序 _id：数值 < 字符串 < ObjectId
+_TYPE_ALIASES = {int: "number", str: "string", ObjectId: "objectId"}
+_TYPE_ORDER = ["number", "string", "objectId"]
+
+
+def _sort_key(doc):
+    alias = _TYPE_ALIASES[type(doc["_id"])]
+    return _TYPE_ORDER.index(alias), doc["_id"]
+
+
+class FakeCursor:
+    def __init__(self, collection, query):
+        self.collection = collection
+        self.query = query
+
+    def sort(self, key, direction):
+        self._sort = (key, direction)
+        return self
+
+    def __aiter__(self):
+        docs = [d for d in self.collection.docs if self._match(d)]
+        if getattr(self, "_sort", None):
+            docs.sort(key=_sort_key)
+        self._it = iter(docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            doc = next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+        self.collection.served += 1
+        if self.collection.fail_after is not None and self.collection.served > self.collection.fail_after:
+            raise RuntimeError("cursor interrupted")
+        return dict(doc)
+
+    def _match(self, doc):
+        cond = self.query.get("_id")
+        if not cond:
+            return True
+        bound = cond["$gt"]
+        return type(doc["_id"]) is type(bound) and doc["_id"] > bound
+
+
+class FakeCollection:
+    def __init__(self, docs=None):
+        self.docs = list(docs or [])
+        self.queries = []
+        self.bulk_calls = []
+        self.served = 0
+        self.fail_after = None
+
+    def find(self, query=None, batch_size=None):
+        self.queries.append(query or {})
+        return FakeCursor(self, query or {})
+
+    async def bulk_write(self, ops, ordered=True):
+        assert ordered is True
+        self.bulk_calls.append(len(ops))
+        for op in ops:
+            if isinstance(op, ReplaceOne):
+                self.docs = [d for d in self.docs if d["_id"] != op._filter["_id"]]
+                self.docs.append(dict(op._doc))
+            else:
+                assert isinstance(op, InsertOne)
+                self.docs.append(dict(op._doc))
+
+    async def delete_many(self, query):
+        count, self.docs = len(self.docs), []
+        return SimpleNamespace(deleted_count=count)
+
+    async def insert_one(self, doc):
+        self.docs.append(dict(doc))
+
+    async def delete_one(self, query):
+        self.docs = [d for d in self.docs if d["_id"] != query["_id"]]
+
+    async def find_one(self, query, projection=None):
+        cond = query["_id"]
+        if isinstance(cond, dict):
+            excluded = cond["$not"]["$type"]
+            return next(
+                ({"_id": d["_id"]} for d in self.docs if _TYPE_ALIASES[type(d["_id"])] not in excluded),
+                None,
+            )
+        return next((dict(d) for d in self.docs if d["_id"] == cond), None)
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                doc.update(update.get("$set", {}))
+                for key in update.get("$unset", {}):
+                    doc.pop(key, None)
+
+
+class FakeDB:
+    def __init__(self, collections=None):
+        self.collections = {name: FakeCollection(docs) for name, docs in (collections or {}).items()}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self):
+        return list(self.collections)
+
+
+def _stocks(n):
+    return [
+        {
+            "_id": ObjectId(),
+            "code": f"{i:06d}",
+            "price": Decimal128(f"{i}.10"),
+            "updated_at": datetime(2025, 10, 17, 6, 30, i % 60),
+            "tags": ["a", {"nested": i}],
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def db():
+    return FakeDB({
+        "stocks": _stocks(23),
+        "users": [{"_id": ObjectId(), "username": "alice", "hashed_password": "x", "api_key": "k"}],
+    })
+
+
+def _export(db, root, collections=("stocks",), **kwargs):
+    manifest = streaming.new_manifest("t", list(collections))
+    return asyncio.run(streaming.stream_export(
+        db, str(root), manifest, chunk_documents=10, batch_size=4, **kwargs
+    ))
+
+
+@pytest.mark.unit
+class TestStreamingBackup:
+    """测试分块导出、续传与恢复"""
+
+    def test_round_trip_preserves_types(self, db, tmp_path):
+        manifest = _export(db, tmp_path)
+
+        entry = manifest["collections"]["stocks"]
+        assert manifest["status"] == "completed"
+        assert [c["count"] for c in entry["chunks"]] == [10, 10, 3]
+        assert entry["count"] == 23
+        for chunk in entry["chunks"]:
+            assert streaming.file_sha256(tmp_path / chunk["file"]) == chunk["sha256"]
+
+        target = FakeDB()
+        result = asyncio.run(streaming.stream_restore(target, str(tmp_path), batch_size=4))
+
+        assert result["total_restored"] == 23
+        assert max(target["stocks"].bulk_calls) == 4
+        restored = sorted(target["stocks"].docs, key=lambda d: d["_id"])
+        assert restored == sorted(db["stocks"].docs, key=lambda d: d["_id"])
+        assert not (tmp_path / streaming.RESTORE_STATE_FILE).exists()
+
+    def test_resume_after_interruption(self, db, tmp_path):
+        stocks = db["stocks"]
+        stocks.fail_after = 15
+        manifest = streaming.new_manifest("t", ["stocks"])
+        with pytest.raises(RuntimeError):
+            asyncio.run(streaming.stream_export(
+                db, str(tmp_path), manifest, chunk_documents=10, batch_size=4
+            ))
+
+        saved = streaming.load_manifest(str(tmp_path))
+        assert saved["status"] == "running"
+        assert saved["collections"]["stocks"]["count"] == 10
+        # 中断时写了一半的分块未登记
+        assert sorted(os.listdir(tmp_path / "stocks")) == ["00000.ndjson.gz", "00001.ndjson.gz"]
+
+        stocks.fail_after = None
+        manifest = asyncio.run(streaming.stream_export(
+            db, str(tmp_path), saved, chunk_documents=10, batch_size=4
+        ))
+        ordered = sorted(stocks.docs, key=lambda d: d["_id"])
+        assert stocks.queries[-1] == {"_id": {"$gt": ordered[9]["_id"]}}
+        assert manifest["collections"]["stocks"]["count"] == 23
+
+        target = FakeDB()
+        asyncio.run(streaming.stream_restore(target, str(tmp_path)))
+        assert sorted(d["_id"] for d in target["stocks"].docs) == [d["_id"] for d in ordered]
+
+    def test_resume_reexports_when_unseen_id_types_exist(self, tmp_path):
+        # 数值 _id 排在字符串 _id 之前，中断时还没读到字符串 _id
+        docs = [{"_id": i, "v": i} for i in range(12)] + [{"_id": f"k{i}", "v": i} for i in range(5)]
+        db = FakeDB({"mixed": docs})
+        db["mixed"].fail_after = 12
+        manifest = streaming.new_manifest("t", ["mixed"])
+        with pytest.raises(RuntimeError):
+            asyncio.run(streaming.stream_export(
+                db, str(tmp_path), manifest, chunk_documents=10, batch_size=4
+            ))
+
+        saved = streaming.load_manifest(str(tmp_path))
+        assert saved["collections"]["mixed"]["id_types"] == ["int"]
+
+        db["mixed"].fail_after = None
+        manifest = asyncio.run(streaming.stream_export(
+            db, str(tmp_path), saved, chunk_documents=10, batch_size=4
+        ))
+
+        # 按 $gt 续传只会读到剩余的数值 _id；检测到字符串 _id 后整个集合重新导出
+        assert db["mixed"].queries[-1] == {}
+        entry = manifest["collections"]["mixed"]
+        assert entry["count"] == 17 and entry["id_types"] == ["int", "str"]
+        target = FakeDB()
+        asyncio.run(streaming.stream_restore(target, str(tmp_path)))
+        assert sorted(target["mixed"].docs, key=_sort_key) == sorted(docs, key=_sort_key)
+
+    def test_checksum_mismatch_and_idempotent_restore(self, db, tmp_path):
+        manifest = _export(db, tmp_path)
+        target = FakeDB({"stocks": [{"_id": "stale"}]})
+
+        asyncio.run(streaming.stream_restore(target, str(tmp_path)))
+        asyncio.run(streaming.stream_restore(target, str(tmp_path)))
+        assert len(target["stocks"].docs) == 24  # 按 _id 覆盖，重复恢复不产生重复文档
+
+        asyncio.run(streaming.stream_restore(target, str(tmp_path), overwrite=True))
+        assert len(target["stocks"].docs) == 23
+
+        chunk = tmp_path / manifest["collections"]["stocks"]["chunks"][1]["file"]
+        data = bytearray(chunk.read_bytes())
+        data[len(data) // 2] ^= 0xFF
+        chunk.write_bytes(bytes(data))
+        with pytest.raises(Exception, match="分块校验失败"):
+            asyncio.run(streaming.stream_restore(FakeDB(), str(tmp_path)))
+
+
+@pytest.mark.unit
+class TestBackupService:
+    """测试备份元数据与导出"""
+
+    @pytest.fixture(autouse=True)
+    def patch_db(self, db, monkeypatch):
+        monkeypatch.setattr(backups, "get_mongo_db", lambda: db)
+
+    def test_create_and_restore_backup(self, db, tmp_path):
+        info = asyncio.run(backups.create_backup("daily", str(tmp_path), collections=["stocks"]))
+
+        assert info["status"] == "completed"
+        assert info["document_count"] == 23
+        meta = db["database_backups"].docs[0]
+        assert (meta["status"], meta["backup_type"], meta["size"]) == ("completed", "ndjson", info["size"])
+
+        db["stocks"].docs = []
+        result = asyncio.run(backups.restore_backup(info["id"]))
+        assert result["restored"] == {"stocks": 23}
+
+        with pytest.raises(Exception, match="无需续传"):
+            asyncio.run(backups.resume_backup(info["id"]))
+
+        asyncio.run(backups.delete_backup(info["id"]))
+        assert not os.path.exists(info["file_path"])
+
+    def test_json_export_streams_importable_format(self, db, tmp_path):
+        path = asyncio.run(backups.export_data(export_dir=str(tmp_path), format="json", sanitize=True))
+
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["export_info"]["collections"] == ["stocks", "users"]
+        assert len(data["data"]["stocks"]) == 23
+        assert data["data"]["stocks"][0]["updated_at"].startswith("2025-10-17")
+        assert data["data"]["users"] == []
+
+    def test_ndjson_export_packs_tar(self, db, tmp_path):
+        path = asyncio.run(backups.export_data(export_dir=str(tmp_path), format="ndjson"))
+
+        assert path.endswith(".tar")
+        with tarfile.open(path) as tar:
+            names = tar.getnames()
+        root = os.path.basename(path)[:-4]
+        assert f"{root}/{streaming.MANIFEST_FILE}" in names
+        assert f"{root}/stocks/00000.ndjson.gz" in names
+        assert not os.path.exists(os.path.join(tmp_path, root))
+
+    def test_parquet_export(self, db, tmp_path):
+        pd = pytest.importorskip("pandas")
+        pytest.importorskip("pyarrow")
+
+        manifest = streaming.new_manifest("t", ["stocks"], chunk_format="parquet")
+        asyncio.run(streaming.stream_export(db, str(tmp_path), manifest, chunk_documents=10))
+
+        df = pd.read_parquet(tmp_path / "stocks" / "00000.parquet")
+        assert len(df) == 10
+        assert json.loads(df["tags"][0])[1] == {"nested": 0}
+
+    def test_unsupported_format(self, tmp_path):
+        with pytest.raises(Exception, match="不支持的导出格式"):
+            asyncio.run(backups.export_data(export_dir=str(tmp_path), format="bson"))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+进程内指标聚合测试
+
+测试范围:
+- 固定分桶直方图与分位数
+- 计数器/gauge/直方图聚合与 Prometheus 导出
+- 周期性批量落库
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.metrics_collector import (
+    Histogram,
+    MetricsCollector,
+    MetricsRegistry,
+    MetricType,
+)
+
+
+@pytest.mark.unit
+class TestHistogram:
+    """测试固定分桶直方图"""
+
+    def test_observe_uses_le_bucket_semantics(self):
+        hist = Histogram((0.1, 1.0))
+
+        hist.observe(0.1)
+        hist.observe(0.5)
+        hist.observe(5.0)
+
+        assert hist.counts == [1, 1, 1]
+        assert hist.count == 3
+        assert hist.sum == pytest.approx(5.6)
+
+    def test_percentile_interpolates_within_bucket(self):
+        hist = Histogram((1.0, 2.0))
+        for _ in range(10):
+            hist.observe(1.5)
+
+        assert hist.percentile(0.5) == pytest.approx(1.5)
+        assert hist.percentile(1.0) == pytest.approx(2.0)
+
+    def test_percentile_overflow_returns_largest_bound(self):
+        hist = Histogram((1.0, 2.0))
+        hist.observe(100.0)
+
+        assert hist.percentile(0.99) == 2.0
+        assert Histogram().percentile(0.5) == 0.0
+
+
+@pytest.mark.unit
+class TestMetricsRegistry:
+    """测试进程内指标注册表"""
+
+    def test_counter_gauge_histogram_render(self):
+        registry = MetricsRegistry()
+        tags = {"endpoint": "/api/x", "method": "GET", "status": "200"}
+
+        registry.observe(MetricType.APP_REQUEST_COUNT, 1, tags)
+        registry.observe(MetricType.APP_REQUEST_COUNT, 1, tags)
+        registry.observe(MetricType.SYSTEM_CPU, 10)
+        registry.observe(MetricType.SYSTEM_CPU, 42.5)
+        registry.observe(MetricType.APP_REQUEST_LATENCY, 0.02, tags)
+
+        text = registry.render_prometheus()
+
+        assert "# TYPE tradingagents_app_request_count_total counter" in text
+        assert (
+            'tradingagents_app_request_count_total{endpoint="/api/x",method="GET",status="200"} 2'
+            in text
+        )
+        assert "tradingagents_system_cpu 42.5" in text
+        assert (
+            'tradingagents_app_request_latency_bucket{endpoint="/api/x",method="GET",status="200",le="0.025"} 1'
+            in text
+        )
+        assert 'le="+Inf"} 1' in text
+        assert 'tradingagents_app_request_latency_count{endpoint="/api/x",method="GET",status="200"} 1' in text
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry()
+        registry.observe(MetricType.APP_ERROR_COUNT, 1, {"endpoint": 'a"b\\c'})
+
+        assert 'endpoint="a\\"b\\\\c"' in registry.render_prometheus()
+
+    def test_percentiles_merge_matching_series(self):
+        registry = MetricsRegistry()
+        for status in ("200", "500"):
+            for _ in range(5):
+                registry.observe(
+                    MetricType.APP_REQUEST_LATENCY, 0.2, {"endpoint": "/a", "status": status}
+                )
+
+        merged = registry.percentiles(MetricType.APP_REQUEST_LATENCY)
+        only_errors = registry.percentiles(MetricType.APP_REQUEST_LATENCY, {"status": "500"})
+
+        assert merged["count"] == 10
+        assert only_errors["count"] == 5
+        assert 0.1 < merged["p50"] <= 0.25
+
+    def test_drain_returns_deltas_and_keeps_cumulative(self):
+        registry = MetricsRegistry()
+        registry.observe(MetricType.ANALYSIS_COUNT, 1, {"analysis_type": "a"})
+        registry.observe(MetricType.ANALYSIS_COUNT, 1, {"analysis_type": "a"})
+
+        pending = registry.drain()
+
+        agg = pending[(MetricType.ANALYSIS_COUNT, (("analysis_type", "a"),), "app")]
+        assert agg.count == 2
+        assert agg.sum == 2
+        assert registry.drain() == {}
+        assert "tradingagents_analysis_count_total" in registry.render_prometheus()
+
+
+@pytest.mark.unit
+class TestMetricsCollectorFlush:
+    """测试批量落库"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_one_document_per_series(self):
+        collector = MetricsCollector(flush_interval=3600)
+        collector._initialized = True
+        metrics_coll = MagicMock()
+        metrics_coll.insert_many = AsyncMock()
+        summary_coll = MagicMock()
+        summary_coll.bulk_write = AsyncMock()
+        db = {"system_metrics": metrics_coll, "metrics_summary": summary_coll}
+        collector._db = db
+
+        tags = {"endpoint": "/a", "method": "GET", "status": "200"}
+        for value in (0.1, 0.3):
+            await collector.record_metric(MetricType.APP_REQUEST_COUNT, 1, tags)
+            await collector.record_metric(MetricType.APP_REQUEST_LATENCY, value, tags)
+
+        written = await collector.flush()
+        await collector.stop()
+
+        assert written == 2
+        docs = metrics_coll.insert_many.await_args.args[0]
+        by_type = {d["metric_type"]: d for d in docs}
+        assert by_type["app_request_count"]["value"] == 2
+        assert by_type["app_request_latency"]["value"] == pytest.approx(0.2)
+        assert by_type["app_request_latency"]["max"] == pytest.approx(0.3)
+        assert by_type["app_request_latency"]["tags"] == tags
+
+        ops = summary_coll.bulk_write.await_args.args[0]
+        assert len(ops) == 2
+        assert metrics_coll.insert_many.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_without_samples_skips_database(self):
+        collector = MetricsCollector(flush_interval=3600)
+        collector._db = MagicMock()
+
+        assert await collector.flush() == 0
+        collector._db.__getitem__.assert_not_called()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+操作日志批量写入器测试
+
+测试范围:
+- 缓冲区提交与批量写入
+- 缓冲区满/写库失败时的落盘与丢弃
+- 落盘文件补写
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.operation_log_writer import OperationLogWriter
+
+
+def _doc(i=0):
+    return {"user_id": "admin", "action": f"op-{i}", "timestamp": datetime(2025, 1, 1, 9, 30, i)}
+
+
+def _mock_service(side_effect=None):
+    service = MagicMock()
+    service.insert_log_documents = AsyncMock(
+        side_effect=side_effect or (lambda docs: len(docs))
+    )
+    return service
+
+
+@pytest.mark.unit
+class TestOperationLogWriter:
+    """测试操作日志批量写入器"""
+
+    @pytest.mark.asyncio
+    async def test_flush_writes_in_batches(self, tmp_path):
+        writer = OperationLogWriter(
+            max_buffer=100, batch_size=2, flush_interval=60, spill_file=str(tmp_path / "spill.jsonl")
+        )
+        service = _mock_service()
+
+        with patch("app.services.operation_log_writer.get_operation_log_service", return_value=service):
+            for i in range(5):
+                assert writer.submit(_doc(i)) is True
+            written = await writer.flush()
+            await writer.stop()
+
+        assert written == 5
+        assert [len(c.args[0]) for c in service.insert_log_documents.await_args_list] == [2, 2, 1]
+        assert writer.pending_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_size_threshold_wakes_background_task(self, tmp_path):
+        writer = OperationLogWriter(
+            max_buffer=100, batch_size=2, flush_interval=60, spill_file=str(tmp_path / "spill.jsonl")
+        )
+        service = _mock_service()
+
+        with patch("app.services.operation_log_writer.get_operation_log_service", return_value=service):
+            writer.submit(_doc(0))
+            writer.submit(_doc(1))
+            for _ in range(20):
+                await asyncio.sleep(0)
+                if writer.stats["written"]:
+                    break
+            await writer.stop()
+
+        assert writer.stats["written"] == 2
+
+    def test_overflow_spills_to_file(self, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        writer = OperationLogWriter(max_buffer=1, batch_size=10, flush_interval=60, spill_file=str(spill))
+
+        assert writer.submit(_doc(0)) is True
+        assert writer.submit(_doc(1)) is False
+
+        assert writer.stats["spilled"] == 1
+        assert "op-1" in spill.read_text(encoding="utf-8")
+
+    def test_overflow_drop_policy(self, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        writer = OperationLogWriter(
+            max_buffer=1, batch_size=10, flush_interval=60, overflow_policy="drop", spill_file=str(spill)
+        )
+
+        writer.submit(_doc(0))
+        writer.submit(_doc(1))
+
+        assert writer.stats["dropped"] == 1
+        assert not spill.exists()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_spilled_then_replayed(self, tmp_path):
+        spill = tmp_path / "spill.jsonl"
+        writer = OperationLogWriter(max_buffer=10, batch_size=10, flush_interval=60, spill_file=str(spill))
+
+        def fail(docs):
+            raise RuntimeError("mongo down")
+
+        with patch(
+            "app.services.operation_log_writer.get_operation_log_service",
+            return_value=_mock_service(side_effect=fail),
+        ):
+            writer.submit(_doc(0))
+            writer.submit(_doc(1))
+            assert await writer.flush() == 0
+
+        assert writer.stats["spilled"] == 2
+
+        service = _mock_service()
+        with patch("app.services.operation_log_writer.get_operation_log_service", return_value=service):
+            replayed = await writer.replay_spill_file()
+
+        assert replayed == 2
+        docs = service.insert_log_documents.await_args.args[0]
+        assert docs[0]["timestamp"] == datetime(2025, 1, 1, 9, 30, 0)
+        assert not spill.exists()
+
+    @pytest.mark.asyncio
+    async def test_partially_written_batch_replays_once(self, tmp_path):
+        """insert_many 分配 _id 并写入一部分后失败：补写跳过已写入的文档，不会反复落盘"""
+        from bson import ObjectId
+        from pymongo.errors import BulkWriteError
+
+        spill = tmp_path / "spill.jsonl"
+        writer = OperationLogWriter(max_buffer=10, batch_size=10, flush_interval=60, spill_file=str(spill))
+        stored = {}
+
+        def insert_many(docs, fail_after=None):
+            errors, inserted = [], 0
+            for index, doc in enumerate(docs):
+                doc.setdefault("_id", ObjectId())
+                if fail_after is not None and index >= fail_after:
+                    raise RuntimeError("connection reset")
+                if doc["_id"] in stored:
+                    errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key"})
+                else:
+                    stored[doc["_id"]] = dict(doc)
+                    inserted += 1
+            if errors:
+                raise BulkWriteError({"writeErrors": errors, "nInserted": inserted})
+            return inserted
+
+        with patch(
+            "app.services.operation_log_writer.get_operation_log_service",
+            return_value=_mock_service(side_effect=lambda docs: insert_many(docs, fail_after=1)),
+        ):
+            for i in range(3):
+                writer.submit(_doc(i))
+            assert await writer.flush() == 0
+
+        assert len(stored) == 1
+        assert writer.stats["spilled"] == 3
+
+        with patch(
+            "app.services.operation_log_writer.get_operation_log_service",
+            return_value=_mock_service(side_effect=insert_many),
+        ):
+            assert await writer.replay_spill_file() == 3
+            assert await writer.replay_spill_file() == 0
+
+        assert sorted(d["action"] for d in stored.values()) == ["op-0", "op-1", "op-2"]
+        assert writer.stats["spilled"] == 3
+        assert not spill.exists()
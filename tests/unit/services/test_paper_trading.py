@@ -0,0 +1,559 @@
+# -*- coding: utf-8 -*-
+"""
+模拟交易引擎单元测试
+
+测试范围:
+- 限价/触发单撮合规则
+- 批量行情查询（A股一次查询 + 缺失回退）
+- 条件扣款失败时拒单
+- 并发撮合：订单认领失败时不成交
+- 卖出入账失败时恢复持仓
+- 在内存集合上执行管道更新：加权成本、清仓删除、并发首次开户
+- 进程中断后停留在 filling 的订单：按进度标记补完成交或回滚
+"""
+
+import asyncio
+import copy
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.services.paper import PaperTradingEngine, PaperTradingError, evaluate_order, get_last_prices
+
+
+def _cursor(docs):
+    cursor = MagicMock()
+    cursor.to_list = AsyncMock(return_value=docs)
+    return cursor
+
+
+def _db(**collections):
+    """按集合名返回 mock 集合的数据库"""
+    db = MagicMock()
+    store = {}
+
+    def get(name):
+        if name not in store:
+            coll = MagicMock()
+            for method in ("find_one", "update_one", "insert_one", "delete_one", "find_one_and_update"):
+                setattr(coll, method, AsyncMock())
+            store[name] = coll
+        return store[name]
+
+    db.__getitem__.side_effect = get
+    for name, coll in collections.items():
+        store[name] = coll
+    return db
+
+
+def _order(**overrides):
+    order = {
+        "_id": ObjectId(),
+        "user_id": "u1",
+        "code": "600000",
+        "market": "CN",
+        "currency": "CNY",
+        "side": "buy",
+        "order_type": "limit",
+        "quantity": 100,
+        "limit_price": 10.0,
+        "stop_price": None,
+        "status": "open",
+    }
+    order.update(overrides)
+    return order
+
+
+@pytest.mark.unit
+class TestEvaluateOrder:
+    """测试撮合规则"""
+
+    def test_limit_orders(self):
+        assert evaluate_order(_order(), 9.8)[1] == 9.8
+        assert evaluate_order(_order(), 10.2)[1] is None
+        assert evaluate_order(_order(side="sell"), 10.2)[1] == 10.2
+        assert evaluate_order(_order(side="sell"), 9.8)[1] is None
+
+    def test_stop_orders(self):
+        stop_sell = _order(side="sell", order_type="stop", stop_price=9.0, limit_price=None)
+        assert evaluate_order(stop_sell, 9.5) == (False, None)
+        assert evaluate_order(stop_sell, 8.9) == (True, 8.9)
+
+        stop_buy = _order(order_type="stop", stop_price=11.0, limit_price=None)
+        assert evaluate_order(stop_buy, 11.2) == (True, 11.2)
+
+    def test_stop_limit_stays_triggered(self):
+        order = _order(order_type="stop", stop_price=11.0, limit_price=11.1)
+        # 触发但超过限价：已触发、不成交
+        assert evaluate_order(order, 11.3) == (True, None)
+        order["triggered"] = True
+        # 回落到触发价以下仍按限价撮合
+        assert evaluate_order(order, 10.9) == (True, 10.9)
+
+    def test_invalid_price(self):
+        assert evaluate_order(_order(order_type="market"), None) == (False, None)
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_get_last_prices_batches_cn_lookup():
+    quotes = MagicMock()
+    quotes.find.return_value = _cursor([{"code": "600000", "close": 10.5}, {"code": "000001", "close": 0}])
+    basics = MagicMock()
+    basics.find.return_value = _cursor([{"code": "000001", "current_price": 12.3}])
+    db = _db(market_quotes=quotes, stock_basic_info=basics)
+
+    prices = await get_last_prices(
+        db, [("CN", "600000"), ("CN", "000001"), ("CN", "600000"), ("CN", "000002")]
+    )
+
+    assert prices == {("CN", "600000"): 10.5, ("CN", "000001"): 12.3, ("CN", "000002"): None}
+    quotes.find.assert_called_once()
+    # 只为缺失的代码回退查询
+    assert basics.find.call_args[0][0]["$or"][0]["code"]["$in"] == ["000001", "000002"]
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_buy_rejected_when_cash_cas_fails():
+    db = _db()
+    db["paper_market_rules"].find_one.return_value = None
+    db["paper_accounts"].update_one.return_value = SimpleNamespace(modified_count=0)
+    db["paper_accounts"].find_one.return_value = {"cash": {"CNY": 500.0}}
+    engine = PaperTradingEngine(db=db)
+    order = _order(status="filling")
+
+    with pytest.raises(PaperTradingError, match="可用CNY不足"):
+        await engine._execute_fill(order, 10.0)
+
+    debit_filter = db["paper_accounts"].update_one.call_args[0][0]
+    assert debit_filter["cash.CNY"] == {"$gte": 1000.0}
+    db["paper_positions"].update_one.assert_not_called()
+    assert order["status"] == "rejected"
+    db["paper_trades"].insert_one.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_claimed_order_is_not_filled_twice():
+    db = _db()
+    db["paper_orders"].find_one_and_update.return_value = None  # 已被其他撮合方认领
+    engine = PaperTradingEngine(db=db)
+
+    assert await engine._try_match(_order(), 9.5) is False
+    db["paper_accounts"].update_one.assert_not_called()
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_buy_fill_updates_position_atomically():
+    db = _db()
+    db["paper_market_rules"].find_one.return_value = None
+    db["paper_accounts"].update_one.return_value = SimpleNamespace(modified_count=1)
+    db["paper_orders"].find_one_and_update.return_value = {"status": "open"}
+    engine = PaperTradingEngine(db=db)
+    order = _order()
+
+    assert await engine._try_match(order, 9.5) is True
+
+    position_filter, pipeline = db["paper_positions"].update_one.call_args_list[0][0]
+    assert position_filter == {"user_id": "u1", "code": "600000"}
+    assert isinstance(pipeline, list) and "$round" in pipeline[0]["$set"]["avg_cost"]
+    assert db["paper_positions"].update_one.call_args_list[0][1]["upsert"] is True
+    assert order["status"] == "filled" and order["price"] == 9.5
+    trade = db["paper_trades"].insert_one.call_args[0][0]
+    assert trade["order_id"] == str(order["_id"]) and trade["amount"] == 950.0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_sell_restores_position_when_credit_fails():
+    db = _db()
+    db["paper_market_rules"].find_one.return_value = None
+    position = {"_id": ObjectId(), "quantity": 300, "available_qty": 300, "avg_cost": 8.0}
+    db["paper_positions"].find_one_and_update.return_value = position
+    db["paper_accounts"].update_one.side_effect = RuntimeError("write failed")
+    engine = PaperTradingEngine(db=db)
+    order = _order(side="sell", status="filling")
+
+    with pytest.raises(RuntimeError):
+        await engine._execute_fill(order, 10.0)
+
+    sell_filter = db["paper_positions"].find_one_and_update.call_args[0][0]
+    assert sell_filter["quantity"] == {"$gte": 100}
+    restore = db["paper_positions"].update_one.call_args[0]
+    assert restore[0] == {"_id": position["_id"], f"pending_fills.{order['_id']}": {"$exists": True}}
+    # 增量恢复，不用读取时的旧值覆盖并发成交后的持仓
+    assert restore[1]["$inc"] == {"quantity": 100, "available_qty": 100}
+    assert order["status"] == "rejected"
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_sell_restore_only_returns_what_was_deducted():
+    db = _db()
+    db["paper_market_rules"].find_one.return_value = None
+    # 可用数量不足卖出数量时，管道更新把 available_qty 截断为 0，只扣掉了 40
+    position = {"_id": ObjectId(), "quantity": 300, "available_qty": 40, "avg_cost": 8.0}
+    db["paper_positions"].find_one_and_update.return_value = position
+    db["paper_accounts"].update_one.side_effect = RuntimeError("write failed")
+    engine = PaperTradingEngine(db=db)
+
+    with pytest.raises(RuntimeError):
+        await engine._execute_fill(_order(side="sell", status="filling"), 10.0)
+
+    restore = db["paper_positions"].update_one.call_args[0][1]
+    assert restore["$inc"] == {"quantity": 100, "available_qty": 40}
+
+
+# ---------------------------------------------------------------- 内存集合
+
+_EXPR_OPS = {
+    "$ifNull": lambda value, default: default if value is None else value,
+    "$add": lambda *values: sum(values),
+    "$subtract": lambda a, b: a - b,
+    "$multiply": lambda a, b: a * b,
+    "$divide": lambda a, b: a / b,
+    "$round": lambda value, digits: round(value, digits),
+    "$max": lambda *values: max(values),
+    "$min": lambda *values: min(values),
+}
+
+
+def _get(doc, path):
+    for key in path.split("."):
+        if not isinstance(doc, dict):
+            return None
+        doc = doc.get(key)
+    return doc
+
+
+def _set(doc, path, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[last] = value
+
+
+def _expr(expr, doc):
+    """按 MongoDB 聚合表达式语义求值（只覆盖引擎用到的算子）"""
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _get(doc, expr[1:])
+    if isinstance(expr, dict) and len(expr) == 1 and next(iter(expr)) in _EXPR_OPS:
+        op, args = next(iter(expr.items()))
+        return _EXPR_OPS[op](*[_expr(arg, doc) for arg in args])
+    if isinstance(expr, dict):
+        return {key: _expr(value, doc) for key, value in expr.items()}
+    return expr
+
+
+def _unset(doc, path):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.get(key) or {}
+    doc.pop(last, None)
+
+
+def _matches(doc, query):
+    for path, cond in query.items():
+        value = _get(doc, path)
+        if isinstance(cond, dict):
+            if "$exists" in cond and (value is not None) != cond["$exists"]:
+                return False
+            if "$lt" in cond and not (value is not None and value < cond["$lt"]):
+                return False
+            if "$gte" in cond and not (value is not None and value >= cond["$gte"]):
+                return False
+            if "$lte" in cond and not (value is not None and value <= cond["$lte"]):
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class MemoryCollection:
+    """带唯一键约束的内存集合；find_one 读取后让出事件循环以模拟并发交错"""
+
+    def __init__(self, unique=None):
+        self.docs = []
+        self.unique = unique
+
+    def _check_unique(self, doc):
+        if self.unique and any(
+            d is not doc and all(d.get(k) == doc.get(k) for k in self.unique) for d in self.docs
+        ):
+            raise DuplicateKeyError("E11000 duplicate key")
+
+    def _apply(self, doc, update, inserting=False):
+        if isinstance(update, list):
+            for stage in update:
+                # 同一 $set 阶段的表达式都基于阶段开始前的文档求值
+                before = copy.deepcopy(doc)
+                for path, expr in stage["$set"].items():
+                    _set(doc, path, _expr(expr, before))
+            return
+        for path, value in update.get("$set", {}).items():
+            _set(doc, path, value)
+        for path, value in update.get("$inc", {}).items():
+            _set(doc, path, (_get(doc, path) or 0) + value)
+        for path in update.get("$unset", {}):
+            _unset(doc, path)
+        if inserting:
+            for path, value in update.get("$setOnInsert", {}).items():
+                _set(doc, path, value)
+
+    async def find_one(self, query):
+        doc = copy.deepcopy(next((d for d in self.docs if _matches(d, query)), None))
+        await asyncio.sleep(0)
+        return doc
+
+    def find(self, query):
+        return _cursor([copy.deepcopy(d) for d in self.docs if _matches(d, query)])
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self._check_unique(doc)
+        self.docs.append(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def update_one(self, query, update, upsert=False):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            if not upsert:
+                return SimpleNamespace(modified_count=0, upserted_id=None)
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            doc["_id"] = ObjectId()
+            self._apply(doc, update, inserting=True)
+            self._check_unique(doc)
+            self.docs.append(doc)
+            return SimpleNamespace(modified_count=0, upserted_id=doc["_id"])
+        self._apply(doc, update)
+        return SimpleNamespace(modified_count=1, upserted_id=None)
+
+    async def find_one_and_update(self, query, update, return_document=ReturnDocument.BEFORE):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is None:
+            return None
+        before = copy.deepcopy(doc)
+        self._apply(doc, update)
+        return before if return_document == ReturnDocument.BEFORE else copy.deepcopy(doc)
+
+    async def delete_one(self, query):
+        doc = next((d for d in self.docs if _matches(d, query)), None)
+        if doc is not None:
+            self.docs.remove(doc)
+        return SimpleNamespace(deleted_count=int(doc is not None))
+
+
+class MemoryDB(dict):
+    def __missing__(self, name):
+        unique = {"paper_accounts": ("user_id",), "paper_positions": ("user_id", "code")}.get(name)
+        self[name] = MemoryCollection(unique)
+        return self[name]
+
+
+@pytest.mark.unit
+class TestPipelineSemantics:
+    """在内存集合上执行引擎的条件更新与管道更新"""
+
+    def test_weighted_cost_and_round_trip(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            await engine._execute_fill(_order(order_type="market", status="filling"), 10.0)
+            await engine._execute_fill(
+                _order(order_type="market", status="filling", quantity=300), 12.0
+            )
+            position = await db["paper_positions"].find_one({"user_id": "u1", "code": "600000"})
+
+            sell = _order(side="sell", order_type="market", status="filling", quantity=400)
+            pnl_before = await db["paper_accounts"].find_one({"user_id": "u1"})
+            await engine._execute_fill(sell, 13.0)
+            account = await db["paper_accounts"].find_one({"user_id": "u1"})
+            return position, pnl_before, account
+
+        position, before_sell, account = asyncio.run(run())
+
+        assert position["quantity"] == 400
+        assert position["avg_cost"] == 11.5  # (10*100 + 12*300) / 400
+        assert position["available_qty"] == 0  # A股 T+1
+        assert before_sell["cash"]["CNY"] == 1_000_000.0 - 1000.0 - 3600.0
+        assert account["cash"]["CNY"] == 1_000_000.0 - 4600.0 + 5200.0
+        assert account["realized_pnl"]["CNY"] == 600.0
+        # 清仓后删除持仓；每笔成交都有记录
+        assert db["paper_positions"].docs == []
+        assert [t["side"] for t in db["paper_trades"].docs] == ["buy", "buy", "sell"]
+        assert db["paper_trades"].docs[-1]["pnl"] == 600.0
+        # 进度标记在成交完成后清除
+        assert db["paper_accounts"].docs[0]["pending_fills"] == {}
+
+    def test_oversell_is_rejected_without_side_effects(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            await engine._execute_fill(_order(order_type="market", status="filling"), 10.0)
+            with pytest.raises(PaperTradingError, match="可用持仓不足"):
+                await engine._execute_fill(
+                    _order(side="sell", order_type="market", status="filling", quantity=200), 11.0
+                )
+
+        asyncio.run(run())
+
+        assert db["paper_positions"].docs[0]["quantity"] == 100
+        assert db["paper_accounts"].docs[0]["realized_pnl"]["CNY"] == 0.0
+
+    def test_concurrent_first_requests_create_one_account(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            return await asyncio.gather(*(engine.get_or_create_account("u1") for _ in range(3)))
+
+        accounts = asyncio.run(run())
+
+        assert len(db["paper_accounts"].docs) == 1
+        assert {a["_id"] for a in accounts} == {db["paper_accounts"].docs[0]["_id"]}
+        assert accounts[0]["cash"]["CNY"] == 1_000_000.0
+
+
+@pytest.mark.unit
+@pytest.mark.asyncio
+async def test_account_upsert_race_rereads_winner():
+    db = _db()
+    winner = {"_id": ObjectId(), "user_id": "u1", "cash": {"CNY": 1.0}, "realized_pnl": {"CNY": 0.0}}
+    db["paper_accounts"].find_one.side_effect = [None, winner]
+    db["paper_accounts"].update_one.side_effect = DuplicateKeyError("E11000 duplicate key")
+    engine = PaperTradingEngine(db=db)
+
+    assert await engine.get_or_create_account("u1") == winner
+    assert db["paper_accounts"].update_one.call_args[1]["upsert"] is True
+
+
+def _crash_on(collection, method):
+    """模拟进程在该次写入时中断：CancelledError 不是 Exception，补偿分支不会执行"""
+    original = getattr(collection, method)
+
+    async def crash(*args, **kwargs):
+        setattr(collection, method, original)
+        raise asyncio.CancelledError()
+
+    setattr(collection, method, crash)
+
+
+async def _interrupted_fill(db, engine, crash_collection, crash_method, price, **overrides):
+    """写入一笔过期的 filling 订单，执行成交并在指定写入处中断"""
+    order = _order(order_type="market", status="filling", updated_at="2000-01-01T00:00:00", **overrides)
+    await db["paper_orders"].insert_one(order)
+    _crash_on(db[crash_collection], crash_method)
+    with pytest.raises(asyncio.CancelledError):
+        await engine._execute_fill(order, price)
+    return order
+
+
+_HK = {"code": "00700", "market": "HK", "currency": "HKD"}
+
+
+@pytest.mark.unit
+class TestStaleFillRecovery:
+    """测试中断后停留在 filling 的订单的收尾"""
+
+    def test_buy_interrupted_after_debit_is_refunded_once(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            order = await _interrupted_fill(db, engine, "paper_positions", "update_one", 10.0)
+            debited = (await db["paper_accounts"].find_one({"user_id": "u1"}))["cash"]["CNY"]
+            # 并发的恢复方只有一个认领成功
+            counts = await asyncio.gather(engine.recover_stale_fills(), engine.recover_stale_fills())
+            return order, debited, counts
+
+        order, debited, counts = asyncio.run(run())
+
+        assert debited == 1_000_000.0 - 1000.0
+        assert sorted(counts) == [0, 1]
+        account = db["paper_accounts"].docs[0]
+        assert account["cash"]["CNY"] == 1_000_000.0
+        assert account["pending_fills"] == {}
+        assert db["paper_orders"].docs[0]["status"] == "rejected"
+        assert db["paper_positions"].docs == [] and db["paper_trades"].docs == []
+
+    def test_buy_interrupted_before_trade_record_is_completed(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            await _interrupted_fill(db, engine, "paper_trades", "insert_one", 10.0)
+            return await engine.recover_stale_fills()
+
+        assert asyncio.run(run()) == 1
+
+        order = db["paper_orders"].docs[0]
+        assert (order["status"], order["price"], order["amount"]) == ("filled", 10.0, 1000.0)
+        assert [t["order_id"] for t in db["paper_trades"].docs] == [str(order["_id"])]
+        assert db["paper_accounts"].docs[0]["cash"]["CNY"] == 1_000_000.0 - 1000.0
+        position = db["paper_positions"].docs[0]
+        assert position["quantity"] == 100 and position["pending_fills"] == {}
+
+    def test_sell_interrupted_after_deduction_restores_position(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            await engine._execute_fill(_order(order_type="market", status="filling", quantity=300, **_HK), 10.0)
+            await _interrupted_fill(
+                db, engine, "paper_accounts", "update_one", 12.0, side="sell", quantity=200, **_HK
+            )
+            return await engine.recover_stale_fills()
+
+        assert asyncio.run(run()) == 1
+
+        position = db["paper_positions"].docs[0]
+        assert (position["quantity"], position["available_qty"]) == (300, 300)
+        assert position["pending_fills"] == {}
+        assert db["paper_accounts"].docs[0]["realized_pnl"]["HKD"] == 0.0
+        assert db["paper_orders"].docs[0]["status"] == "rejected"
+
+    def test_sell_interrupted_after_credit_is_completed(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+
+        async def run():
+            await engine.get_or_create_account("u1")
+            await engine._execute_fill(_order(order_type="market", status="filling", quantity=300, **_HK), 10.0)
+            await _interrupted_fill(
+                db, engine, "paper_trades", "insert_one", 12.0, side="sell", quantity=300, **_HK
+            )
+            return await engine.recover_stale_fills()
+
+        assert asyncio.run(run()) == 1
+
+        assert db["paper_positions"].docs == []
+        assert db["paper_orders"].docs[0]["status"] == "filled"
+        assert [(t["side"], t["pnl"]) for t in db["paper_trades"].docs] == [("buy", 0.0), ("sell", 600.0)]
+        account = db["paper_accounts"].docs[0]
+        assert account["realized_pnl"]["HKD"] == 600.0 and account["pending_fills"] == {}
+
+    def test_recent_filling_orders_are_left_alone(self):
+        db = MemoryDB()
+        engine = PaperTradingEngine(db=db)
+        order = _order(status="filling", updated_at=datetime.utcnow().isoformat())
+
+        async def run():
+            await db["paper_orders"].insert_one(order)
+            return await engine.recover_stale_fills()
+
+        assert asyncio.run(run()) == 0
+        assert db["paper_orders"].docs[0]["status"] == "filling"
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+认证主体缓存测试
+
+测试范围:
+- 缓存命中/过期/LRU 淘汰，Token 版本号高于缓存时重新读库
+- get_current_user 命中缓存时不查库，版本号增加后旧 Token 立即失效
+- 版本号递增并发布跨进程失效通知
+- 其它进程的失效通知与撤销耗时指标
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.user import User
+from app.services import principal_cache as principal_cache_mod
+from app.services.auth_service import AuthService
+from app.services.metrics_collector import MetricType, get_metrics_collector
+from app.services.principal_cache import PrincipalCache
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = PrincipalCache(ttl=30, max_entries=100)
+    monkeypatch.setattr(principal_cache_mod, "_principal_cache", cache)
+    monkeypatch.setattr(principal_cache_mod, "get_redis", lambda: None)
+    return cache
+
+
+class FakeUserStore:
+    """按用户名返回用户，记录查库次数"""
+
+    def __init__(self):
+        self.users = {
+            "alice": User(username="alice", email="alice@example.com", hashed_password="x"),
+        }
+        self.lookups = 0
+
+    async def get_user_by_username(self, username):
+        self.lookups += 1
+        return self.users.get(username)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    from app.routers import auth_db
+
+    store = FakeUserStore()
+    monkeypatch.setattr(auth_db.user_service, "get_user_by_username", store.get_user_by_username)
+    return store
+
+
+def _authenticate(token):
+    from app.routers.auth_db import get_current_user
+
+    return asyncio.run(get_current_user(authorization=f"Bearer {token}"))
+
+
+@pytest.mark.unit
+class TestPrincipalCache:
+    """测试缓存本身"""
+
+    def test_hit_expiry_and_newer_token(self, cache):
+        cache.put("alice", {"username": "alice"}, token_version=1)
+
+        assert cache.get("alice", 1).principal == {"username": "alice"}
+        # Token 版本号高于缓存：其它进程已撤销过，缓存过时
+        assert cache.get("alice", 2) is None
+        assert "alice" not in cache._entries
+
+        entry = cache.put("alice", {"username": "alice"}, token_version=2)
+        entry.expires_at = time.monotonic() - 1
+        assert cache.get("alice", 2) is None
+
+        stats = cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (1, 2)
+        assert stats["hit_rate"] == pytest.approx(1 / 3)
+
+    def test_lru_bound(self, cache):
+        cache.max_entries = 2
+        for name in ("a", "b"):
+            cache.put(name, {}, 0)
+        cache.get("a")
+        cache.put("c", {}, 0)
+
+        assert sorted(cache._entries) == ["a", "c"]
+
+    def test_disabled(self, cache, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "PRINCIPAL_CACHE_ENABLED", False)
+        cache.put("alice", {}, 0)
+        assert cache.get("alice") is None
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestGetCurrentUser:
+    """测试请求认证"""
+
+    def test_cache_hit_skips_database(self, cache, store):
+        token = AuthService.create_access_token(sub="alice")
+
+        first = _authenticate(token)
+        first["preferences"]["language"] = "en-US"
+        second = _authenticate(token)
+
+        assert store.lookups == 1
+        assert second["username"] == "alice"
+        assert second["preferences"]["language"] == "zh-CN"  # 返回的是副本
+
+    def test_revoked_token_rejected_immediately(self, cache, store):
+        old_token = AuthService.create_access_token(sub="alice")
+        _authenticate(old_token)
+
+        # 模拟 bump_token_version：数据库版本号 +1 并失效缓存
+        store.users["alice"].token_version = 1
+        asyncio.run(cache.invalidate("alice", token_version=1))
+
+        with pytest.raises(HTTPException) as exc:
+            _authenticate(old_token)
+        assert exc.value.detail == "Token has been revoked"
+        assert cache.stats["revoked"] == 1
+
+        # 撤销结果也被缓存：旧 Token 的后续请求不再查库
+        lookups = store.lookups
+        with pytest.raises(HTTPException):
+            _authenticate(old_token)
+        assert store.lookups == lookups
+
+        new_token = AuthService.create_access_token(sub="alice", token_version=1)
+        assert _authenticate(new_token)["username"] == "alice"
+        assert store.lookups == lookups
+
+    def test_inactive_user_not_cached(self, cache, store):
+        store.users["alice"].is_active = False
+        token = AuthService.create_access_token(sub="alice")
+
+        with pytest.raises(HTTPException):
+            _authenticate(token)
+        assert len(cache) == 0
+
+
+@pytest.mark.unit
+class TestInvalidation:
+    """测试版本号递增与跨进程通知"""
+
+    def test_bump_token_version_publishes(self, cache, monkeypatch):
+        from app.services.user_service import UserService
+
+        published = []
+
+        class FakeRedis:
+            async def publish(self, channel, message):
+                published.append((channel, json.loads(message)))
+
+        class FakeCollection:
+            def __init__(self):
+                self.version = 2
+
+            async def find_one_and_update(self, query, update, **kwargs):
+                assert update["$inc"] == {"token_version": 1}
+                self.version += 1
+                return {"token_version": self.version}
+
+        monkeypatch.setattr(principal_cache_mod, "get_redis", lambda: FakeRedis())
+        service = UserService()
+        service._collection = FakeCollection()
+        cache.put("alice", {}, 2)
+
+        assert asyncio.run(service.bump_token_version("alice")) == 3
+        assert len(cache) == 0
+        channel, message = published[0]
+        assert channel == principal_cache_mod.INVALIDATION_CHANNEL
+        assert message["username"] == "alice"
+        assert message["token_version"] == 3
+        assert message["origin"] == cache.instance_id
+
+    def test_remote_message_evicts_and_records_latency(self, cache):
+        cache.put("alice", {}, 0)
+        cache.put("bob", {}, 0)
+
+        # 本进程自己发出的通知忽略
+        cache.handle_message(json.dumps({"username": "bob", "origin": cache.instance_id}))
+        assert "bob" in cache._entries
+
+        before = get_metrics_collector().registry.percentiles(
+            MetricType.TOKEN_REVOCATION_LATENCY, tags={"scope": "remote"}
+        )["count"]
+        cache.handle_message(json.dumps({
+            "username": "alice", "token_version": 1, "changed_at": time.time() - 0.2, "origin": "other",
+        }))
+
+        assert "alice" not in cache._entries
+        latency = get_metrics_collector().registry.percentiles(
+            MetricType.TOKEN_REVOCATION_LATENCY, tags={"scope": "remote"}
+        )
+        assert latency["count"] == before + 1
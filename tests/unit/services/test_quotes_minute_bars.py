@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+行情入库变化检测与分钟K线测试
+
+测试范围:
+- 未变化的股票不重复写入，交易日变化时全量写入
+- 快照聚合为1分钟K线（OHLC、成交量增量）
+- 进入下一分钟才定型并按 股票+交易日 分桶追加写入
+- 休市时写出最后一分钟
+- 采集间隔超过60秒时不记录分钟K线
+"""
+
+import asyncio
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+TZ = ZoneInfo("Asia/Shanghai")
+
+
+class FakeCollection:
+    def __init__(self):
+        self.batches = []
+
+    async def bulk_write(self, ops, ordered=False):
+        self.batches.append(ops)
+
+        class Result:
+            matched_count = len(ops)
+            modified_count = len(ops)
+            upserted_ids = {}
+
+        return Result()
+
+
+class FakeDB:
+    def __init__(self):
+        self.collections = {}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+@pytest.fixture
+def service(monkeypatch):
+    import app.services.quotes.bars as bars_mod
+    import app.services.quotes.ingestion as ingestion_mod
+    from app.services.quotes import QuotesIngestionService
+
+    db = FakeDB()
+    monkeypatch.setattr(ingestion_mod, "get_mongo_db", lambda: db)
+    monkeypatch.setattr(bars_mod, "get_mongo_db", lambda: db)
+
+    svc = QuotesIngestionService()
+    svc.fake_db = db
+    return svc
+
+
+def _quote(close, volume, amount=None):
+    return {"close": close, "volume": volume, "amount": amount if amount is not None else volume * close}
+
+
+def _written_codes(collection, batch=-1):
+    return [op._filter["code"] for op in collection.batches[batch]]
+
+
+@pytest.mark.unit
+class TestChangeDetection:
+    """测试变化检测"""
+
+    def test_unchanged_symbols_skipped(self, service):
+        coll = service.fake_db["market_quotes"]
+        snapshot = {"000001": _quote(10.0, 100), "600000": _quote(8.0, 200)}
+
+        asyncio.run(service._bulk_upsert(snapshot, "20251017", "test"))
+        changed = asyncio.run(
+            service._bulk_upsert({**snapshot, "600000": _quote(8.1, 260)}, "20251017", "test")
+        )
+
+        assert sorted(_written_codes(coll, 0)) == ["000001", "600000"]
+        assert _written_codes(coll, 1) == ["600000"]
+        assert list(changed) == ["600000"]
+        assert service.write_stats["skipped_unchanged"] == 1
+
+        # 全部未变化时不写库
+        asyncio.run(service._bulk_upsert({**snapshot, "600000": _quote(8.1, 260)}, "20251017", "test"))
+        assert len(coll.batches) == 2
+
+        # 新交易日全量写入
+        asyncio.run(service._bulk_upsert(snapshot, "20251020", "test"))
+        assert sorted(_written_codes(coll, 2)) == ["000001", "600000"]
+
+    def test_detection_can_be_disabled(self, service, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "QUOTES_CHANGE_DETECTION_ENABLED", False)
+        coll = service.fake_db["market_quotes"]
+        snapshot = {"000001": _quote(10.0, 100)}
+
+        asyncio.run(service._bulk_upsert(snapshot, "20251017", "test"))
+        asyncio.run(service._bulk_upsert(snapshot, "20251017", "test"))
+
+        assert len(coll.batches) == 2
+
+
+@pytest.mark.unit
+class TestMinuteBars:
+    """测试分钟K线聚合"""
+
+    def test_ticks_aggregate_into_bars(self, service):
+        day = "20251017"
+        assert service._aggregate_ticks({"000001": _quote(10.0, 1000)}, day, datetime(2025, 10, 17, 9, 31, 5, tzinfo=TZ)) == []
+        assert service._aggregate_ticks({"000001": _quote(10.3, 1500)}, day, datetime(2025, 10, 17, 9, 31, 30, tzinfo=TZ)) == []
+        assert service._aggregate_ticks({"000001": _quote(9.9, 1700)}, day, datetime(2025, 10, 17, 9, 31, 50, tzinfo=TZ)) == []
+
+        finalized = service._aggregate_ticks({"000001": _quote(10.1, 2000)}, day, datetime(2025, 10, 17, 9, 32, 10, tzinfo=TZ))
+
+        assert len(finalized) == 1
+        bar = finalized[0]
+        assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (10.0, 10.3, 9.9, 9.9)
+        assert bar["volume"] == 700  # 当日首个快照没有基准，只统计之后的增量
+        assert bar["t"] == datetime(2025, 10, 17, 9, 31, tzinfo=TZ)
+
+        # 之后没有新快照的股票也会在进入下一分钟后定型
+        finalized = service._aggregate_ticks({}, day, datetime(2025, 10, 17, 9, 33, 0, tzinfo=TZ))
+        assert [(b["close"], b["volume"]) for b in finalized] == [(10.1, 300)]
+
+    def test_bars_appended_per_symbol_and_day(self, service, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "QUOTES_INGEST_INTERVAL_SECONDS", 30)
+        day = "20251017"
+        asyncio.run(service._record_minute_bars(
+            {"000001": _quote(10.0, 100), "600000": _quote(8.0, 100)}, day, datetime(2025, 10, 17, 10, 0, tzinfo=TZ)
+        ))
+        asyncio.run(service._record_minute_bars(
+            {"000001": _quote(10.2, 150)}, day, datetime(2025, 10, 17, 10, 1, tzinfo=TZ)
+        ))
+
+        coll = service.fake_db["market_quotes_1m"]
+        ops = coll.batches[0]
+        assert sorted(op._filter["code"] for op in ops) == ["000001", "600000"]
+        update = ops[0]._doc
+        assert update["$push"]["bars"]["$each"][0]["close"] in (10.0, 8.0)
+        assert update["$inc"] == {"count": 1}
+        assert update["$setOnInsert"]["expire_at"] > datetime(2025, 11, 1, tzinfo=TZ)
+
+        # 休市时写出最后一分钟
+        assert asyncio.run(service.flush_minute_bars()) == 1
+        assert coll.batches[-1][0]._filter == {"code": "000001", "trade_date": day}
+
+    def test_skipped_when_sampling_interval_too_long(self, service, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "QUOTES_INGEST_INTERVAL_SECONDS", 360)
+        day = "20251017"
+        for minute in (0, 6, 12):
+            asyncio.run(service._record_minute_bars(
+                {"000001": _quote(10.0 + minute / 100, 100 * (minute + 1))}, day,
+                datetime(2025, 10, 17, 10, minute, tzinfo=TZ),
+            ))
+
+        assert "market_quotes_1m" not in service.fake_db.collections
+        assert service._pending_bars == {}
+        assert asyncio.run(service.flush_minute_bars()) == 0
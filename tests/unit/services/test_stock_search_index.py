@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+股票搜索内存索引测试
+
+测试范围:
+- 代码前缀、名称子串、英文名搜索与排序
+- 数据源优先级去重、严格数据源过滤
+- 容错匹配
+- 拼音首字母/全拼（需要 pypinyin）
+- 按 updated_at 增量刷新
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.services.stock_search_index import (
+    StockSearchIndex,
+    edit_distance,
+    normalize_query,
+)
+
+
+def _match(doc, query):
+    if "$or" in query:
+        return any(_match(doc, q) for q in query["$or"])
+    for field, cond in query.items():
+        value = doc.get(field)
+        bound = cond["$gt"]
+        if type(value) is not type(bound) or not value > bound:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        self._it = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return dict(next(self._it))
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        return FakeCursor([d for d in self.docs if _match(d, query)])
+
+
+class FakeDB:
+    def __init__(self, collections):
+        self.collections = {name: FakeCollection(docs) for name, docs in collections.items()}
+
+    def __getitem__(self, name):
+        return self.collections.setdefault(name, FakeCollection([]))
+
+
+T0 = "2025-10-17T06:30:00"
+
+
+def _cn(code, name, source="tushare", updated_at=T0):
+    return {"code": code, "symbol": code, "name": name, "source": source, "updated_at": updated_at}
+
+
+@pytest.fixture
+def db():
+    return FakeDB({
+        "stock_basic_info": [
+            _cn("600519", "贵州茅台"),
+            _cn("600519", "贵州茅台", source="akshare"),
+            _cn("000001", "平安银行"),
+            _cn("601318", "中国平安"),
+            _cn("600000", "浦发银行"),
+            _cn("000858", "五粮液", source="akshare"),
+        ],
+        "stock_basic_info_hk": [
+            {"code": "00700", "name": "腾讯控股", "name_en": "Tencent Holdings", "source": "yfinance",
+             "updated_at": datetime(2025, 10, 17, 6, 30)},
+        ],
+        "stock_basic_info_us": [
+            {"code": "AAPL", "name": "苹果", "name_en": "Apple Inc.", "source": "yfinance", "updated_at": T0},
+            {"code": "AMZN", "name": "亚马逊", "name_en": "Amazon.com Inc.", "source": "yfinance", "updated_at": T0},
+        ],
+    })
+
+
+@pytest.fixture
+def index(db):
+    idx = StockSearchIndex(db=db)
+    asyncio.run(idx.load_all())
+    return idx
+
+
+def _codes(results):
+    return [r["code"] for r in results]
+
+
+@pytest.mark.unit
+class TestSearch:
+    """测试搜索与排序"""
+
+    def test_code_prefix_and_affixes(self, index):
+        assert _codes(index.search("6005", markets=["CN"])) == ["600519"]
+        assert _codes(index.search("600519.SH"))[0] == "600519"
+        assert _codes(index.search("0700.hk")) == ["00700"]
+        # 完全匹配排在前缀匹配之前
+        assert _codes(index.search("600000", markets=["CN"])) == ["600000"]
+        assert _codes(index.search("60", markets=["CN"])) == ["600000", "600519", "601318"]
+
+    def test_name_substring_ranking(self, index):
+        # 名称前缀（平安银行）优先于名称子串（中国平安）
+        assert _codes(index.search("平安")) == ["000001", "601318"]
+        assert _codes(index.search("银行")) == ["000001", "600000"]
+
+    def test_english_name_and_market_filter(self, index):
+        assert _codes(index.search("apple")) == ["AAPL"]
+        assert _codes(index.search("tencent", markets=["HK"])) == ["00700"]
+        assert index.search("tencent", markets=["US"]) == []
+
+    def test_source_priority_and_strict_filter(self, index):
+        results = index.search("茅台", sources={"CN": ["akshare", "tushare"]})
+        assert [(r["code"], r["source"]) for r in results] == [("600519", "akshare")]
+
+        strict = index.search("五粮液", sources={"CN": ["tushare"]}, strict_sources=True)
+        assert strict == []
+        assert _codes(index.search("五粮液", sources={"CN": ["tushare"]})) == ["000858"]
+
+    def test_typo_tolerance(self, index):
+        assert _codes(index.search("贵州矛台")) == ["600519"]
+        assert _codes(index.search("amazn")) == ["AMZN"]
+        assert edit_distance("aple", "apple", 1) == 1
+        assert edit_distance("abcd", "badc", 1) == 2
+
+    def test_pinyin(self, db):
+        pytest.importorskip("pypinyin")
+        idx = StockSearchIndex(db=db)
+        asyncio.run(idx.load_all())
+
+        assert _codes(idx.search("gzmt"))[0] == "600519"
+        assert _codes(idx.search("guizhou"))[0] == "600519"
+        assert _codes(idx.search("wly")) == ["000858"]
+
+    def test_normalize_query(self):
+        assert normalize_query(" ＳＨ600519 ") == "600519"
+        assert normalize_query("*ST 康美") == "st康美"
+        assert normalize_query("BRK.B") == "brkb"
+
+
+@pytest.mark.unit
+class TestRefresh:
+    """测试增量刷新"""
+
+    def test_incremental_refresh_picks_up_changes(self, index, db):
+        cn = db["stock_basic_info"]
+        cn.docs.append(_cn("688981", "中芯国际", updated_at="2025-10-18T06:30:00"))
+        cn.docs[2] = _cn("000001", "平安银行", updated_at="2025-10-18T06:30:00")
+        cn.docs[2]["industry"] = "银行"
+
+        rebuilds = index.stats["rebuilds"]
+        assert asyncio.run(index.refresh()) == 2
+        assert cn.queries[-1] == {"updated_at": {"$gt": T0}}
+        assert index.stats["rebuilds"] == rebuilds + 1
+
+        assert _codes(index.search("中芯")) == ["688981"]
+        # 非索引字段变化只更新返回内容
+        assert index.search("000001")[0]["industry"] == "银行"
+
+        # 没有新变化时不重建
+        assert asyncio.run(index.refresh()) == 0
+        assert index.stats["rebuilds"] == rebuilds + 1
+
+    def test_datetime_watermark(self, index, db):
+        hk = db["stock_basic_info_hk"]
+        hk.docs.append({"code": "09988", "name": "阿里巴巴-W", "source": "yfinance",
+                        "updated_at": datetime(2025, 10, 18, 6, 30)})
+
+        assert asyncio.run(index.refresh()) == 1
+        assert _codes(index.search("阿里巴巴")) == ["09988"]
+
+    def test_ensure_ready_falls_back_when_disabled(self, db, monkeypatch):
+        from app.core.config import settings
+
+        monkeypatch.setattr(settings, "STOCK_SEARCH_INDEX_ENABLED", False)
+        idx = StockSearchIndex(db=db)
+        assert asyncio.run(idx.ensure_ready()) is False
+        assert not idx.ready
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+TradingAgentsGraph 实例池测试
+
+测试范围:
+- 池键（分析师组合、模型、配置哈希）
+- 签出/归还与复用
+- 异常实例丢弃、空闲上限与 LRU 淘汰
+- 并发签出互不共享实例
+"""
+
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.services.analysis.trading_graph_pool import TradingGraphPool, make_pool_key
+
+
+def _config(**overrides):
+    config = {
+        "selected_analysts": ["market", "fundamentals"],
+        "quick_think_llm": "qwen-turbo",
+        "deep_think_llm": "qwen-plus",
+        "max_debate_rounds": 1,
+    }
+    config.update(overrides)
+    return config
+
+
+def _pool(**kwargs):
+    factory = MagicMock(side_effect=lambda config: MagicMock(name="graph"))
+    return TradingGraphPool(factory=factory, **kwargs), factory
+
+
+@pytest.mark.unit
+class TestPoolKey:
+    """测试池键"""
+
+    def test_same_config_same_key(self):
+        assert make_pool_key(_config()) == make_pool_key(dict(reversed(list(_config().items()))))
+
+    def test_depth_changes_key(self):
+        assert make_pool_key(_config()) != make_pool_key(_config(max_debate_rounds=3))
+
+    def test_analysts_and_models_in_key(self):
+        key = make_pool_key(_config())
+        assert key[:3] == (("market", "fundamentals"), "qwen-turbo", "qwen-plus")
+
+
+@pytest.mark.unit
+class TestTradingGraphPool:
+    """测试实例池"""
+
+    def test_released_graph_is_reused_and_reset(self):
+        pool, factory = _pool()
+
+        graph = pool.acquire(_config())
+        pool.release(graph)
+        again = pool.acquire(_config())
+
+        assert again is graph
+        assert factory.call_count == 1
+        graph.reset_run_state.assert_called_once()
+        assert pool.get_stats()["reused"] == 1
+
+    def test_different_config_builds_new_graph(self):
+        pool, factory = _pool()
+
+        pool.release(pool.acquire(_config()))
+        pool.acquire(_config(deep_think_llm="qwen-max"))
+
+        assert factory.call_count == 2
+
+    def test_leased_graph_is_not_shared(self):
+        pool, _ = _pool()
+
+        first = pool.acquire(_config())
+        second = pool.acquire(_config())
+
+        assert first is not second
+        assert pool.get_stats()["leased"] == 2
+
+    def test_lease_discards_on_error(self):
+        pool, factory = _pool()
+
+        with pytest.raises(RuntimeError):
+            with pool.lease(_config()):
+                raise RuntimeError("llm down")
+        pool.acquire(_config())
+
+        assert factory.call_count == 2
+        assert pool.get_stats()["discarded"] == 1
+
+    def test_failed_reset_discards_graph(self):
+        pool, _ = _pool()
+        graph = pool.acquire(_config())
+        graph.reset_run_state.side_effect = RuntimeError("boom")
+
+        pool.release(graph)
+
+        assert pool.get_stats()["idle"] == 0
+
+    def test_max_idle_per_key(self):
+        pool, _ = _pool(max_idle_per_key=1)
+        graphs = [pool.acquire(_config()) for _ in range(3)]
+
+        for graph in graphs:
+            pool.release(graph)
+
+        stats = pool.get_stats()
+        assert stats["idle"] == 1
+        assert stats["discarded"] == 2
+
+    def test_lru_key_eviction(self):
+        pool, _ = _pool(max_keys=2)
+
+        for depth in (1, 2, 3):
+            pool.release(pool.acquire(_config(max_debate_rounds=depth)))
+
+        assert pool.get_stats()["keys"] == 2
+        assert make_pool_key(_config(max_debate_rounds=1)) not in pool._idle
+
+    def test_concurrent_acquire(self):
+        pool, _ = _pool()
+        pool.release(pool.acquire(_config()))
+        leased = []
+        lock = threading.Lock()
+
+        def worker():
+            graph = pool.acquire(_config())
+            with lock:
+                leased.append(graph)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len({id(g) for g in leased}) == 8
+        assert pool.get_stats()["reused"] == 1
+
+
+@pytest.mark.unit
+class TestExecutionReleasesGraph:
+    """测试分析执行在签出实例后的任何失败都会归还实例"""
+
+    def _run(self, monkeypatch, **overrides):
+        from app.services.analysis.base_analysis_service import BaseAnalysisService
+        from app.services.analysis.execution.core import AnalysisExecutionService
+
+        graph = MagicMock(name="graph")
+        released = []
+        monkeypatch.setattr(BaseAnalysisService, "_get_trading_graph", lambda self, config: graph)
+        monkeypatch.setattr(
+            BaseAnalysisService,
+            "_release_trading_graph",
+            lambda self, g, discard=False: released.append((g, discard)),
+        )
+
+        service = AnalysisExecutionService.__new__(AnalysisExecutionService)
+        service._update_progress_sync = MagicMock()
+        service._build_analysis_config = MagicMock(return_value=_config())
+        service._get_analysis_date = MagicMock(return_value="2025-10-17")
+        service._start_progress_simulation = MagicMock()
+        service._create_progress_callback = MagicMock()
+        for name, value in overrides.items():
+            setattr(service, name, value)
+        if "propagate" in overrides:
+            graph.propagate = overrides["propagate"]
+
+        with pytest.raises(RuntimeError):
+            service._run_analysis_sync("task-1", "user-1", MagicMock(stock_code="600519"))
+        return graph, released
+
+    def test_setup_failure_returns_graph(self, monkeypatch):
+        graph, released = self._run(
+            monkeypatch, _start_progress_simulation=MagicMock(side_effect=RuntimeError("redis down"))
+        )
+        assert released == [(graph, False)]
+
+    def test_propagate_failure_discards_graph(self, monkeypatch):
+        graph, released = self._run(monkeypatch, propagate=MagicMock(side_effect=RuntimeError("llm down")))
+        assert released == [(graph, True)]
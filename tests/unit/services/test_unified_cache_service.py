@@ -191,3 +191,67 @@ class TestUnifiedCacheServiceStatistics:
         assert stats["memory_cache_size"] >= initial_size + 10
 
         logger.info("✅ 缓存统计功能测试通过")
+
+
+class FakeBridgeRedis:
+    """只能在创建时所在事件循环上使用的异步 Redis 替身"""
+
+    def __init__(self):
+        self.loop = asyncio.get_event_loop()
+        self.data = {}
+
+    def _check_loop(self):
+        assert asyncio.get_running_loop() is self.loop, "客户端跨事件循环使用"
+
+    async def ping(self):
+        self._check_loop()
+        return True
+
+    async def get(self, key):
+        self._check_loop()
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self._check_loop()
+        self.data[key] = value
+
+    async def expire(self, key, ttl):
+        self._check_loop()
+
+    async def delete(self, *keys):
+        self._check_loop()
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+
+class TestRedisBackendBridgeClient:
+    """RedisBackend 使用后台事件循环专属的客户端"""
+
+    def test_commands_run_on_bridge_owned_client(self):
+        from app.services.cache.backends.redis import RedisBackend
+        from app.services.cache.stats import CacheStats
+        from tradingagents.utils.async_bridge import get_async_bridge, get_bridge_resource
+
+        client = get_bridge_resource("test-cache-redis", FakeBridgeRedis)
+        assert client.loop is get_async_bridge().loop
+
+        with patch(
+            "app.services.cache.backends.redis.get_redis_client", return_value=MagicMock()
+        ), patch(
+            "app.services.cache.backends.redis.get_bridge_redis_client", return_value=client
+        ):
+            backend = RedisBackend(CacheStats())
+            backend.set("k", {"v": 1})
+            assert backend.get("k") == ({"v": 1}, "redis")
+            assert backend.delete("k") is True
+
+    def test_disabled_when_app_redis_not_initialized(self):
+        from app.services.cache.backends.redis import RedisBackend
+        from app.services.cache.stats import CacheStats
+
+        with patch(
+            "app.services.cache.backends.redis.get_redis_client",
+            side_effect=RuntimeError("Redis客户端未初始化"),
+        ), patch("app.services.cache.backends.redis.get_bridge_redis_client") as bridge_client:
+            backend = RedisBackend(CacheStats())
+            assert backend.get("k") == (None, "redis")
+            bridge_client.assert_not_called()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+进程级后台事件循环测试
+
+测试范围:
+- 多次调用复用同一个事件循环
+- 在已有运行中循环的线程里同步调用
+- 调用方上下文（运行级配置）带入协程
+- 跨调用复用 asyncio.Lock
+- 超时取消、循环线程内调用报错
+- 后台循环专属客户端：在循环线程上创建、复用、循环重建后重建、停止时关闭
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from tradingagents.utils.async_bridge import AsyncLoopBridge
+from tradingagents.utils.run_context import get_run_config, run_scope
+
+
+@pytest.fixture
+def bridge():
+    bridge = AsyncLoopBridge(name="test-async-bridge")
+    yield bridge
+    bridge.stop()
+
+
+async def _current_loop():
+    return asyncio.get_running_loop()
+
+
+@pytest.mark.unit
+class TestAsyncLoopBridge:
+    """测试后台事件循环"""
+
+    def test_reuses_single_loop(self, bridge):
+        first = bridge.run(_current_loop())
+        second = bridge.run(_current_loop())
+
+        assert first is second is bridge.loop
+        stats = bridge.get_stats()
+        assert stats["loop_starts"] == 1 and stats["calls"] == 2 and stats["running"]
+
+    def test_callable_inside_running_loop(self, bridge):
+        async def caller():
+            # 异步代码里调用同步函数，同步函数再等待协程
+            return bridge.run(asyncio.sleep(0, result="ok"))
+
+        assert asyncio.run(caller()) == "ok"
+
+    def test_caller_context_propagates(self, bridge):
+        async def read_task_id():
+            return (get_run_config() or {}).get("task_id")
+
+        with run_scope({}, task_id="t-1"):
+            assert bridge.run(read_task_id()) == "t-1"
+        assert bridge.run(read_task_id()) is None
+
+    def test_loop_bound_primitives_survive_calls(self, bridge):
+        lock = {}
+
+        async def use_lock():
+            lock.setdefault("lock", asyncio.Lock())
+            async with lock["lock"]:
+                await asyncio.sleep(0)
+            return True
+
+        futures = [bridge.submit(use_lock()) for _ in range(5)]
+        assert all(f.result(2) for f in futures)
+        assert bridge.run(use_lock())
+
+    def test_timeout_cancels_coroutine(self, bridge):
+        cancelled = asyncio.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            bridge.run(slow(), timeout=0.05)
+        assert bridge.run(asyncio.wait_for(cancelled.wait(), 1)) is True
+        assert bridge.get_stats()["timeouts"] == 1
+
+    def test_blocking_inside_loop_thread_rejected(self, bridge):
+        async def nested():
+            return bridge.run(asyncio.sleep(0))
+
+        with pytest.raises(RuntimeError):
+            bridge.run(nested())
+
+    def test_errors_propagate(self, bridge):
+        async def boom():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            bridge.run(boom())
+        assert bridge.get_stats()["errors"] == 1
+
+
+class LoopBoundClient:
+    """记录创建线程、只能在创建时的事件循环上使用的客户端"""
+
+    def __init__(self):
+        self.thread = threading.current_thread()
+        self.loop = asyncio.get_event_loop()
+        self.closed = False
+
+    async def ping(self):
+        assert asyncio.get_running_loop() is self.loop
+        return True
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.mark.unit
+class TestBridgeResources:
+    """测试后台循环专属客户端"""
+
+    def test_created_on_loop_thread_and_reused(self, bridge):
+        client = bridge.get_resource("redis", LoopBoundClient)
+
+        assert client.loop is bridge.loop
+        assert client.thread is not threading.current_thread()
+        assert bridge.get_resource("redis", LoopBoundClient) is client
+        assert bridge.run(client.ping()) is True
+
+    def test_created_inside_loop_thread(self, bridge):
+        async def from_loop():
+            return bridge.get_resource("mongo", LoopBoundClient)
+
+        client = bridge.run(from_loop())
+        assert client is bridge.get_resource("mongo", LoopBoundClient)
+
+    def test_closed_on_stop_and_rebuilt_with_loop(self, bridge):
+        first = bridge.get_resource("redis", LoopBoundClient)
+        bridge.stop()
+
+        assert first.closed
+        second = bridge.get_resource("redis", LoopBoundClient)
+        assert second is not first and second.loop is bridge.loop
+        assert bridge.run(second.ping()) is True
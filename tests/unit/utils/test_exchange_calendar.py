@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+离线交易所日历测试
+
+测试范围:
+- 节假日、周末判断（单个日期和日期数组）
+- 上一个/下一个交易日、区间内交易日
+- 午休和提前收盘
+- 本地覆盖文件按版本号生效
+- 同步结果合并
+"""
+
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradingagents.utils.exchange_calendar import (
+    ExchangeCalendarRegistry,
+    get_exchange_calendar,
+)
+
+
+@pytest.mark.unit
+class TestExchangeCalendarQueries:
+    """测试交易日查询"""
+
+    def test_holidays_and_weekends(self):
+        cn = get_exchange_calendar("A股")
+
+        assert cn.is_session("2025-10-08") is False  # 国庆
+        assert cn.is_session("20251009") is True
+        assert cn.is_session(date(2025, 10, 11)) is False  # 周六（调休上班日也不开市）
+
+        mask = cn.is_session(pd.date_range("2025-09-29", "2025-10-10"))
+        assert mask.tolist() == [True, True] + [False] * 8 + [True, True]
+
+    def test_markets_have_own_holidays(self):
+        day = "2025-04-21"  # 复活节星期一
+        assert get_exchange_calendar("HK").is_session(day) is False
+        assert get_exchange_calendar("CN").is_session(day) is True
+        assert get_exchange_calendar("NYSE").is_session(day) is True
+
+    def test_previous_and_next_session(self):
+        cn = get_exchange_calendar("CN")
+
+        assert cn.previous_session("2025-10-09") == date(2025, 9, 30)
+        assert cn.next_session("2025-09-30") == date(2025, 10, 9)
+        assert cn.previous_session("2025-10-09", inclusive=True) == date(2025, 10, 9)
+
+        result = cn.previous_session(["2025-02-05", "2025-01-27"])
+        assert result.astype(object).tolist() == [date(2025, 1, 27), date(2025, 1, 24)]
+
+    def test_sessions_between(self):
+        cn = get_exchange_calendar("CN")
+
+        sessions = cn.sessions_between("2025-09-29", "2025-10-10")
+        assert sessions.astype(object).tolist() == [
+            date(2025, 9, 29),
+            date(2025, 9, 30),
+            date(2025, 10, 9),
+            date(2025, 10, 10),
+        ]
+        assert cn.session_count("2025-09-29", "2025-10-10") == 4
+        assert len(cn.sessions_between("2025-10-10", "2025-10-01")) == 0
+
+    def test_lunch_break_and_early_close(self):
+        hk = get_exchange_calendar("HK")
+        assert hk.is_open(datetime(2025, 12, 23, 12, 30)) is False  # 午休
+        assert hk.is_open(datetime(2025, 12, 23, 14, 0)) is True
+        assert hk.is_open(datetime(2025, 12, 24, 14, 0)) is False  # 平安夜半日市
+        assert hk.is_half_day("2025-12-24")
+
+        us = get_exchange_calendar("US")
+        assert us.market_close("2025-11-28").hour == 13
+        assert us.latest_completed_session(datetime(2025, 11, 28, 12, 0)) == date(2025, 11, 26)
+        assert us.latest_completed_session(datetime(2025, 11, 28, 13, 30)) == date(2025, 11, 28)
+
+    def test_outside_coverage_only_weekends(self):
+        cn = get_exchange_calendar("CN")
+        assert not cn.covers("2030-10-01")
+        assert cn.is_session("2030-10-01") is True
+        assert cn.is_session("2030-10-05") is False
+
+
+@pytest.mark.unit
+class TestCalendarStorage:
+    """测试本地覆盖文件与同步合并"""
+
+    def test_local_file_with_higher_version_wins(self, tmp_path):
+        local = tmp_path / "calendars.json"
+        registry = ExchangeCalendarRegistry(local_file=local)
+        cn = registry.get("CN")
+        assert cn.is_session("2026-03-02")
+
+        entry = cn.to_dict()
+        entry["holidays"].append("2026-03-02")
+        local.write_text(json.dumps({"CN": {**entry, "version": 0}}), encoding="utf-8")
+        registry.reload()
+        assert registry.get("CN").is_session("2026-03-02")  # 版本号不高于种子，不生效
+
+        local.write_text(json.dumps({"CN": {**entry, "version": cn.version + 1}}), encoding="utf-8")
+        registry.reload()
+        assert not registry.get("CN").is_session("2026-03-02")
+        assert registry.get_versions()["CN"]["version"] == cn.version + 1
+
+    def test_sync_merge_saves_new_version(self, tmp_path):
+        from app.services.exchange_calendar_sync_service import merge_schedule
+
+        registry = ExchangeCalendarRegistry(local_file=tmp_path / "calendars.json")
+        cn = registry.get("CN")
+        sessions = list(cn.sessions_between("2027-01-04", "2027-12-31").astype(object))
+        sessions.remove(date(2027, 2, 8))
+
+        merged = merge_schedule(cn, sessions, {}, source="test")
+        assert merged.version == cn.version + 1
+        assert merged.end == date(2027, 12, 31)
+        assert merge_schedule(merged, sessions, {}, source="test") is None
+
+        registry.save({"CN": merged})
+        reloaded = registry.get("CN")
+        assert reloaded.source == "test"
+        assert not reloaded.is_session("2027-02-08")
+        assert not reloaded.is_session("2026-10-01")  # 范围外的原有节假日保留
+
+
+@pytest.mark.unit
+def test_trading_date_manager_skips_holidays():
+    from tradingagents.utils.trading_date_manager import get_trading_date_manager
+
+    mgr = get_trading_date_manager()
+    mgr.clear_cache()
+
+    assert mgr.get_latest_trading_date("2025-10-08") == "2025-09-30"
+    assert mgr.get_latest_trading_date("2025-04-21", market="HK") == "2025-04-17"
+    assert mgr.get_trading_date_range("2025-10-06", lookback_days=10) == ("2025-09-20", "2025-09-30")
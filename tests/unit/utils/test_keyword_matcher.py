@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+多关键词单遍匹配器测试
+
+测试范围:
+- 与 ``keyword in text`` 语义一致（重叠、前缀、后缀关键词）
+- 分组命中、词典顺序、按位置截取标题部分
+- 相同词典只编译一次
+- 新闻分类/情绪/重要性/关键词、紧急度、相关性评分接入
+"""
+
+import random
+
+import pytest
+
+from tradingagents.utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
+
+@pytest.mark.unit
+class TestKeywordMatcher:
+    """测试自动机匹配语义"""
+
+    def test_overlapping_keywords(self):
+        matcher = KeywordMatcher(
+            {"report": ["业绩", "业绩预告", "年报", "半年报"], "en": ["he", "she", "hers"]}
+        )
+        hits = matcher.scan("公司发布半年报与业绩预告 ushers")
+
+        assert hits.get("report") == ["业绩", "业绩预告", "年报", "半年报"]
+        assert hits.get("en") == ["he", "she", "hers"]
+
+    def test_matches_substring_semantics(self):
+        rng = random.Random(7)
+        alphabet = "ab业绩预告"
+        for _ in range(500):
+            words = list({"".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(8)})
+            groups = {"g1": words[::2], "g2": words[1::2]}
+            text = "".join(rng.choices(alphabet, k=rng.randint(0, 30)))
+            end = rng.randint(0, len(text))
+            hits = KeywordMatcher(groups).scan(text)
+
+            for group, group_words in groups.items():
+                assert hits.get(group) == [w for w in group_words if w in text]
+                assert hits.get(group, end) == [w for w in group_words if w in text[:end]]
+
+    def test_group_helpers(self):
+        matcher = KeywordMatcher({"high": ["突发"], "medium": ["公告", "通知"], "low": []})
+        hits = matcher.scan("通知：公司公告")
+
+        assert hits.first_group(["high", "medium"]) == "medium"
+        assert hits.count("medium") == 2
+        assert not hits.any("high")
+        assert not matcher.scan("")
+
+    def test_matcher_is_cached(self):
+        groups = {"a": ["x", "y"]}
+        assert get_keyword_matcher(groups) is get_keyword_matcher({"a": ["x", "y"]})
+        assert get_keyword_matcher(groups) is not get_keyword_matcher({"a": ["x"]})
+
+
+@pytest.mark.unit
+class TestNewsKeywordConsumers:
+    """测试新闻处理函数接入"""
+
+    def test_sync_service_annotation(self):
+        from app.worker.news_data_sync_service import NewsDataSyncService
+
+        service = NewsDataSyncService()
+        result = service._annotate_news("公司发布年报，利润增长", "业绩上涨，但存在亏损风险和下滑压力")
+
+        assert result == {
+            "category": "company_announcement",
+            "sentiment": "negative",
+            "importance": "high",
+            "keywords": ["业绩", "年报", "增长", "利润", "风险"],
+        }
+        # 类别和重要性只看标题
+        assert service._annotate_news("央行发布通知", "年报")["category"] == "policy_news"
+        assert service._annotate_news("央行发布通知", "年报")["importance"] == "medium"
+
+    def test_realtime_urgency_and_relevance(self):
+        from tradingagents.dataflows.news.realtime_news import RealtimeNewsAggregator
+
+        aggregator = RealtimeNewsAggregator()
+
+        assert aggregator._assess_news_urgency("Company to announce results", "") == "medium"
+        assert aggregator._assess_news_urgency("盘中消息", "公司股票临时停牌") == "high"
+        assert aggregator._assess_news_urgency("日常新闻", "") == "low"
+        assert aggregator._calculate_relevance("New iPhone sales strong", "AAPL") == 0.8
+        assert aggregator._calculate_relevance("600036 公告", "600036.SH") == 0.9
+
+    def test_relevance_filter_score(self):
+        from tradingagents.utils.news_filter import NewsRelevanceFilter
+
+        news_filter = NewsRelevanceFilter("600036", "招商银行")
+
+        # 公司名(50) + 标题强相关(30) + 内容包含关键词(8)
+        assert news_filter.calculate_relevance_score("招商银行停牌", "公司发布公告") == 88
+        # 标题排除词(-40) + 标题无公司信息且含排除词(-30) -> 截断为0
+        assert news_filter.calculate_relevance_score("银行ETF上涨", "") == 0
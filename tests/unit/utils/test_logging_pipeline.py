@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+异步日志管道测试
+
+测试范围:
+- 限流与采样过滤器
+- 有界队列处理器（丢弃策略、延迟格式化）
+- TradingAgentsLogger 的 QueueListener 管道
+"""
+
+import logging
+import queue
+
+import pytest
+
+from tradingagents.utils.logging_manager import (
+    BoundedQueueHandler,
+    RateLimitFilter,
+    TradingAgentsLogger,
+)
+
+
+def _record(name="dataflows", level=logging.INFO, msg="hello", args=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(self.format(record))
+
+
+@pytest.mark.unit
+class TestRateLimitFilter:
+    """测试限流与采样"""
+
+    def test_burst_then_suppress(self):
+        f = RateLimitFilter(per_second=0.0001, burst=3)
+
+        results = [f.filter(_record()) for _ in range(5)]
+
+        assert results == [True, True, True, False, False]
+        assert f.suppressed["dataflows"] == 2
+
+    def test_warning_always_passes(self):
+        f = RateLimitFilter(per_second=0.0001, burst=1)
+
+        assert all(f.filter(_record(level=logging.WARNING)) for _ in range(10))
+
+    def test_sampling_by_logger_prefix(self):
+        f = RateLimitFilter(per_second=0, sampling={"dataflows.cache": 0.25})
+
+        kept = sum(f.filter(_record(name="dataflows.cache.redis")) for _ in range(8))
+        other = sum(f.filter(_record(name="dataflows")) for _ in range(8))
+
+        assert kept == 2
+        assert other == 8
+
+    def test_decision_is_cached_per_record(self):
+        f = RateLimitFilter(per_second=0.0001, burst=1)
+        record = _record()
+
+        assert f.filter(record) is True
+        # 同步模式下第二个处理器看到同一条记录，不能再次扣减令牌
+        assert f.filter(record) is True
+
+    def test_suppressed_count_attached_to_next_admitted(self):
+        f = RateLimitFilter(per_second=0, sampling={"noisy": 0.5})
+
+        f.filter(_record(name="noisy"))
+        f.filter(_record(name="noisy"))
+        admitted = _record(name="noisy")
+
+        assert f.filter(admitted) is True
+        assert admitted.suppressed_count == 1
+
+
+@pytest.mark.unit
+class TestBoundedQueueHandler:
+    """测试有界队列处理器"""
+
+    def test_drops_info_when_full(self):
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1), block_timeout=0.01)
+
+        handler.handle(_record())
+        handler.handle(_record())
+        handler.handle(_record(level=logging.ERROR))
+
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 2
+
+    def test_prepare_is_lazy(self):
+        handler = BoundedQueueHandler(queue.Queue())
+        handler.setFormatter(logging.Formatter("%(levelname)s | %(message)s"))
+        args_record = _record(msg="value=%s", args=([1],))
+        plain_record = _record(msg="plain")
+
+        handler.handle(args_record)
+        handler.handle(plain_record)
+
+        queued = handler.queue.get_nowait()
+        assert queued.msg == "value=[1]"
+        assert queued.args is None
+        assert not hasattr(plain_record, "message")
+
+
+@pytest.mark.unit
+class TestAsyncPipeline:
+    """测试 QueueListener 管道"""
+
+    def _config(self, tmp_path, **overrides):
+        config = {
+            "level": "INFO",
+            "format": {"console": "%(message)s", "file": "%(message)s"},
+            "handlers": {
+                "console": {"enabled": False},
+                "file": {"enabled": False, "directory": str(tmp_path)},
+                "error": {"enabled": False},
+                "structured": {"enabled": False},
+            },
+            "loggers": {},
+            "docker": {"enabled": True, "stdout_only": True},
+            "async": {"enabled": True, "queue_size": 100},
+            "rate_limit": {"enabled": False},
+            "sampling": {},
+        }
+        config.update(overrides)
+        return config
+
+    def test_records_are_emitted_by_listener(self, tmp_path):
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        manager = TradingAgentsLogger(self._config(tmp_path))
+        try:
+            sink = _ListHandler()
+            manager.listener.handlers = manager.listener.handlers + (sink,)
+
+            logging.getLogger("pipeline.test").info("value=%d", 42)
+            manager.flush()
+
+            assert root.handlers == [manager.queue_handler]
+            assert sink.messages == ["value=42"]
+            assert manager.get_pipeline_stats()["async"] is True
+        finally:
+            manager.shutdown()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+    def test_sync_mode_keeps_direct_handlers(self, tmp_path):
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        manager = TradingAgentsLogger(
+            self._config(tmp_path, **{"async": {"enabled": False}})
+        )
+        try:
+            assert manager.listener is None
+            assert manager.get_pipeline_stats() == {"async": False, "suppressed": {}}
+        finally:
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
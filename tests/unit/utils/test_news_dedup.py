@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+新闻近似重复检测测试
+
+测试范围:
+- 指纹稳定、忽略来源前缀与标点
+- 近似重复聚簇、无关新闻不合并
+- 分段索引近邻查询
+- 有符号 int64 存储往返
+- 实时聚合器、同步服务、数据库查询接入
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from tradingagents.utils.news_dedup import (
+    SimHashIndex,
+    cluster_near_duplicates,
+    from_signed64,
+    hamming_distance,
+    news_fingerprint,
+    to_signed64,
+)
+
+LEAD = "招商银行今日公告称，公司2024年前三季度实现营业收入2514亿元，同比下降2.91%；归属于本行股东的净利润1138亿元，同比下降0.65%。"
+TITLE = "招商银行：前三季度净利润1138亿元 同比下降0.65%"
+REWORDED = "招商银行前三季度净利润1138亿元，同比降0.65%"
+UNRELATED_TITLE = "宁德时代发布新一代钠离子电池 能量密度提升"
+UNRELATED_LEAD = "宁德时代在发布会上推出第二代钠离子电池，能量密度达到200Wh/kg，预计明年量产并率先用于乘用车。"
+
+
+def _text(item):
+    return item["title"], item["content"]
+
+
+@pytest.mark.unit
+class TestFingerprint:
+    """测试指纹计算"""
+
+    def test_fingerprint_is_stable_and_ignores_prefix(self):
+        base = news_fingerprint(TITLE, LEAD)
+
+        assert base == news_fingerprint(TITLE, LEAD)
+        assert base == news_fingerprint(f"【财联社】{TITLE}", LEAD)
+        assert base == news_fingerprint(TITLE.replace("：", ":"), LEAD)
+
+    def test_distances(self):
+        base = news_fingerprint(TITLE, LEAD)
+
+        assert hamming_distance(base, news_fingerprint(REWORDED, LEAD)) <= 4
+        assert hamming_distance(base, news_fingerprint(UNRELATED_TITLE, UNRELATED_LEAD)) > 10
+
+    def test_signed64_round_trip(self):
+        for fingerprint in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+            stored = to_signed64(fingerprint)
+            assert -(1 << 63) <= stored < (1 << 63)
+            assert from_signed64(stored) == fingerprint
+
+
+@pytest.mark.unit
+class TestClustering:
+    """测试聚簇与索引"""
+
+    def test_index_finds_within_distance(self):
+        index = SimHashIndex(max_distance=3)
+        index.add(0b1011, "a")
+
+        assert index.nearest(0b1011) == ("a", 0)
+        # 不同段上各翻转一位
+        assert index.nearest(0b1011 ^ (1 << 5) ^ (1 << 40)) == ("a", 2)
+        assert index.nearest(0b1011 ^ 0b1111 << 20) is None
+        assert len(index) == 1
+
+    def test_near_duplicates_cluster(self):
+        items = [
+            {"title": TITLE, "content": LEAD},
+            {"title": UNRELATED_TITLE, "content": UNRELATED_LEAD},
+            {"title": f"【快讯】{REWORDED}", "content": LEAD},
+            {"title": "", "content": ""},
+        ]
+        clusters, known = cluster_near_duplicates(items, _text, max_distance=4)
+
+        assert [c.representative for c in clusters] == [items[0], items[1], items[3]]
+        assert clusters[0].duplicates == [items[2]]
+        assert clusters[2].fingerprint is None
+        assert known == 0
+
+    def test_existing_index_drops_known_items(self):
+        index = SimHashIndex(max_distance=4)
+        index.add(news_fingerprint(TITLE, LEAD), None)
+
+        clusters, known = cluster_near_duplicates(
+            [{"title": REWORDED, "content": LEAD}], _text, max_distance=4, index=index
+        )
+
+        assert clusters == []
+        assert known == 1
+
+
+@pytest.mark.unit
+class TestNewsConsumers:
+    """测试新闻处理流程接入"""
+
+    def test_realtime_aggregator_merges_reposts(self):
+        from tradingagents.dataflows.news.realtime_news import NewsItem, RealtimeNewsAggregator
+
+        def item(title, content, source):
+            return NewsItem(title, content, source, datetime(2024, 10, 30), "", "low", 0.5)
+
+        news = [
+            item(TITLE, LEAD, "东方财富"),
+            item(f"【财联社】{REWORDED}", LEAD, "财联社"),
+            item(UNRELATED_TITLE, UNRELATED_LEAD, "新浪财经"),
+        ]
+        result = RealtimeNewsAggregator()._deduplicate_news(news)
+
+        assert [n.source for n in result] == ["东方财富", "新浪财经"]
+
+    def test_sync_service_dedup_and_persisted_index(self):
+        from app.worker.news_data_sync_service import NewsDataSyncService
+
+        service = NewsDataSyncService()
+        publish_time = datetime(2024, 10, 30, 9, 30)
+        news = [
+            {"title": TITLE, "content": LEAD, "url": "a", "publish_time": publish_time},
+            {"title": REWORDED, "content": LEAD, "url": "b", "publish_time": publish_time},
+            {"title": UNRELATED_TITLE, "content": UNRELATED_LEAD, "url": "c", "publish_time": publish_time},
+        ]
+
+        unique = service._deduplicate_news(news)
+        assert [n["url"] for n in unique] == ["a", "c"]
+        assert unique[0]["simhash"] == to_signed64(news_fingerprint(TITLE, LEAD))
+
+        # 数据库中当天已有同一新闻（另一来源），只保留新的那条
+        news_service = MagicMock()
+        news_service.get_news_fingerprints = AsyncMock(return_value=[unique[0]["simhash"]])
+        kept = asyncio.run(service._drop_persisted_duplicates("600036", unique, news_service))
+
+        assert [n["url"] for n in kept] == ["c"]
+        start, end = news_service.get_news_fingerprints.call_args[0][1:]
+        assert start == datetime(2024, 10, 30) and end == datetime(2024, 10, 31)
+
+    def test_database_query_collapses_near_duplicates(self):
+        from tradingagents.tools.unified_news_tool import UnifiedNewsAnalyzer
+
+        analyzer = UnifiedNewsAnalyzer(toolkit=None)
+        rows = [
+            {"title": TITLE, "content": LEAD},
+            {"title": REWORDED, "summary": LEAD},
+            {"title": UNRELATED_TITLE, "content": UNRELATED_LEAD},
+        ]
+
+        assert analyzer._collapse_near_duplicates(rows, 10) == [rows[0], rows[2]]
+        assert analyzer._collapse_near_duplicates(rows, 1) == [rows[0]]
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+前缀稳定的提示词布局测试
+
+测试范围:
+- 系统提示词不随股票、日期变化
+- 共享报告按固定顺序排在易变的本次任务信息之前
+- 分析师、研究员、风险辩论者节点的 prompt 布局
+- 供应商缓存命中 token 的提取与记录
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from tradingagents.llm_adapters.openai_compatible_base import extract_token_usage
+from tradingagents.utils.prompt_builder import (
+    SHARED_REPORT_SECTIONS,
+    create_prompt_builder,
+    format_run_context,
+    format_shared_reports,
+)
+
+REPORTS = {
+    "market_report": "市场报告内容",
+    "sentiment_report": "情绪报告内容",
+    "news_report": "新闻报告内容",
+    "fundamentals_report": "基本面报告内容",
+}
+
+RUN_A = {
+    "company_name": "浦发银行",
+    "ticker": "600000",
+    "market_name": "中国A股",
+    "currency_name": "人民币",
+    "currency_symbol": "¥",
+    "trade_date": "2024-12-31",
+}
+
+RUN_B = {
+    "company_name": "Apple Inc.",
+    "ticker": "AAPL",
+    "market_name": "美股",
+    "currency_name": "美元",
+    "currency_symbol": "$",
+    "trade_date": "2025-01-02",
+}
+
+
+def _llm(content="观点"):
+    llm = MagicMock()
+    llm.model_name = "deepseek-chat"
+    llm.invoke.return_value = MagicMock(content=content)
+    return llm
+
+
+@pytest.mark.unit
+class TestPromptBuilderLayout:
+    """测试统一 Prompt 构建器的布局"""
+
+    @pytest.mark.parametrize(
+        "agent_type", ["market", "bull", "risky", "research_manager", "trader"]
+    )
+    def test_system_prompt_is_run_independent(self, agent_type):
+        builder = create_prompt_builder(agent_type)
+
+        prompt_a = builder.build_system_prompt(**RUN_A)
+        prompt_b = builder.build_system_prompt(**RUN_B)
+
+        assert prompt_a == prompt_b
+        for value in ("600000", "浦发银行", "2024-12-31"):
+            assert value not in prompt_a
+
+    def test_trader_price_example_is_currency_neutral(self):
+        prompt = create_prompt_builder("trader").build_system_prompt(**RUN_B)
+
+        # 静态前缀不能给港股/美股任务举人民币的例子
+        assert "¥XX" not in prompt
+        assert "XX-XX，使用本次任务的计价货币" in prompt
+
+    def test_shared_reports_precede_run_context(self):
+        builder = create_prompt_builder("bear")
+
+        prompt = builder.build_user_prompt(history="辩论历史", **REPORTS, **RUN_A)
+
+        positions = [prompt.index(REPORTS[key]) for key, _ in SHARED_REPORT_SECTIONS[:4]]
+        assert positions == sorted(positions)
+        assert positions[-1] < prompt.index("辩论历史") < prompt.index("=== 本次任务信息 ===")
+        assert prompt.rstrip().endswith("- 分析日期：2024-12-31")
+
+    def test_user_prompts_share_prefix_across_runs(self):
+        builder = create_prompt_builder("safe")
+
+        prompt_a = builder.build_user_prompt(trader_decision="买入", **REPORTS, **RUN_A)
+        prompt_b = builder.build_user_prompt(trader_decision="买入", **REPORTS, **RUN_B)
+        shared = prompt_a.index("=== 本次任务信息 ===")
+
+        assert prompt_a[:shared] == prompt_b[:shared]
+
+    def test_format_helpers(self):
+        assert "A股市场特色" not in format_shared_reports(REPORTS)
+        assert format_run_context() == ""
+        assert "- 计价货币：美元（$）" in format_run_context(**RUN_B)
+
+
+@pytest.mark.unit
+class TestAgentNodeLayout:
+    """测试 Agent 节点的 prompt 布局"""
+
+    def test_market_analyst_system_message_is_static(self):
+        from tradingagents.agents.analysts.market_analyst import create_market_analyst
+
+        messages = []
+        for ticker, date in (("600000", "2024-12-31"), ("000001", "2025-01-02")):
+            llm = _llm("报告")
+            with patch(
+                "tradingagents.agents.analysts.market_analyst.get_company_name",
+                return_value=f"公司{ticker}",
+            ):
+                create_market_analyst(llm)(
+                    {
+                        "trade_date": date,
+                        "company_of_interest": ticker,
+                        "market_data": "MA5: 10.5",
+                    }
+                )
+            messages.append(llm.invoke.call_args[0][0])
+
+        assert messages[0][0] == messages[1][0]
+        human = messages[0][1][1]
+        assert human.index("MA5: 10.5") < human.index("- 股票代码：600000")
+
+    def test_bull_researcher_puts_ticker_last(self):
+        from tradingagents.agents.researchers.bull_researcher import create_bull_researcher
+
+        llm = _llm()
+        state = {
+            "investment_debate_state": {"history": "", "count": 0},
+            "company_of_interest": "600000",
+            **REPORTS,
+        }
+        with patch(
+            "tradingagents.agents.researchers.bull_researcher.get_company_name",
+            return_value="浦发银行",
+        ):
+            create_bull_researcher(llm, None)(state)
+
+        prompt = llm.invoke.call_args[0][0]
+        assert "600000" not in prompt[: prompt.index(REPORTS["fundamentals_report"])]
+        assert prompt.index("- 股票代码：600000") > prompt.index("最后的看跌论点")
+
+    def test_risk_debators_share_reports_before_decision(self):
+        from tradingagents.agents.risk_mgmt.conservative_debator import create_safe_debator
+
+        llm = _llm()
+        state = {
+            "risk_debate_state": {"history": "对话历史", "count": 0},
+            "trader_investment_plan": "建议买入并持有",
+            **REPORTS,
+        }
+        create_safe_debator(llm)(state)
+
+        prompt = llm.invoke.call_args[0][0]
+        assert (
+            prompt.index(REPORTS["fundamentals_report"])
+            < prompt.index("建议买入并持有")
+            < prompt.index("对话历史")
+        )
+
+
+@pytest.mark.unit
+class TestCachedTokenUsage:
+    """测试缓存命中 token 提取与记录"""
+
+    def _result(self, llm_output=None, usage_metadata=None):
+        message = AIMessage(content="ok", usage_metadata=usage_metadata)
+        return ChatResult(generations=[ChatGeneration(message=message)], llm_output=llm_output)
+
+    def test_openai_cached_tokens(self):
+        result = self._result(
+            {
+                "token_usage": {
+                    "prompt_tokens": 1200,
+                    "completion_tokens": 80,
+                    "prompt_tokens_details": {"cached_tokens": 1024},
+                }
+            }
+        )
+        assert extract_token_usage(result) == (1200, 80, 1024)
+
+    def test_deepseek_cache_hit_tokens(self):
+        result = self._result(
+            {
+                "token_usage": {
+                    "prompt_tokens": 900,
+                    "completion_tokens": 50,
+                    "prompt_cache_hit_tokens": 768,
+                    "prompt_cache_miss_tokens": 132,
+                }
+            }
+        )
+        assert extract_token_usage(result) == (900, 50, 768)
+
+    def test_usage_metadata_fallback(self):
+        result = self._result(
+            usage_metadata={
+                "input_tokens": 300,
+                "output_tokens": 20,
+                "total_tokens": 320,
+                "input_token_details": {"cache_read": 256},
+            }
+        )
+        assert extract_token_usage(result) == (300, 20, 256)
+        assert extract_token_usage(self._result()) == (0, 0, 0)
+
+    def test_tracker_records_cached_tokens(self):
+        from tradingagents.config.config_manager import TokenTracker
+
+        config_manager = MagicMock()
+        config_manager.load_settings.return_value = {"enable_cost_tracking": True}
+        config_manager.add_usage_record.return_value = None
+        tracker = TokenTracker(config_manager)
+
+        tracker.track_usage("deepseek", "deepseek-chat", 900, 50, session_id="s1", cached_tokens=768)
+
+        assert config_manager.add_usage_record.call_args[1]["cached_tokens"] == 768
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+提示词紧凑序列化测试
+
+测试范围:
+- 模型上下文窗口与数据预算查询（含聚合渠道名称、未知模型）
+- token 计数与按 token 截断
+- 行情序列紧凑渲染: 关键字段保留、预算约束、逐级裁剪
+- 财务报告压缩: 截断时保留关键指标
+- 分析师 prompt 仍包含关键字段（回归）
+"""
+
+import re
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.constants.model_capabilities import (
+    PROMPT_DATA_BUDGET_MAX,
+    PROMPT_DATA_BUDGET_MIN,
+    get_model_context_window,
+    get_prompt_data_budget,
+)
+from tradingagents.dataflows.data_source_manager import DataSourceManager
+from tradingagents.dataflows.schemas.market_series import (
+    FundamentalsSnapshot,
+    get_structured,
+)
+from tradingagents.utils.prompt_serializer import (
+    TRUNCATION_MARK,
+    compact_report_text,
+    count_tokens,
+    serialize_market_series,
+    truncate_to_tokens,
+)
+
+# 分析师 prompt 要求分析的关键字段
+KEY_FIELDS = (
+    "MA5",
+    "MA10",
+    "MA20",
+    "MA60",
+    "DIF",
+    "DEA",
+    "RSI6",
+    "RSI14",
+    "KDJ",
+    "BOLL",
+    "ATR14",
+    "WR14",
+    "CCI14",
+    "OBV",
+    "成交量",
+    "量比",
+)
+
+
+def _market_data(days=250):
+    """返回 (MarketSeries, 原始 market_data 文本)"""
+    rng = np.random.default_rng(11)
+    close = 20 + np.cumsum(rng.normal(0, 0.3, days))
+    df = pd.DataFrame(
+        {
+            "trade_date": pd.bdate_range("2024-01-01", periods=days).strftime("%Y%m%d"),
+            "open": close + 0.1,
+            "high": close + 0.4,
+            "low": close - 0.4,
+            "close": close,
+            "volume": rng.integers(10000, 90000, days).astype(float),
+        }
+    )
+    manager = DataSourceManager.__new__(DataSourceManager)
+    text = manager._format_stock_data_response(
+        df, "600000", "浦发银行", "2024-01-01", "2024-12-31"
+    )
+    series = get_structured(text)
+    series.source = "tushare"
+    return series, text
+
+
+def _series(days=250):
+    return _market_data(days)[0]
+
+
+@pytest.mark.unit
+class TestTokenBudget:
+    """测试模型预算查询"""
+
+    def test_context_window_lookup(self):
+        assert get_model_context_window("ernie-3.5") == 5120
+        assert get_model_context_window("openai/gpt-4o-mini") == 128000
+        assert get_model_context_window("qwen-plus-latest") == 131072
+        assert get_model_context_window("unknown-model") == 8192
+
+    def test_budget_is_clamped(self):
+        assert get_prompt_data_budget("ernie-3.5") == 1280
+        assert get_prompt_data_budget("gemini-1.5-pro") == PROMPT_DATA_BUDGET_MAX
+        assert get_prompt_data_budget("") >= PROMPT_DATA_BUDGET_MIN
+
+
+@pytest.mark.unit
+class TestTokenCounting:
+    """测试 token 计数与截断"""
+
+    def test_count_tokens(self):
+        assert count_tokens("") == 0
+        assert count_tokens("技术分析报告") >= 4
+        assert count_tokens("MA5 12.34 " * 50) > count_tokens("MA5 12.34")
+
+    def test_truncate_respects_budget(self):
+        text = "收盘价上涨，成交量放大。" * 200
+        truncated = truncate_to_tokens(text, 100)
+
+        assert truncated.endswith(TRUNCATION_MARK)
+        assert count_tokens(truncated) <= 100
+        assert truncate_to_tokens("短文本", 100) == "短文本"
+
+
+@pytest.mark.unit
+class TestMarketSerialization:
+    """测试行情紧凑序列化"""
+
+    def test_keeps_key_fields_and_values(self):
+        series = _series()
+        block = serialize_market_series(series, max_tokens=2000)
+        latest = series.latest()
+
+        for field in KEY_FIELDS:
+            assert field in block.text
+        assert f"价{latest['current_price']:.2f}" in block.text
+        assert f"{latest['MA20']:.2f}" in block.text
+        assert f"{latest['MACD_DIF']:.3f}" in block.text
+        assert "来源:tushare" in block.text
+
+    def test_fits_budget_and_reports_savings(self):
+        block = serialize_market_series(_series(), max_tokens=2000)
+
+        assert block.tokens_after <= 2000
+        assert block.tokens_after == count_tokens(block.text)
+        assert block.tokens_before > block.tokens_after * 5
+        assert 0 < block.saved_ratio < 1
+
+    def test_history_is_downsampled_and_delta_encoded(self):
+        series = _series()
+        block = serialize_market_series(series, max_tokens=100000)
+        lines = block.text.splitlines()
+        start = next(i for i, line in enumerate(lines) if line.startswith("更早"))
+        history = lines[start + 1 :]
+
+        assert block.level == 0
+        assert "近20日" in block.text
+        assert len(history) == (len(series) - 20 + 4) // 5
+        # 第一段为基准值，其余为带符号的差分
+        assert not history[0].split("|")[1].startswith(("+", "-"))
+        assert all(re.match(r"[+-]\d", row.split("|")[1]) for row in history[1:])
+        base = float(history[0].split("|")[1])
+        rebuilt = base + sum(float(row.split("|")[1]) for row in history[1:])
+        assert rebuilt == pytest.approx(series.close[len(series) - 21], abs=0.01 * len(history))
+
+    def test_tight_budget_prunes_history_but_keeps_latest(self):
+        series = _series()
+        full = serialize_market_series(series, max_tokens=100000)
+        tight = serialize_market_series(series, max_tokens=full.tokens_after // 2)
+
+        assert tight.level > 0
+        assert tight.tokens_after <= full.tokens_after // 2
+        for field in KEY_FIELDS:
+            assert field in tight.text
+
+    def test_never_longer_than_replaced_text(self):
+        series, text = _market_data(120)
+        block = serialize_market_series(series, max_tokens=2000, original_text=text)
+
+        assert block.tokens_before == count_tokens(text)
+        assert block.tokens_after <= block.tokens_before
+        assert block.tokens_after == count_tokens(block.text)
+        assert block.saved_ratio >= 0
+        # 原始文本只有几百 token，放不下降采样历史
+        assert "更早" not in block.text
+        for field in KEY_FIELDS:
+            assert field in block.text
+
+    def test_history_only_when_budget_allows(self):
+        series = _series()
+        recent_only = serialize_market_series(series, max_tokens=100000)
+        lines = recent_only.text.splitlines()
+        start = next(i for i, line in enumerate(lines) if line.startswith("更早"))
+        budget = count_tokens("\n".join(lines[:start]))
+
+        block = serialize_market_series(series, max_tokens=budget)
+
+        assert block.level == 0
+        assert "近20日" in block.text
+        assert "更早" not in block.text
+        assert block.tokens_after <= budget
+
+    def test_keeps_replaced_text_when_compact_form_does_not_fit(self):
+        series = _series()
+        original = "最新价 20.55 MA5 20.19"
+        block = serialize_market_series(series, max_tokens=2000, original_text=original)
+
+        assert block.text == original
+        assert block.tokens_after == block.tokens_before
+        assert block.saved_ratio == 0
+
+
+@pytest.mark.unit
+class TestReportCompaction:
+    """测试文本报告压缩"""
+
+    def test_strips_decoration_without_truncating(self):
+        report = "## 估值\n━━━━━━━━━━━━\nPE: 5.2   \n\n\n\nPB: 0.6\n"
+        block = compact_report_text(report, max_tokens=1000)
+
+        assert block.text == "## 估值\n\nPE: 5.2\n\nPB: 0.6"
+        assert block.level == 0
+
+    def test_truncation_keeps_key_metrics(self):
+        snapshot = FundamentalsSnapshot.from_metrics("600000", {"pe": "5.20", "roe": "10.5%"})
+        report = "公司经营情况说明。" * 500
+        block = compact_report_text(report, max_tokens=200, key_metrics=snapshot.to_dict())
+
+        assert block.level == 1
+        assert block.tokens_after <= 200
+        assert block.text.startswith("关键指标: PE=5.2 ROE=10.5")
+
+
+@pytest.mark.unit
+class TestAnalystPrompts:
+    """回归: 分析师 prompt 仍包含关键字段"""
+
+    def _prompt(self, node, state):
+        with patch(
+            "tradingagents.agents.analysts.market_analyst.get_company_name",
+            return_value="浦发银行",
+        ), patch(
+            "tradingagents.agents.analysts.fundamentals_analyst.get_company_name",
+            return_value="浦发银行",
+        ):
+            node(state)
+        return node.llm.invoke.call_args[0][0][-1][1]
+
+    def _llm(self, model_name):
+        llm = MagicMock()
+        llm.model_name = model_name
+        llm.invoke.return_value = MagicMock(content="报告")
+        return llm
+
+    def test_market_analyst_uses_compact_series(self):
+        from tradingagents.agents.analysts.market_analyst import create_market_analyst
+
+        series, text = _market_data()
+        llm = self._llm("ernie-3.5")
+        node = create_market_analyst(llm)
+        node.llm = llm
+        prompt = self._prompt(
+            node,
+            {
+                "trade_date": "2024-12-31",
+                "company_of_interest": "600000",
+                "market_data": text,
+                "market_series": series,
+            },
+        )
+
+        for field in KEY_FIELDS:
+            assert field in prompt
+        data = prompt.split("=== 市场数据 ===")[1].split("================")[0]
+        assert count_tokens(data.strip()) <= get_prompt_data_budget("ernie-3.5")
+        assert count_tokens(data.strip()) <= count_tokens(text)
+
+    def test_fundamentals_analyst_keeps_metrics(self):
+        from tradingagents.agents.analysts.fundamentals_analyst import (
+            create_fundamentals_analyst,
+        )
+
+        snapshot = FundamentalsSnapshot.from_metrics("600000", {"pe": "5.20", "pb": "0.61"})
+        llm = self._llm("ernie-3.5")
+        node = create_fundamentals_analyst(llm)
+        node.llm = llm
+        prompt = self._prompt(
+            node,
+            {
+                "trade_date": "2024-12-31",
+                "company_of_interest": "600000",
+                "financial_data": "财务分析正文。" * 2000,
+                "fundamentals_snapshot": snapshot,
+            },
+        )
+
+        assert "关键指标: PE=5.2 PB=0.61" in prompt
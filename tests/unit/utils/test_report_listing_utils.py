@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+报告列表工具函数测试
+
+测试范围:
+- n-gram 搜索词构建与查询条件
+- 键集分页游标编解码
+- 报告列表预计算字段
+"""
+
+import pytest
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.utils.pagination import (
+    build_keyset_filter,
+    decode_keyset_cursor,
+    encode_keyset_cursor,
+)
+from app.utils.search_utils import (
+    SEARCH_NGRAMS_VERSION,
+    build_ngram_search_query,
+    build_search_ngrams,
+)
+
+
+@pytest.mark.unit
+class TestSearchNgrams:
+    """测试 n-gram 搜索词"""
+
+    def test_ngrams_contain_unigrams_and_bigrams(self):
+        grams = build_search_ngrams("贵州茅台", "600519")
+
+        assert "茅" in grams
+        assert "茅台" in grams
+        assert "6005" not in grams
+        assert "05" in grams
+
+    def test_ngrams_cover_full_text(self):
+        summary = "综合来看估值合理。" * 50 + "关键风险：渠道库存"
+
+        grams = build_search_ngrams(summary)
+
+        assert len(summary) > 300
+        assert "库存" in grams
+
+    def test_ngrams_are_lowercased_and_whitespace_free(self):
+        grams = build_search_ngrams("Apple Inc")
+
+        assert "ap" in grams
+        assert "ei" in grams
+        assert " " not in "".join(grams)
+
+    def test_query_uses_bigrams_and_escaped_regex(self):
+        query = build_ngram_search_query("茅台.", ["stock_name"])
+
+        indexed, legacy = query["$or"]
+        assert indexed["$and"][0] == {"search_ngrams": {"$all": ["台.", "茅台"]}}
+        assert indexed["$and"][1] == {"$or": [{"stock_name": {"$regex": "茅台\\.", "$options": "i"}}]}
+        assert legacy["$and"][0] == {"search_ngrams_version": {"$ne": SEARCH_NGRAMS_VERSION}}
+
+    def test_query_single_character_uses_unigram(self):
+        query = build_ngram_search_query("A", ["stock_symbol"])
+
+        assert query["$or"][0]["$and"][0] == {"search_ngrams": {"$all": ["a"]}}
+
+    def test_empty_keyword_returns_empty_query(self):
+        assert build_ngram_search_query("  ", ["stock_symbol"]) == {}
+
+
+@pytest.mark.unit
+class TestKeysetCursor:
+    """测试键集分页游标"""
+
+    def test_cursor_roundtrip(self):
+        created_at = datetime(2025, 1, 2, 3, 4, 5, 678000)
+        doc_id = ObjectId()
+
+        cursor = encode_keyset_cursor(created_at, doc_id)
+
+        assert decode_keyset_cursor(cursor) == (created_at, doc_id)
+
+    def test_keyset_filter_orders_by_created_at_then_id(self):
+        created_at = datetime(2025, 1, 2)
+        doc_id = ObjectId()
+
+        query = build_keyset_filter(encode_keyset_cursor(created_at, doc_id))
+
+        assert query == {
+            "$or": [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": doc_id}},
+                # 倒序排在日期之后的字符串/数字/缺失值不能被漏掉
+                {"created_at": {"$type": "string"}},
+                {"created_at": {"$type": "number"}},
+                {"created_at": None},
+            ]
+        }
+
+    def test_keyset_filter_non_datetime_created_at(self):
+        doc_id = ObjectId()
+
+        string_cursor = encode_keyset_cursor("2025-01-02 10:00:00", doc_id)
+        assert decode_keyset_cursor(string_cursor) == ("2025-01-02 10:00:00", doc_id)
+        assert build_keyset_filter(string_cursor)["$or"][0] == {
+            "created_at": {"$lt": "2025-01-02 10:00:00"}
+        }
+        assert build_keyset_filter(string_cursor)["$or"][-1] == {"created_at": None}
+
+        # 缺失 created_at 时只按 _id 继续
+        assert build_keyset_filter(encode_keyset_cursor(None, doc_id)) == {
+            "created_at": None,
+            "_id": {"$lt": doc_id},
+        }
+
+    def test_invalid_cursor_raises_value_error(self):
+        with pytest.raises(ValueError):
+            decode_keyset_cursor("not-a-cursor")
+
+
+@pytest.mark.unit
+class TestReportListFields:
+    """测试报告列表预计算字段"""
+
+    def test_build_report_list_fields(self):
+        from app.services.analysis.report_generation_service import build_report_list_fields
+
+        reports = {"market_report": "# 技术分析\n" * 10}
+        fields = build_report_list_fields("600519", "贵州茅台", "600519_20250101", "看多", reports)
+
+        assert fields["report_size"] == len(str(reports))
+        assert "茅台" in fields["search_ngrams"]
+        assert "看多" in fields["search_ngrams"]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+运行级上下文测试
+
+测试范围:
+- run_scope 的隔离与恢复
+- Toolkit / dataflows get_config 读取运行配置
+- 线程池、asyncio 任务中的上下文传递
+- 并发 propagate 之间无串扰（压力测试：真实编译的图 + 桩模型/工具）
+"""
+
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.graph import END, START, StateGraph
+from langgraph.prebuilt import ToolNode
+
+from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.config.config_manager import config_manager
+from tradingagents.dataflows.interfaces import base_interface
+from tradingagents.utils.run_context import (
+    get_run_config,
+    run_in_executor_with_context,
+    run_scope,
+    submit_with_context,
+)
+
+
+@pytest.mark.unit
+class TestRunScope:
+    """测试运行级上下文"""
+
+    def test_scope_is_restored(self):
+        assert get_run_config() is None
+        with run_scope({"a": 1}, task_id="t1") as config:
+            assert get_run_config() is config
+            assert config == {"a": 1, "task_id": "t1"}
+        assert get_run_config() is None
+
+    def test_scope_copies_config(self):
+        original = {"trade_date": "2025-01-02"}
+        with run_scope(original):
+            Toolkit.update_config({"trade_date": "2025-06-30"})
+        assert original == {"trade_date": "2025-01-02"}
+
+    def test_toolkit_update_outside_scope_changes_default(self):
+        saved = Toolkit._config.get("trade_date")
+        try:
+            Toolkit.update_config({"trade_date": "2024-12-31"})
+            assert Toolkit.get_config()["trade_date"] == "2024-12-31"
+            with run_scope({"trade_date": "2025-01-02"}):
+                assert Toolkit.get_config()["trade_date"] == "2025-01-02"
+        finally:
+            Toolkit._config["trade_date"] = saved
+
+    def test_dataflows_get_config_overlays_run_config(self):
+        with patch.object(config_manager, "load_settings", return_value={"a": 1, "b": 1}):
+            with run_scope({"b": 2}):
+                assert base_interface.get_config() == {"a": 1, "b": 2}
+            assert base_interface.get_config() == {"a": 1, "b": 1}
+
+    def test_set_config_in_scope_does_not_persist(self):
+        with patch.object(config_manager, "save_settings") as save:
+            with run_scope({}):
+                base_interface.set_config({"quick_think_llm": "qwen-turbo"})
+                assert get_run_config()["quick_think_llm"] == "qwen-turbo"
+            save.assert_not_called()
+
+    def test_submit_with_context_shares_run_config(self):
+        with run_scope({"trade_date": "2025-01-02"}):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                seen = submit_with_context(
+                    executor, lambda: Toolkit.get_config()["trade_date"]
+                ).result()
+                # 子线程中的修改对整个运行可见
+                submit_with_context(
+                    executor, Toolkit.update_config, {"analysis_date": "2025-01-02"}
+                ).result()
+            assert get_run_config()["analysis_date"] == "2025-01-02"
+        assert seen == "2025-01-02"
+
+    @pytest.mark.asyncio
+    async def test_asyncio_tasks_are_isolated(self):
+        async def run(date):
+            with run_scope({}, trade_date=date):
+                await asyncio.sleep(random.random() / 100)
+                loop = asyncio.get_running_loop()
+                return await run_in_executor_with_context(
+                    loop, None, lambda: Toolkit.get_config()["trade_date"]
+                )
+
+        dates = [f"2025-01-{d:02d}" for d in range(1, 21)]
+        assert await asyncio.gather(*(run(d) for d in dates)) == dates
+
+
+def _observe() -> str:
+    """读取当前线程看到的运行配置（节点、模型、工具内调用）"""
+    config = Toolkit.get_config()
+    time.sleep(random.random() / 200)
+    return json.dumps(
+        [config["trade_date"], config["analysis_date"], config["quick_think_llm"], config["task_id"]]
+    )
+
+
+class StubChatModel(BaseChatModel):
+    """桩模型：在模型调用内部读取运行配置；trader 模式下发起两个工具调用"""
+
+    mode: str = "report"
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        observed = _observe()
+        if self.mode == "trader":
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "observe_run_config", "args": {"source": s}, "id": f"call-{s}"}
+                    for s in ("price", "news")
+                ],
+            )
+        else:
+            message = AIMessage(content=observed)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@tool
+def observe_run_config(source: str) -> str:
+    """Return the run config seen by the tool thread."""
+    return _observe()
+
+
+def _build_stub_graph():
+    """真实编译的 LangGraph：两个分析师并行分支 -> 交易员工具调用（ToolNode 多线程）-> 汇总"""
+    report_llm, trader_llm = StubChatModel(), StubChatModel(mode="trader")
+
+    def analyst(report_key):
+        def node(state):
+            return {report_key: report_llm.invoke(state["messages"]).content}
+        return node
+
+    def trader(state):
+        return {"messages": [trader_llm.invoke(state["messages"])]}
+
+    def judge(state):
+        observed = [m.content for m in state["messages"] if isinstance(m, ToolMessage)]
+        return {"final_trade_decision": json.dumps(observed)}
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("Market Analyst", analyst("market_report"))
+    workflow.add_node("News Analyst", analyst("news_report"))
+    workflow.add_node("Trader", trader)
+    workflow.add_node("tools", ToolNode([observe_run_config]))
+    workflow.add_node("Risk Judge", judge)
+    workflow.add_edge(START, "Market Analyst")
+    workflow.add_edge(START, "News Analyst")
+    workflow.add_edge(["Market Analyst", "News Analyst"], "Trader")
+    workflow.add_edge("Trader", "tools")
+    workflow.add_edge("tools", "Risk Judge")
+    workflow.add_edge("Risk Judge", END)
+    return workflow.compile()
+
+
+@pytest.mark.unit
+class TestConcurrentPropagate:
+    """压力测试：同一进程内并发执行真实的图，节点线程、模型与工具调用互不串扰"""
+
+    def _graph(self, config):
+        from tradingagents.graph.propagation import Propagator
+        from tradingagents.graph.trading_graph import TradingAgentsGraph
+
+        graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+        graph.config = config
+        graph.selected_analysts = config["selected_analysts"]
+        graph.debug = False
+        graph.propagator = Propagator()
+        graph.graph = _build_stub_graph()
+        graph.state_logger = MagicMock()
+        graph.deep_thinking_llm = StubChatModel()
+        graph.signal_processor = MagicMock()
+        graph.signal_processor.process_signal.return_value = {}
+        return graph
+
+    def test_no_cross_talk_between_concurrent_runs(self):
+        def worker(i):
+            graph = self._graph({"quick_think_llm": f"model-{i}", "selected_analysts": ["market", "news"]})
+            date = f"2025-02-{i + 1:02d}"
+            # 与分析服务一致：带进度回调（updates 流模式）
+            state, _ = graph.propagate("000001", date, progress_callback=MagicMock(), task_id=f"task-{i}")
+            return i, date, state
+
+        with patch("tradingagents.graph.trading_graph.QualityChecker"):
+            with ThreadPoolExecutor(max_workers=16) as executor:
+                results = list(executor.map(worker, range(16)))
+
+        for i, date, state in results:
+            expected = [date, date, f"model-{i}", f"task-{i}"]
+            observed = [state["market_report"], state["news_report"]]
+            observed += json.loads(state["final_trade_decision"])
+            assert len(observed) == 4
+            assert all(json.loads(o) == expected for o in observed), (i, observed)
+        assert get_run_config() is None
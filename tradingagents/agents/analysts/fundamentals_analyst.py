@@ -3,6 +3,11 @@ from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.tool_logging import log_analyst_module
 from tradingagents.utils.stock_utils import StockUtils
 from tradingagents.utils.company_name_utils import get_company_name
+from tradingagents.utils.prompt_builder import format_run_context
+from tradingagents.utils.prompt_serializer import (
+    compact_report_text,
+    get_llm_model_name,
+)
 
 logger = get_logger("analysts.fundamentals")
 
@@ -18,6 +23,7 @@ def create_fundamentals_analyst(llm, toolkit=None):
     Returns:
         fundamentals_analyst_node: 基本面分析师节点函数
     """
+    model_name = get_llm_model_name(llm)
 
     @log_analyst_module("fundamentals")
     def fundamentals_analyst_node(state):
@@ -42,6 +48,16 @@ def create_fundamentals_analyst(llm, toolkit=None):
                 "警告：财务数据不可用。已尝试从多个数据源获取但均失败。\n"
                 "请检查网络连接或稍后重试。"
             )
+        else:
+            # 按模型 token 预算压缩财务报告，截断时保留关键指标
+            snapshot = state.get("fundamentals_snapshot")
+            block = compact_report_text(
+                financial_data,
+                model_name=model_name,
+                key_metrics=snapshot.to_dict() if hasattr(snapshot, "to_dict") else None,
+                label=f"{ticker} 财务数据",
+            )
+            financial_data = block.text
 
         logger.info(
             f"[Fundamentals Analyst] Analyzing {ticker} on {current_date} (quality: {data_quality_score:.2f}, source: {financial_source})"
@@ -64,20 +80,13 @@ def create_fundamentals_analyst(llm, toolkit=None):
         # 注意：PS修正信息已由 Data Coordinator 添加到 financial_data 中，这里不再重复添加
         metadata_info = "\n- **成交量单位**: 手 (1手=100股)"
 
-        system_message = f"""你是一位专业的股票基本面分析师。
-请基于以下**真实财务数据**对 {company_name} ({ticker}) 进行深度的基本面分析。
-
-=== 数据信息 ===
-- 数据来源: {financial_source}
-- 数据日期: {current_date}（历史数据）
-{metadata_info}
-
-=== 财务数据 ===
-{financial_data}
-================
+        # 系统消息只含静态指令（跨股票、跨日期可命中提示词缓存），
+        # 数据和本次任务信息（公司、代码、来源、日期）放在用户消息末尾
+        system_message = """你是一位专业的股票基本面分析师。
+请基于用户消息中提供的**真实财务数据**，对"本次任务信息"中的股票进行深度的基本面分析。
 
 **分析要求（必须严格遵守）：**
-1. **数据来源**：必须严格基于上述提供的财务数据进行分析，绝对禁止编造数据。
+1. **数据来源**：必须严格基于提供的财务数据进行分析，绝对禁止编造数据。
 2. **财务状况**：分析营收、利润、现金流等核心指标。
     3. **估值分析**：分析PE、PB、PS、PEG等估值指标，判断当前股价是否低估/高估。
        
@@ -247,8 +256,8 @@ def create_fundamentals_analyst(llm, toolkit=None):
    - 给出明确的投资理由和风险评估
 
 **输出格式要求：**
-请使用Markdown格式，包含以下章节：
-# **{company_name}（{ticker}）基本面分析报告**
+请使用Markdown格式，包含以下章节（标题中的公司名称和股票代码取自本次任务信息）：
+# **公司名称（股票代码）基本面分析报告**
 ## 一、公司概况与财务摘要
 ## 二、盈利能力与成长性分析
 ## 三、估值水平评估
@@ -322,9 +331,22 @@ def create_fundamentals_analyst(llm, toolkit=None):
 ⚠️ **违反以上任何一条，报告将被视为不合格**。
 """
 
+        human_message = f"""=== 数据信息 ===
+- 数据来源: {financial_source}
+- 数据日期: {current_date}（历史数据）
+{metadata_info}
+
+=== 财务数据 ===
+{financial_data}
+================
+
+{format_run_context(company_name=company_name, ticker=ticker, trade_date=current_date)}
+
+请生成 {company_name} ({ticker}) 的基本面分析报告。"""
+
         messages = [
             ("system", system_message),
-            ("human", f"请生成 {company_name} ({ticker}) 的基本面分析报告。"),
+            ("human", human_message),
         ]
 
         try:
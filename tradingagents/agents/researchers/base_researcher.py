@@ -10,6 +10,8 @@ from abc import ABC, abstractmethod
 # 导入统一日志系统和工具
 from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.company_name_utils import get_company_name
+from tradingagents.agents.utils.debate_history import compact_debate_history
+from tradingagents.utils.prompt_builder import format_run_context
 
 logger = get_logger("default")
 
@@ -84,13 +86,18 @@ class BaseResearcher(ABC):
             # 记录日志
             self._log_context(ticker, company_name, market_info, reports, history)
 
+            # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+            prompt_history = compact_debate_history(
+                history, llm, label=f" {self.description}研究员"
+            )
+
             # 构建prompt
             prompt = self._build_prompt(
                 company_name,
                 ticker,
                 market_info,
                 reports,
-                history,
+                prompt_history,
                 current_response,
                 past_memory_str,
             )
@@ -229,10 +236,17 @@ class BullResearcher(BaseResearcher):
         past_memory_str: str,
     ) -> str:
         """构建看涨研究员prompt"""
-        return f"""你是一位看涨分析师，负责为股票 {company_name}（股票代码：{ticker}）的投资建立强有力的论证。
+        run_context = format_run_context(
+            company_name=company_name,
+            ticker=ticker,
+            market_name="中国A股" if market_info["is_china"] else "海外股票",
+            currency_name=market_info["currency_name"],
+            currency_symbol=market_info["currency_symbol"],
+        )
+        return f"""你是一位看涨分析师，负责为"本次任务信息"中的股票的投资建立强有力的论证。
 
-⚠️ 重要提醒：当前分析的是 {"中国A股" if market_info["is_china"] else "海外股票"}，所有价格和估值请使用 {market_info["currency_name"]}（{market_info["currency_symbol"]}）作为单位。
-⚠️ 在你的分析中，请始终使用公司名称"{company_name}"而不是股票代码"{ticker}"来称呼这家公司。
+⚠️ 重要提醒：所有价格和估值请使用本次任务信息中的计价货币作为单位。
+⚠️ 在你的分析中，请始终使用公司名称而不是股票代码来称呼这家公司。
 
 🚨 CRITICAL REQUIREMENT - 绝对强制要求：
 
@@ -293,7 +307,9 @@ class BullResearcher(BaseResearcher):
 
 请使用这些信息提供令人信服的看涨论点，反驳看跌担忧，并参与动态辩论，展示看涨立场的优势。你还必须处理反思并从过去的经验教训和错误中学习。
 
-请确保所有回答都使用中文。"""
+请确保所有回答都使用中文。
+
+{run_context}"""
 
 
 class BearResearcher(BaseResearcher):
@@ -314,10 +330,17 @@ class BearResearcher(BaseResearcher):
         past_memory_str: str,
     ) -> str:
         """构建看跌研究员prompt"""
-        return f"""你是一位看跌分析师，负责论证不投资股票 {company_name}（股票代码：{ticker}）的理由。
+        run_context = format_run_context(
+            company_name=company_name,
+            ticker=ticker,
+            market_name=market_info["market_name"],
+            currency_name=market_info["currency_name"],
+            currency_symbol=market_info["currency_symbol"],
+        )
+        return f"""你是一位看跌分析师，负责论证不投资"本次任务信息"中的股票的理由。
 
-⚠️ 重要提醒：当前分析的是 {market_info["market_name"]}，所有价格和估值请使用 {market_info["currency_name"]}（{market_info["currency_symbol"]}）作为单位。
-⚠️ 在你的分析中，请始终使用公司名称"{company_name}"而不是股票代码"{ticker}"来称呼这家公司。
+⚠️ 重要提醒：所有价格和估值请使用本次任务信息中的计价货币作为单位。
+⚠️ 在你的分析中，请始终使用公司名称而不是股票代码来称呼这家公司。
 
 🚨 CRITICAL REQUIREMENT - 绝对强制要求：
 
@@ -385,7 +408,9 @@ class BearResearcher(BaseResearcher):
 
 请使用这些信息提供令人信服的看跌论点，反驳看涨声明，并参与动态辩论，展示投资该股票的风险和弱点。你还必须处理反思并从过去的经验教训和错误中学习。
 
-请确保所有回答都使用中文。"""
+请确保所有回答都使用中文。
+
+{run_context}"""
 
 
 # 工厂函数
@@ -2,6 +2,8 @@
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.debate_history import compact_debate_history
+from tradingagents.utils.prompt_builder import format_run_context
 
 logger = get_logger("default")
 
@@ -57,10 +59,22 @@ def create_bear_researcher(llm, memory):
         for i, rec in enumerate(past_memories, 1):
             past_memory_str += rec["recommendation"] + "\n\n"
 
-        prompt = f"""你是一位看跌分析师，负责论证不投资股票 {company_name}（股票代码：{ticker}）的理由。
+        # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+        prompt_history = compact_debate_history(history, llm, label=" 空头研究员")
+
+        # 静态指令在前、共享报告居中、本次任务信息（公司/代码/货币）在末尾，保持前缀稳定
+        run_context = format_run_context(
+            company_name=company_name,
+            ticker=ticker,
+            market_name=market_info["market_name"],
+            currency_name=currency,
+            currency_symbol=currency_symbol,
+        )
+
+        prompt = f"""你是一位看跌分析师，负责论证不投资"本次任务信息"中的股票的理由。
  
-⚠️ 重要提醒：当前分析的是 {market_info["market_name"]}，所有价格和估值请使用 {currency}（{currency_symbol}）作为单位。
-⚠️ 在你的分析中，请始终使用公司名称"{company_name}"而不是股票代码"{ticker}"来称呼这家公司。
+⚠️ 重要提醒：所有价格和估值请使用本次任务信息中的计价货币作为单位。
+⚠️ 在你的分析中，请始终使用公司名称而不是股票代码来称呼这家公司。
  
 🚨 CRITICAL REQUIREMENT - 绝对强制要求：
 
@@ -121,13 +135,15 @@ def create_bear_researcher(llm, memory):
 最新世界事务新闻：{news_report}
 公司基本面报告：{fundamentals_report}
 {f"A股市场特色分析报告：{china_market_report}" if is_china and china_market_report else ""}
-辩论对话历史：{history}
+辩论对话历史：{prompt_history}
 最后的看涨论点：{current_response}
 类似情况的反思和经验教训：{past_memory_str}
  
 请使用这些信息提供令人信服的看跌论点，反驳看涨声明，并参与动态辩论，展示投资该股票的风险和弱点。你还必须处理反思并从过去的经验教训和错误中学习。
  
 请确保所有回答都使用中文。
+
+{run_context}
 """
 
         response = llm.invoke(prompt)
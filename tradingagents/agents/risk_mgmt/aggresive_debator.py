@@ -2,6 +2,7 @@
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.debate_history import compact_debate_history
 logger = get_logger("default")
 
 
@@ -35,6 +36,10 @@ def create_risky_debator(llm):
                        len(current_safe_response) + len(current_neutral_response))
         logger.info(f"  - 总Prompt长度: {total_length:,} 字符 (~{total_length//4:,} tokens)")
 
+        # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+        prompt_history = compact_debate_history(history, llm, label=" 激进风险分析师")
+
+        # 角色指令在前，三位辩论者共享的报告和交易员决策居中，本轮对话历史放在最后（前缀稳定）
         prompt = f"""作为激进风险分析师，您的职责是积极倡导高回报、高风险的投资机会，强调大胆策略和竞争优势。在评估交易员的决策或计划时，请重点关注潜在的上涨空间、增长潜力和创新收益——即使这些伴随着较高的风险。使用提供的市场数据和情绪分析来加强您的论点，并挑战对立观点。具体来说，请直接回应保守和中性分析师提出的每个观点，用数据驱动的反驳和有说服力的推理进行反击。突出他们的谨慎态度可能错过的关键机会，或者他们的假设可能过于保守的地方。
 
 **风险评估要求（必须包含）：**
@@ -42,9 +47,7 @@ def create_risky_debator(llm):
 2. **集中度风险评估**：评估投资组合集中度风险。如果交易员建议重仓该股票，分析其潜在收益是否足以补偿集中度风险。
 3. **宏观经济风险评估**：从积极角度分析宏观经济环境（利率、通胀、政策）对该股票的影响，强调在有利条件下的增长潜力。
 
-以下是交易员的决策：
-
-{trader_decision}
+积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。
 
 您的任务是通过质疑和批评保守和中性立场来为交易员的决策创建一个令人信服的案例，证明为什么您的高回报视角提供了最佳的前进道路。将以下来源的见解纳入您的论点：
 
@@ -52,9 +55,12 @@ def create_risky_debator(llm):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务报告：{news_report}
 公司基本面报告：{fundamentals_report}
-以下是当前对话历史：{history} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
 
-积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
+以下是交易员的决策：
+
+{trader_decision}
+
+以下是当前对话历史：{prompt_history} 以下是保守分析师的最后论点：{current_safe_response} 以下是中性分析师的最后论点：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。"""
 
         logger.info(f"⏱️ [Risky Analyst] 开始调用LLM...")
         import time
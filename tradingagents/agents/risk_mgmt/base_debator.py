@@ -10,6 +10,7 @@ from typing import Dict, Any, Callable
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.debate_history import compact_debate_history
 
 logger = get_logger("default")
 
@@ -81,9 +82,14 @@ class BaseDebator(ABC):
                 reports, history, current_responses, trader_decision
             )
 
+            # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+            prompt_history = compact_debate_history(
+                history, llm, label=f" {self.description}分析师"
+            )
+
             # 构建prompt
             prompt = self._build_prompt(
-                reports, history, current_responses, trader_decision
+                reports, prompt_history, current_responses, trader_decision
             )
 
             # 调用LLM
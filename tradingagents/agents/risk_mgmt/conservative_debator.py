@@ -3,6 +3,7 @@ import time
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.debate_history import compact_debate_history
 logger = get_logger("default")
 
 
@@ -36,6 +37,10 @@ def create_safe_debator(llm):
                        len(current_risky_response) + len(current_neutral_response))
         logger.info(f"  - 总Prompt长度: {total_length:,} 字符 (~{total_length//4:,} tokens)")
 
+        # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+        prompt_history = compact_debate_history(history, llm, label=" 保守风险分析师")
+
+        # 角色指令在前，三位辩论者共享的报告和交易员决策居中，本轮对话历史放在最后（前缀稳定）
         prompt = f"""作为安全/保守风险分析师，您的主要目标是保护资产、最小化波动性，并确保稳定、可靠的增长。您优先考虑稳定性、安全性和风险缓解，仔细评估潜在损失、经济衰退和市场波动。在评估交易员的决策或计划时，请批判性地审查高风险要素，指出决策可能使公司面临不当风险的地方，以及更谨慎的替代方案如何能够确保长期收益。
 
 **风险评估要求（必须包含）：**
@@ -43,9 +48,7 @@ def create_safe_debator(llm):
 2. **集中度风险评估**：评估投资组合集中度风险。建议分散投资以降低单一股票或行业的风险暴露。
 3. **宏观经济风险评估**：分析宏观经济环境（利率、通胀、政策）对该股票的潜在负面影响，强调经济下行期的风险控制。
 
-以下是交易员的决策：
-
-{trader_decision}
+通过质疑他们的乐观态度并强调他们可能忽视的潜在下行风险来参与讨论。解决他们的每个反驳点，展示为什么保守立场最终是公司资产最安全的道路。专注于辩论和批评他们的论点，证明低风险策略相对于他们方法的优势。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。
 
 您的任务是积极反驳激进和中性分析师的论点，突出他们的观点可能忽视的潜在威胁或未能优先考虑可持续性的地方。直接回应他们的观点，利用以下数据来源为交易员决策的低风险方法调整建立令人信服的案例：
 
@@ -53,9 +56,12 @@ def create_safe_debator(llm):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务报告：{news_report}
 公司基本面报告：{fundamentals_report}
-以下是当前对话历史：{history} 以下是激进分析师的最后回应：{current_risky_response} 以下是中性分析师的最后回应：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
 
-通过质疑他们的乐观态度并强调他们可能忽视的潜在下行风险来参与讨论。解决他们的每个反驳点，展示为什么保守立场最终是公司资产最安全的道路。专注于辩论和批评他们的论点，证明低风险策略相对于他们方法的优势。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
+以下是交易员的决策：
+
+{trader_decision}
+
+以下是当前对话历史：{prompt_history} 以下是激进分析师的最后回应：{current_risky_response} 以下是中性分析师的最后回应：{current_neutral_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。"""
 
         logger.info(f"⏱️ [Safe Analyst] 开始调用LLM...")
         llm_start_time = time.time()
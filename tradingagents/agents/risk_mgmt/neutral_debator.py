@@ -3,6 +3,7 @@ import time
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.debate_history import compact_debate_history
 logger = get_logger("default")
 
 
@@ -40,6 +41,10 @@ def create_neutral_debator(llm):
                               len(current_risky_response) + len(current_safe_response))
         logger.info(f"  - 🚨 总Prompt长度: {total_prompt_length:,} 字符 (~{total_prompt_length//4:,} tokens)")
 
+        # 送入 prompt 的历史: 最近几次发言原文 + 早期发言滚动摘要
+        prompt_history = compact_debate_history(history, llm, label=" 中性风险分析师")
+
+        # 角色指令在前，三位辩论者共享的报告和交易员决策居中，本轮对话历史放在最后（前缀稳定）
         prompt = f"""作为中性风险分析师，您的角色是提供平衡的视角，权衡交易员决策或计划的潜在收益和风险。您优先考虑全面的方法，评估上行和下行风险，同时考虑更广泛的市场趋势、潜在的经济变化和多元化策略。
 
 **风险评估要求（必须包含）：**
@@ -47,9 +52,7 @@ def create_neutral_debator(llm):
 2. **集中度风险评估**：评估投资组合集中度风险，在收益与风险之间寻找平衡点，建议合理的仓位配置。
 3. **宏观经济风险评估**：从平衡角度分析宏观经济环境（利率、通胀、政策）对该股票的综合影响，既考虑机遇也考虑风险。
 
-以下是交易员的决策：
-
-{trader_decision}
+通过批判性地分析双方来积极参与，解决激进和保守论点中的弱点，倡导更平衡的方法。挑战他们的每个观点，说明为什么适度风险策略可能提供两全其美的效果，既提供增长潜力又防范极端波动。专注于辩论而不是简单地呈现数据，旨在表明平衡的观点可以带来最可靠的结果。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。
 
 您的任务是挑战激进和安全分析师，指出每种观点可能过于乐观或过于谨慎的地方。使用以下数据来源的见解来支持调整交易员决策的温和、可持续策略：
 
@@ -57,9 +60,12 @@ def create_neutral_debator(llm):
 社交媒体情绪报告：{sentiment_report}
 最新世界事务报告：{news_report}
 公司基本面报告：{fundamentals_report}
-以下是当前对话历史：{history} 以下是激进分析师的最后回应：{current_risky_response} 以下是安全分析师的最后回应：{current_safe_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。
 
-通过批判性地分析双方来积极参与，解决激进和保守论点中的弱点，倡导更平衡的方法。挑战他们的每个观点，说明为什么适度风险策略可能提供两全其美的效果，既提供增长潜力又防范极端波动。专注于辩论而不是简单地呈现数据，旨在表明平衡的观点可以带来最可靠的结果。请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
+以下是交易员的决策：
+
+{trader_decision}
+
+以下是当前对话历史：{prompt_history} 以下是激进分析师的最后回应：{current_risky_response} 以下是安全分析师的最后回应：{current_safe_response}。如果其他观点没有回应，请不要虚构，只需提出您的观点。"""
 
         logger.info(f"⏱️ [Neutral Analyst] 开始调用LLM...")
         llm_start_time = time.time()
@@ -82,6 +82,13 @@ class AgentState(MessagesState):
     china_market_data_structured: Annotated[
         Dict[str, Any], "Parsed China market features (turnover, volume_ratio)"
     ] = {}
+    # 数组原件 (MarketSeries / FundamentalsSnapshot)，指标计算直接使用，不再解析文本
+    market_series: Annotated[
+        Optional[Any], "Array-backed daily OHLCV and indicator series"
+    ] = None
+    fundamentals_snapshot: Annotated[
+        Optional[Any], "Numeric fundamentals snapshot"
+    ] = None
 
     # 数据源和问题跟踪 (从 DataCoordinator 传递)
     data_sources: Annotated[
@@ -5,12 +5,35 @@
 在分析师工作流中集成数据验证功能
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _structured_to_dict(raw_data: str, structured_data: Any = None) -> Optional[Dict[str, Any]]:
+    """
+    取结构化数据的字典视图（MarketSeries.latest() / FundamentalsSnapshot.to_dict()）
+
+    structured_data 未传入时尝试从 StructuredText 中取；都没有时返回 None，
+    由调用方退回文本解析
+    """
+    if structured_data is None:
+        structured_data = getattr(raw_data, 'structured', None)
+    if structured_data is None:
+        return None
+    if isinstance(structured_data, dict):
+        data_dict = dict(structured_data)
+    elif hasattr(structured_data, 'latest'):
+        data_dict = structured_data.latest()
+    elif hasattr(structured_data, 'to_dict'):
+        data_dict = structured_data.to_dict()
+    else:
+        return None
+    data_dict.setdefault('source', 'analyst_data')
+    return data_dict
+
+
 def parse_data_string_to_dict(data_str: str) -> Dict[str, Any]:
     """
     将数据字符串解析为字典
@@ -166,7 +189,8 @@ def format_validation_result_to_report(
 def add_data_validation_to_market_report(
     ticker: str,
     raw_data: str,
-    validation_enabled: bool = True
+    validation_enabled: bool = True,
+    structured_data: Any = None
 ) -> str:
     """
     为市场分析报告添加数据验证信息（真实执行验证）
@@ -175,6 +199,7 @@ def add_data_validation_to_market_report(
         ticker: 股票代码
         raw_data: 原始市场数据字符串
         validation_enabled: 是否启用验证
+        structured_data: 结构化数据（可选，提供时直接验证数值，不再解析文本）
 
     Returns:
         str: 添加了验证信息的报告
@@ -187,8 +212,10 @@ def add_data_validation_to_market_report(
         from tradingagents.dataflows.validators.price_validator import PriceValidator
         from tradingagents.dataflows.validators.volume_validator import VolumeValidator
 
-        # 解析数据
-        data_dict = parse_data_string_to_dict(raw_data)
+        # 优先使用结构化数据，只有纯文本时才解析
+        data_dict = _structured_to_dict(raw_data, structured_data)
+        if data_dict is None:
+            data_dict = parse_data_string_to_dict(raw_data)
 
         if not data_dict:
             logger.warning(f"市场数据解析失败，跳过验证")
@@ -247,7 +274,8 @@ def add_data_validation_to_market_report(
 def add_data_validation_to_fundamentals_report(
     ticker: str,
     raw_data: str,
-    validation_enabled: bool = True
+    validation_enabled: bool = True,
+    structured_data: Any = None
 ) -> str:
     """
     为基本面分析报告添加数据验证信息（真实执行验证）
@@ -256,6 +284,7 @@ def add_data_validation_to_fundamentals_report(
         ticker: 股票代码
         raw_data: 原始基本面数据字符串
         validation_enabled: 是否启用验证
+        structured_data: 结构化数据（可选，提供时直接验证数值，不再解析文本）
 
     Returns:
         str: 添加了验证信息的报告
@@ -267,8 +296,10 @@ def add_data_validation_to_fundamentals_report(
         # 导入验证器和标准化器
         from tradingagents.dataflows.validators.fundamentals_validator import FundamentalsValidator
 
-        # 解析数据
-        data_dict = parse_data_string_to_dict(raw_data)
+        # 优先使用结构化数据，只有纯文本时才解析
+        data_dict = _structured_to_dict(raw_data, structured_data)
+        if data_dict is None:
+            data_dict = parse_data_string_to_dict(raw_data)
 
         if not data_dict:
             logger.warning(f"基本面数据解析失败，跳过验证")
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+辩论历史滚动摘要
+
+多空研究员和风险辩论者每次发言都把完整的 history 重新放进 prompt，
+辩论轮次超过 2 轮后 prompt token 随轮次平方增长。本模块只改变送进 prompt
+的历史视图（状态中的完整 history 不变，供裁判和报告使用）：
+
+- 最近 K 次发言原文保留
+- 更早的发言折叠进滚动摘要，由调用方的快速模型生成；摘要按
+  hash(已折叠发言) 链式缓存，同一场辩论的下一位发言者直接命中，
+  每轮最多只需增量摘要新折叠的发言
+- 每次组装后的历史有硬性 token 上限，超出时先压缩摘要再截断最早的原文
+- 统计压缩前后 token 数、摘要调用与缓存命中次数
+
+环境变量：
+- DEBATE_HISTORY_COMPACT_ENABLED: 是否启用（默认 true）
+- DEBATE_HISTORY_RECENT_TURNS: 原文保留的发言次数（默认 4）
+- DEBATE_HISTORY_MAX_TOKENS: 每轮历史的 token 上限（默认 3000）
+- DEBATE_SUMMARY_MAX_TOKENS: 摘要的 token 上限（默认 600）
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.prompt_serializer import count_tokens, truncate_to_tokens
+
+logger = get_logger("agents.utils.debate_history")
+
+# 每次发言以 "xxx Analyst: " 开头（Bull/Bear/Risky/Safe/Neutral 及中文描述）
+_TURN_SPLIT_RE = re.compile(r"\n(?=[^\n:：]{1,20} Analyst: )")
+
+_SUMMARY_PROMPT = """请将以下辩论发言压缩为要点摘要，供后续发言者参考。
+
+要求：
+1. 按发言方归纳核心论点，保留引用的关键数据（价格、估值、技术指标、财务数值）
+2. 保留尚未被回应的质疑和双方的主要分歧
+3. 不添加原文没有的内容，不做评价
+4. 使用中文，不超过{max_chars}字
+
+{previous}需要压缩的发言：
+{turns}"""
+
+
+def split_turns(history: str) -> List[str]:
+    """把辩论历史拆分为单次发言列表"""
+    if not history:
+        return []
+    return [turn.strip() for turn in _TURN_SPLIT_RE.split(history) if turn.strip()]
+
+
+def _chain_key(previous: str, turn: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(previous.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(turn.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DebateHistoryManager:
+    """辩论历史压缩器（线程安全）"""
+
+    def __init__(
+        self,
+        recent_turns: int = 4,
+        max_tokens: int = 3000,
+        summary_max_tokens: int = 600,
+        enabled: bool = True,
+        max_entries: int = 256,
+    ):
+        self.recent_turns = max(1, recent_turns)
+        self.max_tokens = max(200, max_tokens)
+        self.summary_max_tokens = max(50, min(summary_max_tokens, self.max_tokens // 2))
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+
+        self._lock = threading.Lock()
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self.stats = {
+            "calls": 0,
+            "compacted": 0,
+            "summaries_generated": 0,
+            "summary_cache_hits": 0,
+            "summary_failures": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+        }
+
+    # ===== 摘要缓存 =====
+
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is not None:
+                self._summaries.move_to_end(key)
+            return summary
+
+    def _cache_put(self, key: str, summary: str) -> None:
+        with self._lock:
+            self._summaries[key] = summary
+            self._summaries.move_to_end(key)
+            while len(self._summaries) > self.max_entries:
+                self._summaries.popitem(last=False)
+
+    def _count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[name] += value
+
+    # ===== 摘要 =====
+
+    def _running_summary(self, turns: List[str], llm: Any) -> str:
+        """
+        获取 turns 的滚动摘要
+
+        从最长的已缓存前缀继续，只把新折叠的发言交给模型增量摘要。
+        """
+        keys = []
+        key = ""
+        for turn in turns:
+            key = _chain_key(key, turn)
+            keys.append(key)
+
+        start = 0
+        previous = ""
+        for i in range(len(keys) - 1, -1, -1):
+            cached = self._cache_get(keys[i])
+            if cached is not None:
+                start, previous = i + 1, cached
+                break
+
+        if start == len(turns):
+            self._count("summary_cache_hits")
+            return previous
+
+        summary = self._summarize(previous, turns[start:], llm)
+        if summary is None:
+            return self._fallback_summary(previous, turns[start:])
+
+        self._count("summaries_generated")
+        self._cache_put(keys[-1], summary)
+        return summary
+
+    def _summarize(self, previous: str, turns: List[str], llm: Any) -> Optional[str]:
+        if llm is None:
+            return None
+        prompt = _SUMMARY_PROMPT.format(
+            max_chars=self.summary_max_tokens,
+            previous=f"已有摘要：\n{previous}\n\n" if previous else "",
+            turns="\n\n".join(turns),
+        )
+        try:
+            response = llm.invoke(prompt)
+            content = getattr(response, "content", response)
+            summary = str(content).strip()
+        except Exception as e:
+            self._count("summary_failures")
+            logger.warning(f"⚠️ [辩论历史] 摘要生成失败，使用截断摘要: {e}")
+            return None
+        if not summary:
+            self._count("summary_failures")
+            return None
+        return truncate_to_tokens(summary, self.summary_max_tokens)
+
+    def _fallback_summary(self, previous: str, turns: List[str]) -> str:
+        """模型不可用时按发言均分预算截取开头（不缓存，下一轮重试模型摘要）"""
+        parts = [previous] if previous else []
+        share = max(30, self.summary_max_tokens // (len(turns) + bool(previous)))
+        parts += [truncate_to_tokens(turn, share) for turn in turns]
+        return truncate_to_tokens("\n".join(parts), self.summary_max_tokens)
+
+    # ===== 组装 =====
+
+    def compact(self, history: str, llm: Any = None, label: str = "") -> str:
+        """
+        返回送入 prompt 的辩论历史视图
+
+        Args:
+            history: 完整辩论历史
+            llm: 用于生成摘要的模型（通常是快速模型）
+            label: 日志标识
+
+        Returns:
+            最近 K 次发言原文 + 早期发言摘要，总量不超过 max_tokens
+        """
+        if not self.enabled or not history:
+            return history
+
+        tokens_before = count_tokens(history)
+        turns = split_turns(history)
+        if len(turns) <= self.recent_turns and tokens_before <= self.max_tokens:
+            self._record(tokens_before, tokens_before)
+            return history
+
+        older = turns[: -self.recent_turns] if len(turns) > self.recent_turns else []
+        recent = turns[-self.recent_turns :]
+
+        summary_block = ""
+        if older:
+            summary = self._running_summary(older, llm)
+            summary_block = f"【早期辩论摘要（前{len(older)}次发言）】\n{summary}\n\n【最近发言】\n"
+
+        budget = self.max_tokens - count_tokens(summary_block)
+        kept: List[str] = []
+        for turn in reversed(recent):
+            tokens = count_tokens(turn) + 1
+            if tokens <= budget:
+                kept.insert(0, turn)
+                budget -= tokens
+                continue
+            if budget > 50 or not kept:
+                kept.insert(0, truncate_to_tokens(turn, max(budget, 50)))
+            break
+
+        result = summary_block + "\n".join(kept)
+        tokens_after = count_tokens(result)
+        self._record(tokens_before, tokens_after)
+        logger.info(
+            f"🗜️ [辩论历史]{label} {len(turns)}次发言: {tokens_before} → {tokens_after} tokens "
+            f"(原文 {len(kept)} 次, 摘要 {len(older)} 次)"
+        )
+        return result
+
+    def _record(self, tokens_before: int, tokens_after: int) -> None:
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["tokens_before"] += tokens_before
+            self.stats["tokens_after"] += tokens_after
+            if tokens_after < tokens_before:
+                self.stats["compacted"] += 1
+
+    def clear(self) -> None:
+        """清空摘要缓存"""
+        with self._lock:
+            self._summaries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["cached_summaries"] = len(self._summaries)
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+        return stats
+
+
+_history_manager: Optional[DebateHistoryManager] = None
+_history_manager_lock = threading.Lock()
+
+
+def get_debate_history_manager() -> DebateHistoryManager:
+    """获取进程级辩论历史压缩器单例"""
+    global _history_manager
+    if _history_manager is None:
+        with _history_manager_lock:
+            if _history_manager is None:
+                _history_manager = DebateHistoryManager(
+                    recent_turns=int(os.getenv("DEBATE_HISTORY_RECENT_TURNS", "4")),
+                    max_tokens=int(os.getenv("DEBATE_HISTORY_MAX_TOKENS", "3000")),
+                    summary_max_tokens=int(os.getenv("DEBATE_SUMMARY_MAX_TOKENS", "600")),
+                    enabled=os.getenv("DEBATE_HISTORY_COMPACT_ENABLED", "true").lower()
+                    == "true",
+                )
+    return _history_manager
+
+
+def compact_debate_history(history: str, llm: Any = None, label: str = "") -> str:
+    """使用进程级压缩器返回送入 prompt 的辩论历史"""
+    return get_debate_history_manager().compact(history, llm, label)
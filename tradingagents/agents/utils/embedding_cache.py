@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+进程级向量缓存
+
+一次分析中多头/空头研究员、研究经理、交易员、风险经理都会对几乎相同的
+分析师报告调用 get_memories()，每次都要远程请求 embedding。本模块按
+hash(模型 + 规范化文本) 缓存向量：
+
+- 内存 LRU 层：命中时直接返回，微秒级
+- 可选磁盘层：EMBEDDING_CACHE_DIR 设置后启用，进程重启后仍可复用
+- 并发合并：多个线程同时请求同一文本时只发起一次远程调用
+
+环境变量：
+- EMBEDDING_CACHE_ENABLED: 是否启用（默认 true）
+- EMBEDDING_CACHE_MAX_ENTRIES: 内存层最大条数（默认 2048）
+- EMBEDDING_CACHE_DIR: 磁盘层目录（默认不启用）
+"""
+
+import hashlib
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("agents.utils.embedding_cache")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：去除首尾空白并合并连续空白"""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def make_cache_key(model: str, text: str) -> str:
+    """生成缓存键：sha256(模型 + 规范化文本)"""
+    digest = hashlib.sha256()
+    digest.update(model.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _is_zero_vector(vector: List[float]) -> bool:
+    return not vector or not any(vector)
+
+
+class EmbeddingCache:
+    """向量缓存（线程安全）"""
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        cache_dir: Optional[str] = None,
+        enabled: bool = True,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.stats = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+        }
+
+        if self.cache_dir is not None:
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"⚠️ 向量磁盘缓存目录不可用，仅使用内存缓存: {e}")
+                self.cache_dir = None
+
+    # ===== 内存层 =====
+
+    def _memory_get(self, key: str) -> Optional[List[float]]:
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+        return vector
+
+    def _memory_put(self, key: str, vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    # ===== 磁盘层 =====
+
+    def _disk_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.bin"
+
+    def _disk_get(self, key: str) -> Optional[List[float]]:
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.debug(f"读取向量磁盘缓存失败: {e}")
+            return None
+        values = array("d")
+        values.frombytes(data)
+        return values.tolist()
+
+    def _disk_put(self, key: str, vector: List[float]) -> None:
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.write_bytes(array("d", vector).tobytes())
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.debug(f"写入向量磁盘缓存失败: {e}")
+
+    # ===== 对外接口 =====
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """只查缓存（内存层 + 磁盘层），不触发计算"""
+        key = make_cache_key(model, text)
+        with self._lock:
+            vector = self._memory_get(key)
+            if vector is not None:
+                self.stats["hits"] += 1
+                return vector
+
+        vector = self._disk_get(key)
+        if vector is not None:
+            with self._lock:
+                self.stats["disk_hits"] += 1
+                self._memory_put(key, vector)
+        return vector
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        """写入缓存（零向量表示失败/降级，不缓存）"""
+        if not self.enabled or _is_zero_vector(vector):
+            return
+        key = make_cache_key(model, text)
+        with self._lock:
+            self._memory_put(key, vector)
+        self._disk_put(key, vector)
+
+    def get_or_compute(
+        self,
+        model: str,
+        text: str,
+        compute: Callable[[str], List[float]],
+    ) -> List[float]:
+        """
+        获取向量，未命中时调用 compute(text) 计算
+
+        同一键的并发请求只有第一个线程真正计算，其余线程等待其结果。
+        返回的列表为缓存共享对象，调用方不应修改。
+        """
+        if not self.enabled:
+            return compute(text)
+
+        key = make_cache_key(model, text)
+        with self._lock:
+            vector = self._memory_get(key)
+            if vector is not None:
+                self.stats["hits"] += 1
+                return vector
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+                owner = False
+            else:
+                future = Future()
+                self._inflight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            vector = self._disk_get(key)
+            if vector is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                    self._memory_put(key, vector)
+            else:
+                with self._lock:
+                    self.stats["misses"] += 1
+                vector = compute(text)
+                if not _is_zero_vector(vector):
+                    with self._lock:
+                        self._memory_put(key, vector)
+                    self._disk_put(key, vector)
+            future.set_result(vector)
+            return vector
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def clear(self) -> None:
+        """清空内存层（磁盘层保留）"""
+        with self._lock:
+            self._memory.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["entries"] = len(self._memory)
+        stats["disk_enabled"] = self.cache_dir is not None
+        return stats
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """获取进程级向量缓存单例"""
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "2048")),
+                    cache_dir=os.getenv("EMBEDDING_CACHE_DIR") or None,
+                    enabled=os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower()
+                    == "true",
+                )
+    return _embedding_cache
@@ -4,10 +4,16 @@ from chromadb.config import Settings
 from openai import OpenAI
 import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.agents.utils.embedding_cache import (
+    get_embedding_cache,
+    make_cache_key,
+)
 
 logger = get_logger("agents.utils.memory")
 
@@ -446,8 +452,21 @@ class FinancialSituationMemory:
             truncated, _ = self._smart_text_truncation(text, max_length)
             return truncated
 
+    def _embedding_cache_model(self):
+        """向量缓存使用的模型标识（提供商 + 模型名）"""
+        return f"{self.llm_provider}:{getattr(self, 'embedding', '')}"
+
     def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
+        """Get embedding for a text using the configured provider (process-wide cached)"""
+        if self.client == "DISABLED" or not text or not isinstance(text, str):
+            return self._compute_embedding(text)
+
+        return get_embedding_cache().get_or_compute(
+            self._embedding_cache_model(), text, self._compute_embedding
+        )
+
+    def _compute_embedding(self, text):
+        """调用嵌入服务计算向量（不经过缓存）"""
 
         # 检查记忆功能是否被禁用
         if self.client == "DISABLED":
@@ -692,6 +711,137 @@ class FinancialSituationMemory:
                 logger.warning(f"⚠️ 记忆功能降级，返回空向量")
                 return [0.0] * 1024
 
+    def _uses_dashscope_embedding(self):
+        """是否走阿里百炼嵌入接口（与 _compute_embedding 的分支条件一致）"""
+        return (
+            self.llm_provider in ("dashscope", "alibaba", "qianfan")
+            or (
+                self.llm_provider in ("google", "deepseek", "openrouter")
+                and self.client is None
+            )
+        )
+
+    def _embedding_batch_size(self):
+        """单次请求的最大文本条数（DashScope text-embedding-v3 上限 10 条）"""
+        default = 10 if self._uses_dashscope_embedding() else 64
+        return max(1, int(os.getenv("EMBEDDING_BATCH_SIZE", str(default))))
+
+    def _embed_batch(self, texts):
+        """
+        一次请求计算多条文本的向量
+
+        Returns:
+            与 texts 等长的列表，缺失的位置为 None
+        """
+        vectors = [None] * len(texts)
+        if self._uses_dashscope_embedding():
+            from dashscope import TextEmbedding
+
+            response = TextEmbedding.call(model=self.embedding, input=texts)
+            if response.status_code != 200:
+                raise RuntimeError(f"{response.code} - {response.message}")
+            for i, item in enumerate(response.output["embeddings"]):
+                vectors[item.get("text_index", i)] = item["embedding"]
+        else:
+            response = self.client.embeddings.create(model=self.embedding, input=texts)
+            for i, item in enumerate(response.data):
+                index = getattr(item, "index", None)
+                vectors[i if index is None else index] = item.embedding
+        return vectors
+
+    def _embed_chunk_with_retry(self, texts, max_retries=3):
+        """带重试的分块请求，只重试失败的条目"""
+        vectors = [None] * len(texts)
+        pending = list(range(len(texts)))
+        for attempt in range(max_retries):
+            try:
+                results = self._embed_batch([texts[i] for i in pending])
+                for i, vector in zip(pending, results):
+                    vectors[i] = vector
+            except Exception as e:
+                logger.warning(
+                    f"⚠️ 批量embedding失败({len(pending)}条, 第{attempt + 1}/{max_retries}次): {e}"
+                )
+            pending = [i for i in pending if vectors[i] is None]
+            if not pending:
+                break
+            if attempt < max_retries - 1:
+                time.sleep(min(0.5 * (2**attempt), 4.0))
+        return vectors
+
+    def get_embeddings(self, texts):
+        """
+        批量获取向量
+
+        先查进程级缓存；未命中的文本按服务商上限分块，多个分块并发请求
+        （EMBEDDING_BATCH_CONCURRENCY，默认 4），失败条目重试后再逐条降级。
+        超长或无效文本直接走 get_embedding 的单条处理逻辑（截断/跳过）。
+        """
+        if self.client == "DISABLED":
+            return [self._compute_embedding(text) for text in texts]
+
+        cache = get_embedding_cache()
+        model = self._embedding_cache_model()
+        results = [None] * len(texts)
+
+        # 1. 缓存命中 + 去重
+        to_fetch = {}  # 规范化键 -> 文本下标列表
+        single = []
+        batch_limit = 8000 if self._uses_dashscope_embedding() else None
+        for i, text in enumerate(texts):
+            if not text or not isinstance(text, str):
+                single.append(i)
+                continue
+            cached = cache.get(model, text)
+            if cached is not None:
+                results[i] = cached
+                continue
+            too_long = (
+                self.enable_embedding_length_check
+                and len(text) > self.max_embedding_length
+            ) or (batch_limit is not None and len(text) > batch_limit)
+            if too_long:
+                single.append(i)
+                continue
+            to_fetch.setdefault(make_cache_key(model, text), []).append(i)
+
+        # 2. 分块并发请求
+        unique = [indices[0] for indices in to_fetch.values()]
+        if unique:
+            batch_size = self._embedding_batch_size()
+            chunks = [unique[k : k + batch_size] for k in range(0, len(unique), batch_size)]
+            concurrency = max(1, int(os.getenv("EMBEDDING_BATCH_CONCURRENCY", "4")))
+            start = time.time()
+
+            def run_chunk(chunk):
+                return chunk, self._embed_chunk_with_retry([texts[i] for i in chunk])
+
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(chunks))) as pool:
+                for chunk, vectors in pool.map(run_chunk, chunks):
+                    for i, vector in zip(chunk, vectors):
+                        if vector is None:
+                            single.append(i)
+                            continue
+                        cache.put(model, texts[i], vector)
+                        results[i] = vector
+
+            logger.info(
+                f"📦 批量embedding完成: {len(unique)}条文本, {len(chunks)}个请求, "
+                f"耗时{time.time() - start:.2f}s"
+            )
+
+        # 3. 单条处理（超长文本、批量失败的条目）
+        for i in single:
+            results[i] = self.get_embedding(texts[i])
+
+        # 4. 重复文本复用同一向量
+        for indices in to_fetch.values():
+            for i in indices[1:]:
+                if results[i] is None:
+                    results[i] = results[indices[0]]
+
+        return results
+
     def get_embedding_config_status(self):
         """获取向量缓存配置状态"""
         return {
@@ -712,7 +862,6 @@ class FinancialSituationMemory:
         situations = []
         advice = []
         ids = []
-        embeddings = []
 
         offset = self.situation_collection.count()
 
@@ -720,7 +869,8 @@ class FinancialSituationMemory:
             situations.append(situation)
             advice.append(recommendation)
             ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+
+        embeddings = self.get_embeddings(situations)
 
         self.situation_collection.add(
             documents=situations,
@@ -813,6 +963,8 @@ class FinancialSituationMemory:
             "provider": self.llm_provider,
         }
 
+        info["embedding_cache"] = get_embedding_cache().get_stats()
+
         # 添加最后一次文本处理信息
         if hasattr(self, "_last_text_info"):
             info["last_text_processing"] = self._last_text_info
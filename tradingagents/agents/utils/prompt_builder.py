@@ -50,20 +50,23 @@ class PromptBuilder:
         # 格式化其他回应
         other_responses_text = self._format_other_responses(current_responses)
 
-        # 构建prompt
+        # 构建prompt：角色指令在前，三位辩论者共享的报告和交易员决策居中，
+        # 本轮易变的对话历史放在最后，保持前缀稳定以命中提示词缓存
         prompt = f"""作为{description}，您的职责是{goal}。
 
-在评估{trader_decision}时，请重点关注{focus}——即使这些伴随着较高的风险。
+在评估交易员的决策时，请重点关注{focus}——即使这些伴随着较高的风险。
 
 使用提供的市场数据和情绪分析来加强您的论点，并挑战对立观点。
 
 具体来说，请直接回应保守和中性分析师提出的每个观点，用数据驱动的反驳和有说服力的推理进行反击。
 
-以下是交易员的决策：
-{trader_decision}
-
 您的任务是通过质疑和批评保守和中性立场来为交易员的决策创建一个令人信服的案例，证明为什么您的高回报视角提供了最佳的前进道路。
 
+积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。
+专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。
+
+请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。
+
 将以下来源的见解纳入您的论点：
 市场研究报告：{reports["market"]}
 社交媒体情绪报告：{reports["sentiment"]}
@@ -80,15 +83,13 @@ class PromptBuilder:
 """
 
         prompt += f"""
+以下是交易员的决策：
+{trader_decision}
+
 以下是当前对话历史：
 {history_text}
 
-{other_responses_text}
-
-积极参与，解决提出的任何具体担忧，反驳他们逻辑中的弱点，并断言承担风险的好处以超越市场常规。
-专注于辩论和说服，而不仅仅是呈现数据。挑战每个反驳点，强调为什么高风险方法是最优的。
-
-请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
+{other_responses_text}"""
         return prompt
 
     def build_researcher_prompt(
@@ -5,6 +5,7 @@ from langchain_core.tools import tool
 
 from tradingagents.default_config import DEFAULT_CONFIG
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.run_context import get_run_config, update_run_config
 from tradingagents.utils.tool_logging import log_tool_call
 
 # 导入各功能模块的静态方法
@@ -56,17 +57,27 @@ class Toolkit:
     保持向后兼容性，原有代码可以继续使用 Toolkit.xxx() 的方式调用。
     """
 
+    # 进程级默认配置；propagate 期间优先使用运行级配置（见 run_context）
     _config = DEFAULT_CONFIG.copy()
 
+    @classmethod
+    def get_config(cls):
+        """获取当前生效的配置：运行中返回本次运行的配置，否则返回类级默认配置"""
+        run_config = get_run_config()
+        if run_config is not None:
+            return run_config
+        return cls._config
+
     @classmethod
     def update_config(cls, config):
-        """Update the class-level configuration."""
-        cls._config.update(config)
+        """更新配置：运行中只修改本次运行的配置，否则修改类级默认配置"""
+        if not update_run_config(config):
+            cls._config.update(config)
 
     @property
     def config(self):
         """Access the configuration."""
-        return self._config
+        return self.get_config()
 
     def __init__(self, config=None):
         if config:
@@ -270,7 +281,7 @@ class Toolkit:
         curr_date: Annotated[str, "当前日期，格式：YYYY-MM-DD"] = None,
     ) -> str:
         """获取股票完整标准化财务数据"""
-        return get_stock_comprehensive_financials(ticker, curr_date, Toolkit._config)
+        return get_stock_comprehensive_financials(ticker, curr_date, Toolkit.get_config())
 
     @staticmethod
     @tool
@@ -283,7 +294,7 @@ class Toolkit:
     ) -> str:
         """统一的股票基本面分析工具"""
         return get_stock_fundamentals_unified(
-            ticker, start_date, end_date, curr_date, Toolkit._config
+            ticker, start_date, end_date, curr_date, Toolkit.get_config()
         )
 
     @staticmethod
@@ -192,7 +192,13 @@ def get_stock_fundamentals_unified(
         if not end_date:
             end_date = curr_date
 
+        from tradingagents.dataflows.schemas.market_series import (
+            StructuredText,
+            get_structured,
+        )
+
         result_data = []
+        fundamentals_snapshot = None
 
         if is_china:
             # 中国A股：基本面分析优化策略
@@ -260,6 +266,12 @@ def get_stock_fundamentals_unified(
                 )
 
                 result_data.append(f"## A股基本面财务数据\n{fundamentals_data}")
+
+                # 结构化数值直接交给验证器和下游，不再从拼接后的文本中解析
+                fundamentals_snapshot = get_structured(fundamentals_data)
+                series = get_structured(current_price_data)
+                if fundamentals_snapshot is not None and series is not None and len(series):
+                    fundamentals_snapshot.current_price = series.latest_price
             except Exception as e:
                 logger.error(f"❌ [基本面工具调试] A股基本面数据获取失败: {e}")
                 result_data.append(f"## A股基本面财务数据\n获取失败: {e}")
@@ -373,12 +385,14 @@ def get_stock_fundamentals_unified(
             )
 
             combined_result = add_data_validation_to_fundamentals_report(
-                ticker, combined_result
+                ticker, combined_result, structured_data=fundamentals_snapshot
             )
             logger.info(f"✅ [统一基本面工具] {ticker} 数据验证已完成")
         except Exception as e:
             logger.warning(f"⚠️ [统一基本面工具] 数据验证失败: {e}")
 
+        if fundamentals_snapshot is not None:
+            return StructuredText(combined_result, fundamentals_snapshot)
         return combined_result
 
     except Exception as e:
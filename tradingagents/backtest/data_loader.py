@@ -8,7 +8,6 @@
 数据源优先级：MongoDB缓存 → Tushare → AKShare → BaoStock
 """
 
-import asyncio
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional, Any, Tuple
 
@@ -347,12 +346,7 @@ class BacktestDataLoader:
 
     @staticmethod
     def _run_async(coro):
-        """安全运行异步协程"""
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            return asyncio.run(coro)
+        """在进程级后台事件循环中运行异步协程"""
+        from tradingagents.utils.async_bridge import run_async
 
-        import concurrent.futures
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
-            return pool.submit(asyncio.run, coro).result()
+        return run_async(coro)
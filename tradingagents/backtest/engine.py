@@ -25,6 +25,7 @@ from .portfolio import Portfolio
 from .constraints import AStockConstraints
 from .cost import TransactionCost, MarketImpactCalculator
 from .metrics import PerformanceMetrics
+from tradingagents.utils.exchange_calendar import get_exchange_calendar
 from tradingagents.utils.logging_init import get_logger
 
 logger = get_logger("backtest.engine")
@@ -175,7 +176,14 @@ class BacktestEngine:
                 all_dates.update(dates)
 
         trading_dates = sorted(all_dates)
-        return trading_dates
+        if not trading_dates:
+            return trading_dates
+
+        # 按交易所日历剔除非交易日（数据源在节假日补出的行）
+        mask = get_exchange_calendar("CN").is_session(trading_dates)
+        if not mask.all():
+            logger.warning(f"⚠️ 剔除 {int((~mask).sum())} 个非交易日的数据")
+        return [d for d, keep in zip(trading_dates, mask) if keep]
 
     def _process_trading_day(self, trade_date: date, current: int, total: int):
         """
@@ -478,6 +478,7 @@ class ConfigManager:
         output_tokens: int,
         session_id: str,
         analysis_type: str = "stock_analysis",
+        cached_tokens: int = 0,
     ):
         """添加使用记录"""
         # 计算成本
@@ -493,6 +494,7 @@ class ConfigManager:
             currency="CNY",
             session_id=session_id,
             analysis_type=analysis_type,
+            cached_tokens=cached_tokens,
         )
 
         # 🔍 详细日志：记录保存位置
@@ -715,6 +717,7 @@ class ConfigManager:
         total_cost = sum(record.cost for record in recent_records)
         total_input_tokens = sum(record.input_tokens for record in recent_records)
         total_output_tokens = sum(record.output_tokens for record in recent_records)
+        total_cached_tokens = sum(record.cached_tokens for record in recent_records)
 
         # 按供应商统计
         provider_stats = {}
@@ -736,6 +739,10 @@ class ConfigManager:
             "total_cost": round(total_cost, 4),
             "total_input_tokens": total_input_tokens,
             "total_output_tokens": total_output_tokens,
+            "total_cached_tokens": total_cached_tokens,
+            "cache_hit_rate": round(total_cached_tokens / total_input_tokens, 4)
+            if total_input_tokens
+            else 0.0,
             "total_requests": len(recent_records),
             "provider_stats": provider_stats,
             "records_count": len(recent_records),
@@ -832,8 +839,9 @@ class TokenTracker:
         output_tokens: int,
         session_id: str = None,
         analysis_type: str = "stock_analysis",
+        cached_tokens: int = 0,
     ):
-        """跟踪Token使用"""
+        """跟踪Token使用（cached_tokens 为命中供应商提示词缓存的输入token数）"""
         if session_id is None:
             session_id = f"session_{datetime.now(ZoneInfo(get_timezone_name())).strftime('%Y%m%d_%H%M%S')}"
 
@@ -852,6 +860,7 @@ class TokenTracker:
             output_tokens=output_tokens,
             session_id=session_id,
             analysis_type=analysis_type,
+            cached_tokens=cached_tokens,
         )
 
         # 检查成本警告
@@ -229,6 +229,9 @@ class MongoDBStorage:
                         "total_cost": {"$sum": "$cost"},
                         "total_input_tokens": {"$sum": "$input_tokens"},
                         "total_output_tokens": {"$sum": "$output_tokens"},
+                        "total_cached_tokens": {
+                            "$sum": {"$ifNull": ["$cached_tokens", 0]}
+                        },
                         "total_requests": {"$sum": 1},
                     }
                 },
@@ -238,11 +241,17 @@ class MongoDBStorage:
 
             if result:
                 stats = result[0]
+                input_tokens = stats.get("total_input_tokens", 0)
+                cached_tokens = stats.get("total_cached_tokens", 0)
                 return {
                     "period_days": days,
                     "total_cost": round(stats.get("total_cost", 0), 4),
-                    "total_input_tokens": stats.get("total_input_tokens", 0),
+                    "total_input_tokens": input_tokens,
                     "total_output_tokens": stats.get("total_output_tokens", 0),
+                    "total_cached_tokens": cached_tokens,
+                    "cache_hit_rate": round(cached_tokens / input_tokens, 4)
+                    if input_tokens
+                    else 0.0,
                     "total_requests": stats.get("total_requests", 0),
                 }
             else:
@@ -21,6 +21,7 @@ class UsageRecord:
     currency: str = "CNY"  # 货币单位
     session_id: str = ""  # 会话ID
     analysis_type: str = "stock_analysis"  # 分析类型
+    cached_tokens: int = 0  # 命中供应商提示词缓存的输入token数（已包含在 input_tokens 中）
 
 
 @dataclass
@@ -113,11 +113,11 @@ class BaseDataLoader(ABC):
         """
         try:
             from tradingagents.agents.utils.agent_utils import Toolkit
-            date_val = Toolkit._config.get("analysis_date")
+            date_val = Toolkit.get_config().get("analysis_date")
             if date_val and isinstance(date_val, str):
                 return date_val
         except Exception as e:
-            logger.debug(f"无法从Toolkit._config获取analysis_date: {e}")
+            logger.debug(f"无法从Toolkit运行配置获取analysis_date: {e}")
         return ""
 
     def _try_get_old_cache(self, symbol: str, data_type: str = "stock_data") -> Optional[str]:
@@ -15,6 +15,7 @@ from ..parsers.symbol_parser import (
     get_special_stock_info,
 )
 from ..parsers.data_validator import check_data_quality, format_number_yi
+from ..schemas.market_series import FundamentalsSnapshot, StructuredText
 from tradingagents.config.runtime_settings import get_timezone_name
 
 
@@ -128,20 +129,24 @@ class FundamentalsLoader(BaseDataLoader):
 
             # 计算财务比率
             roe = "N/A"
+            roe_value = None
             if (
                 isinstance(net_profit, (int, float))
                 and isinstance(total_equity, (int, float))
                 and total_equity != 0
             ):
-                roe = f"{(net_profit / total_equity * 100):.2f}%"
+                roe_value = net_profit / total_equity * 100
+                roe = f"{roe_value:.2f}%"
 
             roa = "N/A"
+            roa_value = None
             if (
                 isinstance(net_profit, (int, float))
                 and isinstance(total_assets, (int, float))
                 and total_assets != 0
             ):
-                roa = f"{(net_profit / total_assets * 100):.2f}%"
+                roa_value = net_profit / total_assets * 100
+                roa = f"{roa_value:.2f}%"
 
             fundamentals_report = f"""
 # {symbol} 基本面数据分析
@@ -162,7 +167,14 @@ class FundamentalsLoader(BaseDataLoader):
 - 更新时间: {self._get_current_time()}
 - 数据类型: 同步财务数据
 """
-            return fundamentals_report.strip()
+            snapshot = FundamentalsSnapshot(
+                symbol=symbol,
+                ROE=roe_value,
+                ROA=roa_value,
+                revenue=(revenue / 1e8) if isinstance(revenue, (int, float)) else None,
+                source="mongodb",
+            )
+            return StructuredText(fundamentals_report.strip(), snapshot)
 
         except Exception as e:
             logger.warning(f"⚠️ 格式化财务数据失败: {e}")
@@ -195,11 +207,15 @@ class FundamentalsLoader(BaseDataLoader):
 
             # 根据分析模块级别生成报告
             if analysis_modules == "basic":
-                return self._generate_basic_report(symbol, industry_info, financial_metrics, data_quality)
+                report = self._generate_basic_report(symbol, industry_info, financial_metrics, data_quality)
             elif analysis_modules in ["standard", "full"]:
-                return self._generate_standard_report(symbol, industry_info, financial_metrics, data_quality)
+                report = self._generate_standard_report(symbol, industry_info, financial_metrics, data_quality)
             else:
-                return self._generate_detailed_report(symbol, industry_info, financial_metrics, data_quality)
+                report = self._generate_detailed_report(symbol, industry_info, financial_metrics, data_quality)
+
+            # 携带数值快照，下游无需再从报告文本中解析指标
+            snapshot = FundamentalsSnapshot.from_metrics(symbol, financial_metrics, source="tushare")
+            return StructuredText(report, snapshot)
 
         except Exception as e:
             logger.error(f"❌ 生成基本面报告失败: {e}")
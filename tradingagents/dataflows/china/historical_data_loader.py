@@ -72,7 +72,18 @@ class HistoricalDataLoader(BaseDataLoader):
                 logger.info(
                     f"📊 [数据来源: MongoDB] 使用MongoDB历史数据: {symbol} ({len(df)}条记录)"
                 )
-                return df.to_string()
+                # 与 API 路径一致：计算技术指标并携带结构化序列，
+                # 不再输出 df.to_string() 让下游重新解析
+                from ..data_source_manager import get_data_source_manager
+
+                stock_name = f"股票{symbol}"
+                if "name" in df.columns and not df["name"].empty:
+                    stock_name = df["name"].iloc[0]
+                formatted = get_data_source_manager().format_stock_data(
+                    df, symbol, stock_name, start_date, end_date
+                )
+                if formatted and "❌" not in formatted:
+                    return formatted
         except Exception as e:
             logger.debug(f"从MongoDB获取数据失败: {e}")
 
@@ -4,9 +4,10 @@
 提供A股实时行情数据加载功能
 """
 
-import asyncio
 from typing import Optional, Dict, Any, List
 
+from tradingagents.utils.async_bridge import run_async
+
 from .base_data_loader import BaseDataLoader, logger
 
 
@@ -100,16 +101,8 @@ class RealtimeDataLoader(BaseDataLoader):
             if not provider or not provider.connected:
                 return None
 
-            # 使用异步方法获取
-            async def fetch():
-                return await provider.get_realtime_price_from_batch(symbol)
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                price = loop.run_until_complete(fetch())
-            finally:
-                loop.close()
+            # 使用异步方法获取（进程级后台事件循环）
+            price = run_async(provider.get_realtime_price_from_batch(symbol))
 
             if price:
                 return {
@@ -132,16 +125,8 @@ class RealtimeDataLoader(BaseDataLoader):
             if not provider or not provider.connected:
                 return None
 
-            # 使用异步方法获取
-            async def fetch():
-                return await provider.get_stock_quotes_cached(symbol)
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                quotes = loop.run_until_complete(fetch())
-            finally:
-                loop.close()
+            # 使用异步方法获取（进程级后台事件循环）
+            quotes = run_async(provider.get_stock_quotes_cached(symbol))
 
             if quotes:
                 data = {"symbol": symbol, "source": "akshare"}
@@ -72,15 +72,9 @@ class StockListLoader(BaseDataLoader):
 
             provider = get_akshare_provider()
             if provider and provider.connected:
-                import asyncio
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    self._stock_list_cache = loop.run_until_complete(
-                        provider.get_stock_list()
-                    )
-                finally:
-                    loop.close()
+                from tradingagents.utils.async_bridge import run_async
+
+                self._stock_list_cache = run_async(provider.get_stock_list())
                 self._build_stock_dict()
                 logger.info(f"✅ 从AKShare加载股票列表: {len(self._stock_list_cache)}只")
                 return
@@ -129,7 +129,7 @@ class DataCoordinator:
         try:
             from tradingagents.agents.utils.agent_utils import Toolkit
 
-            depth_str = Toolkit._config.get("research_depth", "Standard")
+            depth_str = Toolkit.get_config().get("research_depth", "Standard")
 
             numeric_mapping = {
                 1: AnalysisDepth.QUICK,
@@ -11,7 +11,6 @@
 - adapters/base_adapter.py: 适配器基类
 """
 
-import asyncio
 import os
 import time
 import warnings
@@ -21,6 +20,7 @@ import numpy as np
 import pandas as pd
 
 from tradingagents.dataflows.data_sources.enums import ChinaDataSource
+from tradingagents.dataflows.schemas.market_series import MarketSeries
 from tradingagents.utils.logging_manager import get_logger
 
 logger = get_logger("agents")
@@ -307,6 +307,35 @@ class DataSourceManager:
         """
         return self._realtime_manager.get_realtime_quote(symbol)
 
+    def format_stock_data(
+        self,
+        data: pd.DataFrame,
+        symbol: str,
+        stock_name: str,
+        start_date: str,
+        end_date: str,
+        realtime_quote: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """
+        把行情 DataFrame 格式化为带技术指标的响应
+
+        供其他加载路径（如 MongoDB 缓存）输出与 API 路径一致的格式
+
+        Args:
+            data: 行情数据
+            symbol: 股票代码
+            stock_name: 股票名称
+            start_date: 开始日期
+            end_date: 结束日期
+            realtime_quote: 实时行情（可选）
+
+        Returns:
+            StructuredText：.structured 为 MarketSeries；无数据时返回以 ❌ 开头的提示
+        """
+        return self._format_stock_data_response(
+            data, symbol, stock_name, start_date, end_date, realtime_quote
+        )
+
     # ==================== 数据获取方法（内部使用）====================
 
     def _get_data_fetcher_dict(self) -> Dict:
@@ -656,31 +685,10 @@ class DataSourceManager:
     # ==================== 工具方法 ====================
 
     def _run_async_safe(self, coro):
-        """安全地运行异步协程"""
-        try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            return asyncio.run(coro)
-
-        import concurrent.futures
+        """在进程级后台事件循环中运行异步协程"""
+        from tradingagents.utils.async_bridge import run_async
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(asyncio.run, coro)
-            return future.result()
-
-    def _get_volume_safely(self, data: pd.DataFrame) -> float:
-        """安全获取成交量数据"""
-        try:
-            if "volume" in data.columns:
-                volume_raw = data["volume"].iloc[-1]
-                return float(volume_raw) if volume_raw else 0
-            elif "vol" in data.columns:
-                volume_raw = data["vol"].iloc[-1]
-                return float(volume_raw) if volume_raw else 0
-            else:
-                return 0
-        except Exception:
-            return 0
+        return run_async(coro)
 
     def _format_stock_data_response(
         self,
@@ -694,7 +702,7 @@ class DataSourceManager:
         """
         格式化股票数据响应（包含技术指标）
 
-        这是一个简化版本，完整实现保留了所有技术指标计算逻辑
+        返回 StructuredText：文本内容与以前一致，.structured 为 MarketSeries
         """
         try:
             if data is None or data.empty:
@@ -711,169 +719,92 @@ class DataSourceManager:
                     return f"❌ 数据格式错误：缺少日期列"
 
             # 计算技术指标
-            # 移动平均线
-            data["ma5"] = data["close"].rolling(window=5, min_periods=1).mean()
-            data["ma10"] = data["close"].rolling(window=10, min_periods=1).mean()
-            data["ma20"] = data["close"].rolling(window=20, min_periods=1).mean()
-            data["ma60"] = data["close"].rolling(window=60, min_periods=1).mean()
-
-            # RSI计算
-            delta = data["close"].diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-
-            avg_gain6 = gain.ewm(com=5, adjust=True).mean()
-            avg_loss6 = loss.ewm(com=5, adjust=True).mean()
-            rs6 = avg_gain6 / avg_loss6.replace(0, np.nan)
-            data["rsi6"] = 100 - (100 / (1 + rs6))
-
-            # MACD计算
-            ema12 = data["close"].ewm(span=12, adjust=False).mean()
-            ema26 = data["close"].ewm(span=26, adjust=False).mean()
-            data["macd_dif"] = ema12 - ema26
-            data["macd_dea"] = data["macd_dif"].ewm(span=9, adjust=False).mean()
-            data["macd"] = (data["macd_dif"] - data["macd_dea"]) * 2
-
-            # 布林带
-            data["boll_mid"] = data["close"].rolling(window=20, min_periods=1).mean()
-            std = data["close"].rolling(window=20, min_periods=1).std()
-            data["boll_upper"] = data["boll_mid"] + 2 * std
-            data["boll_lower"] = data["boll_mid"] - 2 * std
-
-            # ========== P1-1: 扩展技术指标 ==========
-
-            # RSI14 (标准14周期)
-            avg_gain14 = gain.ewm(com=13, adjust=True).mean()
-            avg_loss14 = loss.ewm(com=13, adjust=True).mean()
-            rs14 = avg_gain14 / avg_loss14.replace(0, np.nan)
-            data["rsi14"] = 100 - (100 / (1 + rs14))
-
-            # KDJ
-            low_min = data["low"].rolling(window=9, min_periods=1).min()
-            high_max = data["high"].rolling(window=9, min_periods=1).max()
-            rsv = (data["close"] - low_min) / (high_max - low_min).replace(0, np.nan) * 100
-            data["kdj_k"] = rsv.ewm(com=2, adjust=False).mean()
-            data["kdj_d"] = data["kdj_k"].ewm(com=2, adjust=False).mean()
-            data["kdj_j"] = 3 * data["kdj_k"] - 2 * data["kdj_d"]
-
-            # ATR (Average True Range, 14周期)
-            tr1 = data["high"] - data["low"]
-            tr2 = (data["high"] - data["close"].shift(1)).abs()
-            tr3 = (data["low"] - data["close"].shift(1)).abs()
-            tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            data["atr14"] = tr.rolling(window=14, min_periods=1).mean()
-
-            # OBV (On Balance Volume) - 需要成交量列
-            if "vol" in data.columns:
-                obv = [0]
-                for i in range(1, len(data)):
-                    if data["close"].iloc[i] > data["close"].iloc[i - 1]:
-                        obv.append(obv[-1] + data["vol"].iloc[i])
-                    elif data["close"].iloc[i] < data["close"].iloc[i - 1]:
-                        obv.append(obv[-1] - data["vol"].iloc[i])
-                    else:
-                        obv.append(obv[-1])
-                data["obv"] = obv
-            else:
-                data["obv"] = np.nan
-
-            # Williams %R (14周期)
-            data["wr14"] = (high_max - data["close"]) / (high_max - low_min).replace(0, np.nan) * -100
+            data = self._add_technical_indicators(data)
 
-            # CCI (Commodity Channel Index, 14周期)
-            typical_price = (data["high"] + data["low"] + data["close"]) / 3
-            tp_sma = typical_price.rolling(window=14, min_periods=1).mean()
-            tp_mad = typical_price.rolling(window=14, min_periods=1).apply(
-                lambda x: np.mean(np.abs(x - np.mean(x))), raw=True
+            # 按列存储为结构化序列，文本只渲染一次；下游可通过 .structured 直接使用数组
+            series = MarketSeries.from_frame(
+                data, symbol, stock_name, start_date, end_date, realtime_quote
             )
-            data["cci14"] = (typical_price - tp_sma) / (0.015 * tp_mad.replace(0, np.nan))
-
-            # 获取最新数据
-            latest_data = data.iloc[-1]
-            display_rows = min(5, len(data))
-            display_data = data.tail(display_rows)
-
-            # 计算最新价格和涨跌幅
-            if realtime_quote and realtime_quote.get("price"):
-                latest_price = realtime_quote.get("price")
-                price_source = "实时"
-            else:
-                latest_price = latest_data.get("close", 0)
-                price_source = "历史"
-
-            prev_close = (
-                data.iloc[-2].get("close", latest_price)
-                if len(data) > 1
-                else latest_price
-            )
-            change = latest_price - prev_close
-            change_pct = (change / prev_close * 100) if prev_close != 0 else 0
-
-            # 获取最新数据的实际日期
-            latest_data_date = latest_data.get("date", end_date)
-            if isinstance(latest_data_date, pd.Timestamp):
-                latest_data_date = latest_data_date.strftime("%Y-%m-%d")
-
-            # 构建结果
-            result = f"📊 {stock_name}({symbol}) - 技术分析数据\n"
-            result += f"数据期间: {start_date} 至 {end_date}\n"
-            result += f"最新数据日期: {latest_data_date}\n"
-            result += f"数据条数: {len(data)}条 (展示最近{display_rows}个交易日)\n\n"
-
-            # 实时行情
-            if realtime_quote and realtime_quote.get("price"):
-                result += f"⚡ 实时行情（盘中）\n"
-                result += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-                result += f"💰 实时价格: ¥{realtime_quote.get('price', 0):.2f}\n"
-                result += f"📈 涨跌: {realtime_quote.get('change', 0):+.2f} ({realtime_quote.get('change_pct', 0):+.2f}%)\n"
-                result += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
-
-            result += f"💰 最新价格: ¥{latest_price:.2f} (来源: {price_source})\n"
-            result += f"📈 涨跌额: {change:+.2f}元 (涨跌幅: {change_pct:+.2f}%)\n\n"
-
-            # 技术指标
-            result += f"📊 移动平均线 (MA):\n"
-            result += f"   MA5:  ¥{latest_data['ma5']:.2f}\n"
-            result += f"   MA10: ¥{latest_data['ma10']:.2f}\n"
-            result += f"   MA20: ¥{latest_data['ma20']:.2f}\n"
-            result += f"   MA60: ¥{latest_data['ma60']:.2f}\n\n"
-
-            result += f"📈 MACD指标:\n"
-            result += f"   DIF:  {latest_data['macd_dif']:.3f}\n"
-            result += f"   DEA:  {latest_data['macd_dea']:.3f}\n"
-            result += f"   MACD: {latest_data['macd']:.3f}\n\n"
-
-            result += f"📉 RSI指标:\n"
-            result += f"   RSI6:  {latest_data['rsi6']:.2f}\n"
-            result += f"   RSI14: {latest_data['rsi14']:.2f}\n\n"
-
-            result += f"📊 布林带 (BOLL):\n"
-            result += f"   上轨: ¥{latest_data['boll_upper']:.2f}\n"
-            result += f"   中轨: ¥{latest_data['boll_mid']:.2f}\n"
-            result += f"   下轨: ¥{latest_data['boll_lower']:.2f}\n\n"
-
-            # P1-1: 扩展指标输出
-            result += f"📊 KDJ指标:\n"
-            result += f"   K: {latest_data['kdj_k']:.2f}\n"
-            result += f"   D: {latest_data['kdj_d']:.2f}\n"
-            result += f"   J: {latest_data['kdj_j']:.2f}\n\n"
-
-            result += f"📊 ATR(14): {latest_data['atr14']:.4f}\n"
-            result += f"📊 Williams %R(14): {latest_data['wr14']:.2f}\n"
-            result += f"📊 CCI(14): {latest_data['cci14']:.2f}\n"
-            result += f"📊 OBV: {latest_data['obv']:,.0f}\n\n"
-
-            # 成交量统计
-            volume_latest = self._get_volume_safely(display_data)
-            result += f"📊 成交量分析:\n"
-            result += f"   单日成交量: {volume_latest:,.0f}手\n"
-
-            return result
+            return series.to_text()
 
         except Exception as e:
             logger.error(f"❌ 格式化数据响应失败: {e}", exc_info=True)
             return f"❌ 格式化{symbol}数据失败: {e}"
 
+    def _add_technical_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+        """在标准化后的日线数据上计算技术指标列（MA/RSI/MACD/BOLL/KDJ/ATR/OBV/WR/CCI）"""
+        # 移动平均线
+        data["ma5"] = data["close"].rolling(window=5, min_periods=1).mean()
+        data["ma10"] = data["close"].rolling(window=10, min_periods=1).mean()
+        data["ma20"] = data["close"].rolling(window=20, min_periods=1).mean()
+        data["ma60"] = data["close"].rolling(window=60, min_periods=1).mean()
+
+        # RSI计算
+        delta = data["close"].diff()
+        gain = delta.where(delta > 0, 0)
+        loss = -delta.where(delta < 0, 0)
+
+        avg_gain6 = gain.ewm(com=5, adjust=True).mean()
+        avg_loss6 = loss.ewm(com=5, adjust=True).mean()
+        rs6 = avg_gain6 / avg_loss6.replace(0, np.nan)
+        data["rsi6"] = 100 - (100 / (1 + rs6))
+
+        # MACD计算
+        ema12 = data["close"].ewm(span=12, adjust=False).mean()
+        ema26 = data["close"].ewm(span=26, adjust=False).mean()
+        data["macd_dif"] = ema12 - ema26
+        data["macd_dea"] = data["macd_dif"].ewm(span=9, adjust=False).mean()
+        data["macd"] = (data["macd_dif"] - data["macd_dea"]) * 2
+
+        # 布林带
+        data["boll_mid"] = data["close"].rolling(window=20, min_periods=1).mean()
+        std = data["close"].rolling(window=20, min_periods=1).std()
+        data["boll_upper"] = data["boll_mid"] + 2 * std
+        data["boll_lower"] = data["boll_mid"] - 2 * std
+
+        # ========== P1-1: 扩展技术指标 ==========
+
+        # RSI14 (标准14周期)
+        avg_gain14 = gain.ewm(com=13, adjust=True).mean()
+        avg_loss14 = loss.ewm(com=13, adjust=True).mean()
+        rs14 = avg_gain14 / avg_loss14.replace(0, np.nan)
+        data["rsi14"] = 100 - (100 / (1 + rs14))
+
+        # KDJ
+        low_min = data["low"].rolling(window=9, min_periods=1).min()
+        high_max = data["high"].rolling(window=9, min_periods=1).max()
+        rsv = (data["close"] - low_min) / (high_max - low_min).replace(0, np.nan) * 100
+        data["kdj_k"] = rsv.ewm(com=2, adjust=False).mean()
+        data["kdj_d"] = data["kdj_k"].ewm(com=2, adjust=False).mean()
+        data["kdj_j"] = 3 * data["kdj_k"] - 2 * data["kdj_d"]
+
+        # ATR (Average True Range, 14周期)
+        tr1 = data["high"] - data["low"]
+        tr2 = (data["high"] - data["close"].shift(1)).abs()
+        tr3 = (data["low"] - data["close"].shift(1)).abs()
+        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        data["atr14"] = tr.rolling(window=14, min_periods=1).mean()
+
+        # OBV (On Balance Volume) - 需要成交量列
+        if "vol" in data.columns:
+            direction = np.sign(data["close"].diff()).fillna(0)
+            data["obv"] = (direction * data["vol"]).cumsum()
+        else:
+            data["obv"] = np.nan
+
+        # Williams %R (14周期)
+        data["wr14"] = (high_max - data["close"]) / (high_max - low_min).replace(0, np.nan) * -100
+
+        # CCI (Commodity Channel Index, 14周期)
+        typical_price = (data["high"] + data["low"] + data["close"]) / 3
+        tp_sma = typical_price.rolling(window=14, min_periods=1).mean()
+        tp_mad = typical_price.rolling(window=14, min_periods=1).apply(
+            lambda x: np.mean(np.abs(x - np.mean(x))), raw=True
+        )
+        data["cci14"] = (typical_price - tp_sma) / (0.015 * tp_mad.replace(0, np.nan))
+
+        return data
+
     def _standardize_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """标准化 DataFrame 列名和格式"""
         if df is None or df.empty:
@@ -90,14 +90,14 @@ def get_stock_data_by_market(
 
         if market_info["is_china"]:
             # 中国A股
-            # 🔥 从 Toolkit._config 获取分析日期
+            # 🔥 从 Toolkit 运行配置获取分析日期
             analysis_date = None
             try:
                 from tradingagents.agents.utils.agent_utils import Toolkit
 
-                analysis_date = Toolkit._config.get("analysis_date")
+                analysis_date = Toolkit.get_config().get("analysis_date")
             except Exception as e:
-                logger.debug(f"⚠️ 无法从 Toolkit._config 获取 analysis_date: {e}")
+                logger.debug(f"⚠️ 无法从 Toolkit 运行配置获取 analysis_date: {e}")
             return get_china_stock_data_unified(
                 symbol, start_date, end_date, analysis_date=analysis_date
             )
@@ -16,39 +16,44 @@ except ImportError:
 
     logger = logging.getLogger("agents")
 
+from tradingagents.utils.run_context import get_run_config, update_run_config
+
 
 # 导入配置管理器
-# 初始化默认函数
-def _default_get_config():
-    return {}
+config_manager = None
+DATA_DIR = "./data"
 
+try:
+    from tradingagents.config.config_manager import config_manager
 
-def _default_set_config(config):
+    DATA_DIR = config_manager.get_data_dir()
+except ImportError:
     pass
 
 
-get_config = _default_get_config
-set_config = _default_set_config
-DATA_DIR = "./data"
+def get_config():
+    """获取配置（兼容性包装）
 
-try:
-    from tradingagents.config.config_manager import config_manager
+    在 TradingAgentsGraph.propagate 中调用时，本次运行的配置覆盖持久化设置，
+    并发运行的分析互不影响。
+    """
+    config = config_manager.load_settings() if config_manager is not None else {}
+    run_config = get_run_config()
+    if run_config is None:
+        return config
+    merged = dict(config or {})
+    merged.update(run_config)
+    return merged
 
-    DATA_DIR = config_manager.get_data_dir()
 
-    def _get_config_impl():
-        """获取配置（兼容性包装）"""
-        return config_manager.load_settings()
+def set_config(config):
+    """设置配置（兼容性包装）
 
-    def _set_config_impl(config):
-        """设置配置（兼容性包装）"""
+    运行中只修改本次运行的配置；运行外才持久化保存。
+    """
+    if not update_run_config(config) and config_manager is not None:
         config_manager.save_settings(config)
 
-    get_config = _get_config_impl
-    set_config = _set_config_impl
-except ImportError:
-    pass
-
 
 # 数据源可用性标志
 YFIN_AVAILABLE = False
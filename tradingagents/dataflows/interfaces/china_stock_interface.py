@@ -201,14 +201,14 @@ def get_china_stock_data_unified(
     try:
         from ..data_source_manager import get_china_stock_data_unified
 
-        # 🔥 从 Toolkit._config 获取分析日期，用于判断实时行情
+        # 🔥 从 Toolkit 运行配置获取分析日期，用于判断实时行情
         analysis_date = None
         try:
             from tradingagents.agents.utils.agent_utils import Toolkit
 
-            analysis_date = Toolkit._config.get("analysis_date")
+            analysis_date = Toolkit.get_config().get("analysis_date")
         except Exception as e:
-            logger.debug(f"⚠️ 无法从 Toolkit._config 获取 analysis_date: {e}")
+            logger.debug(f"⚠️ 无法从 Toolkit 运行配置获取 analysis_date: {e}")
 
         result = get_china_stock_data_unified(
             ticker, start_date, end_date, analysis_date=analysis_date
@@ -18,8 +18,37 @@ from dataclasses import dataclass
 from tradingagents.config.runtime_settings import get_timezone_name
 
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.keyword_matcher import get_keyword_matcher
+from tradingagents.utils.news_dedup import cluster_near_duplicates, dedup_enabled
 logger = get_logger('agents')
 
+# 新闻紧急度关键词（按优先级排列）
+URGENCY_KEYWORDS = {
+    'high': [
+        'breaking', 'urgent', 'alert', 'emergency', 'halt', 'suspend',
+        '突发', '紧急', '暂停', '停牌', '重大'
+    ],
+    'medium': [
+        'earnings', 'report', 'announce', 'launch', 'merger', 'acquisition',
+        '财报', '发布', '宣布', '并购', '收购'
+    ],
+}
+
+# 公司名称及相关关键词
+COMPANY_KEYWORDS = {
+    'aapl': ['apple', 'iphone', 'ipad', 'mac'],
+    'tsla': ['tesla', 'elon musk', 'electric vehicle'],
+    'nvda': ['nvidia', 'gpu', 'ai chip'],
+    'msft': ['microsoft', 'windows', 'azure'],
+    'googl': ['google', 'alphabet', 'search']
+}
+
+# 紧急度与公司关键词编译为一个自动机，标题+正文只扫描一遍
+_NEWS_MATCHER = get_keyword_matcher({
+    **{f'urgency:{k}': v for k, v in URGENCY_KEYWORDS.items()},
+    **{f'company:{k}': v for k, v in COMPANY_KEYWORDS.items()},
+})
+
 
 
 @dataclass
@@ -504,31 +533,13 @@ class RealtimeNewsAggregator:
 
     def _assess_news_urgency(self, title: str, content: str) -> str:
         """评估新闻紧急程度"""
-        text = (title + ' ' + content).lower()
-
-        # 高紧急度关键词
-        high_urgency_keywords = [
-            'breaking', 'urgent', 'alert', 'emergency', 'halt', 'suspend',
-            '突发', '紧急', '暂停', '停牌', '重大'
-        ]
-
-        # 中等紧急度关键词
-        medium_urgency_keywords = [
-            'earnings', 'report', 'announce', 'launch', 'merger', 'acquisition',
-            '财报', '发布', '宣布', '并购', '收购'
-        ]
-
-        # 检查高紧急度关键词
-        for keyword in high_urgency_keywords:
-            if keyword in text:
-                logger.debug(f"[紧急度评估] 检测到高紧急度关键词 '{keyword}' 在新闻中: {title[:50]}...")
-                return 'high'
-
-        # 检查中等紧急度关键词
-        for keyword in medium_urgency_keywords:
-            if keyword in text:
-                logger.debug(f"[紧急度评估] 检测到中等紧急度关键词 '{keyword}' 在新闻中: {title[:50]}...")
-                return 'medium'
+        hits = _NEWS_MATCHER.scan((title + ' ' + content).lower())
+
+        for level in ('high', 'medium'):
+            matched = hits.get(f'urgency:{level}')
+            if matched:
+                logger.debug(f"[紧急度评估] 检测到{'高' if level == 'high' else '中等'}紧急度关键词 '{matched[0]}' 在新闻中: {title[:50]}...")
+                return level
 
         logger.debug(f"[紧急度评估] 未检测到紧急关键词，评估为低紧急度: {title[:50]}...")
         return 'low'
@@ -543,21 +554,12 @@ class RealtimeNewsAggregator:
             logger.debug(f"[相关性计算] 股票代码 {ticker} 直接出现在标题中，相关性评分: 1.0，标题: {title[:50]}...")
             return 1.0
 
-        # 公司名称匹配
-        company_names = {
-            'aapl': ['apple', 'iphone', 'ipad', 'mac'],
-            'tsla': ['tesla', 'elon musk', 'electric vehicle'],
-            'nvda': ['nvidia', 'gpu', 'ai chip'],
-            'msft': ['microsoft', 'windows', 'azure'],
-            'googl': ['google', 'alphabet', 'search']
-        }
-
         # 检查公司相关关键词
-        if ticker_lower in company_names:
-            for name in company_names[ticker_lower]:
-                if name in text:
-                    logger.debug(f"[相关性计算] 检测到公司相关关键词 '{name}' 在标题中，相关性评分: 0.8，标题: {title[:50]}...")
-                    return 0.8
+        if ticker_lower in COMPANY_KEYWORDS:
+            matched = _NEWS_MATCHER.scan(text).get(f'company:{ticker_lower}')
+            if matched:
+                logger.debug(f"[相关性计算] 检测到公司相关关键词 '{matched[0]}' 在标题中，相关性评分: 0.8，标题: {title[:50]}...")
+                return 0.8
 
         # 提取股票代码的纯数字部分（适用于中国股票）
         pure_code = ''.join(filter(str.isdigit, ticker))
@@ -598,10 +600,17 @@ class RealtimeNewsAggregator:
             seen_titles.add(title_key)
             unique_news.append(item)
 
+        # 近似重复：不同来源转载的同一新闻，每簇保留第一条（数据源优先级顺序）
+        near_duplicate_count = 0
+        if dedup_enabled():
+            clusters, _ = cluster_near_duplicates(unique_news, lambda item: (item.title, item.content))
+            near_duplicate_count = len(unique_news) - len(clusters)
+            unique_news = [cluster.representative for cluster in clusters]
+
         # 记录去重结果
         time_taken = (datetime.now(ZoneInfo(get_timezone_name())) - start_time).total_seconds()
         logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
-        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
+        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，近似重复: {near_duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
 
         return unique_news
 
@@ -19,6 +19,7 @@ import asyncio
 from typing import Any, List, Tuple
 
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.run_context import run_in_executor_with_context
 
 logger = get_logger("parallel_data_fetch")
 
@@ -107,8 +108,8 @@ class ParallelDataFetcher:
 
             # 执行数据获取（使用事件循环执行同步方法）
             loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None, lambda: method(fetch_func_name, *args, **kwargs)
+            result = await run_in_executor_with_context(
+                loop, None, lambda: method(fetch_func_name, *args, **kwargs)
             )
 
             return result
@@ -101,13 +101,21 @@ class AKShareProvider(
                     # 添加请求延迟，避免被反爬虫封禁
                     # 只对东方财富网的请求添加延迟
                     if "eastmoney.com" in url:
-                        current_time = time.time()
-                        time_since_last_request = (
-                            current_time - last_request_time["time"]
-                        )
-                        if time_since_last_request < 0.5:  # 至少间隔0.5秒
-                            time.sleep(0.5 - time_since_last_request)
-                        last_request_time["time"] = time.time()
+                        try:
+                            # 跨进程共享的令牌桶（所有进程合计不超过2次/秒）
+                            from app.core.rate_limiter import (
+                                get_distributed_rate_limiter,
+                            )
+
+                            get_distributed_rate_limiter("eastmoney").acquire_sync()
+                        except ImportError:
+                            current_time = time.time()
+                            time_since_last_request = (
+                                current_time - last_request_time["time"]
+                            )
+                            if time_since_last_request < 0.5:  # 至少间隔0.5秒
+                                time.sleep(0.5 - time_since_last_request)
+                            last_request_time["time"] = time.time()
 
                     # 如果是东方财富网的请求，且 curl_cffi 可用，使用它来绕过反爬虫
                     if use_curl_cffi and "eastmoney.com" in url:
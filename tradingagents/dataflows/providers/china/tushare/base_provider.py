@@ -5,7 +5,8 @@ TushareProvider 基类模块
 提供 Token 管理、连接管理等基础功能。
 """
 
-from typing import Optional
+from typing import Any, Optional
+import asyncio
 import os
 import logging
 
@@ -387,3 +388,41 @@ class BaseTushareProvider(BaseStockDataProvider):
     def is_available(self) -> bool:
         """检查Tushare是否可用"""
         return TUSHARE_AVAILABLE and self.connected and self.api is not None
+
+    # ==================== 接口级限流 ====================
+
+    def _get_rate_limiter(self, endpoint: str):
+        """
+        获取跨进程共享的接口级速率限制器
+
+        Tushare 按接口计算每分钟调用次数，API服务、分析Worker和调度器共用同一个
+        Redis 令牌桶；后端模块不可用时返回 None（不限流，保持原有行为）
+        """
+        try:
+            from app.core.rate_limiter import get_distributed_rate_limiter
+
+            return get_distributed_rate_limiter("tushare", endpoint)
+        except Exception:
+            return None
+
+    async def _acquire_rate_limit(self, endpoint: str):
+        """异步获取接口调用许可"""
+        limiter = self._get_rate_limiter(endpoint)
+        if limiter is not None:
+            await limiter.acquire()
+
+    def _acquire_rate_limit_sync(self, endpoint: str):
+        """同步获取接口调用许可"""
+        limiter = self._get_rate_limiter(endpoint)
+        if limiter is not None:
+            limiter.acquire_sync()
+
+    async def _call_api(self, endpoint: str, *args, **kwargs) -> Any:
+        """限流后在线程中调用 Tushare pro 接口（如 daily、income）"""
+        await self._acquire_rate_limit(endpoint)
+        return await asyncio.to_thread(getattr(self.api, endpoint), *args, **kwargs)
+
+    def _call_api_sync(self, endpoint: str, *args, **kwargs) -> Any:
+        """限流后同步调用 Tushare pro 接口"""
+        self._acquire_rate_limit_sync(endpoint)
+        return getattr(self.api, endpoint)(*args, **kwargs)
@@ -7,7 +7,6 @@
 
 from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
-import asyncio
 import pandas as pd
 
 from .base_provider import BaseTushareProvider
@@ -24,7 +23,8 @@ class BasicDataMixin(BaseTushareProvider):
             return None
 
         try:
-            df = self.api.stock_basic(
+            df = self._call_api_sync(
+                "stock_basic",
                 list_status="L",
                 fields="ts_code,symbol,name,area,industry,market,exchange,list_date,is_hs",
             )
@@ -62,7 +62,7 @@ class BasicDataMixin(BaseTushareProvider):
                     return None  # Tushare不支持美股
 
             # 获取数据
-            df = await asyncio.to_thread(self.api.stock_basic, **params)
+            df = await self._call_api("stock_basic", **params)
 
             if df is None:
                 return []
@@ -93,8 +93,8 @@ class BasicDataMixin(BaseTushareProvider):
         try:
             if symbol:
                 ts_code = self._normalize_ts_code(symbol)
-                df = await asyncio.to_thread(
-                    self.api.stock_basic,
+                df = await self._call_api(
+                    "stock_basic",
                     ts_code=ts_code,
                     fields="ts_code,symbol,name,area,industry,market,exchange,list_date,is_hs,act_name,act_ent_type",
                 )
@@ -105,8 +105,8 @@ class BasicDataMixin(BaseTushareProvider):
                 basic_data = df.iloc[0].to_dict()
 
                 try:
-                    daily_df = await asyncio.to_thread(
-                        self.api.daily_basic,
+                    daily_df = await self._call_api(
+                        "daily_basic",
                         ts_code=ts_code,
                         fields="ts_code,total_mv,circ_mv,pe,pb,ps,turnover_rate,volume_ratio,pe_ttm,pb_mrq,ps_ttm,"
                         "dv_ratio,dv_ttm,total_share,float_share",
@@ -136,8 +136,8 @@ class BasicDataMixin(BaseTushareProvider):
                 try:
                     # 获取财务指标数据（盈利能力、成长能力、偿债能力、每股指标）
                     # 2026-02-12: 增强字段获取，包含四大类核心指标
-                    fina_df = await asyncio.to_thread(
-                        self.api.fina_indicator,
+                    fina_df = await self._call_api(
+                        "fina_indicator",
                         ts_code=ts_code,
                         fields="ts_code,roe,roe_waa,roe_dt,roa,roa2,grossprofit_margin,netprofit_margin,"
                         "q_profit_yoy,or_yoy,eps_yoy,roe_yoy,profit_dedt_yoy,"
@@ -215,8 +215,8 @@ class BasicDataMixin(BaseTushareProvider):
 
                 # 获取股东增减持数据 (stk_holdertrade) - 5210积分可用
                 try:
-                    holder_trade_df = await asyncio.to_thread(
-                        self.api.stk_holdertrade,
+                    holder_trade_df = await self._call_api(
+                        "stk_holdertrade",
                         ts_code=ts_code,
                         limit=10,  # 获取最近10条增减持记录
                     )
@@ -240,8 +240,8 @@ class BasicDataMixin(BaseTushareProvider):
 
                 # 获取股东人数数据 (stk_holdernumber) - 5210积分可用
                 try:
-                    holder_num_df = await asyncio.to_thread(
-                        self.api.stk_holdernumber,
+                    holder_num_df = await self._call_api(
+                        "stk_holdernumber",
                         ts_code=ts_code,
                         limit=4,  # 获取最近4个季度数据
                     )
@@ -7,7 +7,6 @@
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-import asyncio
 
 from .base_provider import BaseTushareProvider
 
@@ -52,7 +51,7 @@ class FinancialDataMixin(BaseTushareProvider):
 
             # 1. 获取利润表数据 (income statement)
             try:
-                income_df = await asyncio.to_thread(self.api.income, **query_params)
+                income_df = await self._call_api("income", **query_params)
                 if income_df is not None and not income_df.empty:
                     financial_data["income_statement"] = income_df.to_dict("records")
                     self.logger.debug(
@@ -65,8 +64,8 @@ class FinancialDataMixin(BaseTushareProvider):
 
             # 2. 获取资产负债表数据 (balance sheet)
             try:
-                balance_df = await asyncio.to_thread(
-                    self.api.balancesheet, **query_params
+                balance_df = await self._call_api(
+                    "balancesheet", **query_params
                 )
                 if balance_df is not None and not balance_df.empty:
                     financial_data["balance_sheet"] = balance_df.to_dict("records")
@@ -80,7 +79,7 @@ class FinancialDataMixin(BaseTushareProvider):
 
             # 3. 获取现金流量表数据 (cash flow statement)
             try:
-                cashflow_df = await asyncio.to_thread(self.api.cashflow, **query_params)
+                cashflow_df = await self._call_api("cashflow", **query_params)
                 if cashflow_df is not None and not cashflow_df.empty:
                     financial_data["cashflow_statement"] = cashflow_df.to_dict(
                         "records"
@@ -95,8 +94,8 @@ class FinancialDataMixin(BaseTushareProvider):
 
             # 4. 获取财务指标数据 (financial indicators)
             try:
-                indicator_df = await asyncio.to_thread(
-                    self.api.fina_indicator, **query_params
+                indicator_df = await self._call_api(
+                    "fina_indicator", **query_params
                 )
                 if indicator_df is not None and not indicator_df.empty:
                     financial_data["financial_indicators"] = indicator_df.to_dict(
@@ -112,8 +111,8 @@ class FinancialDataMixin(BaseTushareProvider):
 
             # 5. 获取主营业务构成数据 (可选)
             try:
-                mainbz_df = await asyncio.to_thread(
-                    self.api.fina_mainbz, **query_params
+                mainbz_df = await self._call_api(
+                    "fina_mainbz", **query_params
                 )
                 if mainbz_df is not None and not mainbz_df.empty:
                     financial_data["main_business"] = mainbz_df.to_dict("records")
@@ -131,8 +130,8 @@ class FinancialDataMixin(BaseTushareProvider):
             try:
                 # dividend接口不需要period参数，使用end_date和limit
                 dividend_params = {"ts_code": ts_code, "limit": limit}
-                dividend_df = await asyncio.to_thread(
-                    self.api.dividend, **dividend_params
+                dividend_df = await self._call_api(
+                    "dividend", **dividend_params
                 )
                 if dividend_df is not None and not dividend_df.empty:
                     financial_data["dividend"] = dividend_df.to_dict("records")
@@ -207,7 +206,7 @@ class FinancialDataMixin(BaseTushareProvider):
                 query_params["end_date"] = end_period
 
             # 获取利润表数据作为主要数据源
-            income_df = await asyncio.to_thread(self.api.income, **query_params)
+            income_df = await self._call_api("income", **query_params)
 
             if income_df is None or income_df.empty:
                 self.logger.warning(f"⚠️ {ts_code} 指定期间无财务数据")
@@ -262,8 +261,8 @@ class FinancialDataMixin(BaseTushareProvider):
             ts_code = self._normalize_ts_code(symbol)
 
             # 仅获取财务指标
-            indicator_df = await asyncio.to_thread(
-                self.api.fina_indicator, ts_code=ts_code, limit=limit
+            indicator_df = await self._call_api(
+                "fina_indicator", ts_code=ts_code, limit=limit
             )
 
             if indicator_df is not None and not indicator_df.empty:
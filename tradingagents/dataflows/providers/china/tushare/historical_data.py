@@ -59,6 +59,7 @@ class HistoricalDataMixin(BaseTushareProvider):
             # FIX: 添加异常处理，如果 pro_bar 失败也尝试备用方案
             df = None
             try:
+                await self._acquire_rate_limit("pro_bar")
                 df = await asyncio.to_thread(
                     ts.pro_bar,
                     ts_code=ts_code,
@@ -92,8 +93,8 @@ class HistoricalDataMixin(BaseTushareProvider):
                     self.logger.info(
                         f"🔄 [备用方案] 尝试使用 api.daily 获取数据: {ts_code}"
                     )
-                    df = await asyncio.to_thread(
-                        self.api.daily,
+                    df = await self._call_api(
+                        "daily",
                         ts_code=ts_code,
                         start_date=start_str,
                         end_date=end_str,
@@ -150,8 +151,8 @@ class HistoricalDataMixin(BaseTushareProvider):
 
         try:
             date_str = trade_date.replace("-", "")
-            df = await asyncio.to_thread(
-                self.api.daily_basic,
+            df = await self._call_api(
+                "daily_basic",
                 trade_date=date_str,
                 fields="ts_code,total_mv,circ_mv,pe,pb,ps,turnover_rate,volume_ratio,pe_ttm,pb_mrq,ps_ttm,"
                 "dv_ratio,dv_ttm,total_share,float_share",
@@ -178,8 +179,8 @@ class HistoricalDataMixin(BaseTushareProvider):
                 check_date = (today - timedelta(days=delta)).strftime("%Y%m%d")
 
                 try:
-                    df = await asyncio.to_thread(
-                        self.api.daily_basic,
+                    df = await self._call_api(
+                        "daily_basic",
                         trade_date=check_date,
                         fields="ts_code",
                         limit=1,
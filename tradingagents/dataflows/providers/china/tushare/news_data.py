@@ -7,7 +7,6 @@
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-import asyncio
 import pandas as pd
 
 from .base_provider import BaseTushareProvider
@@ -76,8 +75,8 @@ class NewsDataMixin(BaseTushareProvider):
                     self.logger.debug(f"📰 尝试从 {source} 获取新闻...")
 
                     # 获取新闻数据
-                    news_df = await asyncio.to_thread(
-                        self.api.news,
+                    news_df = await self._call_api(
+                        "news",
                         src=source,
                         start_date=start_date,
                         end_date=end_date,
@@ -99,8 +99,8 @@ class RealtimeDataMixin(BaseTushareProvider):
             end_date = datetime.now().strftime("%Y%m%d")
             start_date = (datetime.now() - timedelta(days=3)).strftime("%Y%m%d")
 
-            df = await asyncio.to_thread(
-                self.api.daily,
+            df = await self._call_api(
+                "daily",
                 ts_code=ts_code,
                 start_date=start_date,
                 end_date=end_date,
@@ -166,8 +166,8 @@ class RealtimeDataMixin(BaseTushareProvider):
                 return cached
 
         try:
-            df = await asyncio.to_thread(
-                self.api.rt_k, ts_code="3*.SZ,6*.SH,0*.SZ,9*.BJ"
+            df = await self._call_api(
+                "rt_k", ts_code="3*.SZ,6*.SH,0*.SZ,9*.BJ"
             )
 
             if df is None or df.empty:
@@ -282,7 +282,6 @@ class RealtimeQuoteProvider:
     def _get_tushare_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
         """从Tushare获取实时行情"""
         try:
-            import asyncio
             import tushare as ts
 
             # 标准化代码
@@ -291,26 +290,8 @@ class RealtimeQuoteProvider:
 
             logger.debug(f"[Tushare-Realtime] Fetching {symbol} (code: {code_6})")
 
-            # 在线程池中执行同步调用
-            # [改进] 使用 get_running_loop() 如果可用，否则获取/创建新loop
-            try:
-                loop = asyncio.get_running_loop()
-            except RuntimeError:
-                # 没有运行中的loop，创建新的
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-            if loop.is_closed():
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-            future = loop.run_in_executor(
-                None,  # 使用默认线程池
-                lambda: ts.get_realtime_quotes(code_6),
-            )
-
-            # 等待执行完成并获取结果
-            df = loop.run_until_complete(future)
+            # tushare 实时行情接口本身是同步的，直接调用（不再为此新建事件循环）
+            df = ts.get_realtime_quotes(code_6)
 
             if df is None or df.empty:
                 return None
@@ -148,8 +148,6 @@ class RealtimeQuoteManager:
         该接口基于新浪财经数据，无需高级权限
         """
         try:
-            import asyncio
-
             import tushare as ts
 
             # 获取6位股票代码
@@ -158,20 +156,8 @@ class RealtimeQuoteManager:
 
             logger.debug(f"📊 [Tushare实时行情] 尝试获取 {symbol} (代码: {code_6})")
 
-            # 创建事件循环
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_closed():
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-            # 在线程池中执行同步的 tushare 调用
-            df = loop.run_until_complete(
-                asyncio.to_thread(ts.get_realtime_quotes, code_6)
-            )
+            # tushare 实时行情接口本身是同步的，直接调用（不再为此新建事件循环）
+            df = ts.get_realtime_quotes(code_6)
 
             if df is not None and not df.empty:
                 row = df.iloc[0]
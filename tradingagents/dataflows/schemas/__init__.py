@@ -5,6 +5,7 @@ DataFlows Schemas Package
 统一数据Schema定义模块：
 - stock_basic_schema.py: 股票基础信息Schema（基本面分析）
 - stock_historical_schema.py: 股票历史数据Schema（技术分析）
+- market_series.py: 结构化行情/基本面数据通道（数组存储，按需渲染文本）
 """
 
 from tradingagents.dataflows.schemas.stock_basic_schema import (
@@ -20,6 +21,13 @@ from tradingagents.dataflows.schemas.stock_historical_schema import (
     StockHistoricalData,
 )
 
+from tradingagents.dataflows.schemas.market_series import (
+    FundamentalsSnapshot,
+    MarketSeries,
+    StructuredText,
+    get_structured,
+)
+
 __all__ = [
     # 基础信息 Schema（基本面分析）
     "STOCK_BASIC_SCHEMA",
@@ -30,4 +38,9 @@ __all__ = [
     # 历史数据 Schema（技术分析）
     "StockDailyData",
     "StockHistoricalData",
+    # 结构化数据通道
+    "MarketSeries",
+    "FundamentalsSnapshot",
+    "StructuredText",
+    "get_structured",
 ]
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+"""
+结构化行情/基本面数据通道
+
+以前数据流把 DataFrame 渲染成文本，DataCoordinator 再用几十个正则把数值解析
+回来，既浪费 CPU 又丢失精度。本模块提供按列存储（numpy 数组）的结构化对象：
+
+- MarketSeries: 日线 OHLCV + 技术指标数组，latest() 给出与旧解析结果同名的字典
+- FundamentalsSnapshot: 估值/盈利/成长指标的数值快照
+- StructuredText: 携带结构化对象的 str 子类，沿用现有的字符串返回通道，
+  下游可通过 .structured 直接取到数组，无需再解析文本
+
+文本只在需要放进 prompt 时由 render() 生成一次（带缓存）。
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class StructuredText(str):
+    """携带结构化数据的字符串（对所有按 str 处理的调用方透明）"""
+
+    structured: Any = None
+
+    def __new__(cls, text: str, structured: Any = None):
+        obj = super().__new__(cls, text)
+        obj.structured = structured
+        return obj
+
+    def __reduce__(self):
+        return (StructuredText, (str(self), self.structured))
+
+
+def get_structured(value: Any) -> Any:
+    """取出字符串携带的结构化对象；普通字符串返回 None"""
+    return getattr(value, "structured", None)
+
+
+# DataFrame 指标列 → latest() 中的键（与旧的正则解析结果保持同名）
+INDICATOR_KEYS = {
+    "ma5": "MA5",
+    "ma10": "MA10",
+    "ma20": "MA20",
+    "ma60": "MA60",
+    "rsi6": "RSI",
+    "rsi14": "RSI14",
+    "macd_dif": "MACD_DIF",
+    "macd_dea": "MACD_DEA",
+    "macd": "MACD",
+    "kdj_k": "KDJ_K",
+    "kdj_d": "KDJ_D",
+    "kdj_j": "KDJ_J",
+    "atr14": "ATR14",
+    "wr14": "WR14",
+    "cci14": "CCI14",
+    "obv": "OBV",
+    "boll_upper": "BOLL_UPPER",
+    "boll_mid": "BOLL_MID",
+    "boll_lower": "BOLL_LOWER",
+}
+
+
+def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name in df.columns:
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+    return np.full(len(df), np.nan)
+
+
+def _finite(value: Any) -> Optional[float]:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+@dataclass
+class MarketSeries:
+    """日线行情与技术指标（按列存储，最新的在最后）"""
+
+    symbol: str
+    name: str
+    start_date: str
+    end_date: str
+    dates: List[str]
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    indicators: Dict[str, np.ndarray] = field(default_factory=dict)
+    realtime_quote: Optional[Dict[str, Any]] = None
+    source: str = ""
+    _text: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        symbol: str,
+        name: str,
+        start_date: str,
+        end_date: str,
+        realtime_quote: Optional[Dict[str, Any]] = None,
+    ) -> "MarketSeries":
+        """从已计算技术指标的标准化 DataFrame 构建（列名: date/open/high/low/close/vol）"""
+        if "date" in df.columns:
+            raw_dates = df["date"]
+        else:
+            raw_dates = pd.Series(df.index)
+        dates = [
+            d.strftime("%Y-%m-%d") if isinstance(d, (pd.Timestamp,)) else str(d)[:10]
+            for d in raw_dates
+        ]
+        return cls(
+            symbol=symbol,
+            name=name,
+            start_date=start_date,
+            end_date=end_date,
+            dates=dates,
+            open=_column(df, "open"),
+            high=_column(df, "high"),
+            low=_column(df, "low"),
+            close=_column(df, "close"),
+            volume=_column(df, "vol"),
+            indicators={
+                column: _column(df, column)
+                for column in INDICATOR_KEYS
+                if column in df.columns
+            },
+            realtime_quote=realtime_quote,
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    # ===== 数值视图 =====
+
+    @property
+    def latest_price(self) -> float:
+        if self.realtime_quote and self.realtime_quote.get("price"):
+            return float(self.realtime_quote["price"])
+        return float(self.close[-1]) if len(self.close) else 0.0
+
+    @property
+    def prev_close(self) -> float:
+        if len(self.close) > 1:
+            return float(self.close[-2])
+        return self.latest_price
+
+    def valid_closes(self) -> np.ndarray:
+        """去除 NaN/非正值后的收盘价序列"""
+        closes = self.close[np.isfinite(self.close)]
+        return closes[closes > 0]
+
+    def latest(self) -> Dict[str, Any]:
+        """最新一日的数值快照（键名与旧的文本解析结果一致）"""
+        if not len(self):
+            return {}
+        latest_price = self.latest_price
+        prev_close = self.prev_close
+        change = latest_price - prev_close
+        result: Dict[str, Any] = {
+            "current_price": latest_price,
+            "prev_close": prev_close,
+            "change": change,
+            "change_pct": (change / prev_close * 100) if prev_close else 0.0,
+            "open": _finite(self.open[-1]),
+            "high": _finite(self.high[-1]),
+            "low": _finite(self.low[-1]),
+            "volume": _finite(self.volume[-1]),
+            "volume_unit": "手",
+            "latest_date": self.dates[-1] if self.dates else self.end_date,
+            "data_days": len(self),
+        }
+        for column, key in INDICATOR_KEYS.items():
+            values = self.indicators.get(column)
+            if values is not None and len(values):
+                value = _finite(values[-1])
+                if value is not None:
+                    result[key] = value
+        if self.source:
+            result["source"] = self.source
+        return {k: v for k, v in result.items() if v is not None}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可 JSON 序列化的字典（NaN 转为 None），用于对外返回或持久化"""
+
+        def as_list(values: np.ndarray) -> List[Optional[float]]:
+            return [_finite(v) for v in values]
+
+        return {
+            "symbol": self.symbol,
+            "name": self.name,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "source": self.source,
+            "dates": list(self.dates),
+            "open": as_list(self.open),
+            "high": as_list(self.high),
+            "low": as_list(self.low),
+            "close": as_list(self.close),
+            "volume": as_list(self.volume),
+            "indicators": {k: as_list(v) for k, v in self.indicators.items()},
+            "latest": self.latest(),
+        }
+
+    # ===== 文本渲染（仅在构建 prompt 时调用一次）=====
+
+    def render(self) -> str:
+        if self._text is None:
+            self._text = self._render()
+        return self._text
+
+    def _indicator(self, column: str) -> float:
+        values = self.indicators.get(column)
+        return float(values[-1]) if values is not None and len(values) else float("nan")
+
+    def _render(self) -> str:
+        rows = len(self)
+        display_rows = min(5, rows)
+        latest_price = self.latest_price
+        price_source = (
+            "实时" if self.realtime_quote and self.realtime_quote.get("price") else "历史"
+        )
+        change = latest_price - self.prev_close
+        change_pct = (change / self.prev_close * 100) if self.prev_close != 0 else 0
+        ind = self._indicator
+
+        result = f"📊 {self.name}({self.symbol}) - 技术分析数据\n"
+        result += f"数据期间: {self.start_date} 至 {self.end_date}\n"
+        result += f"最新数据日期: {self.dates[-1] if self.dates else self.end_date}\n"
+        result += f"数据条数: {rows}条 (展示最近{display_rows}个交易日)\n\n"
+
+        if self.realtime_quote and self.realtime_quote.get("price"):
+            quote = self.realtime_quote
+            result += f"⚡ 实时行情（盘中）\n"
+            result += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
+            result += f"💰 实时价格: ¥{quote.get('price', 0):.2f}\n"
+            result += f"📈 涨跌: {quote.get('change', 0):+.2f} ({quote.get('change_pct', 0):+.2f}%)\n"
+            result += f"━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━\n\n"
+
+        result += f"💰 最新价格: ¥{latest_price:.2f} (来源: {price_source})\n"
+        result += f"📈 涨跌额: {change:+.2f}元 (涨跌幅: {change_pct:+.2f}%)\n\n"
+
+        result += f"📊 移动平均线 (MA):\n"
+        result += f"   MA5:  ¥{ind('ma5'):.2f}\n"
+        result += f"   MA10: ¥{ind('ma10'):.2f}\n"
+        result += f"   MA20: ¥{ind('ma20'):.2f}\n"
+        result += f"   MA60: ¥{ind('ma60'):.2f}\n\n"
+
+        result += f"📈 MACD指标:\n"
+        result += f"   DIF:  {ind('macd_dif'):.3f}\n"
+        result += f"   DEA:  {ind('macd_dea'):.3f}\n"
+        result += f"   MACD: {ind('macd'):.3f}\n\n"
+
+        result += f"📉 RSI指标:\n"
+        result += f"   RSI6:  {ind('rsi6'):.2f}\n"
+        result += f"   RSI14: {ind('rsi14'):.2f}\n\n"
+
+        result += f"📊 布林带 (BOLL):\n"
+        result += f"   上轨: ¥{ind('boll_upper'):.2f}\n"
+        result += f"   中轨: ¥{ind('boll_mid'):.2f}\n"
+        result += f"   下轨: ¥{ind('boll_lower'):.2f}\n\n"
+
+        result += f"📊 KDJ指标:\n"
+        result += f"   K: {ind('kdj_k'):.2f}\n"
+        result += f"   D: {ind('kdj_d'):.2f}\n"
+        result += f"   J: {ind('kdj_j'):.2f}\n\n"
+
+        result += f"📊 ATR(14): {ind('atr14'):.4f}\n"
+        result += f"📊 Williams %R(14): {ind('wr14'):.2f}\n"
+        result += f"📊 CCI(14): {ind('cci14'):.2f}\n"
+        result += f"📊 OBV: {ind('obv'):,.0f}\n\n"
+
+        volume_latest = _finite(self.volume[-1]) if rows else None
+        result += f"📊 成交量分析:\n"
+        result += f"   单日成交量: {volume_latest or 0:,.0f}手\n"
+        return result
+
+    def to_text(self) -> StructuredText:
+        """渲染为携带本对象的字符串"""
+        return StructuredText(self.render(), self)
+
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def _metric_value(value: Any) -> Optional[float]:
+    """把 "12.34"、"15.20%"、"8.1 (TTM)" 等指标值转为浮点数；N/A 返回 None"""
+    if isinstance(value, (int, float)):
+        return _finite(value)
+    if not isinstance(value, str):
+        return None
+    match = _NUMBER_RE.search(value.replace(",", ""))
+    return float(match.group()) if match else None
+
+
+@dataclass
+class FundamentalsSnapshot:
+    """基本面数值快照（百分比指标以百分数存储，如 ROE=15.2 表示 15.2%）"""
+
+    symbol: str
+    PE: Optional[float] = None
+    PB: Optional[float] = None
+    PS: Optional[float] = None
+    ROE: Optional[float] = None
+    ROA: Optional[float] = None
+    gross_margin: Optional[float] = None
+    net_margin: Optional[float] = None
+    revenue_growth: Optional[float] = None
+    profit_growth: Optional[float] = None
+    debt_ratio: Optional[float] = None
+    market_cap: Optional[float] = None  # 亿元
+    current_price: Optional[float] = None
+    revenue: Optional[float] = None  # 亿元
+    fundamental_score: Optional[float] = None
+    valuation_score: Optional[float] = None
+    growth_score: Optional[float] = None
+    risk_level: Optional[str] = None
+    source: str = ""
+
+    # 财务指标字典（fundamentals_loader 的小写键）→ 快照字段
+    METRIC_FIELDS = {
+        "pe": "PE",
+        "pb": "PB",
+        "ps": "PS",
+        "roe": "ROE",
+        "roa": "ROA",
+        "gross_margin": "gross_margin",
+        "net_margin": "net_margin",
+        "revenue_growth": "revenue_growth",
+        "profit_growth": "profit_growth",
+        "debt_ratio": "debt_ratio",
+        "fundamental_score": "fundamental_score",
+        "valuation_score": "valuation_score",
+        "growth_score": "growth_score",
+    }
+
+    @classmethod
+    def from_metrics(
+        cls, symbol: str, metrics: Dict[str, Any], source: str = ""
+    ) -> "FundamentalsSnapshot":
+        values = {
+            field_name: _metric_value(metrics.get(key))
+            for key, field_name in cls.METRIC_FIELDS.items()
+        }
+        risk_level = metrics.get("risk_level")
+        return cls(
+            symbol=symbol,
+            risk_level=risk_level if isinstance(risk_level, str) else None,
+            source=source,
+            **values,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """非空字段字典（键名与旧的文本解析结果一致）"""
+        result = {
+            name: getattr(self, name)
+            for name in self.__dataclass_fields__
+            if name != "symbol" and getattr(self, name) not in (None, "")
+        }
+        return result
@@ -6,13 +6,18 @@ import os
 import logging
 
 from tradingagents.config.config_manager import config_manager
+from tradingagents.utils.run_context import get_run_config
 
 logger = logging.getLogger(__name__)
 
 
 def get_config():
-    """兼容性包装函数"""
-    return config_manager.load_settings()
+    """兼容性包装函数（运行中叠加本次运行的配置）"""
+    config = config_manager.load_settings()
+    run_config = get_run_config()
+    if run_config is None:
+        return config
+    return {**(config or {}), **run_config}
 
 
 def _is_china_stock(symbol: str) -> bool:
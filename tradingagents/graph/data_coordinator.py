@@ -25,7 +25,14 @@ from dataclasses import dataclass, field
 from functools import wraps
 
 from tradingagents.agents.utils.agent_states import AgentState
+from tradingagents.dataflows.schemas.market_series import (
+    FundamentalsSnapshot,
+    MarketSeries,
+    StructuredText,
+    get_structured,
+)
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.run_context import submit_with_context
 
 logger = get_logger("data_coordinator")
 
@@ -75,6 +82,7 @@ class DataFetchResult:
     fetch_time: float
     metadata: Dict[str, Any] = field(default_factory=dict)
     parsed_data: Dict[str, Any] = field(default_factory=dict)  # P0-1: 结构化数据
+    structured: Optional[Any] = None  # MarketSeries / FundamentalsSnapshot（数组原件）
 
 
 class DataCoordinator:
@@ -185,6 +193,20 @@ class DataCoordinator:
 
     # ==================== 数据解析 ====================
 
+    def _parse_structured(self, data: str, parser) -> Tuple[Dict[str, Any], Any]:
+        """
+        取数据的结构化视图
+
+        数据源返回 StructuredText 时直接使用其携带的 MarketSeries /
+        FundamentalsSnapshot；只有纯文本（旧缓存、非A股等）才退回正则解析
+        """
+        structured = get_structured(data)
+        if isinstance(structured, MarketSeries):
+            return structured.latest(), structured
+        if isinstance(structured, FundamentalsSnapshot):
+            return structured.to_dict(), structured
+        return parser(data), None
+
     def _parse_market_data(self, data_str: str) -> Dict[str, Any]:
         """解析市场数据字符串为结构化数据"""
         result = {}
@@ -361,12 +383,15 @@ class DataCoordinator:
         cache_key = self._get_cache_key(symbol, "market", trade_date)
         cached = self._get_cached_data(cache_key)
         if cached:
+            structured = get_structured(cached)
             return DataFetchResult(
                 data=cached,
                 source="cache",
                 quality_score=0.9,
                 issues=[],
                 fetch_time=time.time() - start_time,
+                parsed_data=structured.latest() if structured is not None else {},
+                structured=structured,
             )
 
         # 2. 尝试各个数据源
@@ -379,8 +404,10 @@ class DataCoordinator:
                 data = self._fetch_market_data_from_source(symbol, trade_date, source)
 
                 if data and "❌" not in str(data):
-                    # 解析并验证数据
-                    parsed = self._parse_market_data(data)
+                    # 取结构化数据并验证（数据源已携带数组时不再解析文本）
+                    parsed, structured = self._parse_structured(
+                        data, self._parse_market_data
+                    )
                     quality_score, issues = self._validate_data(
                         "market", symbol, parsed
                     )
@@ -389,6 +416,9 @@ class DataCoordinator:
                     if parsed:
                         data += f"\n数据来源: {source}"
                         parsed["source"] = source
+                    if structured is not None:
+                        structured.source = source
+                        data = StructuredText(data, structured)
 
                     # 缓存成功数据
                     self._set_cached_data(cache_key, data)
@@ -405,6 +435,7 @@ class DataCoordinator:
                         issues=issues,
                         fetch_time=fetch_time,
                         parsed_data=parsed,
+                        structured=structured,
                     )
 
             except Exception as e:
@@ -444,12 +475,15 @@ class DataCoordinator:
         cache_key = self._get_cache_key(symbol, "financial", trade_date)
         cached = self._get_cached_data(cache_key)
         if cached:
+            structured = get_structured(cached)
             return DataFetchResult(
                 data=cached,
                 source="cache",
                 quality_score=0.9,
                 issues=[],
                 fetch_time=time.time() - start_time,
+                parsed_data=structured.to_dict() if structured is not None else {},
+                structured=structured,
             )
 
         # 2. 尝试各个数据源
@@ -464,8 +498,10 @@ class DataCoordinator:
                 )
 
                 if data and "❌" not in str(data):
-                    # 解析数据
-                    parsed = self._parse_fundamentals_data(data)
+                    # 取结构化数据（数据源已携带数值快照时不再解析文本）
+                    parsed, structured = self._parse_structured(
+                        data, self._parse_fundamentals_data
+                    )
 
                     # 基础验证
                     quality_score, issues = self._validate_data(
@@ -502,6 +538,9 @@ class DataCoordinator:
                     if parsed:
                         data += f"\n数据来源: {source}"
                         parsed["source"] = source
+                    if structured is not None:
+                        structured.source = source
+                        data = StructuredText(data, structured)
 
                     # 缓存成功数据
                     self._set_cached_data(cache_key, data)
@@ -522,6 +561,7 @@ class DataCoordinator:
                             "volume_unit_info": volume_unit_info,
                         },
                         parsed_data=parsed,
+                        structured=structured,
                     )
 
             except Exception as e:
@@ -1111,6 +1151,9 @@ class DataCoordinator:
 
         market_text = market_result.data or ""
         parsed_market = market_result.parsed_data or {}
+        series = market_result.structured if isinstance(
+            market_result.structured, MarketSeries
+        ) else None
 
         # 2. 检查当前价格是否存在
         if not parsed_market.get("current_price"):
@@ -1124,7 +1167,11 @@ class DataCoordinator:
         # MA60 需要至少 60 个交易日数据
         has_ma5 = parsed_market.get("MA5") is not None or "MA5" in market_text
         has_ma20 = parsed_market.get("MA20") is not None or "MA20" in market_text
-        has_ma60 = "MA60" in market_text
+        if series is not None:
+            # MA60 以 min_periods=1 计算，总会有值；按实际数据天数判断
+            has_ma60 = len(series) >= 60
+        else:
+            has_ma60 = "MA60" in market_text
 
         if not has_ma5:
             issues.append({
@@ -1172,8 +1219,11 @@ class DataCoordinator:
                 "field": "financial_data",
             })
 
-        # 6. 数据行数推断 (从文本中计算日期出现次数)
-        date_count = len(re.findall(r"\d{4}-\d{2}-\d{2}", market_text))
+        # 6. 数据行数 (结构化序列直接取长度，纯文本时按日期出现次数推断)
+        if series is not None:
+            date_count = len(series)
+        else:
+            date_count = len(re.findall(r"\d{4}-\d{2}-\d{2}", market_text))
         if 0 < date_count < 20:
             issues.append({
                 "severity": "warning",
@@ -1220,21 +1270,21 @@ class DataCoordinator:
         results = {}
 
         if parallel:
-            # 并行获取所有数据（包括A股特色数据）
+            # 并行获取所有数据（包括A股特色数据），子线程携带本次运行的上下文
             with ThreadPoolExecutor(max_workers=5) as executor:
                 futures = {
-                    executor.submit(
-                        self._get_market_data_with_fallback, symbol, trade_date
+                    submit_with_context(
+                        executor, self._get_market_data_with_fallback, symbol, trade_date
                     ): "market",
-                    executor.submit(
-                        self._get_fundamentals_data_with_fallback, symbol, trade_date
+                    submit_with_context(
+                        executor, self._get_fundamentals_data_with_fallback, symbol, trade_date
                     ): "financial",
-                    executor.submit(self._get_news_data, symbol, trade_date): "news",
-                    executor.submit(
-                        self._get_sentiment_data, symbol, trade_date
+                    submit_with_context(executor, self._get_news_data, symbol, trade_date): "news",
+                    submit_with_context(
+                        executor, self._get_sentiment_data, symbol, trade_date
                     ): "sentiment",
-                    executor.submit(
-                        self._get_china_market_features_data, symbol, trade_date
+                    submit_with_context(
+                        executor, self._get_china_market_features_data, symbol, trade_date
                     ): "china_market",
                 }
 
@@ -1316,6 +1366,7 @@ class DataCoordinator:
         # ========== P2-2: 多维数据质量评分 ==========
         _default = DataFetchResult("", "", 0.0, [], 0)
         market_structured = results.get("market", _default).parsed_data
+        market_series = results.get("market", _default).structured
         market_text = results.get("market", _default).data
         try:
             from tradingagents.graph.data_quality import evaluate_data_quality
@@ -1348,7 +1399,7 @@ class DataCoordinator:
                 format_signals_for_prompt,
             )
 
-            tech_signals = compute_technical_signals(market_structured)
+            tech_signals = compute_technical_signals(market_series or market_structured)
             tech_signals_text = format_signals_for_prompt(tech_signals)
             if tech_signals.get("signals"):
                 logger.info(
@@ -1375,6 +1426,9 @@ class DataCoordinator:
             "china_market_data_structured": results.get(
                 "china_market", _default
             ).parsed_data,
+            # 数组原件：下游指标计算直接使用，无需再解析文本
+            "market_series": market_series,
+            "fundamentals_snapshot": results.get("financial", _default).structured,
             # 质量和元数据
             "data_quality_score": overall_quality,
             "data_sources": {
@@ -1522,7 +1576,7 @@ def data_coordinator_node(state: AgentState):
     company = state.get("company_of_interest", "")
     trade_date = state.get("trade_date", "")
 
-    # 将分析日期设置到 Toolkit._config，确保工具函数能获取到
+    # 将分析日期写入本次运行的 Toolkit 配置（运行级上下文，不影响并发的其他分析）
     if trade_date:
         from tradingagents.agents.utils.agent_utils import Toolkit
 
@@ -1596,9 +1650,12 @@ def data_coordinator_node(state: AgentState):
     try:
         from tradingagents.graph.risk_indicators import get_quant_risk_calculator
 
-        # 从市场数据文本中提取收盘价序列
-        market_text = results.get("market_data", "")
-        prices = _extract_price_series(market_text)
+        # 优先使用结构化收盘价数组，纯文本数据才从文本中提取
+        market_series = results.get("market_series")
+        if isinstance(market_series, MarketSeries):
+            prices = market_series.valid_closes()
+        else:
+            prices = _extract_price_series(results.get("market_data", ""))
 
         if len(prices) >= 5:
             calculator = get_quant_risk_calculator()
@@ -1627,6 +1684,8 @@ def data_coordinator_node(state: AgentState):
         "market_data_structured": results.get("market_data_structured", {}),
         "financial_data_structured": results.get("financial_data_structured", {}),
         "china_market_data_structured": results.get("china_market_data_structured", {}),
+        "market_series": results.get("market_series"),
+        "fundamentals_snapshot": results.get("fundamentals_snapshot"),
         # P1-2: 量化风险指标
         "quant_risk_metrics": quant_risk_metrics,
         "quant_risk_text": quant_risk_text,
@@ -8,6 +8,7 @@
 3. 更好的异常处理和错误恢复
 4. 支持部分失败模式 (部分分析师失败不影响整体流程)
 5. 集成LLM缓存
+6. 超时后取消线程中的在途LLM调用（不再让超时的线程继续消耗token）
 
 作者: Claude
 创建日期: 2026-02-12
@@ -27,10 +28,16 @@ from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
 from tradingagents.graph.conditional_logic import ConditionalLogic
-from tradingagents.graph.setup import GraphSetup
+from tradingagents.graph.setup import GraphSetup, tag_stream_node
 from tradingagents.graph.data_coordinator import data_coordinator_node
 
 from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.run_context import run_in_executor_with_context
+from tradingagents.llm_adapters.invocation import (
+    CancellationToken,
+    LLMDeadlineExceeded,
+    invocation_scope,
+)
 from tradingagents.cache.llm_cache import get_llm_cache
 
 logger = get_logger("parallel_analysts_v2")
@@ -107,6 +114,7 @@ class EnhancedParallelAnalystExecutor:
             "cache_hits": 0,
             "cache_misses": 0,
             "timeout_count": 0,
+            "cancelled_count": 0,
             "error_count": 0,
         }
 
@@ -162,13 +170,18 @@ class EnhancedParallelAnalystExecutor:
                 self.execution_stats["cache_misses"] += 1
 
             # 执行分析师 (带超时)
+            # 截止时间和取消令牌随上下文传入线程，超时后线程中的LLM调用随之中止
+            token = CancellationToken()
             try:
                 # 在事件循环中运行同步函数
                 loop = asyncio.get_event_loop()
-                result = await asyncio.wait_for(
-                    loop.run_in_executor(None, analyst_node, state),
-                    timeout=self.analyst_timeout,
-                )
+                with invocation_scope(
+                    timeout=self.analyst_timeout, token=token, name=analyst_name
+                ):
+                    result = await asyncio.wait_for(
+                        run_in_executor_with_context(loop, None, analyst_node, state),
+                        timeout=self.analyst_timeout,
+                    )
 
                 execution_time = time.time() - start_time
                 self.execution_stats["analyst_times"][analyst_name] = execution_time
@@ -194,8 +207,10 @@ class EnhancedParallelAnalystExecutor:
                     execution_time=execution_time,
                 )
 
-            except asyncio.TimeoutError:
+            except (asyncio.TimeoutError, LLMDeadlineExceeded):
+                token.cancel("timeout")
                 self.execution_stats["timeout_count"] += 1
+                self.execution_stats["cancelled_count"] += 1
                 execution_time = time.time() - start_time
                 error_msg = f"{analyst_name} 执行超时 ({self.analyst_timeout}秒)"
                 logger.warning(f"⚠️ {error_msg}")
@@ -307,6 +322,7 @@ class EnhancedParallelAnalystExecutor:
             f"总耗时: {total_time:.2f}秒, "
             f"缓存命中: {self.execution_stats['cache_hits']}, "
             f"超时: {self.execution_stats['timeout_count']}, "
+            f"已取消: {self.execution_stats['cancelled_count']}, "
             f"错误: {self.execution_stats['error_count']}"
         )
 
@@ -384,21 +400,24 @@ class EnhancedParallelAnalystExecutor:
         # 添加数据协调器节点
         workflow.add_node("Data Coordinator", data_coordinator_node)
 
+        def add_agent_node(name, node):
+            workflow.add_node(name, tag_stream_node(name, node))
+
         # 添加分析师节点
         for analyst_type in selected_analysts:
-            workflow.add_node(
+            add_agent_node(
                 f"{analyst_type.capitalize()} Analyst", analyst_nodes[analyst_type]
             )
 
         # 添加其他节点
-        workflow.add_node("Bull Researcher", bull_researcher_node)
-        workflow.add_node("Bear Researcher", bear_researcher_node)
-        workflow.add_node("Research Manager", research_manager_node)
-        workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
-        workflow.add_node("Risk Judge", risk_manager_node)
+        add_agent_node("Bull Researcher", bull_researcher_node)
+        add_agent_node("Bear Researcher", bear_researcher_node)
+        add_agent_node("Research Manager", research_manager_node)
+        add_agent_node("Trader", trader_node)
+        add_agent_node("Risky Analyst", risky_analyst)
+        add_agent_node("Neutral Analyst", neutral_analyst)
+        add_agent_node("Safe Analyst", safe_analyst)
+        add_agent_node("Risk Judge", risk_manager_node)
 
         # 定义边 (并行执行)
         workflow.add_edge(START, "Data Coordinator")
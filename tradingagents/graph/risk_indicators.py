@@ -159,7 +159,7 @@ class QuantRiskCalculator:
         计算量化风险指标
 
         Args:
-            prices: 历史收盘价列表 (按时间正序，最旧在前)
+            prices: 历史收盘价列表或数组 (按时间正序，最旧在前)
             benchmark_prices: 基准(沪深300)收盘价列表 (同长度)
 
         Returns:
@@ -167,6 +167,12 @@ class QuantRiskCalculator:
         """
         warnings = []
 
+        # 支持 numpy 数组（如 MarketSeries.close），内部统一按列表计算
+        if prices is not None and not isinstance(prices, list):
+            prices = [float(p) for p in prices]
+        if benchmark_prices is not None and not isinstance(benchmark_prices, list):
+            benchmark_prices = [float(p) for p in benchmark_prices]
+
         if not prices or len(prices) < 2:
             return RiskMetrics(
                 data_days=len(prices) if prices else 0,
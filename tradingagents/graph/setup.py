@@ -10,6 +10,8 @@ from tradingagents.agents import *
 from tradingagents.agents.utils.agent_states import AgentState
 from tradingagents.agents.utils.agent_utils import Toolkit
 
+from tradingagents.llm_adapters.token_stream import agent_stream_scope
+
 from .conditional_logic import ConditionalLogic
 from .data_coordinator import data_coordinator_node
 
@@ -18,6 +20,31 @@ from tradingagents.utils.logging_init import get_logger
 
 logger = get_logger("default")
 
+# 辩论节点 -> (辩论状态字段, 每轮发言人数)，用于给 token 流标注辩论轮次
+_DEBATE_NODES = {
+    "Bull Researcher": ("investment_debate_state", 2),
+    "Bear Researcher": ("investment_debate_state", 2),
+    "Risky Analyst": ("risk_debate_state", 3),
+    "Safe Analyst": ("risk_debate_state", 3),
+    "Neutral Analyst": ("risk_debate_state", 3),
+}
+
+
+def tag_stream_node(name: str, node):
+    """包装图节点：节点内 LLM 调用推送的 token 流带上节点名和辩论轮次"""
+    debate = _DEBATE_NODES.get(name)
+
+    def tagged_node(state):
+        debate_round = None
+        if debate:
+            field, speakers = debate
+            count = (state.get(field) or {}).get("count", 0) or 0
+            debate_round = count // speakers + 1
+        with agent_stream_scope(name, debate_round):
+            return node(state)
+
+    return tagged_node
+
 
 class GraphSetup:
     """Handles the setup and configuration of the agent graph."""
@@ -134,20 +161,23 @@ class GraphSetup:
         # Add Data Coordinator node (New Entry Point)
         workflow.add_node("Data Coordinator", data_coordinator_node)
 
+        def add_agent_node(name, node):
+            workflow.add_node(name, tag_stream_node(name, node))
+
         # Add analyst nodes to the graph
         for analyst_type, node in analyst_nodes.items():
-            workflow.add_node(f"{analyst_type.capitalize()} Analyst", node)
+            add_agent_node(f"{analyst_type.capitalize()} Analyst", node)
             # 注意：并行执行模式下不使用 Msg Clear 节点
 
         # Add other nodes
-        workflow.add_node("Bull Researcher", bull_researcher_node)
-        workflow.add_node("Bear Researcher", bear_researcher_node)
-        workflow.add_node("Research Manager", research_manager_node)
-        workflow.add_node("Trader", trader_node)
-        workflow.add_node("Risky Analyst", risky_analyst)
-        workflow.add_node("Neutral Analyst", neutral_analyst)
-        workflow.add_node("Safe Analyst", safe_analyst)
-        workflow.add_node("Risk Judge", risk_manager_node)
+        add_agent_node("Bull Researcher", bull_researcher_node)
+        add_agent_node("Bear Researcher", bear_researcher_node)
+        add_agent_node("Research Manager", research_manager_node)
+        add_agent_node("Trader", trader_node)
+        add_agent_node("Risky Analyst", risky_analyst)
+        add_agent_node("Neutral Analyst", neutral_analyst)
+        add_agent_node("Safe Analyst", safe_analyst)
+        add_agent_node("Risk Judge", risk_manager_node)
 
         # Define edges
 
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """P2-3: 技术指标信号预计算摘要
 
-从结构化数据中确定性地计算技术信号 (不依赖 LLM 推理):
+从结构化数据 (MarketSeries 或其 latest() 字典) 中确定性地计算技术信号
+(不依赖 LLM 推理):
 - 趋势信号: MA 排列、价格相对 MA 位置
 - 动量信号: RSI 超买超卖、KDJ 金叉死叉、MACD 状态
 - 波动信号: 布林带位置、ATR 水平
@@ -10,20 +11,27 @@
 输出简洁的文本摘要, 注入分析师 prompt 前部, 减少 LLM 解读负担。
 """
 
+import math
 from typing import Any, Dict, List, Optional
 
 
-def compute_technical_signals(data: Dict[str, Any]) -> Dict[str, Any]:
+def compute_technical_signals(data: Any) -> Dict[str, Any]:
     """从结构化市场数据计算确定性技术信号
 
     Args:
-        data: _parse_market_data() 返回的 Dict, 包含
-              current_price, MA5/10/20/60, RSI, RSI14, MACD_DIF/DEA/MACD,
-              KDJ_K/D/J, ATR14, WR14, CCI14, OBV, BOLL_UPPER/MID/LOWER 等
+        data: MarketSeries (按列存储的指标数组), 或 latest()/_parse_market_data()
+              返回的 Dict, 包含 current_price, MA5/10/20/60, RSI, RSI14,
+              MACD_DIF/DEA/MACD, KDJ_K/D/J, ATR14, WR14, CCI14, OBV,
+              BOLL_UPPER/MID/LOWER 等
 
     Returns:
         Dict 包含各类信号及文本摘要
     """
+    series = None
+    if hasattr(data, "indicators") and hasattr(data, "latest"):
+        series = data
+        data = series.latest()
+
     if not data:
         return {"signals": [], "summary": "", "trend": "unknown"}
 
@@ -122,6 +130,10 @@ def compute_technical_signals(data: Dict[str, Any]) -> Dict[str, Any]:
         elif kdj_k < kdj_d and kdj_k < 20:
             signals.append(f"KDJ: K({kdj_k:.0f})<D({kdj_d:.0f}), 低位偏空, 注意超卖反弹")
 
+    # 金叉/死叉需要前一交易日的数值，仅在有指标数组时判断
+    if series is not None:
+        signals.extend(_detect_crosses(series.indicators))
+
     if kdj_j is not None:
         if kdj_j > 100:
             signals.append(f"KDJ-J={kdj_j:.0f}, 严重超买")
@@ -239,6 +251,28 @@ def _get_float(data: Dict[str, Any], key: str) -> Optional[float]:
         return None
 
 
+def _detect_crosses(indicators: Dict[str, Any]) -> List[str]:
+    """最近一个交易日的 MACD / KDJ 金叉死叉"""
+    crosses = []
+    for fast_key, slow_key, label in (
+        ("macd_dif", "macd_dea", "MACD"),
+        ("kdj_k", "kdj_d", "KDJ"),
+    ):
+        fast = indicators.get(fast_key)
+        slow = indicators.get(slow_key)
+        if fast is None or slow is None or len(fast) < 2 or len(slow) < 2:
+            continue
+        values = [float(fast[-2]), float(slow[-2]), float(fast[-1]), float(slow[-1])]
+        if not all(math.isfinite(v) for v in values):
+            continue
+        prev_fast, prev_slow, cur_fast, cur_slow = values
+        if prev_fast <= prev_slow and cur_fast > cur_slow:
+            crosses.append(f"{label}金叉 (最近一个交易日)")
+        elif prev_fast >= prev_slow and cur_fast < cur_slow:
+            crosses.append(f"{label}死叉 (最近一个交易日)")
+    return crosses
+
+
 def _cross_validate(
     existing_signals: List[str],
     trend_score: float,
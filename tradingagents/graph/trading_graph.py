@@ -14,8 +14,9 @@ from tradingagents.agents.utils.memory import FinancialSituationMemory
 from tradingagents.agents.utils.agent_states import (
     AgentState,
 )
-from tradingagents.dataflows.interfaces.base_interface import set_config
 from tradingagents.agents.utils.agent_utils import Toolkit
+from tradingagents.utils.run_context import run_scope
+from tradingagents.llm_adapters.invocation import invocation_scope, task_deadline_seconds
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
@@ -62,8 +63,7 @@ class TradingAgentsGraph:
         self.config = config or DEFAULT_CONFIG
         self.selected_analysts = selected_analysts  # 保存分析师选择列表
 
-        # Update interface's config
-        set_config(self.config)
+        # 配置不再写入全局 set_config()，propagate 时通过运行级上下文传递
 
         # Create necessary directories
         os.makedirs(
@@ -140,10 +140,20 @@ class TradingAgentsGraph:
         self.curr_state = None
         self.ticker = None
         self.state_logger = None
+        self._current_task_id = None
+        self._initial_selected_analysts = list(selected_analysts)
 
         # Set up graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
 
+    def reset_run_state(self):
+        """清理单次运行产生的状态，使实例可被实例池复用"""
+        self.curr_state = None
+        self.ticker = None
+        self.state_logger = None
+        self._current_task_id = None
+        self.selected_analysts = list(self._initial_selected_analysts)
+
     def _create_tool_nodes(self) -> Dict:
         """[已弃用] 创建工具节点
 
@@ -157,12 +167,23 @@ class TradingAgentsGraph:
     def propagate(self, company_name, trade_date, progress_callback=None, task_id=None):
         """Run trading agents graph for a company on a specific date.
 
+        整个运行在独立的运行级上下文中执行：工具包、数据流配置读取和数据源
+        读到的都是本次运行的配置与分析日期，同一进程内可并发运行多次分析。
+        LLM 调用在任务级调用范围内执行：取消任务或超过 LLM_TASK_DEADLINE_SECONDS
+        时，在途和后续的 LLM 调用都会中止。
+
         Args:
             company_name: Company name or stock symbol
             trade_date: Date for analysis
             progress_callback: Optional callback function for progress updates
             task_id: Optional task ID for tracking performance data
         """
+        with run_scope(self.config, task_id=task_id), invocation_scope(
+            timeout=task_deadline_seconds(), name="analysis", task_id=task_id
+        ):
+            return self._propagate(company_name, trade_date, progress_callback, task_id)
+
+    def _propagate(self, company_name, trade_date, progress_callback=None, task_id=None):
         # 添加详细的接收日志
         logger.debug(
             f"🔍 [GRAPH DEBUG] ===== TradingAgentsGraph.propagate 接收参数 ====="
@@ -188,11 +209,12 @@ class TradingAgentsGraph:
             )
             self.selected_analysts = config_selected_analysts
 
-        # 🔧修复：同步日期到全局配置，确保所有工具都能获取正确的分析日期
+        # 同步日期到本次运行的配置，确保所有工具都能获取正确的分析日期
         if trade_date is not None:
-            Toolkit._config["trade_date"] = str(trade_date)
-            Toolkit._config["analysis_date"] = str(trade_date)
-            logger.info(f"📅 [GRAPH] 已同步分析日期到全局配置: {trade_date}")
+            Toolkit.update_config(
+                {"trade_date": str(trade_date), "analysis_date": str(trade_date)}
+            )
+            logger.info(f"📅 [GRAPH] 已同步分析日期到运行配置: {trade_date}")
         else:
             logger.warning(f"⚠️  [GRAPH] trade_date 为 None，跳过日期同步")
 
@@ -341,6 +363,13 @@ class TradingAgentsGraph:
         # 将质量检查结果添加到决策中
         QualityChecker.apply_quality_results_to_decision(final_state, decision)
 
+        # 数组对象只在图内部使用，对外返回可序列化的字典
+        if final_state is not None:
+            for key in ("market_series", "fundamentals_snapshot"):
+                value = final_state.get(key)
+                if value is not None and hasattr(value, "to_dict"):
+                    final_state[key] = value.to_dict()
+
         # Return decision and processed signal
         return final_state, decision
 
@@ -6,11 +6,12 @@
 """
 
 import os
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Union
 from langchain_openai import ChatOpenAI
 from langchain_core.tools import BaseTool
 from pydantic import Field
 from ..config.config_manager import token_tracker
+from .invocation import guarded_generate
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -23,6 +24,9 @@ class ChatDashScopeOpenAI(ChatOpenAI):
     继承 ChatOpenAI，通过 OpenAI 兼容接口调用百炼模型
     利用百炼模型的原生 OpenAI 兼容性，支持原生 Function Calling
     """
+
+    # 流式接口接受 stream_options，可被取消的调用以流式请求实现在途中止
+    supports_stream_cancellation: ClassVar[bool] = True
     
     def __init__(self, **kwargs):
         """初始化 DashScope OpenAI 兼容客户端"""
@@ -103,17 +107,16 @@ class ChatDashScopeOpenAI(ChatOpenAI):
     def _generate(self, *args, **kwargs):
         """重写生成方法，添加 token 使用量追踪"""
         
-        # 调用父类的生成方法
-        result = super()._generate(*args, **kwargs)
+        # 调用父类的生成方法（携带调用范围的截止时间与取消令牌）
+        result = guarded_generate(self, super()._generate, *args, stream=super()._stream, **kwargs)
         
         # 追踪 token 使用量
         try:
-            # 从结果中提取 token 使用信息
-            if hasattr(result, 'llm_output') and result.llm_output:
-                token_usage = result.llm_output.get('token_usage', {})
-                
-                input_tokens = token_usage.get('prompt_tokens', 0)
-                output_tokens = token_usage.get('completion_tokens', 0)
+            # 从结果中提取 token 使用信息（流式结果的用量在 usage_metadata 中）
+            if result and result.generations:
+                from tradingagents.llm_adapters.openai_compatible_base import extract_token_usage
+
+                input_tokens, output_tokens, cached_tokens = extract_token_usage(result)
                 
                 if input_tokens > 0 or output_tokens > 0:
                     # 生成会话ID
@@ -127,7 +130,8 @@ class ChatDashScopeOpenAI(ChatOpenAI):
                         input_tokens=input_tokens,
                         output_tokens=output_tokens,
                         session_id=session_id,
-                        analysis_type=analysis_type
+                        analysis_type=analysis_type,
+                        cached_tokens=cached_tokens
                     )
                     
         except Exception as track_error:
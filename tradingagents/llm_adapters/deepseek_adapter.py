@@ -5,7 +5,7 @@ DeepSeek LLM适配器，支持Token使用统计
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Union
 from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
 from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_openai import ChatOpenAI
@@ -23,44 +23,15 @@ logger = setup_llm_logging()
 # 导入LLM缓存
 from tradingagents.utils.llm_cache import get_llm_cache
 
-# 导入超时处理
-import signal
-import platform
-from contextlib import contextmanager
+# 导入超时处理：截止时间随调用范围传到 HTTP 请求，任意线程均可生效
+from tradingagents.llm_adapters.invocation import (
+    LLMDeadlineExceeded,
+    guarded_generate,
+    invocation_scope,
+)
 
-
-class TimeoutException(Exception):
-    """超时异常"""
-
-    pass
-
-
-@contextmanager
-def timeout_context(seconds: int):
-    """超时上下文管理器（支持Unix和Windows）"""
-
-    def timeout_handler(signum, frame):
-        raise TimeoutException(f"LLM调用超时 ({seconds}秒)")
-
-    # Windows不支持signal.SIGALRM，直接yield
-    if platform.system() == "Windows":
-        yield
-        return
-
-    # Unix/Linux/Mac系统使用signal实现超时
-    try:
-        old_handler = signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(seconds)
-        yield
-    except ValueError:
-        # 如果signal不可用，直接yield
-        yield
-    finally:
-        try:
-            signal.alarm(0)
-            signal.signal(signal.SIGALRM, old_handler)
-        except:
-            pass
+# 向后兼容：原 SIGALRM 实现抛出的超时异常
+TimeoutException = LLMDeadlineExceeded
 
 
 # 导入token跟踪器
@@ -81,6 +52,9 @@ class ChatDeepSeek(ChatOpenAI):
     继承自ChatOpenAI，添加了Token使用量统计功能
     """
 
+    # 流式接口接受 stream_options，可被取消的调用以流式请求实现在途中止
+    supports_stream_cancellation: ClassVar[bool] = True
+
     def __init__(
         self,
         model: str = "deepseek-chat",
@@ -190,24 +164,28 @@ class ChatDeepSeek(ChatOpenAI):
             # 🔥 设置超时（默认120秒）
             timeout_seconds = kwargs.pop("timeout", 120)
 
-            # 调用父类方法生成响应（带超时）
-            with timeout_context(timeout_seconds):
-                result = super()._generate(messages, stop, run_manager, **kwargs)
+            # 调用父类方法生成响应（带超时，不超过外层任务的截止时间）
+            with invocation_scope(timeout=timeout_seconds, name="DeepSeek"):
+                result = guarded_generate(
+                    self,
+                    super()._generate,
+                    messages,
+                    stop,
+                    run_manager,
+                    stream=super()._stream,
+                    **kwargs,
+                )
 
             # 🔥 缓存结果
             cache.set(messages, self.model_name, result, **kwargs)
             logger.debug(f"💾 [DeepSeek] 结果已缓存 | 模型: {self.model_name}")
 
-            # 提取token使用量
-            input_tokens = 0
-            output_tokens = 0
+            # 提取token使用量（含提示词缓存命中数）
+            from tradingagents.llm_adapters.openai_compatible_base import (
+                extract_token_usage,
+            )
 
-            # 尝试从响应中提取token使用量
-            if hasattr(result, "llm_output") and result.llm_output:
-                token_usage = result.llm_output.get("token_usage", {})
-                if token_usage:
-                    input_tokens = token_usage.get("prompt_tokens", 0)
-                    output_tokens = token_usage.get("completion_tokens", 0)
+            input_tokens, output_tokens, cached_tokens = extract_token_usage(result)
 
             # 如果没有获取到token使用量，进行估算
             if input_tokens == 0 and output_tokens == 0:
@@ -218,7 +196,7 @@ class ChatDeepSeek(ChatOpenAI):
                 )
             else:
                 logger.info(
-                    f"📊 [DeepSeek] 实际token使用: 输入={input_tokens}, 输出={output_tokens}"
+                    f"📊 [DeepSeek] 实际token使用: 输入={input_tokens} (缓存命中={cached_tokens}), 输出={output_tokens}"
                 )
 
             # 记录token使用量
@@ -238,6 +216,7 @@ class ChatDeepSeek(ChatOpenAI):
                         output_tokens=output_tokens,
                         session_id=session_id,
                         analysis_type=analysis_type,
+                        cached_tokens=cached_tokens,
                     )
 
                     if usage_record:
@@ -13,6 +13,7 @@ from langchain_core.messages import BaseMessage, AIMessage, HumanMessage
 from langchain_core.outputs import LLMResult
 from pydantic import Field
 from ..config.config_manager import token_tracker
+from .invocation import LLMCancelledError, guarded_generate
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -161,8 +162,20 @@ class ChatGoogleOpenAI(ChatGoogleGenerativeAI):
         """重写生成方法，优化工具调用处理和内容格式"""
 
         try:
-            # 调用父类的生成方法
-            result = super()._generate(messages, stop, **kwargs)
+            # 调用父类的生成方法（调用前检查取消与截止时间；Gemini 客户端不接受
+            # 单次请求超时参数，在途中止依赖其自身的超时配置）
+            parent_generate = super()._generate
+            result = guarded_generate(
+                self,
+                lambda msgs, stp, run_manager, **kw: parent_generate(
+                    msgs, stp, run_manager=run_manager, **kw
+                ),
+                messages,
+                stop,
+                kwargs.pop("run_manager", None),
+                pass_timeout=False,
+                **kwargs,
+            )
 
             # 优化返回内容格式
             # 注意：result.generations 是二维列表 [[ChatGeneration]]
@@ -183,6 +196,8 @@ class ChatGoogleOpenAI(ChatGoogleGenerativeAI):
 
             return result
 
+        except LLMCancelledError:
+            raise
         except Exception as e:
             logger.error(f"❌ Google AI 生成失败: {e}")
             logger.exception(e)  # 打印完整的堆栈跟踪
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""
+可取消、带截止时间的 LLM 调用层
+
+以前超时只在调用方生效：并行分析师用 ``asyncio.wait_for`` 包装线程池任务，
+超时后线程仍在运行、继续消耗 token；DeepSeek 适配器用 SIGALRM 实现超时，
+只能在主线程生效，而分析都运行在工作线程里。本模块把截止时间和取消令牌
+放进 contextvars，随运行上下文传到每一次 HTTP 请求：
+
+- invocation_scope(timeout, token)：进入调用范围；嵌套时截止时间只会更早，
+  父范围取消会级联到子范围
+- guarded_generate()：所有适配器的统一调用入口
+  - 调用前已取消/已超时：不发请求，直接抛出 LLMCancelledError
+  - 请求超时设为剩余时间，截止时间到达时在 HTTP 层中止
+  - 适配器声明 ``supports_stream_cancellation`` 且调用范围可被外部取消时
+    以流式方式请求，每个分片之间检查取消令牌和截止时间，取消后立即关闭
+    连接，服务端停止生成；未声明的适配器（供应商可能拒绝 stream_options）
+    仍走普通请求
+- 节省的 token（未发送的请求 + 中止后未生成的输出）记入统计
+- 分析任务中的调用同时把增量输出推送到 token 流（见 token_stream）
+
+环境变量：
+- LLM_STREAM_CANCELLATION: 是否对支持的适配器以流式请求实现在途取消（默认 true）
+- LLM_TASK_DEADLINE_SECONDS: 单次分析任务的截止时间（秒，默认 0 不限制）
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from langchain_core.language_models.chat_models import generate_from_stream
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatResult
+
+from tradingagents.llm_adapters.token_stream import get_token_stream_publisher
+from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.prompt_serializer import count_tokens
+
+logger = get_logger("llm_adapters.invocation")
+
+# 没有历史数据时预估的输出 token 数
+DEFAULT_EXPECTED_COMPLETION_TOKENS = 1000
+
+
+class LLMCancelledError(Exception):
+    """LLM 调用被取消"""
+
+
+class LLMDeadlineExceeded(LLMCancelledError, TimeoutError):
+    """LLM 调用超过截止时间"""
+
+
+class CancellationToken:
+    """线程安全的取消令牌"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[str], None]] = []
+        self.reason: Optional[str] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(reason)
+            except Exception as e:
+                logger.debug(f"取消回调失败: {e}")
+
+    def add_callback(self, callback: Callable[[str], None]) -> None:
+        """注册取消回调；已取消时立即执行"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self.reason or "cancelled")
+
+    def remove_callback(self, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+@dataclass
+class InvocationScope:
+    """调用范围：截止时间（time.monotonic）+ 取消令牌"""
+
+    token: CancellationToken = field(default_factory=CancellationToken)
+    deadline: Optional[float] = None
+    name: str = ""
+    # 令牌是否可能被外部取消（传入令牌、父范围或按任务注册）
+    cancellable: bool = False
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def error(self) -> Optional[LLMCancelledError]:
+        """已取消或已超时时返回对应异常"""
+        label = f"[{self.name}] " if self.name else ""
+        if self.token.cancelled:
+            return LLMCancelledError(f"{label}LLM调用已取消: {self.token.reason}")
+        if self.expired:
+            return LLMDeadlineExceeded(f"{label}LLM调用超过截止时间")
+        return None
+
+    def check(self) -> None:
+        error = self.error()
+        if error is not None:
+            raise error
+
+
+_current_scope: contextvars.ContextVar[Optional[InvocationScope]] = contextvars.ContextVar(
+    "tradingagents_llm_invocation_scope", default=None
+)
+
+# task_id -> 取消令牌（同一进程内按任务取消在途调用）
+_task_tokens: Dict[str, CancellationToken] = {}
+_task_tokens_lock = threading.Lock()
+
+
+def current_scope() -> Optional[InvocationScope]:
+    """当前调用范围；不在范围内时返回 None"""
+    return _current_scope.get()
+
+
+@contextmanager
+def invocation_scope(
+    timeout: Optional[float] = None,
+    token: Optional[CancellationToken] = None,
+    name: str = "",
+    task_id: Optional[str] = None,
+) -> Iterator[InvocationScope]:
+    """
+    进入 LLM 调用范围
+
+    Args:
+        timeout: 本范围的超时（秒）；与父范围取较早的截止时间
+        token: 取消令牌；不传则新建（父范围取消时级联取消）
+        name: 名称（用于日志）
+        task_id: 分析任务ID；注册后可通过 cancel_task_invocations() 取消
+    """
+    parent = _current_scope.get()
+
+    deadline = time.monotonic() + timeout if timeout else None
+    if parent is not None and parent.deadline is not None:
+        deadline = parent.deadline if deadline is None else min(deadline, parent.deadline)
+
+    scope = InvocationScope(
+        token=token or CancellationToken(),
+        deadline=deadline,
+        name=name,
+        cancellable=token is not None or bool(task_id) or (parent is not None and parent.cancellable),
+    )
+    if parent is not None:
+        parent.token.add_callback(scope.token.cancel)
+    if task_id:
+        with _task_tokens_lock:
+            _task_tokens[task_id] = scope.token
+
+    ctx_token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(ctx_token)
+        if parent is not None:
+            parent.token.remove_callback(scope.token.cancel)
+        if task_id:
+            with _task_tokens_lock:
+                if _task_tokens.get(task_id) is scope.token:
+                    del _task_tokens[task_id]
+
+
+def cancel_task_invocations(task_id: str, reason: str = "任务已取消") -> bool:
+    """取消某个分析任务的全部在途/后续 LLM 调用（同一进程内）"""
+    with _task_tokens_lock:
+        token = _task_tokens.get(task_id)
+    if token is None:
+        return False
+    token.cancel(reason)
+    logger.info(f"🛑 已取消任务 {task_id} 的LLM调用: {reason}")
+    return True
+
+
+def task_deadline_seconds() -> Optional[float]:
+    """单次分析任务的截止时间（秒），未配置时返回 None"""
+    try:
+        seconds = float(os.getenv("LLM_TASK_DEADLINE_SECONDS", "0"))
+    except ValueError:
+        return None
+    return seconds if seconds > 0 else None
+
+
+def _stream_cancellation_enabled() -> bool:
+    return os.getenv("LLM_STREAM_CANCELLATION", "true").lower() == "true"
+
+
+class InvocationStats:
+    """取消/超时统计与节省的 token"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            "calls": 0,
+            "completed": 0,
+            "skipped": 0,
+            "aborted": 0,
+            "deadline_exceeded": 0,
+            "tokens_saved": 0,
+        }
+        # 模型 -> (完成次数, 输出token总数)，用于预估被取消调用的输出
+        self._completions: Dict[str, List[int]] = {}
+
+    def expected_completion_tokens(self, model: str) -> int:
+        with self._lock:
+            count, total = self._completions.get(model, (0, 0))
+        return total // count if count else DEFAULT_EXPECTED_COMPLETION_TOKENS
+
+    def record_completed(self, model: str, completion_tokens: int) -> None:
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["completed"] += 1
+            if completion_tokens > 0:
+                entry = self._completions.setdefault(model, [0, 0])
+                entry[0] += 1
+                entry[1] += completion_tokens
+
+    def record_cancelled(
+        self, model: str, error: LLMCancelledError, prompt_tokens: int, generated_tokens: Optional[int]
+    ) -> int:
+        """
+        记录被取消的调用
+
+        Args:
+            generated_tokens: 中止前已生成的输出；None 表示请求未发送
+
+        Returns:
+            节省的 token 数
+        """
+        expected = self.expected_completion_tokens(model)
+        if generated_tokens is None:
+            saved = prompt_tokens + expected
+        else:
+            saved = max(0, expected - generated_tokens)
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["skipped" if generated_tokens is None else "aborted"] += 1
+            if isinstance(error, LLMDeadlineExceeded):
+                self.stats["deadline_exceeded"] += 1
+            self.stats["tokens_saved"] += saved
+        return saved
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def reset(self) -> None:
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+            self._completions.clear()
+
+
+_stats = InvocationStats()
+
+
+def get_invocation_stats() -> InvocationStats:
+    """获取全局调用统计"""
+    return _stats
+
+
+def _prompt_tokens(messages: List[BaseMessage]) -> int:
+    return sum(count_tokens(str(getattr(m, "content", "") or "")) for m in messages)
+
+
+def _result_completion_tokens(result: ChatResult) -> int:
+    from tradingagents.llm_adapters.openai_compatible_base import extract_token_usage
+
+    completion_tokens = extract_token_usage(result)[1]
+    if completion_tokens:
+        return completion_tokens
+    return sum(count_tokens(g.text or "") for g in result.generations)
+
+
+def _cancelled(
+    scope: InvocationScope, model: str, messages: List[BaseMessage], generated: Optional[int], cause=None
+) -> LLMCancelledError:
+    error = scope.error() or LLMDeadlineExceeded(f"LLM调用超时: {cause}")
+    saved = _stats.record_cancelled(model, error, _prompt_tokens(messages), generated)
+    stage = "请求前" if generated is None else "生成中"
+    logger.warning(f"🛑 {error}（{stage}，模型: {model}，预计节省 {saved} tokens）")
+    return error
+
+
+def guarded_generate(
+    llm: Any,
+    generate: Callable[..., ChatResult],
+    messages: List[BaseMessage],
+    stop: Optional[List[str]] = None,
+    run_manager: Any = None,
+    stream: Optional[Callable[..., Iterator[Any]]] = None,
+    pass_timeout: bool = True,
+    **kwargs: Any,
+) -> ChatResult:
+    """
+    在当前调用范围内执行一次生成
+
+    Args:
+        llm: 模型实例（用于读取模型名）
+        generate: 父类的 _generate
+        stream: 父类的 _stream；提供时用于 token 流推送，适配器声明
+            ``supports_stream_cancellation`` 时还用于在途取消并请求流式用量
+        pass_timeout: 是否把剩余时间作为请求超时传给底层客户端
+    """
+    scope = _current_scope.get()
+    emitter = get_token_stream_publisher().open()
+    if scope is None and emitter is None:
+        return generate(messages, stop, run_manager, **kwargs)
+
+    model = str(getattr(llm, "model_name", None) or getattr(llm, "model", None) or "unknown")
+    scope = scope or InvocationScope()
+    if scope.error() is not None:
+        raise _cancelled(scope, model, messages, None)
+
+    remaining = scope.remaining()
+    if pass_timeout and remaining is not None:
+        requested = kwargs.get("timeout")
+        kwargs["timeout"] = min(requested, remaining) if requested else remaining
+
+    # 只有声明支持的适配器才发送 stream_options（stream_usage），其余供应商可能拒绝该参数
+    stream_capable = bool(getattr(llm, "supports_stream_cancellation", False))
+    use_stream = stream is not None and (
+        emitter is not None
+        or (stream_capable and scope.cancellable and _stream_cancellation_enabled())
+    )
+    if not use_stream:
+        try:
+            result = generate(messages, stop, run_manager, **kwargs)
+        except Exception as e:
+            if emitter is not None:
+                emitter.close()
+            if scope.error() is not None:
+                raise _cancelled(scope, model, messages, 0, e) from e
+            raise
+        if emitter is not None:
+            # 不支持流式的适配器：完成后一次性推送
+            emitter.close("".join(g.text or "" for g in result.generations))
+        _stats.record_completed(model, _result_completion_tokens(result))
+        return result
+
+    # 流式请求：每个分片之间检查取消，关闭迭代器即关闭 HTTP 连接
+    chunks = []
+    if stream_capable:
+        kwargs.setdefault("stream_usage", True)
+    iterator = stream(messages, stop, run_manager, **kwargs)
+    try:
+        for chunk in iterator:
+            chunks.append(chunk)
+            if emitter is not None:
+                emitter.write(chunk.text)
+            if scope.error() is not None:
+                generated = count_tokens("".join(c.text or "" for c in chunks))
+                raise _cancelled(scope, model, messages, generated)
+    except LLMCancelledError:
+        raise
+    except Exception as e:
+        if scope.error() is not None:
+            generated = count_tokens("".join(c.text or "" for c in chunks))
+            raise _cancelled(scope, model, messages, generated, e) from e
+        raise
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        if emitter is not None:
+            emitter.close()
+
+    result = generate_from_stream(iter(chunks))
+    _stats.record_completed(model, _result_completion_tokens(result))
+    return result
@@ -6,7 +6,7 @@ OpenAI兼容适配器基类
 
 import os
 import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, ClassVar, Dict, List, Optional, Tuple, Union
 from langchain_core.messages import BaseMessage
 from langchain_core.outputs import ChatResult
 from langchain_openai import ChatOpenAI
@@ -14,6 +14,8 @@ from langchain_core.callbacks import CallbackManagerForLLMRun
 
 # 导入统一日志系统
 from tradingagents.utils.logging_init import setup_llm_logging
+from tradingagents.utils.prompt_serializer import count_tokens, truncate_to_tokens
+from tradingagents.llm_adapters.invocation import guarded_generate
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger, get_logger_manager
@@ -35,6 +37,10 @@ class OpenAICompatibleBase(ChatOpenAI):
     OpenAI兼容适配器基类
     为所有支持OpenAI接口的LLM提供商提供统一实现
     """
+
+    # 供应商的流式接口接受 stream_options（返回用量）时由子类开启，
+    # 开启后可被取消的调用以流式请求，取消时在途中止
+    supports_stream_cancellation: ClassVar[bool] = False
     
     def __init__(
         self,
@@ -167,36 +173,86 @@ class OpenAICompatibleBase(ChatOpenAI):
         # 记录开始时间
         start_time = time.time()
         
-        # 调用父类生成方法
-        result = super()._generate(messages, stop, run_manager, **kwargs)
-        
+        # 调用父类生成方法（携带调用范围的截止时间与取消令牌）
+        result = guarded_generate(
+            self,
+            super()._generate,
+            messages,
+            stop,
+            run_manager,
+            stream=super()._stream,
+            **kwargs,
+        )
+
         # 记录token使用
         self._track_token_usage(result, kwargs, start_time)
         
         return result
 
     def _track_token_usage(self, result: ChatResult, kwargs: Dict, start_time: float):
-        """记录token使用量并输出日志"""
+        """记录token使用量（含供应商提示词缓存命中数）并输出日志"""
         if not TOKEN_TRACKING_ENABLED:
             return
         try:
-            # 统计token信息
-            usage = getattr(result, "usage_metadata", None)
-            total_tokens = usage.get("total_tokens") if usage else None
-            prompt_tokens = usage.get("input_tokens") if usage else None
-            completion_tokens = usage.get("output_tokens") if usage else None
+            prompt_tokens, completion_tokens, cached_tokens = extract_token_usage(result)
+            total_tokens = prompt_tokens + completion_tokens
+            hit_rate = cached_tokens / prompt_tokens if prompt_tokens else 0.0
 
             elapsed = time.time() - start_time
             logger.info(
                 f"📊 Token使用 - Provider: {getattr(self, 'provider_name', 'unknown')}, Model: {getattr(self, 'model_name', 'unknown')}, "
-                f"总tokens: {total_tokens}, 提示: {prompt_tokens}, 补全: {completion_tokens}, 用时: {elapsed:.2f}s"
+                f"总tokens: {total_tokens}, 提示: {prompt_tokens} (缓存命中: {cached_tokens}, {hit_rate:.0%}), "
+                f"补全: {completion_tokens}, 用时: {elapsed:.2f}s"
             )
+
+            if prompt_tokens or completion_tokens:
+                token_tracker.track_usage(
+                    provider=getattr(self, "provider_name", None) or "unknown",
+                    model_name=getattr(self, "model_name", None) or "unknown",
+                    input_tokens=prompt_tokens,
+                    output_tokens=completion_tokens,
+                    session_id=kwargs.get("session_id"),
+                    analysis_type=kwargs.get("analysis_type", "stock_analysis"),
+                    cached_tokens=cached_tokens,
+                )
         except Exception as e:
             logger.warning(f"⚠️ Token跟踪记录失败: {e}")
 
 
+def extract_token_usage(result: ChatResult) -> Tuple[int, int, int]:
+    """
+    从生成结果中提取 (输入token, 输出token, 缓存命中token)
+
+    兼容不同供应商的缓存字段：
+    - OpenAI / DashScope: prompt_tokens_details.cached_tokens
+    - DeepSeek: prompt_cache_hit_tokens
+    - LangChain usage_metadata: input_token_details.cache_read
+    """
+    token_usage = (getattr(result, "llm_output", None) or {}).get("token_usage") or {}
+    if token_usage:
+        details = token_usage.get("prompt_tokens_details") or {}
+        cached = details.get("cached_tokens") or token_usage.get("prompt_cache_hit_tokens") or 0
+        return (
+            int(token_usage.get("prompt_tokens") or 0),
+            int(token_usage.get("completion_tokens") or 0),
+            int(cached),
+        )
+
+    generations = getattr(result, "generations", None) or []
+    message = getattr(generations[0], "message", None) if generations else None
+    usage = getattr(message, "usage_metadata", None) or {}
+    details = usage.get("input_token_details") or {}
+    return (
+        int(usage.get("input_tokens") or 0),
+        int(usage.get("output_tokens") or 0),
+        int(details.get("cache_read") or 0),
+    )
+
+
 class ChatDeepSeekOpenAI(OpenAICompatibleBase):
     """DeepSeek OpenAI兼容适配器"""
+
+    supports_stream_cancellation: ClassVar[bool] = True
     
     def __init__(
         self,
@@ -220,6 +276,8 @@ class ChatDeepSeekOpenAI(OpenAICompatibleBase):
 
 class ChatDashScopeOpenAIUnified(OpenAICompatibleBase):
     """阿里百炼 DashScope OpenAI兼容适配器"""
+
+    supports_stream_cancellation: ClassVar[bool] = True
     
     def __init__(
         self,
@@ -304,10 +362,8 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
         )
     
     def _estimate_tokens(self, text: str) -> int:
-        """估算文本的token数量（千帆模型专用）"""
-        # 千帆模型的token估算：中文约1.5字符/token，英文约4字符/token
-        # 保守估算：2字符/token
-        return max(1, len(text) // 2)
+        """估算文本的token数量（千帆模型专用，基于分词器计数）"""
+        return max(1, count_tokens(text, self.model_name))
     
     def _truncate_messages(self, messages: List[BaseMessage], max_tokens: int = 4500) -> List[BaseMessage]:
         """截断消息以适应千帆模型的token限制"""
@@ -327,8 +383,9 @@ class ChatQianfanOpenAI(OpenAICompatibleBase):
                 # 如果是第一条消息且超长，进行内容截断
                 if not truncated_messages:
                     remaining_tokens = max_tokens - 100  # 预留100个token
-                    max_chars = remaining_tokens * 2  # 2字符/token
-                    truncated_content = content[:max_chars] + "...(内容已截断)"
+                    truncated_content = truncate_to_tokens(
+                        content, remaining_tokens, self.model_name
+                    )
                     
                     # 创建截断后的消息
                     if hasattr(message, 'content'):
@@ -389,10 +446,8 @@ class ChatZhipuOpenAI(OpenAICompatibleBase):
         )
     
     def _estimate_tokens(self, text: str) -> int:
-        """估算文本的token数量（GLM模型专用）"""
-        # GLM模型的token估算：中文约1.5字符/token，英文约4字符/token
-        # 保守估算：2字符/token
-        return max(1, len(text) // 2)
+        """估算文本的token数量（GLM模型专用，基于分词器计数）"""
+        return max(1, count_tokens(text, self.model_name))
 
 
 class ChatCustomOpenAI(OpenAICompatibleBase):
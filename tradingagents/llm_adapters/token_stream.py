@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 输出的 token 级流式推送
+
+以前前端只能看到进度跟踪器的粗粒度步骤，分析师报告要等整次 LLM 调用结束
+才出现。本模块把流式请求的增量文本按任务/智能体/辩论轮次打上标签后发布：
+
+- agent_stream_scope(agent, round)：图节点执行时进入，标记当前智能体
+- get_token_stream_publisher().open()：guarded_generate 每次调用开始时获取
+  发射器；不在分析任务中、未安装发布端或已禁用时返回 None
+- TokenStreamEmitter：在生产端合并分片，按时间间隔/字符数批量发布，
+  每个智能体每秒只发布有限条消息，不为客户端缓存完整输出
+- set_token_sink()：安装发布端（Web 应用启动时安装 Redis 发布端，
+  频道与任务进度相同：task_progress:{task_id}）
+
+消息格式：
+    {"type": "token", "task_id": "...", "agent": "Market Analyst", "round": null,
+     "call": 12, "seq": 3, "text": "增量文本", "done": false, "timestamp": 1700000000.0}
+
+环境变量：
+- LLM_TOKEN_STREAM_ENABLED: 是否推送 token 流（默认 true）
+- LLM_TOKEN_STREAM_FLUSH_MS: 生产端合并间隔（毫秒，默认 150）
+- LLM_TOKEN_STREAM_MAX_CHARS: 单条消息最多合并的字符数（默认 400）
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from tradingagents.utils.logging_init import get_logger
+from tradingagents.utils.run_context import get_run_config
+
+logger = get_logger("llm_adapters.token_stream")
+
+TOKEN_STREAM_CHANNEL = "task_progress:{task_id}"
+
+# 发布失败后暂停推送的时间（秒），避免 Redis 不可用时拖慢 LLM 调用
+PUBLISH_SUSPEND_SECONDS = 30.0
+
+# 发布端：(频道, JSON 消息) -> None
+TokenSink = Callable[[str, str], None]
+
+_agent_tags: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "tradingagents_token_stream_agent", default=None
+)
+
+
+@contextmanager
+def agent_stream_scope(agent: str, round: Optional[int] = None) -> Iterator[None]:
+    """标记当前执行的智能体与辩论轮次"""
+    token = _agent_tags.set({"agent": agent, "round": round})
+    try:
+        yield
+    finally:
+        _agent_tags.reset(token)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+class TokenStreamEmitter:
+    """单次 LLM 调用的增量输出发射器（生产端合并）"""
+
+    def __init__(
+        self,
+        publisher: "TokenStreamPublisher",
+        task_id: str,
+        agent: Optional[str],
+        round: Optional[int],
+        call: int,
+        flush_interval: float,
+        max_chars: int,
+    ):
+        self._publisher = publisher
+        self.task_id = task_id
+        self.agent = agent
+        self.round = round
+        self.call = call
+        self._flush_interval = flush_interval
+        self._max_chars = max_chars
+        self._parts: List[str] = []
+        self._size = 0
+        self._seq = 0
+        self._last_flush = time.monotonic()
+        self._closed = False
+
+    def write(self, text: str) -> None:
+        if not text or self._closed:
+            return
+        self._parts.append(text)
+        self._size += len(text)
+        if (
+            self._size >= self._max_chars
+            or time.monotonic() - self._last_flush >= self._flush_interval
+        ):
+            self.flush()
+
+    def flush(self, done: bool = False) -> None:
+        if self._closed or (not self._parts and not done):
+            return
+        text = "".join(self._parts)
+        self._parts.clear()
+        self._size = 0
+        self._seq += 1
+        self._last_flush = time.monotonic()
+        self._closed = done
+        self._publisher.publish(
+            self.task_id,
+            {
+                "type": "token",
+                "task_id": self.task_id,
+                "agent": self.agent,
+                "round": self.round,
+                "call": self.call,
+                "seq": self._seq,
+                "text": text,
+                "done": done,
+                "timestamp": time.time(),
+            },
+        )
+
+    def close(self, text: str = "") -> None:
+        """发布剩余文本（可附加最后一段）并标记本次调用结束"""
+        if text and not self._closed:
+            self._parts.append(text)
+        self.flush(done=True)
+
+
+class TokenStreamPublisher:
+    """token 流发布器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sink: Optional[TokenSink] = None
+        self._call_seq = itertools.count(1)
+        self._suspended_until = 0.0
+        self.stats = {"calls": 0, "messages": 0, "chars": 0, "publish_errors": 0}
+
+    def set_sink(self, sink: Optional[TokenSink]) -> None:
+        self._sink = sink
+        self._suspended_until = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return (
+            self._sink is not None
+            and os.getenv("LLM_TOKEN_STREAM_ENABLED", "true").lower() == "true"
+        )
+
+    def open(self) -> Optional[TokenStreamEmitter]:
+        """为当前 LLM 调用创建发射器；不在分析任务中时返回 None"""
+        if not self.enabled:
+            return None
+        run_config = get_run_config()
+        task_id = run_config.get("task_id") if run_config else None
+        if not task_id:
+            return None
+
+        tags = _agent_tags.get() or {}
+        with self._lock:
+            self.stats["calls"] += 1
+        return TokenStreamEmitter(
+            self,
+            task_id=str(task_id),
+            agent=tags.get("agent"),
+            round=tags.get("round"),
+            call=next(self._call_seq),
+            flush_interval=_env_int("LLM_TOKEN_STREAM_FLUSH_MS", 150) / 1000,
+            max_chars=_env_int("LLM_TOKEN_STREAM_MAX_CHARS", 400),
+        )
+
+    def publish(self, task_id: str, payload: Dict[str, Any]) -> None:
+        """发布一条消息；失败只记录，不影响 LLM 调用"""
+        sink = self._sink
+        if sink is None or time.monotonic() < self._suspended_until:
+            return
+        try:
+            sink(
+                TOKEN_STREAM_CHANNEL.format(task_id=task_id),
+                json.dumps(payload, ensure_ascii=False),
+            )
+        except Exception as e:
+            with self._lock:
+                self.stats["publish_errors"] += 1
+                self._suspended_until = time.monotonic() + PUBLISH_SUSPEND_SECONDS
+            logger.warning(f"⚠️ token 流发布失败，暂停推送 {PUBLISH_SUSPEND_SECONDS:.0f} 秒: {e}")
+            return
+        with self._lock:
+            self.stats["messages"] += 1
+            self.stats["chars"] += len(payload.get("text") or "")
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+
+_publisher = TokenStreamPublisher()
+
+
+def get_token_stream_publisher() -> TokenStreamPublisher:
+    """获取全局 token 流发布器"""
+    return _publisher
+
+
+def set_token_sink(sink: Optional[TokenSink]) -> None:
+    """安装 token 流发布端；传 None 关闭推送"""
+    _publisher.set_sink(sink)
@@ -8,8 +8,11 @@
 
 import logging
 from datetime import datetime
+from typing import Dict, List
 import re
 
+from tradingagents.utils.news_dedup import cluster_near_duplicates, dedup_enabled
+
 logger = logging.getLogger(__name__)
 
 class UnifiedNewsAnalyzer:
@@ -180,10 +183,13 @@ class UnifiedNewsAnalyzer:
                 {'symbols': clean_code},
             ]
 
+            # 多取一些候选，近似重复合并后仍能凑够 max_news 条
+            fetch_limit = max_news * 3 if dedup_enabled() else max_news
+
             news_items = []
             for query in query_list:
-                cursor = collection.find(query).sort('publish_time', -1).limit(max_news)
-                news_items = list(cursor)
+                cursor = collection.find(query).sort('publish_time', -1).limit(fetch_limit)
+                news_items = self._collapse_near_duplicates(list(cursor), max_news)
                 if news_items:
                     logger.info(f"[统一新闻工具] 📊 使用查询找到 {len(news_items)} 条新闻")
                     # 记录新闻的时间范围
@@ -236,6 +242,20 @@ class UnifiedNewsAnalyzer:
             logger.error(traceback.format_exc())
             return ""
 
+    def _collapse_near_duplicates(self, news_items: List[Dict], max_news: int) -> List[Dict]:
+        """合并近似重复新闻（保留每簇最新的一条），最多返回 max_news 条"""
+        if not dedup_enabled() or len(news_items) <= 1:
+            return news_items[:max_news]
+
+        clusters, _ = cluster_near_duplicates(
+            news_items,
+            lambda news: (news.get('title', ''), news.get('content', '') or news.get('summary', '')),
+        )
+        merged = len(news_items) - len(clusters)
+        if merged:
+            logger.info(f"[统一新闻工具] 🧹 合并近似重复新闻 {merged} 条")
+        return [cluster.representative for cluster in clusters[:max_news]]
+
     def _sync_news_from_akshare(self, stock_code: str, max_news: int = 10) -> bool:
         """
         从AKShare同步新闻到数据库（同步方法）
@@ -249,8 +269,7 @@ class UnifiedNewsAnalyzer:
             bool: 是否同步成功
         """
         try:
-            import asyncio
-            import concurrent.futures
+            from tradingagents.utils.async_bridge import run_async
 
             # 标准化股票代码（去除后缀）
             clean_code = stock_code.replace('.SH', '').replace('.SZ', '').replace('.SS', '')\
@@ -258,71 +277,49 @@ class UnifiedNewsAnalyzer:
 
             logger.info(f"[统一新闻工具] 🔄 开始同步 {clean_code} 的新闻...")
 
-            # 🔥 在新线程中运行，使用同步数据库客户端
-            def run_sync_in_new_thread():
-                """在新线程中创建新的事件循环并运行同步任务"""
-                # 创建新的事件循环
-                new_loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(new_loop)
-
+            async def get_news_task():
                 try:
-                    # 定义异步获取新闻任务
-                    async def get_news_task():
-                        try:
-                            # 动态导入 AKShare provider（正确的导入路径）
-                            from tradingagents.dataflows.providers.china.akshare import AKShareProvider
-
-                            # 创建 provider 实例
-                            provider = AKShareProvider()
-
-                            # 调用 provider 获取新闻
-                            news_data = await provider.get_stock_news(
-                                symbol=clean_code,
-                                limit=max_news
-                            )
-
-                            return news_data
-
-                        except Exception as e:
-                            logger.error(f"[统一新闻工具] ❌ 获取新闻失败: {e}")
-                            import traceback
-                            logger.error(traceback.format_exc())
-                            return None
-
-                    # 在新的事件循环中获取新闻
-                    news_data = new_loop.run_until_complete(get_news_task())
-
-                    if not news_data:
-                        logger.warning(f"[统一新闻工具] ⚠️ 未获取到新闻数据")
-                        return False
-
-                    logger.info(f"[统一新闻工具] 📥 获取到 {len(news_data)} 条新闻")
-
-                    # 🔥 使用同步方法保存到数据库（不依赖事件循环）
-                    from app.services.news import NewsDataService
-
-                    news_service = NewsDataService()
-                    saved_count = news_service.save_news_data_sync(
-                        news_data=news_data,
-                        data_source="akshare",
-                        market="CN"
+                    # 动态导入 AKShare provider（正确的导入路径）
+                    from tradingagents.dataflows.providers.china.akshare import AKShareProvider
+
+                    # 创建 provider 实例
+                    provider = AKShareProvider()
+
+                    # 调用 provider 获取新闻
+                    return await provider.get_stock_news(
+                        symbol=clean_code,
+                        limit=max_news
                     )
 
-                    logger.info(f"[统一新闻工具] ✅ 同步成功: {saved_count} 条新闻")
-                    return saved_count > 0
+                except Exception as e:
+                    logger.error(f"[统一新闻工具] ❌ 获取新闻失败: {e}")
+                    import traceback
+                    logger.error(traceback.format_exc())
+                    return None
+
+            # 在进程级后台事件循环中获取新闻（不再每次新建线程和事件循环）
+            news_data = run_async(get_news_task(), timeout=30)
+
+            if not news_data:
+                logger.warning(f"[统一新闻工具] ⚠️ 未获取到新闻数据")
+                return False
+
+            logger.info(f"[统一新闻工具] 📥 获取到 {len(news_data)} 条新闻")
+
+            # 🔥 使用同步方法保存到数据库（不依赖事件循环）
+            from app.services.news import NewsDataService
 
-                finally:
-                    # 清理事件循环
-                    new_loop.close()
+            news_service = NewsDataService()
+            saved_count = news_service.save_news_data_sync(
+                news_data=news_data,
+                data_source="akshare",
+                market="CN"
+            )
 
-            # 在线程池中执行
-            logger.info(f"[统一新闻工具] 在新线程中运行同步任务，避免事件循环冲突")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-                future = executor.submit(run_sync_in_new_thread)
-                result = future.result(timeout=30)  # 30秒超时
-                return result
+            logger.info(f"[统一新闻工具] ✅ 同步成功: {saved_count} 条新闻")
+            return saved_count > 0
 
-        except concurrent.futures.TimeoutError:
+        except TimeoutError:
             logger.error(f"[统一新闻工具] ❌ 同步新闻超时（30秒）")
             return False
         except Exception as e:
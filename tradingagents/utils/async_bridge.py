@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+常驻后台事件循环（同步代码调用异步代码的桥）
+
+以前很多同步调用点每次都用 asyncio.run() / new_event_loop() 去等待一个
+Motor 或异步数据源调用：每次都新建并销毁事件循环，绑定在循环上的
+asyncio.Lock、连接池随之失效（"attached to a different loop"），
+在已有运行中循环的线程里还要再开线程绕开。本模块在每个进程里维护一个
+常驻的后台事件循环线程，所有同步调用点共用：
+
+- run_async(coro, timeout)：在后台循环中执行协程并阻塞等待结果
+  （asyncio.run_coroutine_threadsafe），调用方的 contextvars（运行级配置、
+  LLM 调用范围等）会随协程一起带过去
+- submit_async(coro)：提交后不等待，返回 concurrent.futures.Future
+- get_resource(name, factory)：后台循环专属的共享客户端（Redis/Motor 连接池等）。
+  应用主循环上创建的异步客户端不能拿到后台循环里使用，经桥执行的调用点
+  应使用这里在后台循环线程上创建的客户端
+- fork 出的子进程首次调用时自动重建循环线程（专属客户端随之重建）
+
+在后台循环线程内部同步等待会死锁，此时直接抛出 RuntimeError；
+异步代码应直接 await。
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import os
+import threading
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("utils.async_bridge")
+
+
+class AsyncLoopBridge:
+    """进程级后台事件循环"""
+
+    def __init__(self, name: str = "tradingagents-async-bridge"):
+        self._name = name
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        # name -> (创建时所在的循环, 对象)；循环重建后旧对象作废
+        self._resources: Dict[str, Tuple[asyncio.AbstractEventLoop, Any]] = {}
+        self.stats = {"calls": 0, "errors": 0, "timeouts": 0, "loop_starts": 0}
+
+    def _alive(self) -> bool:
+        return (
+            self._loop is not None
+            and self._pid == os.getpid()
+            and self._thread is not None
+            and self._thread.is_alive()
+            and not self._loop.is_closed()
+        )
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._alive():
+            return self._loop
+        with self._lock:
+            if self._alive():
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_forever():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_forever, name=self._name, daemon=True)
+            thread.start()
+            ready.wait()
+
+            self._loop, self._thread, self._pid = loop, thread, os.getpid()
+            self.stats["loop_starts"] += 1
+            logger.debug(f"🔁 后台事件循环已启动: {self._name} (pid={self._pid})")
+            return loop
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环（首次访问时启动）"""
+        return self._ensure_loop()
+
+    def in_loop_thread(self) -> bool:
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """提交协程到后台循环，不等待结果"""
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("不能在后台事件循环线程内同步等待协程，请直接 await")
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """在后台循环中执行协程并等待结果"""
+        future = self.submit(coro)
+        with self._lock:
+            self.stats["calls"] += 1
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError as e:
+            future.cancel()
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise TimeoutError(f"异步调用超时 ({timeout}秒)") from e
+        except BaseException:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+
+    def get_resource(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        获取后台循环专属的共享对象（首次调用时在循环线程上创建）
+
+        Args:
+            name: 对象名称
+            factory: 创建函数（在后台循环线程上调用）
+
+        Returns:
+            绑定到后台循环的对象，只能在经桥执行的协程里使用
+        """
+        loop = self._ensure_loop()
+        entry = self._resources.get(name)
+        if entry is not None and entry[0] is loop:
+            return entry[1]
+        if self.in_loop_thread():
+            return self._create_resource(name, factory, loop)
+
+        async def create():
+            return self._create_resource(name, factory, loop)
+
+        return asyncio.run_coroutine_threadsafe(create(), loop).result()
+
+    def _create_resource(
+        self, name: str, factory: Callable[[], Any], loop: asyncio.AbstractEventLoop
+    ) -> Any:
+        # 只在后台循环线程上执行，检查与写入之间不会切换，不会重复创建
+        entry = self._resources.get(name)
+        if entry is None or entry[0] is not loop:
+            self._resources[name] = (loop, factory())
+            logger.debug(f"🔌 后台循环专属客户端已创建: {name}")
+        return self._resources[name][1]
+
+    async def _close_resources(self) -> None:
+        resources, self._resources = self._resources, {}
+        for name, (_, resource) in resources.items():
+            try:
+                close = getattr(resource, "aclose", None) or getattr(resource, "close", None)
+                result = close() if close is not None else None
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.debug(f"关闭后台循环客户端失败 {name}: {e}")
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """停止后台循环（进程退出时调用），先关闭专属客户端"""
+        with self._lock:
+            if not self._alive():
+                return
+            loop, thread = self._loop, self._thread
+        if not self.in_loop_thread():
+            try:
+                asyncio.run_coroutine_threadsafe(self._close_resources(), loop).result(timeout)
+            except Exception as e:
+                logger.debug(f"关闭后台循环客户端超时或失败: {e}")
+        with self._lock:
+            if self._loop is not loop:
+                return
+            self._loop = self._thread = self._pid = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
+            loop.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "running": self._alive()}
+
+
+_bridge = AsyncLoopBridge()
+atexit.register(_bridge.stop)
+
+
+def get_async_bridge() -> AsyncLoopBridge:
+    """获取进程级后台事件循环"""
+    return _bridge
+
+
+def run_async(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    """在同步代码中执行协程并返回结果（可在已有运行中循环的线程里调用）"""
+    return _bridge.run(coro, timeout)
+
+
+def submit_async(coro: Coroutine) -> concurrent.futures.Future:
+    """提交协程到后台循环执行，不等待结果"""
+    return _bridge.submit(coro)
+
+
+def get_bridge_resource(name: str, factory: Callable[[], Any]) -> Any:
+    """获取后台循环专属的共享对象（见 AsyncLoopBridge.get_resource）"""
+    return _bridge.get_resource(name, factory)
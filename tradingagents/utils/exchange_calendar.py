@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+离线交易所日历
+
+以前交易日只排除周末，节假日要靠每个入库周期去远端数据源探测
+（find_latest_trade_date_with_fallback）。本模块在本地维护一份带版本号的
+交易日历（上交所/深交所、港交所、纽交所/纳斯达克），包含节假日、午休和
+提前收盘：
+
+- 随包附带种子文件 tradingagents/utils/data/exchange_calendars.json
+- 同步任务把更新写到本地覆盖文件（EXCHANGE_CALENDAR_FILE，默认
+  {TRADINGAGENTS_DATA_DIR}/calendars/exchange_calendars.json），
+  加载时每个市场取版本号较高的一份；其他进程每分钟检查一次文件变化并重新加载
+- 查询基于 numpy 工作日日历，同时支持单个日期和日期数组：
+  is_session / previous_session / next_session / sessions_between
+
+日历覆盖范围（start ~ end）之外只排除周末，与原有行为一致。
+"""
+
+import json
+import os
+import threading
+import time as time_module
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("utils.exchange_calendar")
+
+SEED_FILE = Path(__file__).parent / "data" / "exchange_calendars.json"
+
+# 周一至周五开市
+WEEKMASK = "1111100"
+
+# 市场别名 -> 日历代码
+MARKET_ALIASES = {
+    "CN": "CN",
+    "A股": "CN",
+    "china": "CN",
+    "china_a": "CN",
+    "SSE": "CN",
+    "SZSE": "CN",
+    "HK": "HK",
+    "港股": "HK",
+    "hk": "HK",
+    "hong_kong": "HK",
+    "HKEX": "HK",
+    "US": "US",
+    "美股": "US",
+    "us": "US",
+    "NYSE": "US",
+    "NASDAQ": "US",
+}
+
+DateLike = Union[str, date, datetime, pd.Timestamp, np.datetime64]
+
+
+def normalize_market(market: Any) -> str:
+    """把各处使用的市场名称（A股/港股/美股、StockMarket 枚举值、交易所代码）转成日历代码"""
+    key = getattr(market, "value", market) or "CN"
+    code = MARKET_ALIASES.get(key) or MARKET_ALIASES.get(str(key).upper())
+    if code is None:
+        raise ValueError(f"不支持的市场: {market}")
+    return code
+
+
+def default_calendar_file() -> Path:
+    """本地覆盖文件路径（同步任务写入）"""
+    configured = os.getenv("EXCHANGE_CALENDAR_FILE")
+    if configured:
+        return Path(configured)
+    data_dir = os.getenv("TRADINGAGENTS_DATA_DIR", "./data")
+    return Path(data_dir) / "calendars" / "exchange_calendars.json"
+
+
+def _parse_time(value: str) -> time:
+    hh, mm = value.split(":")
+    return time(int(hh), int(mm))
+
+
+@dataclass
+class ExchangeCalendar:
+    """单个市场的交易日历"""
+
+    market: str
+    timezone: str
+    sessions: List[Tuple[time, time]]
+    holidays: List[date]
+    early_closes: Dict[date, time] = field(default_factory=dict)
+    start: Optional[date] = None
+    end: Optional[date] = None
+    version: int = 0
+    updated_at: Optional[str] = None
+    source: str = "bundled"
+    name: str = ""
+
+    def __post_init__(self):
+        self.tz = pytz.timezone(self.timezone)
+        self._holidays = np.array(sorted(set(self.holidays)), dtype="datetime64[D]")
+        self._busdaycal = np.busdaycalendar(weekmask=WEEKMASK, holidays=self._holidays)
+
+    @classmethod
+    def from_dict(cls, market: str, data: Dict[str, Any]) -> "ExchangeCalendar":
+        return cls(
+            market=market,
+            timezone=data["timezone"],
+            sessions=[(_parse_time(s), _parse_time(e)) for s, e in data["sessions"]],
+            holidays=[date.fromisoformat(d) for d in data.get("holidays", [])],
+            early_closes={
+                date.fromisoformat(d): _parse_time(t)
+                for d, t in (data.get("early_closes") or {}).items()
+            },
+            start=date.fromisoformat(data["start"]) if data.get("start") else None,
+            end=date.fromisoformat(data["end"]) if data.get("end") else None,
+            version=int(data.get("version", 0)),
+            updated_at=data.get("updated_at"),
+            source=data.get("source", "bundled"),
+            name=data.get("name", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "timezone": self.timezone,
+            "sessions": [[s.strftime("%H:%M"), e.strftime("%H:%M")] for s, e in self.sessions],
+            "start": self.start.isoformat() if self.start else None,
+            "end": self.end.isoformat() if self.end else None,
+            "version": self.version,
+            "updated_at": self.updated_at,
+            "source": self.source,
+            "holidays": [str(d) for d in self._holidays],
+            "early_closes": {
+                d.isoformat(): t.strftime("%H:%M") for d, t in sorted(self.early_closes.items())
+            },
+        }
+
+    # ==================== 日期转换 ====================
+
+    def _to_days(self, values) -> Tuple[np.ndarray, bool]:
+        """转换为 datetime64[D] 数组，返回 (数组, 是否标量)
+
+        带时区的时间先换算到交易所时区再取日期。
+        """
+        if isinstance(values, (str, date, datetime, pd.Timestamp, np.datetime64)):
+            if isinstance(values, datetime) and values.tzinfo is not None:
+                values = values.astimezone(self.tz)
+            if isinstance(values, (datetime, pd.Timestamp)):
+                values = values.date()
+            elif isinstance(values, str):
+                values = pd.Timestamp(values).date()
+            return np.array([values], dtype="datetime64[D]"), True
+
+        index = pd.DatetimeIndex(pd.to_datetime(values))
+        if index.tz is not None:
+            index = index.tz_convert(self.tz).tz_localize(None)
+        return index.values.astype("datetime64[D]"), False
+
+    @staticmethod
+    def _result(days: np.ndarray, scalar: bool):
+        return days[0].astype(object) if scalar else days
+
+    # ==================== 交易日查询 ====================
+
+    def is_session(self, dates):
+        """是否交易日（支持单个日期或日期数组）"""
+        days, scalar = self._to_days(dates)
+        result = np.is_busday(days, busdaycal=self._busdaycal)
+        return bool(result[0]) if scalar else result
+
+    def previous_session(self, dates, inclusive: bool = False):
+        """上一个交易日；inclusive=True 时当天是交易日则返回当天"""
+        days, scalar = self._to_days(dates)
+        if not inclusive:
+            days = days - np.timedelta64(1, "D")
+        result = np.busday_offset(days, 0, roll="backward", busdaycal=self._busdaycal)
+        return self._result(result, scalar)
+
+    def next_session(self, dates, inclusive: bool = False):
+        """下一个交易日；inclusive=True 时当天是交易日则返回当天"""
+        days, scalar = self._to_days(dates)
+        if not inclusive:
+            days = days + np.timedelta64(1, "D")
+        result = np.busday_offset(days, 0, roll="forward", busdaycal=self._busdaycal)
+        return self._result(result, scalar)
+
+    def offset_sessions(self, dates, count: int):
+        """向前/向后移动 count 个交易日（非交易日先回退到上一个交易日）"""
+        days, scalar = self._to_days(dates)
+        result = np.busday_offset(days, count, roll="backward", busdaycal=self._busdaycal)
+        return self._result(result, scalar)
+
+    def sessions_between(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """[start, end] 闭区间内的全部交易日（datetime64[D] 数组，.astype(object) 得到 date 列表）"""
+        start_day = self._to_days(start)[0][0]
+        end_day = self._to_days(end)[0][0]
+        if end_day < start_day:
+            return np.array([], dtype="datetime64[D]")
+        days = np.arange(start_day, end_day + np.timedelta64(1, "D"), dtype="datetime64[D]")
+        return days[np.is_busday(days, busdaycal=self._busdaycal)]
+
+    def session_count(self, start: DateLike, end: DateLike) -> int:
+        """[start, end] 闭区间内的交易日数量"""
+        start_day = self._to_days(start)[0][0]
+        end_day = self._to_days(end)[0][0]
+        return int(
+            np.busday_count(start_day, end_day + np.timedelta64(1, "D"), busdaycal=self._busdaycal)
+        )
+
+    def covers(self, day: DateLike) -> bool:
+        """日期是否在日历数据覆盖范围内（范围外只排除周末）"""
+        value = self._to_days(day)[0][0].astype(object)
+        return (self.start is None or value >= self.start) and (self.end is None or value <= self.end)
+
+    # ==================== 交易时段 ====================
+
+    def is_half_day(self, day: DateLike) -> bool:
+        return self._to_days(day)[0][0].astype(object) in self.early_closes
+
+    def session_times(self, day: DateLike) -> List[Tuple[datetime, datetime]]:
+        """指定日期的交易时段（交易所时区的 datetime），非交易日返回空列表"""
+        value = self._to_days(day)[0][0].astype(object)
+        if not self.is_session(value):
+            return []
+
+        close = self.early_closes.get(value)
+        result = []
+        for start, end in self.sessions:
+            if close is not None:
+                if start >= close:
+                    break
+                end = min(end, close)
+            result.append(
+                (
+                    self.tz.localize(datetime.combine(value, start)),
+                    self.tz.localize(datetime.combine(value, end)),
+                )
+            )
+        return result
+
+    def now(self) -> datetime:
+        return datetime.now(self.tz)
+
+    def _localize(self, moment: Optional[datetime]) -> datetime:
+        if moment is None:
+            return self.now()
+        if moment.tzinfo is None:
+            return self.tz.localize(moment)
+        return moment.astimezone(self.tz)
+
+    def is_open(self, moment: Optional[datetime] = None) -> bool:
+        """是否处于交易时段（考虑节假日、午休和提前收盘）"""
+        moment = self._localize(moment)
+        return any(start <= moment <= end for start, end in self.session_times(moment.date()))
+
+    def market_close(self, day: DateLike) -> Optional[datetime]:
+        """当日收盘时间（考虑提前收盘），非交易日返回 None"""
+        sessions = self.session_times(day)
+        return sessions[-1][1] if sessions else None
+
+    def latest_completed_session(self, moment: Optional[datetime] = None) -> date:
+        """最近一个已收盘的交易日（当天收盘前返回上一个交易日）"""
+        moment = self._localize(moment)
+        today = moment.date()
+        close = self.market_close(today)
+        if close is not None and moment >= close:
+            return today
+        return self.previous_session(today)
+
+
+class ExchangeCalendarRegistry:
+    """加载并缓存各市场日历，本地覆盖文件变化后自动重新加载"""
+
+    # 检查本地覆盖文件是否变化的间隔（秒）
+    CHECK_INTERVAL = 60.0
+
+    def __init__(self, seed_file: Path = SEED_FILE, local_file: Optional[Path] = None):
+        self._seed_file = seed_file
+        self._local_file = local_file
+        self._lock = threading.Lock()
+        self._calendars: Optional[Dict[str, ExchangeCalendar]] = None
+        self._local_mtime: Optional[float] = None
+        self._checked_at = 0.0
+
+    @property
+    def local_file(self) -> Path:
+        return self._local_file or default_calendar_file()
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, Any]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"⚠️ 读取交易日历失败 {path}: {e}")
+            return {}
+
+    def _mtime(self) -> Optional[float]:
+        try:
+            return self.local_file.stat().st_mtime
+        except OSError:
+            return None
+
+    def _load(self) -> Dict[str, ExchangeCalendar]:
+        self._local_mtime = self._mtime()
+        self._checked_at = time_module.monotonic()
+        data = self._read(self._seed_file)
+        for market, entry in self._read(self.local_file).items():
+            if int(entry.get("version", 0)) > int(data.get(market, {}).get("version", 0)):
+                data[market] = entry
+
+        calendars = {}
+        for market, entry in data.items():
+            try:
+                calendars[market] = ExchangeCalendar.from_dict(market, entry)
+            except Exception as e:
+                logger.warning(f"⚠️ 交易日历数据无效 {market}: {e}")
+        logger.debug(
+            "📅 交易日历已加载: "
+            + ", ".join(f"{m}(v{c.version}, {c.source})" for m, c in calendars.items())
+        )
+        return calendars
+
+    def get(self, market: Any = "CN") -> ExchangeCalendar:
+        code = normalize_market(market)
+        if self._calendars is None:
+            with self._lock:
+                if self._calendars is None:
+                    self._calendars = self._load()
+        elif time_module.monotonic() - self._checked_at > self.CHECK_INTERVAL:
+            self._checked_at = time_module.monotonic()
+            if self._mtime() != self._local_mtime:
+                logger.info("📅 交易日历本地文件已更新，重新加载")
+                self.reload()
+        if code not in self._calendars:
+            raise ValueError(f"没有 {code} 市场的交易日历")
+        return self._calendars[code]
+
+    def reload(self) -> None:
+        with self._lock:
+            self._calendars = self._load()
+
+    def save(self, calendars: Dict[str, ExchangeCalendar]) -> Path:
+        """写入本地覆盖文件（先写临时文件再替换）并重新加载"""
+        path = self.local_file
+        path.parent.mkdir(parents=True, exist_ok=True)
+        existing = self._read(path)
+        existing.update({market: cal.to_dict() for market, cal in calendars.items()})
+
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(existing, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+        self.reload()
+        return path
+
+    def get_versions(self) -> Dict[str, Dict[str, Any]]:
+        self.get("CN")
+        return {
+            market: {
+                "version": cal.version,
+                "source": cal.source,
+                "updated_at": cal.updated_at,
+                "start": cal.start.isoformat() if cal.start else None,
+                "end": cal.end.isoformat() if cal.end else None,
+            }
+            for market, cal in self._calendars.items()
+        }
+
+
+_registry = ExchangeCalendarRegistry()
+
+
+def get_calendar_registry() -> ExchangeCalendarRegistry:
+    """获取交易日历注册表"""
+    return _registry
+
+
+def get_exchange_calendar(market: Any = "CN") -> ExchangeCalendar:
+    """获取指定市场的交易日历（A股/港股/美股、CN/HK/US 或交易所代码）"""
+    return _registry.get(market)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+多关键词单遍匹配器（Aho-Corasick）
+
+新闻分类、情绪、重要性、紧急度、相关性评分原先各自对同一段文本执行
+``any(word in text for word in words)``，每篇新闻要被扫描几十到上百次。
+本模块把所有关键词词典编译成一个自动机（按失败链展开为确定性转移表），
+每篇新闻只扫描一遍即可得到所有分组的命中结果，耗时与词典大小无关。
+
+匹配语义与 ``keyword in text`` 一致（子串匹配、区分大小写）；需要忽略
+大小写时由调用方先把文本转为小写。
+
+用法：
+    matcher = get_keyword_matcher({"positive": ["增长", "利好"], "negative": ["下跌"]})
+    hits = matcher.scan(text)
+    hits.get("positive")            # 按词典顺序返回命中的关键词
+    hits.any("negative", end=20)    # 只看前 20 个字符（如标题部分）
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# (分组名, 组内序号, 关键词)
+_Keyword = Tuple[str, int, str]
+
+
+class KeywordHits:
+    """一次扫描的命中结果"""
+
+    __slots__ = ("_keywords", "_first_end")
+
+    def __init__(self, keywords: Sequence[_Keyword], first_end: Dict[int, int]):
+        self._keywords = keywords
+        # 关键词ID -> 首次出现的结束位置（不含）
+        self._first_end = first_end
+
+    def get(self, group: str, end: Optional[int] = None) -> List[str]:
+        """
+        返回分组内命中的关键词（按词典顺序）
+
+        Args:
+            group: 分组名
+            end: 只统计完全落在 text[:end] 内的命中；None 表示整段文本
+        """
+        matched = [
+            self._keywords[kid]
+            for kid, pos in self._first_end.items()
+            if self._keywords[kid][0] == group and (end is None or pos <= end)
+        ]
+        matched.sort(key=lambda item: item[1])
+        return [item[2] for item in matched]
+
+    def any(self, group: str, end: Optional[int] = None) -> bool:
+        """分组内是否有命中"""
+        return any(
+            self._keywords[kid][0] == group and (end is None or pos <= end)
+            for kid, pos in self._first_end.items()
+        )
+
+    def count(self, group: str, end: Optional[int] = None) -> int:
+        """分组内命中的不同关键词数量"""
+        return len(self.get(group, end))
+
+    def first_group(self, groups: Iterable[str], end: Optional[int] = None) -> Optional[str]:
+        """按给定优先级返回第一个有命中的分组"""
+        for group in groups:
+            if self.any(group, end):
+                return group
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self._first_end)
+
+
+class KeywordMatcher:
+    """分组关键词自动机（构建后只读，可在线程间共享）"""
+
+    def __init__(self, groups: Mapping[str, Iterable[str]]):
+        self._keywords: List[_Keyword] = []
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for group, words in groups.items():
+            for index, word in enumerate(words):
+                if not word:
+                    continue
+                kid = len(self._keywords)
+                self._keywords.append((group, index, word))
+                state = 0
+                for ch in word:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        outputs.append([])
+                        nxt = len(goto) - 1
+                        goto[state][ch] = nxt
+                    state = nxt
+                outputs[state].append(kid)
+
+        # 广度优先计算失败链，并把转移表展开为确定性自动机：
+        # 扫描时每个字符只需一次字典查找，无需沿失败链回退
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [dict() for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, nxt in goto[state].items():
+                # 失败状态更浅，其转移表已在前面展开
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+
+        self._delta = delta
+        self._outputs: List[Tuple[int, ...]] = [tuple(o) for o in outputs]
+
+    @property
+    def keyword_count(self) -> int:
+        return len(self._keywords)
+
+    def scan(self, text: str) -> KeywordHits:
+        """单遍扫描文本，返回所有分组的命中"""
+        first_end: Dict[int, int] = {}
+        if text:
+            delta = self._delta
+            outputs = self._outputs
+            state = 0
+            for pos, ch in enumerate(text, 1):
+                state = delta[state].get(ch, 0)
+                if outputs[state]:
+                    for kid in outputs[state]:
+                        if kid not in first_end:
+                            first_end[kid] = pos
+        return KeywordHits(self._keywords, first_end)
+
+
+@lru_cache(maxsize=64)
+def _build_matcher(frozen: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> KeywordMatcher:
+    return KeywordMatcher(dict(frozen))
+
+
+def get_keyword_matcher(groups: Mapping[str, Iterable[str]]) -> KeywordMatcher:
+    """获取关键词自动机（相同词典只编译一次）"""
+    frozen = tuple((group, tuple(words)) for group, words in groups.items())
+    return _build_matcher(frozen)
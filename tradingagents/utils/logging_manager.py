@@ -3,15 +3,22 @@
 """
 统一日志管理器
 提供项目级别的日志配置和管理功能
+
+默认使用 QueueHandler + QueueListener 的异步管道：调用线程只做过滤和入队，
+格式化与文件 I/O 在后台监听线程完成，不占用分析与 API 请求的耗时。
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple, Union
 import json
 import toml
 
@@ -34,9 +41,14 @@ class ColoredFormatter(logging.Formatter):
     }
 
     def format(self, record):
-        # 添加颜色
-        if hasattr(record, "levelname") and record.levelname in self.COLORS:
-            record.levelname = f"{self.COLORS[record.levelname]}{record.levelname}{self.COLORS['RESET']}"
+        # 添加颜色（格式化后恢复，避免影响同一记录的其他处理器）
+        levelname = getattr(record, "levelname", None)
+        if levelname in self.COLORS:
+            record.levelname = f"{self.COLORS[levelname]}{levelname}{self.COLORS['RESET']}"
+            try:
+                return super().format(record)
+            finally:
+                record.levelname = levelname
 
         return super().format(record)
 
@@ -66,16 +78,143 @@ class StructuredFormatter(logging.Formatter):
             log_entry["cost"] = record.cost
         if hasattr(record, "tokens"):
             log_entry["tokens"] = record.tokens
+        if hasattr(record, "suppressed_count"):
+            log_entry["suppressed_count"] = record.suppressed_count
 
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+class RateLimitFilter(logging.Filter):
+    """
+    按日志器限流与采样（只作用于 WARNING 以下级别）
+
+    - 限流：每个 (logger, level) 一个令牌桶，超出部分直接丢弃
+    - 采样：按日志器名前缀配置保留比例，例如 {"dataflows.cache": 0.1} 表示每 10 条保留 1 条
+
+    WARNING 及以上级别始终放行。被丢弃的数量记录在 suppressed 中，
+    下一条被放行的同名日志会携带 suppressed_count 字段。
+    """
+
+    def __init__(
+        self,
+        per_second: float = 50.0,
+        burst: int = 200,
+        sampling: Optional[Dict[str, float]] = None,
+        enabled: bool = True,
+    ):
+        super().__init__()
+        self.enabled = enabled
+        self.per_second = float(per_second)
+        self.burst = float(max(1, burst))
+        # 前缀越长越优先匹配
+        self.sampling: List[Tuple[str, float]] = sorted(
+            ((name, float(rate)) for name, rate in (sampling or {}).items()),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}
+        self._sample_counters: Dict[str, int] = {}
+        self._sample_rate_cache: Dict[str, float] = {}
+        self.suppressed: Dict[str, int] = {}
+
+    def _sample_rate(self, name: str) -> float:
+        rate = self._sample_rate_cache.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix, prefix_rate in self.sampling:
+                if name == prefix or name.startswith(prefix + "."):
+                    rate = prefix_rate
+                    break
+            self._sample_rate_cache[name] = rate
+        return rate
+
+    def _admit(self, record: logging.LogRecord) -> bool:
+        name = record.name
+        with self._lock:
+            rate = self._sample_rate(name)
+            if rate <= 0:
+                admitted = False
+            elif rate < 1.0:
+                count = self._sample_counters.get(name, 0)
+                self._sample_counters[name] = count + 1
+                admitted = count % max(1, round(1.0 / rate)) == 0
+            else:
+                admitted = True
+
+            if admitted and self.per_second > 0:
+                now = time.monotonic()
+                key = (name, record.levelno)
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    bucket = self._buckets[key] = [self.burst, now]
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.per_second)
+                bucket[1] = now
+                if tokens >= 1.0:
+                    bucket[0] = tokens - 1.0
+                else:
+                    bucket[0] = tokens
+                    admitted = False
+
+            if not admitted:
+                self.suppressed[name] = self.suppressed.get(name, 0) + 1
+            elif self.suppressed.get(name):
+                record.suppressed_count = self.suppressed.pop(name)
+        return admitted
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.enabled or record.levelno >= logging.WARNING:
+            return True
+        # 同步模式下同一条记录会经过多个处理器，只判定一次
+        decision = getattr(record, "_ta_admitted", None)
+        if decision is None:
+            decision = self._admit(record)
+            record._ta_admitted = decision
+        return decision
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    有界队列处理器
+
+    - 队列满时 WARNING 以下级别直接丢弃，WARNING 及以上最多阻塞 block_timeout 秒
+    - prepare() 不做格式化，只在存在 args 时冻结消息文本（避免对象在入队后被修改），
+      asctime/格式串/异常堆栈等全部交给监听线程处理
+    """
+
+    def __init__(self, log_queue: queue.Queue, block_timeout: float = 0.05):
+        super().__init__(log_queue)
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                try:
+                    self.queue.put(record, timeout=self.block_timeout)
+                    return
+                except queue.Full:
+                    pass
+            self.dropped += 1
+
+
 class TradingAgentsLogger:
     """TradingAgents统一日志管理器"""
 
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.rate_limit_filter: Optional[RateLimitFilter] = None
         self._setup_logging()
 
     def _load_default_config(self) -> Dict[str, Any]:
@@ -130,6 +269,13 @@ class TradingAgentsLogger:
                 "enabled": os.getenv("DOCKER_CONTAINER", "false").lower() == "true",
                 "stdout_only": True,  # Docker环境只输出到stdout
             },
+            "async": {
+                "enabled": os.getenv("TRADINGAGENTS_LOG_ASYNC", "true").lower()
+                == "true",
+                "queue_size": 10000,
+            },
+            "rate_limit": {"enabled": True, "per_second": 50, "burst": 200},
+            "sampling": {},
         }
 
     def _load_config_file(self) -> Optional[Dict[str, Any]]:
@@ -179,6 +325,9 @@ class TradingAgentsLogger:
                     "stdout_only", True
                 ),
             },
+            "async": logging_config.get("async", {}),
+            "rate_limit": logging_config.get("rate_limit", {}),
+            "sampling": logging_config.get("sampling", {}),
             "performance": logging_config.get("performance", {}),
             "security": logging_config.get("security", {}),
             "business": logging_config.get("business", {}),
@@ -210,9 +359,70 @@ class TradingAgentsLogger:
             if self.config["handlers"]["structured"]["enabled"]:
                 self._add_structured_handler(root_logger)
 
+        self._install_filters_and_pipeline(root_logger)
+
         # 配置特定日志器
         self._configure_specific_loggers()
 
+    def _install_filters_and_pipeline(self, root_logger: logging.Logger):
+        """挂载限流/采样过滤器，并把根处理器迁移到异步队列管道"""
+        # 先停掉上一次 setup 留下的监听线程
+        _stop_active_listener()
+
+        rate_config = self.config.get("rate_limit", {})
+        self.rate_limit_filter = RateLimitFilter(
+            per_second=rate_config.get("per_second", 50),
+            burst=rate_config.get("burst", 200),
+            sampling=self.config.get("sampling", {}),
+            enabled=rate_config.get("enabled", True),
+        )
+
+        async_config = self.config.get("async", {})
+        if not async_config.get("enabled", True):
+            for handler in root_logger.handlers:
+                handler.addFilter(self.rate_limit_filter)
+            return
+
+        handlers = list(root_logger.handlers)
+        root_logger.handlers.clear()
+
+        log_queue: queue.Queue = queue.Queue(
+            maxsize=int(async_config.get("queue_size", 10000))
+        )
+        self.queue_handler = BoundedQueueHandler(log_queue)
+        self.queue_handler.addFilter(self.rate_limit_filter)
+        root_logger.addHandler(self.queue_handler)
+
+        self.listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        self.listener.start()
+        _set_active_listener(self.listener)
+
+    def flush(self):
+        """等待队列中的日志全部写出（测试或进程退出前使用）"""
+        if self.listener is not None:
+            _stop_active_listener()
+            self.listener.start()
+            _set_active_listener(self.listener)
+
+    def shutdown(self):
+        """停止异步日志管道并刷出剩余日志"""
+        if self.listener is not None:
+            _stop_active_listener()
+            self.listener = None
+
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """获取日志管道状态（队列长度、丢弃和限流数量）"""
+        stats: Dict[str, Any] = {"async": self.listener is not None}
+        if self.queue_handler is not None:
+            stats["queue_size"] = self.queue_handler.queue.qsize()
+            stats["queue_capacity"] = self.queue_handler.queue.maxsize
+            stats["dropped"] = self.queue_handler.dropped
+        if self.rate_limit_filter is not None:
+            stats["suppressed"] = dict(self.rate_limit_filter.suppressed)
+        return stats
+
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
         if not self.config["handlers"]["console"]["enabled"]:
@@ -481,6 +691,31 @@ class TradingAgentsLogger:
 # 全局日志管理器实例
 _logger_manager: Optional[TradingAgentsLogger] = None
 
+# 当前运行中的队列监听线程（进程内唯一）
+_active_listener: Optional[logging.handlers.QueueListener] = None
+_listener_lock = threading.Lock()
+
+
+def _set_active_listener(listener: logging.handlers.QueueListener) -> None:
+    global _active_listener
+    with _listener_lock:
+        _active_listener = listener
+
+
+def _stop_active_listener() -> None:
+    """停止监听线程；stop() 会先处理完队列中剩余的日志"""
+    global _active_listener
+    with _listener_lock:
+        listener, _active_listener = _active_listener, None
+    if listener is not None and listener._thread is not None:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+atexit.register(_stop_active_listener)
+
 
 def get_logger_manager() -> TradingAgentsLogger:
     """获取全局日志管理器实例"""
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+新闻近似重复检测（SimHash）
+
+同一篇通稿被新浪、东方财富、财联社等转载时标题往往略有差异（前缀、标点、
+个别措辞），按标题精确去重无法识别，全部进入新闻分析师的 prompt 和
+``stock_news`` 集合。本模块对"标题 + 导语"计算 64 位 SimHash 指纹：
+
+- 特征为归一化文本的字符二元组，对中文无需分词
+- 指纹汉明距离 ≤ max_distance 视为同一簇，每簇只保留一个代表
+- 64 位指纹分为 max_distance + 1 段建立 LSH 索引：距离 ≤ max_distance 的
+  两个指纹至少有一段完全相同，只需比较同段候选，无需两两比较
+
+环境变量：
+- NEWS_DEDUP_ENABLED: 是否启用近似去重（默认 true）
+- NEWS_DEDUP_MAX_DISTANCE: 视为重复的最大汉明距离（默认 4）
+- NEWS_DEDUP_LEAD_CHARS: 参与指纹的正文导语长度（默认 200）
+"""
+
+import hashlib
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("utils.news_dedup")
+
+T = TypeVar("T")
+
+FINGERPRINT_BITS = 64
+_MASK64 = (1 << FINGERPRINT_BITS) - 1
+
+# 标题常见的来源前缀，如"【财联社】"、"[快讯]"
+_PREFIX_RE = re.compile(r"^\s*(?:【[^】]{0,12}】|\[[^\]]{0,12}\])\s*")
+# 只保留文字和数字，去掉标点、空白和符号
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
+def dedup_enabled() -> bool:
+    """是否启用近似去重"""
+    return os.getenv("NEWS_DEDUP_ENABLED", "true").lower() == "true"
+
+
+def default_max_distance() -> int:
+    """视为重复的最大汉明距离"""
+    return _env_int("NEWS_DEDUP_MAX_DISTANCE", 4)
+
+
+def normalize_news_text(title: str, content: str = "", lead_chars: Optional[int] = None) -> str:
+    """
+    归一化参与指纹计算的文本（标题 + 正文导语）
+
+    全角转半角、转小写、去掉来源前缀和标点。
+    """
+    if lead_chars is None:
+        lead_chars = _env_int("NEWS_DEDUP_LEAD_CHARS", 200)
+    title = _PREFIX_RE.sub("", title or "")
+    lead = (content or "")[: max(0, lead_chars)]
+    text = unicodedata.normalize("NFKC", f"{title} {lead}").lower()
+    return _NON_WORD_RE.sub("", text)
+
+
+def _feature_hash(feature: str) -> int:
+    # 不能用内置 hash()：进程间随机化，持久化的指纹必须稳定
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(text: str) -> int:
+    """计算文本的 64 位 SimHash（特征为字符二元组，按出现次数加权）"""
+    if not text:
+        return 0
+    features = Counter(text[i : i + 2] for i in range(max(1, len(text) - 1)))
+    hashes = np.array([_feature_hash(f) for f in features], dtype=">u8")
+    counts = np.fromiter(features.values(), dtype=np.int64, count=len(features))
+    # 每个特征展开为 64 位（大端，第 0 列为最高位），按权重累加 ±1
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1)
+    weights = counts @ (bits.astype(np.int64) * 2 - 1)
+    return int("".join("1" if w > 0 else "0" for w in weights), 2)
+
+
+def news_fingerprint(title: str, content: str = "", lead_chars: Optional[int] = None) -> int:
+    """新闻指纹（标题 + 导语）"""
+    return simhash(normalize_news_text(title, content, lead_chars))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK64).count("1")
+
+
+def to_signed64(fingerprint: int) -> int:
+    """转为有符号 64 位整数（MongoDB int64 存储）"""
+    return fingerprint - (1 << 64) if fingerprint >= (1 << 63) else fingerprint
+
+
+def from_signed64(value: int) -> int:
+    """从 MongoDB int64 还原无符号指纹"""
+    return value & _MASK64
+
+
+class SimHashIndex(Generic[T]):
+    """
+    SimHash 近邻索引（分段 LSH）
+
+    指纹分为 max_distance + 1 段，按鸽巢原理距离不超过 max_distance 的指纹
+    至少有一段相同；查询只比较同段候选。
+    """
+
+    def __init__(self, max_distance: int = 4):
+        self.max_distance = max(0, max_distance)
+        self._bands = self.max_distance + 1
+        self._band_bits = -(-FINGERPRINT_BITS // self._bands)
+        self._buckets: List[Dict[int, List[Tuple[int, T]]]] = [
+            defaultdict(list) for _ in range(self._bands)
+        ]
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _band_keys(self, fingerprint: int) -> Iterable[Tuple[int, int]]:
+        mask = (1 << self._band_bits) - 1
+        for band in range(self._bands):
+            yield band, (fingerprint >> (band * self._band_bits)) & mask
+
+    def add(self, fingerprint: int, value: T) -> None:
+        for band, key in self._band_keys(fingerprint):
+            self._buckets[band][key].append((fingerprint, value))
+        self._size += 1
+
+    def nearest(self, fingerprint: int) -> Optional[Tuple[T, int]]:
+        """返回距离最近且不超过 max_distance 的 (值, 距离)"""
+        best: Optional[Tuple[T, int]] = None
+        for band, key in self._band_keys(fingerprint):
+            for candidate, value in self._buckets[band].get(key, ()):
+                distance = hamming_distance(fingerprint, candidate)
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (value, distance)
+                    if distance == 0:
+                        return best
+        return best
+
+
+@dataclass
+class NewsCluster(Generic[T]):
+    """近似重复簇：第一个出现的条目作为代表（无可比较文本时指纹为 None）"""
+
+    representative: T
+    fingerprint: Optional[int]
+    duplicates: List[T] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return 1 + len(self.duplicates)
+
+
+def cluster_near_duplicates(
+    items: Iterable[T],
+    text_of: Callable[[T], Tuple[str, str]],
+    max_distance: Optional[int] = None,
+    index: Optional[SimHashIndex[Any]] = None,
+) -> Tuple[List[NewsCluster[T]], int]:
+    """
+    把条目聚为近似重复簇
+
+    Args:
+        items: 条目（按优先级排列，靠前的条目作为簇代表）
+        text_of: 返回条目的 (标题, 正文)
+        max_distance: 最大汉明距离，默认读取环境变量
+        index: 已有指纹索引（如数据库中同股票同日的新闻）；命中的条目视为
+            已存在，不生成新簇
+
+    Returns:
+        (新簇列表, 与已有索引重复而被丢弃的条目数)
+    """
+    if max_distance is None:
+        max_distance = default_max_distance()
+    batch_index: SimHashIndex[NewsCluster[T]] = SimHashIndex(max_distance)
+    clusters: List[NewsCluster[T]] = []
+    known_duplicates = 0
+
+    for item in items:
+        title, content = text_of(item)
+        text = normalize_news_text(title, content)
+        if not text:
+            # 无可比较的文本，单独成簇
+            clusters.append(NewsCluster(representative=item, fingerprint=None))
+            continue
+        fingerprint = simhash(text)
+
+        if index is not None and index.nearest(fingerprint) is not None:
+            known_duplicates += 1
+            continue
+
+        match = batch_index.nearest(fingerprint)
+        if match is not None:
+            match[0].duplicates.append(item)
+            continue
+
+        cluster = NewsCluster(representative=item, fingerprint=fingerprint)
+        batch_index.add(fingerprint, cluster)
+        clusters.append(cluster)
+
+    return clusters, known_duplicates
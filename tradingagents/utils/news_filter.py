@@ -10,6 +10,8 @@ from typing import List, Dict, Tuple
 from datetime import datetime
 import logging
 
+from tradingagents.utils.keyword_matcher import KeywordMatcher, get_keyword_matcher
+
 logger = logging.getLogger(__name__)
 
 
@@ -97,6 +99,16 @@ class NewsRelevanceFilter:
             "ST",
         ]
 
+    def _get_matcher(self) -> KeywordMatcher:
+        """获取当前关键词列表的自动机（相同词表只编译一次）"""
+        return get_keyword_matcher(
+            {
+                "strong": self.strong_keywords,
+                "include": self.include_keywords,
+                "exclude": self.exclude_keywords,
+            }
+        )
+
     def calculate_relevance_score(self, title: str, content: str) -> float:
         """
         计算新闻相关性评分
@@ -109,8 +121,10 @@ class NewsRelevanceFilter:
             float: 相关性评分 (0-100)
         """
         score = 0
+        # 标题和内容一起扫描一遍；关键词不含换行，标题部分的命中以标题长度为界
         title_lower = title.lower()
-        content_lower = content.lower()
+        title_end = len(title_lower)
+        hits = self._get_matcher().scan(f"{title_lower}\n{content.lower()}")
 
         # 1. 直接提及公司名称
         if self.company_name in title:
@@ -128,52 +142,25 @@ class NewsRelevanceFilter:
             score += 20  # 内容中出现股票代码，中等分
             logger.debug(f"[过滤器] 内容包含股票代码 '{self.stock_code}': +20分")
 
-        # 3. 强相关关键词检查
-        strong_matches = []
-        for keyword in self.strong_keywords:
-            if keyword in title_lower:
-                score += 30
-                strong_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 15
-                strong_matches.append(keyword)
-
-        if strong_matches:
-            logger.debug(f"[过滤器] 强相关关键词匹配: {strong_matches}")
-
-        # 4. 包含关键词检查
-        include_matches = []
-        for keyword in self.include_keywords:
-            if keyword in title_lower:
-                score += 15
-                include_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 8
-                include_matches.append(keyword)
-
-        if include_matches:
-            logger.debug(
-                f"[过滤器] 相关关键词匹配: {include_matches[:3]}..."
-            )  # 只显示前3个
-
-        # 5. 排除关键词检查（减分）
-        exclude_matches = []
-        for keyword in self.exclude_keywords:
-            if keyword in title_lower:
-                score -= 40  # 标题中出现排除词，大幅减分
-                exclude_matches.append(keyword)
-            elif keyword in content_lower:
-                score -= 20  # 内容中出现排除词，中等减分
-                exclude_matches.append(keyword)
-
-        if exclude_matches:
-            logger.debug(f"[过滤器] 排除关键词匹配: {exclude_matches[:3]}...")
+        # 3~5. 关键词检查：标题命中记高分，仅内容命中记低分
+        keyword_rules = (
+            ("strong", 30, 15, "强相关关键词匹配"),
+            ("include", 15, 8, "相关关键词匹配"),
+            ("exclude", -40, -20, "排除关键词匹配"),
+        )
+        for group, title_points, content_points, label in keyword_rules:
+            matches = hits.get(group)
+            if not matches:
+                continue
+            in_title = len(hits.get(group, title_end))
+            score += in_title * title_points + (len(matches) - in_title) * content_points
+            logger.debug(f"[过滤器] {label}: {matches[:3]}")
 
         # 6. 特殊规则：如果标题完全不包含公司信息但包含排除词，严重减分
         if (
             self.company_name not in title
             and self.stock_code not in title
-            and any(keyword in title_lower for keyword in self.exclude_keywords)
+            and hits.any("exclude", title_end)
         ):
             score -= 30
             logger.debug(f"[过滤器] 标题无公司信息但含排除词: -30分")
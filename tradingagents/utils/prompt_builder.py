@@ -3,9 +3,15 @@
 统一Prompt构建模式
 为不同类型的Agent提供统一的prompt构建接口
 减少prompt构建代码重复
+
+前缀稳定布局（便于 DeepSeek / DashScope / OpenAI 的提示词缓存命中）：
+1. 系统提示词只包含静态指令，不含股票代码、日期、价格等本次运行的值
+2. 用户提示词先放各 Agent 共享的分析师报告（固定顺序），再放本 Agent 的
+   辩论历史、记忆等内容
+3. 股票、市场、货币、日期、价格等易变字段统一放在末尾的"本次任务信息"中
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Sequence, Tuple
 from abc import ABC, abstractmethod
 
 # 导入统一日志系统
@@ -13,6 +19,75 @@ from tradingagents.utils.logging_init import get_logger
 
 logger = get_logger("default")
 
+# 共享报告的固定顺序：所有 Agent 按同一顺序拼接，保证同一次分析中的公共前缀一致
+SHARED_REPORT_SECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("market_report", "市场研究报告"),
+    ("sentiment_report", "社交媒体情绪报告"),
+    ("news_report", "最新世界事务新闻"),
+    ("fundamentals_report", "公司基本面报告"),
+    ("china_market_report", "A股市场特色分析报告"),
+)
+
+# 本次任务信息字段（按此顺序输出，缺失的字段跳过）
+RUN_CONTEXT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("company_name", "公司名称"),
+    ("ticker", "股票代码"),
+    ("market_name", "所属市场"),
+    ("currency", "计价货币"),
+    ("trade_date", "分析日期"),
+    ("current_price", "当前价格"),
+)
+
+
+def format_shared_reports(reports: Dict[str, Any]) -> str:
+    """
+    按固定顺序格式化共享的分析师报告
+
+    Args:
+        reports: 报告字典，键为 market_report/sentiment_report/news_report/
+            fundamentals_report/china_market_report
+
+    Returns:
+        报告文本（空报告跳过，A股特色报告仅在存在时输出）
+    """
+    parts = []
+    for key, title in SHARED_REPORT_SECTIONS:
+        value = reports.get(key, "")
+        if value or key != "china_market_report":
+            parts.append(f"{title}：{value}")
+    return "\n\n".join(parts)
+
+
+def format_run_context(**kwargs) -> str:
+    """
+    格式化本次任务信息（放在 prompt 末尾的易变字段）
+
+    Args:
+        company_name / ticker / market_name / trade_date / current_price: 对应字段
+        currency_name / currency_symbol: 计价货币
+
+    Returns:
+        "=== 本次任务信息 ===" 段落；没有任何字段时返回空字符串
+    """
+    values = dict(kwargs)
+    if values.get("currency_name"):
+        symbol = values.get("currency_symbol", "")
+        values["currency"] = f"{values['currency_name']}（{symbol}）" if symbol else values["currency_name"]
+
+    lines = [
+        f"- {label}：{values[key]}"
+        for key, label in RUN_CONTEXT_FIELDS
+        if values.get(key) not in (None, "")
+    ]
+    if not lines:
+        return ""
+    return "=== 本次任务信息 ===\n" + "\n".join(lines)
+
+
+def assemble_prompt(*sections: Optional[str]) -> str:
+    """按 静态指令 → 共享内容 → 易变内容 的顺序拼接非空段落"""
+    return "\n\n".join(section.strip() for section in sections if section and section.strip())
+
 
 class PromptBuilder(ABC):
     """Prompt构建器基类"""
@@ -58,9 +133,9 @@ class PromptBuilder(ABC):
         Returns:
             完整提示词字符串
         """
-        system = self.build_system_prompt(**kwargs)
-        user = self.build_user_prompt(**kwargs)
-        return f"{system}\n\n{user}"
+        return assemble_prompt(
+            self.build_system_prompt(**kwargs), self.build_user_prompt(**kwargs)
+        )
 
     def build_chat_messages(self, **kwargs) -> list:
         """
@@ -113,32 +188,18 @@ class AnalystPromptBuilder(PromptBuilder):
         """
         构建分析师系统提示词
 
+        只包含静态指令；分析对象（公司、代码、市场、货币）放在用户提示词末尾。
+
         Args:
-            company_name: 公司名称
-            ticker: 股票代码
-            market_name: 市场名称
-            currency_name: 货币名称
-            currency_symbol: 货币符号
-            analyst_specific: 分析师特定要求
+            analyst_specific: 分析师特定要求（应为静态文本）
 
         Returns:
             系统提示词
         """
-        company_name = kwargs.get("company_name", "")
-        ticker = kwargs.get("ticker", "")
-        market_name = kwargs.get("market_name", "")
-        currency_name = kwargs.get("currency_name", "")
-        currency_symbol = kwargs.get("currency_symbol", "")
         analyst_specific = kwargs.get("analyst_specific", "")
 
         # 基础提示词
-        prompt = f"""您是一位专业的{self.analyst_type}分析师。
-
-📊 **分析对象：**
-- 公司名称：{company_name}
-- 股票代码：{ticker}
-- 所属市场：{market_name}
-- 计价货币：{currency_name}（{currency_symbol}）
+        prompt = f"""您是一位专业的{self.analyst_type}分析师。分析对象见用户消息末尾的"本次任务信息"。
 
 🚨 **CRITICAL REQUIREMENT - 绝对强制要求：**
 
@@ -167,6 +228,8 @@ class AnalystPromptBuilder(PromptBuilder):
         Args:
             available_data: 可用数据描述
             specific_task: 特定任务要求
+            company_name/ticker/market_name/currency_name/currency_symbol/
+            trade_date/current_price: 本次任务信息
 
         Returns:
             用户提示词
@@ -174,7 +237,7 @@ class AnalystPromptBuilder(PromptBuilder):
         available_data = kwargs.get("available_data", "")
         specific_task = kwargs.get("specific_task", "")
 
-        prompt = f"""基于以下数据进行{self.analyst_type}分析：
+        instructions = f"""基于以下数据进行{self.analyst_type}分析：
 
 {available_data}
 
@@ -184,9 +247,9 @@ class AnalystPromptBuilder(PromptBuilder):
 1. 基于真实数据进行分析
 2. 提供详细的推理过程
 3. 使用中文撰写
-4. 使用{kwargs.get("currency_name", "")}({kwargs.get("currency_symbol", "")})表示价格"""
+4. 使用本次任务信息中的计价货币表示价格"""
 
-        return prompt
+        return assemble_prompt(instructions, format_run_context(**kwargs))
 
     def _build_forbidden_rules(self) -> str:
         """构建禁止规则"""
@@ -238,29 +301,18 @@ class ResearcherPromptBuilder(PromptBuilder):
         """
         构建研究员系统提示词
 
-        Args:
-            company_name: 公司名称
-            ticker: 股票代码
-            market_name: 市场名称
-            currency_name: 货币名称
-            currency_symbol: 货币符号
+        只包含静态指令；公司、市场和货币放在用户提示词末尾。
 
         Returns:
             系统提示词
         """
-        company_name = kwargs.get("company_name", "")
-        ticker = kwargs.get("ticker", "")
-        market_name = kwargs.get("market_name", "")
-        currency_name = kwargs.get("currency_name", "")
-        currency_symbol = kwargs.get("currency_symbol", "")
-
         perspective_specific = self._build_perspective_specific_requirements()
 
-        prompt = f"""你是一位{self.perspective_text}分析师，负责为股票 {company_name}（股票代码：{ticker}）的投资建立强有力的论证。
+        prompt = f"""你是一位{self.perspective_text}分析师，负责为用户消息末尾"本次任务信息"中的股票建立强有力的论证。
 
 ⚠️ **重要提醒：**
-当前分析的是 {market_name}，所有价格和估值请使用 {currency_name}（{currency_symbol}）作为单位。
-⚠️ 在你的分析中，请始终使用公司名称"{company_name}"而不是股票代码"{ticker}"来称呼这家公司。
+所有价格和估值请使用本次任务信息中的计价货币作为单位。
+⚠️ 在你的分析中，请始终使用公司名称而不是股票代码来称呼这家公司。
 
 🚨 **CRITICAL REQUIREMENT - 绝对强制要求：**
 
@@ -292,21 +344,12 @@ class ResearcherPromptBuilder(PromptBuilder):
             history: 辩论历史
             current_response: 当前对方论点
             past_memories: 过去记忆
+            company_name/ticker/market_name/currency_name/currency_symbol: 本次任务信息
 
         Returns:
             用户提示词
         """
-        prompt = f"""可用资源：
-
-市场研究报告：{kwargs.get("market_report", "")}
-
-社交媒体情绪报告：{kwargs.get("sentiment_report", "")}
-
-最新世界事务新闻：{kwargs.get("news_report", "")}
-
-公司基本面报告：{kwargs.get("fundamentals_report", "")}
-
-辩论对话历史：{kwargs.get("history", "")}
+        debate = f"""辩论对话历史：{kwargs.get("history", "")}
 
 最后对方论点：{kwargs.get("current_response", "")}
 
@@ -316,7 +359,12 @@ class ResearcherPromptBuilder(PromptBuilder):
 
 请确保所有回答都使用中文。"""
 
-        return prompt
+        return assemble_prompt(
+            "可用资源：",
+            format_shared_reports(kwargs),
+            debate,
+            format_run_context(**kwargs),
+        )
 
     def _build_perspective_specific_requirements(self) -> str:
         """构建特定视角要求"""
@@ -426,16 +474,11 @@ class DebatorPromptBuilder(PromptBuilder):
         """
         构建辩论者系统提示词
 
-        Args:
-            company_name: 公司名称
-            ticker: 股票代码
+        只包含静态指令；股票信息放在用户提示词末尾。
 
         Returns:
             系统提示词
         """
-        company_name = kwargs.get("company_name", "")
-        ticker = kwargs.get("ticker", "")
-
         prompt = f"""作为{self.description}风险分析师，您的主要目标是{self.goal}。
 
 在评估交易员的决策或计划时，请重点关注{self.focus}，仔细评估潜在损失、经济衰退和市场波动。
@@ -447,7 +490,7 @@ class DebatorPromptBuilder(PromptBuilder):
 - 如果数据互相矛盾，分析可能的原因（数据源问题、计算方法差异等）
 - 不要盲目使用报告中的数据，要批判性地评估可靠性
 
-请分析股票 {company_name}（股票代码：{ticker}）的{self.description}风险视角。
+请针对用户消息末尾"本次任务信息"中的股票，给出{self.description}风险视角的分析。
 
 请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
 
@@ -465,20 +508,21 @@ class DebatorPromptBuilder(PromptBuilder):
             fundamentals_report: 基本面报告
             history: 对话历史
             current_*_response: 其他辩论者的最新回应
+            company_name/ticker/trade_date: 本次任务信息
 
         Returns:
             用户提示词
         """
-        prompt = f"""以下是交易员的决策：
-{kwargs.get("trader_decision", "")}
+        # 共享内容（三位辩论者相同）在前，本辩论者的任务和易变的对话在后
+        shared = f"""可用资源：
+
+{format_shared_reports(kwargs)}
+
+以下是交易员的决策：
+{kwargs.get("trader_decision", "")}"""
 
-您的任务是{self._build_debator_task_description()}
+        debate = f"""您的任务是{self._build_debator_task_description()}
 
-可用资源：
-市场研究报告：{kwargs.get("market_report", "")}
-社交媒体情绪报告：{kwargs.get("sentiment_report", "")}
-最新世界事务报告：{kwargs.get("news_report", "")}
-公司基本面报告：{kwargs.get("fundamentals_report", "")}
 当前对话历史：{kwargs.get("history", "")}
 
 其他辩论者的最新回应：
@@ -488,7 +532,7 @@ class DebatorPromptBuilder(PromptBuilder):
 
 请用中文以对话方式输出，就像您在说话一样，不使用任何特殊格式。"""
 
-        return prompt
+        return assemble_prompt(shared, debate, format_run_context(**kwargs))
 
     def _build_debator_task_description(self) -> str:
         """构建辩论者任务描述"""
@@ -587,8 +631,7 @@ class ManagerPromptBuilder(PromptBuilder):
 
     def _build_research_manager_system(self, **kwargs) -> str:
         """构建Research Manager系统提示词"""
-        trade_date = kwargs.get("trade_date", "指定日期")
-        return f"""**任务说明**：这是一个历史股票数据分析任务，我们正在分析 {trade_date} 的数据。请基于实际提供的报告数据进行评估，不要质疑日期的有效性，也不要认为数据是"合成"或"模拟"的。
+        return f"""**任务说明**：这是一个历史股票数据分析任务，分析日期见用户消息末尾的"本次任务信息"。请基于实际提供的报告数据进行评估，不要质疑日期的有效性，也不要认为数据是"合成"或"模拟"的。
 
 作为投资组合经理和辩论主持人，您的职责是批判性地评估这轮辩论并做出明确决策：支持看跌分析师、看涨分析师，或者仅在基于所提出论点有强有力理由时选择持有。
 
@@ -650,19 +693,9 @@ class ManagerPromptBuilder(PromptBuilder):
 
     def _build_research_manager_user(self, **kwargs) -> str:
         """构建Research Manager用户提示词"""
-        return f"""以下是您对错误的过去反思：
+        debate = f"""以下是您对错误的过去反思：
 \"{kwargs.get("past_memories", "")}\"
 
-以下是综合分析报告：
-
-市场研究：{kwargs.get("market_report", "")}
-
-情绪分析：{kwargs.get("sentiment_report", "")}
-
-新闻分析：{kwargs.get("news_report", "")}
-
-基本面分析：{kwargs.get("fundamentals_report", "")}
-
 以下是辩论：
 
 辩论历史：
@@ -670,13 +703,22 @@ class ManagerPromptBuilder(PromptBuilder):
 
 请用中文撰写所有分析内容和建议。"""
 
+        return assemble_prompt(
+            "以下是综合分析报告：",
+            format_shared_reports(kwargs),
+            debate,
+            format_run_context(**kwargs),
+        )
+
     def _build_risk_manager_user(self, **kwargs) -> str:
         """构建Risk Manager用户提示词"""
-        return f"""以下是分析师辩论历史：
+        debate = f"""以下是分析师辩论历史：
 {kwargs.get("history", "")}
 
 请用中文撰写所有分析内容和建议。"""
 
+        return assemble_prompt(debate, format_run_context(**kwargs))
+
 
 class TraderPromptBuilder(PromptBuilder):
     """交易员Prompt构建器"""
@@ -689,26 +731,17 @@ class TraderPromptBuilder(PromptBuilder):
         """
         构建交易员系统提示词
 
-        Args:
-            company_name: 公司名称
-            ticker: 股票代码
-            currency_name: 货币名称
-            currency_symbol: 货币符号
+        只包含静态指令；股票和货币放在用户提示词末尾。
 
         Returns:
             系统提示词
         """
-        company_name = kwargs.get("company_name", "")
-        ticker = kwargs.get("ticker", "")
-        currency_name = kwargs.get("currency_name", "")
-        currency_symbol = kwargs.get("currency_symbol", "")
-
-        prompt = f"""您是一位专业的交易员，负责分析市场数据并做出投资决策。基于您的分析，请提供具体的买入、卖出或持有建议。
+        prompt = """您是一位专业的交易员，负责分析市场数据并做出投资决策。基于您的分析，请提供具体的买入、卖出或持有建议。
 
-⚠️ **重要提醒：**当前分析的股票代码是 {company_name}，请使用正确的货币单位：{currency_name}（{currency_symbol}）
+⚠️ **重要提醒：**当前分析的股票和计价货币见用户消息末尾的"本次任务信息"，请使用正确的货币单位
 
 🔴 **严格要求：**
-- 股票代码 {company_name} 的公司名称必须严格按照基本面报告中的真实数据
+- 公司名称必须严格按照基本面报告中的真实数据
 - 绝对禁止使用错误的公司名称或混淆不同的股票
 - 所有分析必须基于提供的真实数据，不允许假设或编造
 - **必须提供具体的目标价位，不允许设置为null或空值**
@@ -716,9 +749,9 @@ class TraderPromptBuilder(PromptBuilder):
 请在您的分析中包含以下关键信息：
 
 1. **投资建议**: 明确的买入/持有/卖出决策
-2. **目标价位**: 基于分析的合理目标价格({currency_name}) - 🚨 强制要求提供具体数值
+2. **目标价位**: 基于分析的合理目标价格（计价货币） - 🚨 强制要求提供具体数值
    - 买入建议：提供目标价位和预期涨幅
-   - 持有建议：提供合理价格区间（如：{currency_symbol}XX-XX）
+   - 持有建议：提供合理价格区间（如：XX-XX，使用本次任务的计价货币）
    - 卖出建议：提供止损价位和目标卖出价
 3. **置信度**: 对决策的信心程度(0-1之间)
 4. **风险评分**: 投资风险等级(0-1之间，0为低风险，1为高风险)
@@ -751,11 +784,12 @@ class TraderPromptBuilder(PromptBuilder):
         Args:
             investment_plan: 投资计划
             past_memories: 过去记忆
+            company_name/ticker/currency_name/currency_symbol/current_price: 本次任务信息
 
         Returns:
             用户提示词
         """
-        return f"""Based on a comprehensive analysis by a team of analysts, here is an investment plan tailored for {kwargs.get("company_name", "")}. This plan incorporates insights from current technical market trends, macroeconomic indicators, and social media sentiment. Use this plan as a foundation for evaluating your next trading decision.
+        plan = f"""Based on a comprehensive analysis by a team of analysts, here is an investment plan tailored for the company in the task context below. This plan incorporates insights from current technical market trends, macroeconomic indicators, and social media sentiment. Use this plan as a foundation for evaluating your next trading decision.
 
 Proposed Investment Plan: {kwargs.get("investment_plan", "")}
 
@@ -763,6 +797,8 @@ Leverage these insights to make an informed and strategic decision。
 
 以下是类似情况下的交易反思和经验教训: {kwargs.get("past_memories", "")}"""
 
+        return assemble_prompt(plan, format_run_context(**kwargs))
+
 
 # 工厂函数
 def create_prompt_builder(agent_type: str, **kwargs) -> PromptBuilder:
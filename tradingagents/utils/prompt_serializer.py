@@ -0,0 +1,499 @@
+# -*- coding: utf-8 -*-
+"""
+提示词数据紧凑序列化
+
+分析师 prompt 中的行情表、指标和财务报告是 LLM 延迟与费用的主要来源。
+本模块按模型的 token 预算渲染数据块：
+
+- count_tokens / truncate_to_tokens: 基于 tiktoken 的真实 token 计数与截断，
+  分词器不可用（如离线环境无法下载编码表）时退回到中英文分别估算
+- serialize_market_series: 把 MarketSeries 渲染为紧凑文本——最新指标完整保留，
+  近期日线逐日列出，更早的历史按周/月降采样并对收盘价做差分编码，
+  超出预算时逐级裁剪列和行数，且不会比被替换的原始文本更长
+- compact_report_text: 压缩长篇文本报告，超出预算时按 token 截断并前置关键指标
+
+每次序列化都会返回并记录压缩前后的 token 数。
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tradingagents.utils.logging_init import get_logger
+
+logger = get_logger("prompt_serializer")
+
+# 无法获取模型名称或 app 配置不可用时使用的默认预算
+DEFAULT_DATA_BUDGET = 2000
+
+TRUNCATION_MARK = "...(内容已截断)"
+
+
+# ==================== Token 计数 ====================
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str = ""):
+    """获取 tiktoken 编码器；不可用时返回 None（结果缓存，避免反复尝试下载）"""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        if model_name:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.debug(f"tiktoken 编码表不可用，使用估算分词: {e}")
+        return None
+
+
+# 中日韩字符与全角符号各计 1 个 token；数字按 3 位一组；英文单词约 4 字符/token
+_ESTIMATE_RE = re.compile(
+    r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]|\d{1,3}|[A-Za-z]+|[^\sA-Za-z\d]"
+)
+
+
+def _estimate_tokens(text: str) -> int:
+    count = 0
+    for match in _ESTIMATE_RE.finditer(text):
+        piece = match.group()
+        if piece.isascii() and piece.isalpha():
+            count += (len(piece) + 3) // 4
+        else:
+            count += 1
+    return count
+
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    计算文本的 token 数
+
+    Args:
+        text: 文本
+        model_name: 模型名称（OpenAI 系模型使用对应编码，其他模型使用 cl100k_base 近似）
+
+    Returns:
+        token 数
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(_encoding_key(model_name))
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+
+def truncate_to_tokens(
+    text: str,
+    max_tokens: int,
+    model_name: Optional[str] = None,
+    suffix: str = TRUNCATION_MARK,
+) -> str:
+    """
+    把文本截断到不超过 max_tokens 个 token（含截断标记）
+
+    Args:
+        text: 文本
+        max_tokens: 最大 token 数
+        model_name: 模型名称
+        suffix: 截断后追加的标记
+
+    Returns:
+        截断后的文本；未超出预算时原样返回
+    """
+    if count_tokens(text, model_name) <= max_tokens:
+        return text
+
+    keep = max(0, max_tokens - count_tokens(suffix, model_name))
+    encoding = _get_encoding(_encoding_key(model_name))
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return encoding.decode(tokens[:keep]) + suffix
+
+    # 估算模式: 二分查找满足预算的最长前缀
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _estimate_tokens(text[:mid]) <= keep:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + suffix
+
+
+def _encoding_key(model_name: Optional[str]) -> str:
+    """只有 OpenAI 系模型有专用编码，其余统一按 cl100k_base 计数以共享缓存"""
+    if not model_name:
+        return ""
+    name = model_name.rsplit("/", 1)[-1].lower()
+    return name if name.startswith(("gpt-", "o1", "o3", "o4")) else ""
+
+
+# ==================== 预算 ====================
+
+
+def get_llm_model_name(llm: Any) -> str:
+    """从 LangChain 模型实例上取模型名称"""
+    for attr in ("model_name", "model"):
+        value = getattr(llm, attr, None)
+        if isinstance(value, str) and value:
+            return value
+    return ""
+
+
+def get_data_token_budget(model_name: Optional[str]) -> int:
+    """
+    获取单个数据块的 token 预算（来自 app/constants/model_capabilities.py）
+
+    Args:
+        model_name: 模型名称
+
+    Returns:
+        token 预算
+    """
+    try:
+        from app.constants.model_capabilities import get_prompt_data_budget
+
+        return get_prompt_data_budget(model_name or "")
+    except ImportError:
+        return DEFAULT_DATA_BUDGET
+
+
+@dataclass
+class SerializedBlock:
+    """序列化结果及压缩前后的 token 统计"""
+
+    text: str
+    tokens_before: int
+    tokens_after: int
+    budget: int
+    level: int = 0
+
+    @property
+    def saved_ratio(self) -> float:
+        if not self.tokens_before:
+            return 0.0
+        return 1 - self.tokens_after / self.tokens_before
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tokens_before": self.tokens_before,
+            "tokens_after": self.tokens_after,
+            "budget": self.budget,
+            "level": self.level,
+        }
+
+
+# ==================== 行情序列 ====================
+
+# 逐级裁剪方案: (近期逐日天数, 近期列, 历史降采样步长, 历史是否带成交量)
+# 步长 5 约为一周、20 约为一月；0 表示不输出更早的历史
+_MARKET_LEVELS: Tuple[Tuple[int, Tuple[str, ...], int, bool], ...] = (
+    (20, ("open", "high", "low", "close", "pct", "volume"), 5, True),
+    (10, ("open", "high", "low", "close", "pct", "volume"), 5, False),
+    (10, ("close", "pct", "volume"), 20, False),
+    (5, ("close", "pct", "volume"), 0, False),
+    (3, ("close", "pct", "volume"), 0, False),
+    (0, (), 0, False),
+)
+
+_COLUMN_LABELS = {
+    "open": "开",
+    "high": "高",
+    "low": "低",
+    "close": "收",
+    "pct": "涨跌%",
+    "volume": "量",
+}
+
+
+def _num(value: Any, digits: int = 2) -> str:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "-"
+    if not math.isfinite(value):
+        return "-"
+    return f"{value:.{digits}f}"
+
+
+def _volume(value: Any) -> str:
+    """成交量（手）紧凑写法: 12345 -> 1.23万"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return "-"
+    if not math.isfinite(value):
+        return "-"
+    if abs(value) >= 1e8:
+        return f"{value / 1e8:.2f}亿"
+    if abs(value) >= 1e4:
+        return f"{value / 1e4:.2f}万"
+    return f"{value:.0f}"
+
+
+def _join(values: Sequence[str]) -> str:
+    return "/".join(values)
+
+
+def _latest_block(series: Any) -> List[str]:
+    """最新一日的完整指标（任何裁剪级别都保留）"""
+    latest = series.latest()
+    price_kind = (
+        "实时" if series.realtime_quote and series.realtime_quote.get("price") else "收盘"
+    )
+    get = latest.get
+    lines = [
+        f"{series.name}({series.symbol}) 日线 {series.start_date}~{series.end_date} "
+        f"共{len(series)}日"
+        + (f" 来源:{series.source}" if series.source else ""),
+        f"最新({get('latest_date', '')}) 价{_num(get('current_price'))}({price_kind}) "
+        f"涨跌{float(get('change', 0)):+.2f}({float(get('change_pct', 0)):+.2f}%) "
+        f"开{_num(get('open'))} 高{_num(get('high'))} 低{_num(get('low'))}",
+        "MA5/MA10/MA20/MA60: "
+        + _join([_num(get(k)) for k in ("MA5", "MA10", "MA20", "MA60")]),
+        "MACD DIF/DEA/柱: "
+        + _join([_num(get(k), 3) for k in ("MACD_DIF", "MACD_DEA", "MACD")]),
+        f"RSI6/RSI14: {_num(get('RSI'))}/{_num(get('RSI14'))} "
+        "KDJ K/D/J: " + _join([_num(get(k)) for k in ("KDJ_K", "KDJ_D", "KDJ_J")]),
+        "BOLL 上/中/下: "
+        + _join([_num(get(k)) for k in ("BOLL_UPPER", "BOLL_MID", "BOLL_LOWER")]),
+        f"ATR14 {_num(get('ATR14'), 4)} WR14 {_num(get('WR14'))} "
+        f"CCI14 {_num(get('CCI14'))} OBV {_num(get('OBV'), 0)}",
+    ]
+
+    volumes = series.volume[np.isfinite(series.volume)]
+    volume_line = f"成交量 {_volume(get('volume'))}手"
+    if len(volumes) >= 6:
+        avg5 = float(np.mean(volumes[-6:-1]))
+        if avg5 > 0:
+            volume_line += f" 5日均量 {_volume(avg5)}手 量比 {volumes[-1] / avg5:.2f}"
+    lines.append(volume_line)
+    return lines
+
+
+def _recent_rows(series: Any, days: int, columns: Tuple[str, ...]) -> List[str]:
+    if not days or not len(series):
+        return []
+    start = max(0, len(series) - days)
+    header = "近{}日(日期|{}):".format(
+        len(series) - start, "|".join(_COLUMN_LABELS[c] for c in columns)
+    )
+    rows = [header]
+    for i in range(start, len(series)):
+        cells = [series.dates[i][5:] if i < len(series.dates) else "-"]
+        for column in columns:
+            if column == "pct":
+                prev = series.close[i - 1] if i > 0 else float("nan")
+                pct = (series.close[i] / prev - 1) * 100 if prev else float("nan")
+                cells.append(_num(pct) if not math.isfinite(pct) else f"{pct:+.2f}")
+            elif column == "volume":
+                cells.append(_volume(series.volume[i]))
+            else:
+                cells.append(_num(getattr(series, column)[i]))
+        rows.append("|".join(cells))
+    return rows
+
+
+def _history_rows(series: Any, recent_days: int, step: int, with_volume: bool) -> List[str]:
+    """更早的历史按 step 个交易日降采样，收盘价差分编码（首项为基准值）"""
+    end = len(series) - recent_days
+    if not step or end < step:
+        return []
+
+    # 从近期窗口向前对齐分组，保证最后一组紧邻近期数据
+    first = end % step
+    bounds = [(i, i + step) for i in range(first, end, step)]
+    if first:
+        bounds.insert(0, (0, first))
+
+    unit = "周" if step == 5 else f"{step}日"
+    header = f"更早{len(bounds)}段(每{unit}, 段末日期|收盘差分"
+    header += "|成交量)" if with_volume else ")"
+    rows = [header + ":"]
+    previous = None
+    for lo, hi in bounds:
+        closes = series.close[lo:hi]
+        finite = closes[np.isfinite(closes)]
+        if not len(finite):
+            continue
+        close = float(finite[-1])
+        date = series.dates[hi - 1][5:] if hi - 1 < len(series.dates) else "-"
+        value = f"{close:.2f}" if previous is None else f"{close - previous:+.2f}"
+        previous = close
+        cells = [date, value]
+        if with_volume:
+            cells.append(_volume(np.nansum(series.volume[lo:hi])))
+        rows.append("|".join(cells))
+    return rows
+
+
+def _render_full_table(series: Any) -> str:
+    """无损全量表格（与直接 df.to_string() 嵌入 prompt 的体积相当），作为压缩前基准"""
+    import pandas as pd
+
+    frame = pd.DataFrame(
+        {
+            "date": series.dates,
+            "open": series.open,
+            "high": series.high,
+            "low": series.low,
+            "close": series.close,
+            "volume": series.volume,
+            **series.indicators,
+        }
+    )
+    return frame.to_string(index=False)
+
+
+def serialize_market_series(
+    series: Any,
+    max_tokens: Optional[int] = None,
+    model_name: Optional[str] = None,
+    original_text: Optional[str] = None,
+) -> SerializedBlock:
+    """
+    把 MarketSeries 渲染为不超过预算的紧凑文本
+
+    近期逐日数据优先于更早的历史：只有加入历史段后仍在预算内才输出历史。
+    传入 original_text 时，输出不会比它更长——紧凑格式连最新指标都放不下时
+    原样返回 original_text。
+
+    Args:
+        series: MarketSeries 实例
+        max_tokens: token 预算（默认按模型上下文窗口计算）
+        model_name: 模型名称（用于选择分词器和默认预算）
+        original_text: 被替换的原始行情文本（如 state["market_data"]）
+
+    Returns:
+        SerializedBlock，tokens_before 为 original_text 的 token 数，
+        未传入时为全量表格的 token 数
+    """
+    budget = max_tokens if max_tokens is not None else get_data_token_budget(model_name)
+    if original_text is not None:
+        tokens_before = count_tokens(original_text, model_name)
+        limit = min(budget, tokens_before)
+    else:
+        tokens_before = count_tokens(_render_full_table(series), model_name)
+        limit = budget
+    latest_lines = _latest_block(series)
+
+    text = ""
+    tokens = 0
+    for level, (days, columns, step, with_volume) in enumerate(_MARKET_LEVELS):
+        lines = latest_lines + _recent_rows(series, days, columns)
+        text = "\n".join(lines)
+        tokens = count_tokens(text, model_name)
+        if tokens > limit:
+            continue
+        history = _history_rows(series, days, step, with_volume)
+        if history:
+            with_history = "\n".join(lines + history)
+            history_tokens = count_tokens(with_history, model_name)
+            if history_tokens <= limit:
+                text, tokens = with_history, history_tokens
+        break
+    else:
+        level = len(_MARKET_LEVELS)
+        if original_text is not None and tokens_before <= budget:
+            text, tokens = original_text, tokens_before
+        else:
+            text = truncate_to_tokens(text, limit, model_name)
+            tokens = count_tokens(text, model_name)
+
+    block = SerializedBlock(
+        text=text,
+        tokens_before=tokens_before,
+        tokens_after=tokens,
+        budget=budget,
+        level=level,
+    )
+    logger.info(
+        f"📦 [Prompt序列化] {series.symbol} 行情: {block.tokens_before} → "
+        f"{block.tokens_after} tokens (预算 {budget}, 级别 {level}, "
+        f"节省 {block.saved_ratio:.0%})"
+    )
+    return block
+
+
+# ==================== 文本报告 ====================
+
+# 纯装饰行（━━━、===、---、空白）与行尾空白
+_DECORATION_RE = re.compile(r"^[\s━─=\-*#_~·]{3,}$", re.MULTILINE)
+_TRAILING_SPACE_RE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+def compact_report_text(
+    text: str,
+    max_tokens: Optional[int] = None,
+    model_name: Optional[str] = None,
+    key_metrics: Optional[Dict[str, Any]] = None,
+    label: str = "报告",
+) -> SerializedBlock:
+    """
+    压缩文本报告到预算以内
+
+    先去掉装饰分隔线和多余空白；仍超出预算时按 token 截断，并在开头保留
+    key_metrics（如 FundamentalsSnapshot.to_dict()），保证关键字段不被截掉。
+
+    Args:
+        text: 原始报告
+        max_tokens: token 预算（默认按模型上下文窗口计算）
+        model_name: 模型名称
+        key_metrics: 截断时需保留的关键指标
+        label: 日志中的数据块名称
+
+    Returns:
+        SerializedBlock
+    """
+    budget = max_tokens if max_tokens is not None else get_data_token_budget(model_name)
+    tokens_before = count_tokens(text, model_name)
+
+    compact = _TRAILING_SPACE_RE.sub("", text)
+    compact = _DECORATION_RE.sub("", compact)
+    compact = _BLANK_LINES_RE.sub("\n\n", compact).strip()
+    tokens = count_tokens(compact, model_name)
+    level = 0
+
+    if tokens > budget:
+        level = 1
+        prefix = ""
+        if key_metrics:
+            prefix = (
+                "关键指标: "
+                + " ".join(f"{k}={_metric(v)}" for k, v in key_metrics.items())
+                + "\n"
+            )
+        remaining = max(0, budget - count_tokens(prefix, model_name))
+        compact = prefix + truncate_to_tokens(compact, remaining, model_name)
+        tokens = count_tokens(compact, model_name)
+
+    block = SerializedBlock(
+        text=compact,
+        tokens_before=tokens_before,
+        tokens_after=tokens,
+        budget=budget,
+        level=level,
+    )
+    if tokens_before != tokens:
+        logger.info(
+            f"📦 [Prompt序列化] {label}: {tokens_before} → {tokens} tokens "
+            f"(预算 {budget}, 级别 {level})"
+        )
+    return block
+
+
+def _metric(value: Any) -> str:
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return str(value)
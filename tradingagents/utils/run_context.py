@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+运行级上下文（run-scoped context）
+
+以前 TradingAgentsGraph 通过全局 set_config() 和 Toolkit 类属性传递配置与
+分析日期，同一进程内并发运行两次分析会互相覆盖。本模块用 contextvars
+为每次 propagate 保存独立的配置副本：
+
+- run_scope(config, **values)：进入一次运行，退出时自动恢复
+- get_run_config()：读取当前运行的配置（不在运行中时返回 None）
+- update_run_config(values)：只修改当前运行的配置
+
+contextvars 天然按线程/asyncio 任务隔离；asyncio.to_thread 与 LangGraph
+节点线程会复制上下文，自行创建的线程池需使用 submit_with_context /
+run_in_executor_with_context 把上下文带过去。上下文中保存的是同一个
+可变字典，子线程中的修改对整个运行可见。
+"""
+
+import asyncio
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+_run_config: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "tradingagents_run_config", default=None
+)
+
+
+@contextmanager
+def run_scope(config: Optional[Dict[str, Any]] = None, **values: Any) -> Iterator[Dict[str, Any]]:
+    """
+    进入一次运行的上下文
+
+    Args:
+        config: 本次运行的配置（会复制，不修改调用方的字典）
+        **values: 额外写入运行配置的值，例如 trade_date、task_id
+    """
+    run_config = dict(config or {})
+    run_config.update({k: v for k, v in values.items() if v is not None})
+    token = _run_config.set(run_config)
+    try:
+        yield run_config
+    finally:
+        _run_config.reset(token)
+
+
+def get_run_config() -> Optional[Dict[str, Any]]:
+    """获取当前运行的配置；不在 run_scope 中时返回 None"""
+    return _run_config.get()
+
+
+def in_run_scope() -> bool:
+    return _run_config.get() is not None
+
+
+def update_run_config(values: Dict[str, Any]) -> bool:
+    """
+    更新当前运行的配置
+
+    Returns:
+        True 表示已写入运行配置；False 表示当前不在 run_scope 中
+    """
+    run_config = _run_config.get()
+    if run_config is None:
+        return False
+    run_config.update(values)
+    return True
+
+
+def submit_with_context(executor, fn: Callable, *args: Any, **kwargs: Any):
+    """在线程池中执行 fn，并携带当前运行上下文"""
+    ctx = contextvars.copy_context()
+    return executor.submit(ctx.run, fn, *args, **kwargs)
+
+
+def run_in_executor_with_context(
+    loop: asyncio.AbstractEventLoop, executor, fn: Callable, *args: Any
+) -> "asyncio.Future":
+    """loop.run_in_executor 的上下文感知版本（默认实现不会复制 contextvars）"""
+    ctx = contextvars.copy_context()
+    return loop.run_in_executor(executor, ctx.run, fn, *args)
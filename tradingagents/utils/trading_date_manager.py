@@ -11,6 +11,8 @@ from typing import Optional
 import logging
 import threading
 
+from tradingagents.utils.exchange_calendar import get_exchange_calendar
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,7 +20,7 @@ class TradingDateManager:
     """交易日管理器 - 单例模式
 
     功能：
-    1. 确定最新的有效交易日（排除周末）
+    1. 确定最新的有效交易日（按交易所日历排除周末和节假日）
     2. 缓存交易日结果（避免重复计算）
     3. 线程安全
     """
@@ -38,62 +40,71 @@ class TradingDateManager:
     def __init__(self):
         if self._initialized:
             return
-        self._cached_date = None
-        self._cached_until = None
+        self._cache = {}  # (市场, 请求日期) -> (交易日, 过期时间)
         self._cache_ttl_minutes = 60  # 缓存1小时
         self._initialized = True
 
-    def get_latest_trading_date(self, requested_date: Optional[str] = None) -> str:
+    def get_latest_trading_date(
+        self, requested_date: Optional[str] = None, market: str = "CN"
+    ) -> str:
         """
         获取最新的有效交易日
 
         Args:
             requested_date: 请求的日期 (YYYY-MM-DD)，如果为None则使用今天
+            market: 市场（CN/HK/US 或 A股/港股/美股），默认A股
 
         Returns:
             最新的有效交易日 (YYYY-MM-DD)
         """
         now = datetime.now()
+        cache_key = (market, requested_date)
 
         # 检查缓存
-        if self._cached_date and self._cached_until and now < self._cached_until:
-            logger.debug(f"📅 [交易日管理器] 使用缓存的交易日: {self._cached_date}")
-            return self._cached_date
+        cached = self._cache.get(cache_key)
+        if cached and now < cached[1]:
+            logger.debug(f"📅 [交易日管理器] 使用缓存的交易日: {cached[0]}")
+            return cached[0]
+
+        calendar = get_exchange_calendar(market)
 
-        # 确定目标日期
+        # 确定目标日期（未指定时取交易所当地的今天）
         if requested_date:
-            target_date = datetime.strptime(requested_date, "%Y-%m-%d")
+            target_date = datetime.strptime(requested_date, "%Y-%m-%d").date()
         else:
-            target_date = now
-
-        # 回溯查找最近的有效交易日（排除周末）
-        # 注意：这里只处理周末，不处理节假日（需要外部日历数据）
-        while target_date.weekday() >= 5:  # 5=周六, 6=周日
-            target_date = target_date - timedelta(days=1)
+            target_date = calendar.now().date()
 
-        latest_trading_date = target_date.strftime("%Y-%m-%d")
+        # 回溯到最近的交易日（排除周末和节假日，日历范围外只排除周末）
+        if not calendar.covers(target_date):
+            logger.debug(f"📅 [交易日管理器] {target_date} 超出 {calendar.market} 日历范围，仅排除周末")
+        latest_trading_date = calendar.previous_session(
+            target_date, inclusive=True
+        ).strftime("%Y-%m-%d")
 
         # 更新缓存
-        self._cached_date = latest_trading_date
-        self._cached_until = now + timedelta(minutes=self._cache_ttl_minutes)
+        self._cache[cache_key] = (
+            latest_trading_date,
+            now + timedelta(minutes=self._cache_ttl_minutes),
+        )
 
         logger.info(f"📅 [交易日管理器] 确定最新交易日: {latest_trading_date}")
         return latest_trading_date
 
     def get_trading_date_range(
-        self, target_date=None, lookback_days: int = 10
+        self, target_date=None, lookback_days: int = 10, market: str = "CN"
     ) -> tuple:
         """
         获取用于查询交易数据的日期范围
 
         策略：获取最近N天的数据，以确保能获取到最后一个交易日的数据
-        自动调整周末日期到最近的交易日，处理周末、节假日和数据延迟的情况
+        自动调整非交易日（周末、节假日）到最近的交易日，并覆盖数据延迟的情况
 
         使用统一的交易日管理器，确保所有分析师使用相同的日期基准
 
         Args:
             target_date: 目标日期（datetime对象或字符串YYYY-MM-DD），默认为今天
             lookback_days: 向前查找的天数，默认10天（可以覆盖周末+小长假）
+            market: 市场（CN/HK/US 或 A股/港股/美股），默认A股
 
         Returns:
             tuple: (start_date, end_date) 两个字符串，格式YYYY-MM-DD
@@ -118,16 +129,15 @@ class TradingDateManager:
         if target_date.date() > today.date():
             target_date = today
 
-        # 🔧 调整：使用统一的交易日管理器处理周末
+        # 🔧 调整：使用统一的交易日管理器处理周末和节假日
         # 调用 get_latest_trading_date 获取有效交易日（带缓存）
-        if target_date.weekday() >= 5:  # 5=周六, 6=周日
-            # 使用交易日管理器调整到最近的工作日
+        if not get_exchange_calendar(market).is_session(target_date):
             adjusted_date_str = self.get_latest_trading_date(
-                target_date.strftime("%Y-%m-%d")
+                target_date.strftime("%Y-%m-%d"), market=market
             )
             target_date = dt.strptime(adjusted_date_str, "%Y-%m-%d")
             logger.info(
-                f"📅 [交易日管理器] target_date={adjusted_date_str} (原始是周末，已调整为最近交易日)"
+                f"📅 [交易日管理器] target_date={adjusted_date_str} (原始是非交易日，已调整为最近交易日)"
             )
 
         # 计算开始日期（向前推N天）
@@ -137,8 +147,7 @@ class TradingDateManager:
 
     def clear_cache(self):
         """清除缓存"""
-        self._cached_date = None
-        self._cached_until = None
+        self._cache.clear()
         logger.debug("🗑️ [交易日管理器] 缓存已清除")
 
 
@@ -9,6 +9,8 @@ from datetime import datetime, time
 from typing import Tuple, Optional
 import pytz
 
+from tradingagents.utils.exchange_calendar import get_exchange_calendar
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 
@@ -54,20 +56,10 @@ class TradingHoursChecker:
             bool: 是否在交易时段
         """
         try:
-            now = cls._get_market_time(market_type)
-            sessions = cls._get_sessions(market_type)
-
-            # 检查是否是交易日（周一到周五）
-            if now.weekday() >= 5:  # 周六=5, 周日=6
-                return False
-
-            # 检查是否在交易时段内
-            current_time = now.time()
-            for start, end in sessions:
-                if start <= current_time <= end:
-                    return True
-
-            return False
+            # 按交易所日历判断（排除周末、节假日，考虑提前收盘）
+            return cls._get_calendar(market_type).is_open(
+                cls._get_market_time(market_type)
+            )
         except Exception as e:
             logger.warning(f"检查交易时段失败: {e}")
             return False
@@ -86,12 +78,18 @@ class TradingHoursChecker:
         """
         try:
             now = cls._get_market_time(market_type)
-            sessions = cls._get_sessions(market_type)
+            calendar = cls._get_calendar(market_type)
 
-            # 周末
+            # 周末 / 节假日
             if now.weekday() >= 5:
                 return ("closed", "周末休市")
+            if not calendar.is_session(now):
+                return ("closed", "节假日休市")
 
+            # 当日交易时段（提前收盘日只保留收盘前的时段）
+            sessions = [
+                (start.time(), end.time()) for start, end in calendar.session_times(now)
+            ]
             current_time = now.time()
 
             # 检查是否在交易时段
@@ -124,7 +122,7 @@ class TradingHoursChecker:
     @classmethod
     def is_trading_day(cls, market_type: str = "A股", check_date: datetime = None) -> bool:
         """
-        判断指定日期是否是交易日（仅检查周末，不检查节假日）
+        判断指定日期是否是交易日（按交易所日历排除周末和节假日）
 
         Args:
             market_type: 市场类型
@@ -136,8 +134,7 @@ class TradingHoursChecker:
         if check_date is None:
             check_date = cls._get_market_time(market_type)
 
-        # 周末不是交易日
-        return check_date.weekday() < 5
+        return cls._get_calendar(market_type).is_session(check_date)
 
     @classmethod
     def get_next_trading_session(cls, market_type: str = "A股") -> Optional[Tuple[str, str]]:
@@ -176,6 +173,11 @@ class TradingHoursChecker:
         tz = pytz.timezone(tz_name)
         return datetime.now(tz)
 
+    @classmethod
+    def _get_calendar(cls, market_type: str):
+        """获取市场的交易所日历（未知市场按A股处理）"""
+        return get_exchange_calendar(market_type if market_type in cls.TIMEZONE_MAP else "A股")
+
     @classmethod
     def _get_sessions(cls, market_type: str) -> list:
         """获取市场交易时段"""